@@ -29,9 +29,48 @@ def debug_task(self):
 
 # Configure Celery Beat Schedule
 app.conf.beat_schedule = {
-    'send-meeting-reminders-every-5-minutes': {
-        'task': 'meetings.tasks.send_meeting_reminders_task',
-        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    # Sync Meeting -> Google Sheets normalnya di-trigger on_commit; beat ini untuk retry/backoff
+    'sync-meetings-to-google-sheets-every-5-minutes': {
+        'task': 'meetings.tasks.sync_meetings_to_google_sheets_task',
+        'schedule': crontab(minute='*/5'),
+        'options': {'queue': 'default'}
+    },
+    # Reminder dikirim oleh task ETA per meeting; sweep ini hanya safety net
+    # (reminder terlewat + menjadwalkan reminder yang masuk horizon ETA)
+    'reconcile-meeting-reminders-every-15-minutes': {
+        'task': 'meetings.tasks.reconcile_meeting_reminders_task',
+        'schedule': crontab(minute='*/15'),
+        'options': {'queue': 'default'}
+    },
+    'sync-leave-calendars-every-10-minutes': {
+        'task': 'core.tasks.sync_leave_calendars',
+        'schedule': crontab(minute='*/10'),  # Incremental (nextSyncToken per departemen)
+        'options': {'queue': 'default'}
+    },
+    'run-status-sweeper-every-15-minutes': {
+        'task': 'core.tasks.run_status_sweeper',
+        'schedule': crontab(minute='*/15'),  # Overdue / selesai / telat (bulk UPDATE)
+        'options': {'queue': 'default'}
+    },
+    'take-stock-snapshots-daily': {
+        'task': 'inventory.tasks.take_stock_snapshots',
+        'schedule': crontab(hour=0, minute=15),  # Saldo akhir hari dari ledger StockMovement
+        'options': {'queue': 'default'}
+    },
+    'refresh-stock-alerts-every-30-minutes': {
+        'task': 'inventory.tasks.refresh_stock_alerts',
+        'schedule': crontab(minute='*/30'),  # Cache daftar stok rendah untuk list inventory
+        'options': {'queue': 'default'}
+    },
+    'send-stock-alert-digest-daily': {
+        'task': 'inventory.tasks.refresh_stock_alerts',
+        'schedule': crontab(hour=7, minute=0),  # Satu digest WA per storekeeper
+        'kwargs': {'notify': True},
+        'options': {'queue': 'default'}
+    },
+    'process-whatsapp-outbox-every-minute': {
+        'task': 'core.tasks.process_whatsapp_outbox',
+        'schedule': crontab(minute='*'),  # Retry terjadwal & trigger on_commit yang gagal
         'options': {'queue': 'default'}
     },
 }
@@ -25,7 +25,11 @@ from .models import (
     Karyawan,
     LeaveEvent,
     MaintenanceMode,
-    FonnteSettings
+    FonnteSettings,
+    WhatsAppOutbox,
+    LeaveCalendarSync,
+    DocumentSequence,
+    StatusTransitionLog
 )
 
 # ============================================================
@@ -483,6 +487,88 @@ class FonnteSettingsAdmin(admin.ModelAdmin):
         return request.user.is_staff and request.user.is_superuser
 
 
+# ============================================================
+# ADMIN UNTUK WHATSAPP OUTBOX (monitoring antrian pengiriman WA)
+# ============================================================
+@admin.register(WhatsAppOutbox)
+class WhatsAppOutboxAdmin(admin.ModelAdmin):
+    """Read-only monitoring outbox; retry manual lewat action"""
+    list_display = ('id', 'target', 'provider', 'departemen', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'provider', 'departemen')
+    search_fields = ('target', 'idempotency_key', 'ref_model', 'ref_id')
+    list_select_related = ('departemen',)
+    ordering = ('-created_at',)
+    actions = ['retry_now']
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Kirim ulang sekarang (reset percobaan)')
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        from .whatsapp_outbox import _schedule_processing
+
+        updated = queryset.exclude(status=WhatsAppOutbox.STATUS_SENT).update(
+            status=WhatsAppOutbox.STATUS_PENDING, attempts=0,
+            next_attempt_at=timezone.now(), updated_at=timezone.now(),
+        )
+        _schedule_processing()
+        self.message_user(request, f'{updated} pesan dijadwalkan ulang.')
+
+
+# ============================================================
+# ADMIN UNTUK SYNC GOOGLE CALENDAR CUTI (state incremental per departemen)
+# ============================================================
+@admin.register(LeaveCalendarSync)
+class LeaveCalendarSyncAdmin(admin.ModelAdmin):
+    list_display = ('departemen', 'calendar_id', 'last_synced_at', 'last_full_sync_at', 'sync_requested_at',
+                    'last_error')
+    readonly_fields = ('departemen', 'calendar_id', 'sync_token', 'last_synced_at', 'last_full_sync_at',
+                       'sync_requested_at', 'last_error', 'updated_at')
+    actions = ['reset_sync_token']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reset sync token (full sync di run berikutnya)')
+    def reset_sync_token(self, request, queryset):
+        updated = queryset.update(sync_token='')
+        self.message_user(request, f'{updated} departemen akan full sync di run berikutnya.')
+
+
+# ============================================================
+# ADMIN UNTUK DOCUMENT SEQUENCE (counter nomor dokumen)
+# ============================================================
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    """Counter hanya boleh dinaikkan (mundur = nomor dobel)"""
+    list_display = ('key', 'last_value', 'updated_at')
+    search_fields = ('key',)
+    readonly_fields = ('key', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StatusTransitionLog)
+class StatusTransitionLogAdmin(admin.ModelAdmin):
+    """Audit status sweeper (read-only)"""
+    list_display = ('created_at', 'model_label', 'object_id', 'from_status', 'to_status', 'reason')
+    list_filter = ('model_label', 'to_status')
+    search_fields = ('object_id',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ============================================================
 # ADMIN UNTUK ASET DEPARTEMEN (Tree untuk non-Teknik)
 # ============================================================
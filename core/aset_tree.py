@@ -0,0 +1,70 @@
+"""
+Serialized asset tree (AsetMesin & AsetDepartemen) untuk cascading dropdown client-side.
+
+Tree aset hanya berubah beberapa kali sebulan, tapi sebelumnya setiap render dashboard
+meng-query line_list/mesin_list/... dan setiap perubahan dropdown memanggil
+load_children / api_aset_children (satu round trip per level).
+
+Sekarang seluruh tree dikirim sekali sebagai payload ringkas:
+    {"kind": "mesin", "version": "...", "fields": [...], "nodes": [[id, parent_id, nama, level], ...]}
+Node diurutkan (tree_id, lft) sehingga children sudah urut nama (order_insertion_by).
+
+Versi tree disimpan di cache dan di-bump oleh signal save/delete aset, dipakai untuk:
+- ETag endpoint (304 tanpa query DB)
+- URL versioned `?v=<version>` yang boleh di-cache browser lama (immutable)
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+
+ASET_TREE_KINDS = ('mesin', 'departemen')
+ASET_TREE_VERSION_KEY = 'aset_tree_version_{kind}'
+ASET_TREE_PAYLOAD_KEY = 'aset_tree_payload_{kind}_{version}'
+ASET_TREE_CACHE_TIMEOUT = 60 * 60 * 24  # 24 jam (invalidasi lewat version)
+
+
+def get_aset_tree_version(kind):
+    """Return token versi tree saat ini (dibuat jika belum ada)"""
+    return cache.get_or_set(ASET_TREE_VERSION_KEY.format(kind=kind), lambda: uuid.uuid4().hex[:12], None)
+
+
+def bump_aset_tree_version(kind):
+    """Tandai tree berubah - payload & ETag lama otomatis tidak dipakai lagi"""
+    cache.set(ASET_TREE_VERSION_KEY.format(kind=kind), uuid.uuid4().hex[:12], None)
+
+
+def _build_payload(kind, version):
+    from .models import AsetMesin, AsetDepartemen
+
+    if kind == 'mesin':
+        fields = ['id', 'parent_id', 'nama', 'level']
+        queryset = AsetMesin.objects.order_by('tree_id', 'lft')
+    else:
+        fields = ['id', 'parent_id', 'nama', 'level', 'departemen_id']
+        queryset = AsetDepartemen.objects.order_by('tree_id', 'lft')
+
+    return {
+        'kind': kind,
+        'version': version,
+        'fields': fields,
+        'nodes': [list(row) for row in queryset.values_list(*fields)],
+    }
+
+
+def get_aset_tree_payload(kind):
+    """
+    Return (version, payload dict) untuk tree `kind` ('mesin' / 'departemen').
+    Payload di-cache per versi, jadi query DB hanya terjadi sekali per perubahan tree.
+    """
+    if kind not in ASET_TREE_KINDS:
+        raise ValueError(f"Unknown aset tree kind: {kind}")
+
+    version = get_aset_tree_version(kind)
+    cache_key = ASET_TREE_PAYLOAD_KEY.format(kind=kind, version=version)
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = _build_payload(kind, version)
+        cache.set(cache_key, payload, ASET_TREE_CACHE_TIMEOUT)
+    return version, payload
@@ -4,8 +4,11 @@ Cache utilities untuk optimization access control dan hierarchical data.
 Functions:
 - get_user_accessible_projects: Get accessible projects with caching
 - invalidate_user_accessible_projects_cache: Manually invalidate cache
+- get_team_data_version / bump_team_data_version: Version stamp data job per tim
 """
 
+import uuid
+
 from django.core.cache import cache
 from django.db.models import Q
 
@@ -114,3 +117,56 @@ def clear_all_access_control_cache():
     for user in CustomUser.objects.all():
         cache_key = f"accessible_projects_{user.id}"
         cache.delete(cache_key)
+
+
+# ==============================================================================
+# TEAM DATA VERSION STAMPS (INVALIDASI CACHE DASHBOARD PER TIM)
+# ==============================================================================
+TEAM_VERSION_KEY = 'team_data_version_{user_id}'
+
+
+def get_team_data_version(user_id):
+    """
+    Return version stamp data job untuk tim user (user + semua bawahan).
+    Dipakai sebagai bagian dari cache key dashboard/export.
+    """
+    key = TEAM_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        cache.set(key, version, None)
+    return version
+
+
+def get_supervisor_chain_ids(user_ids):
+    """
+    Return set berisi user_ids + semua atasan di atasnya (sampai puncak hierarki).
+    Satu query per level hierarki, aman dari circular reference.
+    """
+    from .models import CustomUser
+
+    result = set(uid for uid in user_ids if uid)
+    current = set(result)
+    while current:
+        atasan_ids = set(
+            CustomUser.objects.filter(id__in=current, atasan__isnull=False)
+            .values_list('atasan_id', flat=True)
+        )
+        current = atasan_ids - result
+        result |= current
+    return result
+
+
+def bump_team_data_version(*user_ids):
+    """
+    Bump version stamp untuk user yang terkait data yang berubah (PIC, assigned_to)
+    beserta semua atasannya, karena atasan ikut melihat job bawahan di dashboard.
+    """
+    chain_ids = get_supervisor_chain_ids(user_ids)
+    if not chain_ids:
+        return
+    version = uuid.uuid4().hex[:12]
+    cache.set_many(
+        {TEAM_VERSION_KEY.format(user_id=uid): version for uid in chain_ids},
+        None
+    )
@@ -3,7 +3,6 @@ Context Processors untuk global template variables
 Saat ini digunakan untuk: Navbar bell (overdue jobs)
 """
 
-from django.utils import timezone
 from django.db.models import Q
 from django.core.cache import cache
 from core.models import Job, JobDate, UserOverdueJobPreference
@@ -106,11 +105,10 @@ def overdue_jobs_context(request):
     
     # 3. GET OVERDUE PREVENTIVE JOB EXECUTIONS (if preference allows)
     if preference.show_preventive_jobs:
-        today = timezone.now().date()
         overdue_preventive = PreventiveJobExecution.objects.filter(
             Q(template__pic_id__in=all_user_ids) | Q(assigned_to_id__in=all_user_ids),
             status='Scheduled',
-            scheduled_date__lt=today
+            is_late=True  # Ditandai core.status_sweeper
         ).select_related('template__pic', 'assigned_to', 'aset')
         
         for execution in overdue_preventive:
@@ -0,0 +1,238 @@
+"""
+Framework import Excel berukuran besar (streaming + chunked bulk insert).
+
+Dipakai oleh importer per modul (inventory.import_handler.BarangImporter, dst). Subclass cukup
+mendefinisikan kolom, `clean_row` (validasi satu baris) dan `persist_chunk` (bulk insert).
+
+Alur:
+1. Workbook dibuka dengan load_workbook(read_only=True) dan dibaca dengan
+   iter_rows(values_only=True) - memori konstan walau file berisi puluhan ribu baris.
+2. Baris divalidasi per chunk (default 500). Baris invalid masuk failed_rows
+   (nomor baris, kolom, nilai, pesan error) dan tidak menghentikan import.
+3. Setiap chunk valid disimpan dalam SATU transaksi oleh persist_chunk (bulk_create).
+   Jika chunk gagal di database (misal bentrok unique), chunk diulang baris per baris
+   di savepoint masing-masing supaya error tetap terlapor per baris.
+
+Hasil (get_result) kompatibel dengan importer lama:
+    {'success', 'failed', 'errors', 'failed_rows', 'total_rows'}
+
+Laporan baris gagal (Excel) disimpan sementara di cache dengan cache_error_report()
+dan diambil view download dengan get_cached_error_report().
+"""
+
+import logging
+import uuid
+from io import BytesIO
+
+import openpyxl
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+REPORT_TIMEOUT = 60 * 60
+
+
+def _report_cache_key(namespace, user_id, token):
+    return f'{namespace}_import_report:{user_id}:{token}'
+
+
+def get_cached_error_report(namespace, user_id, token):
+    """Bytes laporan baris gagal (None jika sudah kedaluwarsa / bukan milik user)"""
+    return cache.get(_report_cache_key(namespace, user_id, token))
+
+
+class RowError(Exception):
+    """Error validasi satu baris (opsional dengan nama kolom & nilai yang salah)"""
+
+    def __init__(self, message, column=None, value=None):
+        super().__init__(message)
+        self.message = message
+        self.column = column
+        self.value = value
+
+
+class ChunkedExcelImporter:
+    """Base class importer Excel streaming"""
+
+    REQUIRED_COLUMNS = []
+    OPTIONAL_COLUMNS = []
+    # Jika diisi, kolom dibaca berdasarkan posisi (A, B, C, ...) dan teks header diabaikan
+    POSITIONAL_COLUMNS = []
+    CHUNK_SIZE = 500
+    MAX_REPORTED_ROWS = 5000  # Batas failed_rows yang disimpan (jumlah gagal tetap dihitung penuh)
+
+    def __init__(self, file_path, chunk_size=None, user=None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.user = user
+        self.errors = []
+        self.success_count = 0
+        self.failed_count = 0
+        self.total_rows = 0
+        self.failed_rows = []
+        self.columns = {}
+
+    # ------------------------------------------------------------------
+    # Hook untuk subclass
+    # ------------------------------------------------------------------
+    def prepare(self):
+        """Dipanggil sekali sebelum baris pertama (muat lookup ke memori, dst)"""
+
+    def clean_row(self, row_num, values):
+        """
+        Validasi & normalisasi satu baris.
+
+        Args:
+            values: dict {nama kolom: nilai mentah}
+        Returns:
+            Data bersih (bebas bentuk) yang diteruskan ke persist_chunk
+        Raises:
+            RowError
+        """
+        raise NotImplementedError
+
+    def prepare_chunk(self, rows):
+        """
+        Dipanggil per chunk SEBELUM transaksi dibuka - tempat lookup batch
+        (misal satu query `__in` untuk cek duplikat). Baris yang ditolak dicatat
+        dengan add_failed_row dan tidak dikembalikan.
+        Returns: list (row_num, cleaned) yang diteruskan ke persist_chunk
+        """
+        return rows
+    
+    def persist_chunk(self, rows):
+        """
+        Simpan list (row_num, cleaned) dalam transaksi yang sudah dibuka pemanggil.
+        Returns: jumlah baris tersimpan
+        """
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Error report
+    # ------------------------------------------------------------------
+    def add_failed_row(self, row_num, error, column=None, value=None):
+        self.failed_count += 1
+        if len(self.failed_rows) < self.MAX_REPORTED_ROWS:
+            self.failed_rows.append({
+                'row': row_num,
+                'column': column or '',
+                'value': '' if value is None else str(value)[:100],
+                'error': error,
+            })
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+    def _read_header(self, rows):
+        header = next(rows, None)
+        if not header:
+            self.errors.append("File Excel kosong")
+            return False
+
+        if self.POSITIONAL_COLUMNS:
+            self.columns = {name: idx for idx, name in enumerate(self.POSITIONAL_COLUMNS)}
+            return True
+
+        self.columns = {}
+        for idx, cell in enumerate(header):
+            if cell is not None and str(cell).strip():
+                self.columns.setdefault(str(cell).strip(), idx)
+
+        # Check required columns
+        for required_col in self.REQUIRED_COLUMNS:
+            if required_col not in self.columns:
+                self.errors.append(
+                    f"Kolom '{required_col}' tidak ditemukan. Kolom wajib: {', '.join(self.REQUIRED_COLUMNS)}"
+                )
+                return False
+        return True
+
+    def _row_values(self, row):
+        return {
+            name: (row[idx] if idx < len(row) else None)
+            for name, idx in self.columns.items()
+        }
+
+    def _flush(self, chunk):
+        chunk = self.prepare_chunk(chunk) if chunk else chunk
+        if not chunk:
+            return
+        try:
+            with transaction.atomic():
+                self.success_count += self.persist_chunk(chunk)
+            return
+        except DatabaseError as e:
+            logger.warning(f"[Import] Chunk {chunk[0][0]}-{chunk[-1][0]} gagal ({e}), ulang per baris")
+
+        # Fallback: satu savepoint per baris supaya error terlapor per baris
+        for row_num, cleaned in chunk:
+            try:
+                with transaction.atomic():
+                    self.success_count += self.persist_chunk([(row_num, cleaned)])
+            except DatabaseError as e:
+                self.add_failed_row(row_num, f"Gagal disimpan: {e}")
+
+    def import_data(self):
+        """Import data dari Excel (streaming)"""
+        try:
+            workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        except Exception as e:
+            self.errors.append(f"Error membaca file Excel: {str(e)}")
+            return False
+
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            if not self._read_header(rows):
+                return False
+
+            self.prepare()
+            chunk = []
+            for row_num, row in enumerate(rows, start=2):
+                if not row or all(value is None or str(value).strip() == '' for value in row):
+                    continue  # Baris kosong (sering ada di akhir sheet)
+                self.total_rows += 1
+                try:
+                    chunk.append((row_num, self.clean_row(row_num, self._row_values(row))))
+                except RowError as e:
+                    self.add_failed_row(row_num, e.message, e.column, e.value)
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self._flush(chunk)
+                    chunk = []
+            self._flush(chunk)
+        finally:
+            workbook.close()
+        return True
+
+    def get_result(self):
+        """Get import result"""
+        return {
+            'success': self.success_count,
+            'failed': self.failed_count,
+            'errors': self.errors,
+            'failed_rows': self.failed_rows,
+            'total_rows': self.total_rows,
+        }
+
+    def error_report_workbook(self):
+        """File Excel (bytes) berisi baris yang gagal: Baris, Kolom, Nilai, Error"""
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet('Baris Gagal')
+        sheet.append(['Baris', 'Kolom', 'Nilai', 'Error'])
+        for failed in self.failed_rows:
+            sheet.append([failed['row'], failed['column'], failed['value'], failed['error']])
+        output = BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+
+    def cache_error_report(self, namespace, user_id, timeout=REPORT_TIMEOUT):
+        """
+        Simpan laporan baris gagal di cache untuk diunduh (lihat get_cached_error_report).
+        Returns: token, atau None jika tidak ada baris gagal
+        """
+        if not self.failed_rows:
+            return None
+        token = uuid.uuid4().hex
+        cache.set(_report_cache_key(namespace, user_id, token), self.error_report_workbook(), timeout)
+        return token
@@ -1,234 +1,238 @@
 # ==============================================================================
 # EXPORT HANDLER - SEND DATA TO GOOGLE APPS SCRIPT
 # ==============================================================================
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+
 import requests
+from .services.http_client import http_post
 import json
+from django.conf import settings
+from django.db import transaction
 from django.http import JsonResponse
+from django.utils import timezone
 from .models import Job, CustomUser
 from django.db.models import Q
 
+logger = logging.getLogger(__name__)
+
 # Google Apps Script URLs (JANGAN DIUBAH)
 GAS_PREVENTIF_URL = "https://script.google.com/macros/s/AKfycbyqbeARRivauzTinWAnKwOUglV7r1ANsLXJRTRtMpd3TSDlaIXpiRzwuul2j6reecw7/exec"
 GAS_EVALUASI_URL = "https://script.google.com/macros/s/AKfycbxg2zPRso6f1bZQTuOxg2D2ey64a1iY6wWTKv-QmeZQBQIKDHjH8k2UT6wvSlgpZrOf2g/exec"
 
 
-def prepare_job_data_for_export(job_ids, export_type="preventif"):
+# ==============================================================================
+# PAYLOAD BUILDER (query teragregasi, tanpa query per job)
+# ==============================================================================
+def _choice_labels(model, field_name):
+    return dict(model._meta.get_field(field_name).flatchoices)
+
+
+def _personil_names(through_model, owner_field, owner_ids):
+    """owner_id -> "Nama1, Nama2" dari tabel M2M through (satu query untuk semua job)"""
+    names = {}
+    rows = through_model.objects.filter(**{f'{owner_field}__in': owner_ids}).order_by('pk').values_list(
+        owner_field, 'personil__nama_lengkap'
+    )
+    for owner_id, nama in rows:
+        names.setdefault(owner_id, []).append(nama)
+    return {owner_id: ", ".join(nama_list) for owner_id, nama_list in names.items()}
+
+
+def _make_row(export_type, personil_names, mesin_name, sub_mesin_name, job_name):
+    if export_type == "evaluasi":
+        # Evaluasi: [Personil, Mesin, SubMesin, DetailPekerjaan, Kesimpulan/Status]
+        # Kolom kesimpulan/status kosong (user isi di sheet)
+        return [personil_names, mesin_name, sub_mesin_name, job_name, ""]
+    # Preventif: [Personil, Mesin, SubMesin, DetailPekerjaan]
+    return [personil_names, mesin_name, sub_mesin_name, job_name]
+
+
+def collect_daily_job_rows(job_ids, export_type="preventif"):
     """
-    Prepare job data untuk export ke Google Apps Script
-    Format disesuaikan dengan template Google Apps Script
-    
-    export_type: "preventif" atau "evaluasi"
-    Returns: dict dengan structured data sesuai Google Apps Script template
+    Row export untuk Job (Daily/Project).
+
+    Satu query teranotasi (aset, parent, tanggal pertama seperti first()) + satu query nama personil.
+
+    Returns:
+        dict job_id -> {'row', 'mesin', 'sub_mesin', 'prioritas', 'tanggal', 'tipe_job'}
     """
-    # Fetch jobs tapi MAINTAIN urutan dari job_ids array (penting untuk sort)
-    jobs_dict = {}
-    jobs = Job.objects.filter(id__in=job_ids).select_related(
-        'aset', 'aset__parent', 'aset__parent__parent'
-    ).prefetch_related('personil_ditugaskan', 'tanggal_pelaksanaan')
-    
-    # Convert ke dict for ordering
+    from django.db.models import OuterRef, Subquery
+    from .models import JobDate
+
+    prioritas_labels = _choice_labels(Job, 'prioritas')
+    # Sama persis dengan perilaku lama tanggal_pelaksanaan.first(): urutan Meta JobDate
+    # (['tanggal']) lalu pk - first() memakai ordering model, bukan sekadar pk
+    tanggal_pertama = (
+        JobDate.objects.filter(job=OuterRef('pk'))
+        .order_by(*JobDate._meta.ordering, 'pk').values('tanggal')[:1]
+    )
+    jobs = Job.objects.filter(id__in=job_ids).values(
+        'id', 'nama_pekerjaan', 'prioritas', 'tipe_job',
+        'aset__nama', 'aset__level', 'aset__parent__nama',
+    ).annotate(tanggal_pertama=Subquery(tanggal_pertama)).order_by()
+    jobs = list(jobs)
+    personil_map = _personil_names(Job.personil_ditugaskan.through, 'job_id', [job['id'] for job in jobs])
+
+    collected = {}
     for job in jobs:
-        jobs_dict[job.id] = job
-    
-    # Rebuild jobs list dalam urutan job_ids (PENTING: respect sort order dari frontend)
-    jobs_ordered = []
-    for job_id in job_ids:
-        if job_id in jobs_dict:
-            jobs_ordered.append(jobs_dict[job_id])
-    
-    if not jobs_ordered:
-        return None
-    
-    # Ambil first job untuk tanggal (semua job seharusnya same day)
-    first_job = jobs_ordered[0]
-    tanggal = first_job.tanggal_pelaksanaan.first().tanggal if first_job.tanggal_pelaksanaan.exists() else None
-    
-    # Kumpulkan unique values
-    mesin_set = set()
-    sub_mesin_set = set()
-    prioritas_set = set()
-    job_data_list = []
-    
-    # Process jobs dalam urutan yang sudah di-sort (dari frontend)
-    for job in jobs_ordered:
-        # Collect unique mesin/sub mesin
-        if job.aset:
-            if job.aset.level == 2:  # Sub Mesin
-                sub_mesin_set.add(job.aset.nama)
-                if job.aset.parent:  # Mesin
-                    mesin_set.add(job.aset.parent.nama)
-            elif job.aset.level == 1:  # Mesin
-                mesin_set.add(job.aset.nama)
-        
-        # Collect prioritas
-        if job.prioritas:
-            prioritas_set.add(job.get_prioritas_display())
-        
-        # Prepare job data row
-        # Format berbeda untuk preventif vs evaluasi
-        personil_names = ", ".join([p.nama_lengkap for p in job.personil_ditugaskan.all()])
-        mesin_name = job.aset.parent.nama if job.aset and job.aset.level == 2 and job.aset.parent else (job.aset.nama if job.aset else "")
-        sub_mesin_name = job.aset.nama if job.aset and job.aset.level == 2 else ""
-        job_name = job.nama_pekerjaan
-        
-        if export_type == "preventif":
-            # Preventif: [Personil, Mesin, SubMesin, DetailPekerjaan]
-            job_data_list.append([
-                personil_names,
-                mesin_name,
-                sub_mesin_name,
-                job_name
-            ])
-        elif export_type == "evaluasi":
-            # Evaluasi: [Personil, Mesin, SubMesin, DetailPekerjaan, Kesimpulan/Status]
-            job_data_list.append([
-                personil_names,
-                mesin_name,
-                sub_mesin_name,
-                job_name,
-                ""  # Kolom kesimpulan/status kosong (user isi di sheet)
-            ])
-    
-    # Format payload sesuai Google Apps Script template
-    payload = {
+        aset_nama, level, parent_nama = job['aset__nama'], job['aset__level'], job['aset__parent__nama']
+        mesin, sub_mesin = None, None
+        if aset_nama:
+            if level == 2:  # Sub Mesin
+                sub_mesin, mesin = aset_nama, parent_nama
+            elif level == 1:  # Mesin
+                mesin = aset_nama
+
+        mesin_name = parent_nama if aset_nama and level == 2 and parent_nama else (aset_nama or "")
+        sub_mesin_name = aset_nama if aset_nama and level == 2 else ""
+        collected[job['id']] = {
+            'row': _make_row(export_type, personil_map.get(job['id'], ""), mesin_name, sub_mesin_name, job['nama_pekerjaan']),
+            'mesin': mesin,
+            'sub_mesin': sub_mesin,
+            'prioritas': prioritas_labels.get(job['prioritas'], job['prioritas']) if job['prioritas'] else None,
+            'tanggal': job['tanggal_pertama'],
+            'tipe_job': job['tipe_job'],
+        }
+    return collected
+
+
+def collect_preventive_rows(execution_ids, export_type="preventif"):
+    """Row export untuk PreventiveJobExecution (format sama dengan collect_daily_job_rows)"""
+    from preventive_jobs.models import PreventiveJobExecution, PreventiveJobTemplate
+
+    prioritas_labels = _choice_labels(PreventiveJobTemplate, 'prioritas')
+    executions = list(
+        PreventiveJobExecution.objects.filter(id__in=execution_ids).values(
+            'id', 'template__nama_pekerjaan', 'template__prioritas',
+            'aset__nama', 'aset__level', 'aset__parent__nama',
+        ).order_by()
+    )
+    personil_map = _personil_names(
+        PreventiveJobExecution.assigned_to_personil.through, 'preventivejobexecution_id',
+        [execution['id'] for execution in executions]
+    )
+
+    collected = {}
+    for execution in executions:
+        aset_nama, level, parent_nama = execution['aset__nama'], execution['aset__level'], execution['aset__parent__nama']
+        mesin, sub_mesin = None, None
+        if aset_nama:
+            if level == 2:
+                sub_mesin, mesin = aset_nama, parent_nama
+            elif level == 1:
+                mesin = aset_nama
+
+        prioritas = execution['template__prioritas']
+        collected[execution['id']] = {
+            'row': _make_row(
+                export_type, personil_map.get(execution['id'], ""),
+                parent_nama or "", aset_nama or "", execution['template__nama_pekerjaan']
+            ),
+            'mesin': mesin,
+            'sub_mesin': sub_mesin,
+            'prioritas': prioritas_labels.get(prioritas, prioritas) if prioritas else None,
+        }
+    return collected
+
+
+def build_payload(items, export_type, tanggal):
+    """
+    Payload sesuai Google Apps Script template dari list item (urutan = urutan row).
+    """
+    mesin_set = {item['mesin'] for item in items if item['mesin']}
+    sub_mesin_set = {item['sub_mesin'] for item in items if item['sub_mesin']}
+    prioritas_set = {item['prioritas'] for item in items if item['prioritas']}
+    return {
         "exportType": export_type,  # PENTING: Ada field ini untuk routing di Google Apps Script
         "tanggal": str(tanggal) if tanggal else "",
         "allMesin": ", ".join(sorted(mesin_set)) if mesin_set else "",
         "allSubMesin": ", ".join(sorted(sub_mesin_set)) if sub_mesin_set else "",
         "allPrioritas": ", ".join(sorted(prioritas_set)) if prioritas_set else "",
-        "jobData": job_data_list
+        "jobData": [item['row'] for item in items]
     }
-    
-    return payload
 
 
-def prepare_unified_job_data_for_export(job_ids_with_type, export_type="preventif"):
+def collect_daily_export_items(job_ids, export_type="preventif"):
     """
-    Prepare unified job data (Daily + Project + Preventive) untuk export ke Google Apps Script
-    Format disesuaikan dengan template Google Apps Script
-    
+    Item export Job dalam urutan job_ids (PENTING: respect sort order dari frontend).
+
+    Returns:
+        (items, tanggal) - tanggal diambil dari job pertama (semua job seharusnya same day)
+    """
+    collected = collect_daily_job_rows(job_ids, export_type)
+    items = [collected[job_id] for job_id in job_ids if job_id in collected]
+    tanggal = items[0]['tanggal'] if items else None
+    return items, tanggal
+
+
+def collect_unified_export_items(job_ids_with_type, export_type="preventif"):
+    """
+    Item export unified (Daily + Project + Preventive) dalam urutan dari frontend.
+
     job_ids_with_type: list of strings dalam format "id_type" (e.g., ["1_daily", "2_project", "3_preventive"])
-    export_type: "preventif" atau "evaluasi"
-    Returns: dict dengan structured data sesuai Google Apps Script template
     """
-    from preventive_jobs.models import PreventiveJobExecution
     from django.utils import timezone
-    
+
     # Parse job IDs dengan tipe mereka
     daily_job_ids = []
-    project_job_ids = []
     preventive_job_ids = []
     id_order_map = {}  # Track original order
-    
     for idx, job_id_str in enumerate(job_ids_with_type):
         try:
             job_id, job_type = job_id_str.rsplit('_', 1)
             job_id = int(job_id)
-            id_order_map[(job_id, job_type)] = idx
-            
-            if job_type == 'daily' or job_type == 'project':
-                daily_job_ids.append(job_id)
-            elif job_type == 'preventive':
-                preventive_job_ids.append(job_id)
         except (ValueError, AttributeError):
             continue
-    
-    # Kumpulkan unique values
-    mesin_set = set()
-    sub_mesin_set = set()
-    prioritas_set = set()
-    job_data_list = []
-    all_jobs_with_order = []  # Track jobs dengan order mereka
-    
-    # 1. Process Daily/Project jobs
+        id_order_map[(job_id, job_type)] = idx
+        if job_type == 'daily' or job_type == 'project':
+            daily_job_ids.append(job_id)
+        elif job_type == 'preventive':
+            preventive_job_ids.append(job_id)
+
+    ordered = []
     if daily_job_ids:
-        jobs = Job.objects.filter(id__in=daily_job_ids).select_related(
-            'aset', 'aset__parent', 'aset__parent__parent', 'pic', 'assigned_to'
-        ).prefetch_related('personil_ditugaskan', 'tanggal_pelaksanaan')
-        
-        for job in jobs:
-            job_type = 'project' if job.tipe_job == 'Project' else 'daily'
-            order_idx = id_order_map.get((job.id, job_type), 999)
-            
-            # Collect unique mesin/sub mesin
-            if job.aset:
-                if job.aset.level == 2:
-                    sub_mesin_set.add(job.aset.nama)
-                    if job.aset.parent:
-                        mesin_set.add(job.aset.parent.nama)
-                elif job.aset.level == 1:
-                    mesin_set.add(job.aset.nama)
-            
-            if job.prioritas:
-                prioritas_set.add(job.get_prioritas_display())
-            
-            # Prepare job data row
-            personil_names = ", ".join([p.nama_lengkap for p in job.personil_ditugaskan.all()])
-            mesin_name = job.aset.parent.nama if job.aset and job.aset.level == 2 and job.aset.parent else (job.aset.nama if job.aset else "")
-            sub_mesin_name = job.aset.nama if job.aset and job.aset.level == 2 else ""
-            
-            if export_type == "preventif":
-                row = [personil_names, mesin_name, sub_mesin_name, job.nama_pekerjaan]
-            elif export_type == "evaluasi":
-                row = [personil_names, mesin_name, sub_mesin_name, job.nama_pekerjaan, ""]
-            else:
-                row = [personil_names, mesin_name, sub_mesin_name, job.nama_pekerjaan]
-            
-            all_jobs_with_order.append((order_idx, row))
-    
-    # 2. Process Preventive jobs
+        for job_id, item in collect_daily_job_rows(daily_job_ids, export_type).items():
+            job_type = 'project' if item['tipe_job'] == 'Project' else 'daily'
+            ordered.append((id_order_map.get((job_id, job_type), 999), item))
     if preventive_job_ids:
-        executions = PreventiveJobExecution.objects.filter(id__in=preventive_job_ids).select_related(
-            'template', 'template__pic', 'aset', 'aset__parent', 'aset__parent__parent', 'assigned_to'
-        ).prefetch_related('assigned_to_personil')
-        
-        for execution in executions:
-            order_idx = id_order_map.get((execution.id, 'preventive'), 999)
-            
-            # Collect unique mesin/sub mesin
-            if execution.aset:
-                if execution.aset.level == 2:
-                    sub_mesin_set.add(execution.aset.nama)
-                    if execution.aset.parent:
-                        mesin_set.add(execution.aset.parent.nama)
-                elif execution.aset.level == 1:
-                    mesin_set.add(execution.aset.nama)
-            
-            if execution.template and execution.template.prioritas:
-                prioritas_set.add(execution.template.get_prioritas_display())
-            
-            # Prepare job data row
-            personil_names = ", ".join([p.nama_lengkap for p in execution.assigned_to_personil.all()])
-            mesin_name = execution.aset.parent.nama if execution.aset and execution.aset.parent else ""
-            sub_mesin_name = execution.aset.nama if execution.aset else ""
-            
-            if export_type == "preventif":
-                row = [personil_names, mesin_name, sub_mesin_name, execution.template.nama_pekerjaan]
-            elif export_type == "evaluasi":
-                row = [personil_names, mesin_name, sub_mesin_name, execution.template.nama_pekerjaan, ""]
-            else:
-                row = [personil_names, mesin_name, sub_mesin_name, execution.template.nama_pekerjaan]
-            
-            all_jobs_with_order.append((order_idx, row))
-    
-    if not all_jobs_with_order:
-        return None
-    
+        for execution_id, item in collect_preventive_rows(preventive_job_ids, export_type).items():
+            ordered.append((id_order_map.get((execution_id, 'preventive'), 999), item))
+
     # Sort berdasarkan original order dari frontend
-    all_jobs_with_order.sort(key=lambda x: x[0])
-    job_data_list = [row for _, row in all_jobs_with_order]
+    ordered.sort(key=lambda x: x[0])
+    return [item for _, item in ordered], timezone.now().date()
+
+
+def prepare_job_data_for_export(job_ids, export_type="preventif"):
+    """
+    Prepare job data untuk export ke Google Apps Script
+    Format disesuaikan dengan template Google Apps Script
     
-    # Format payload sesuai Google Apps Script template (SAMA seperti prepare_job_data_for_export)
-    payload = {
-        "exportType": export_type,
-        "tanggal": str(timezone.now().date()),
-        "allMesin": ", ".join(sorted(mesin_set)) if mesin_set else "",
-        "allSubMesin": ", ".join(sorted(sub_mesin_set)) if sub_mesin_set else "",
-        "allPrioritas": ", ".join(sorted(prioritas_set)) if prioritas_set else "",
-        "jobData": job_data_list
-    }
+    export_type: "preventif" atau "evaluasi"
+    Returns: dict dengan structured data sesuai Google Apps Script template
+    """
+    items, tanggal = collect_daily_export_items(job_ids, export_type)
+    if not items:
+        return None
+    return build_payload(items, export_type, tanggal)
+
+
+def prepare_unified_job_data_for_export(job_ids_with_type, export_type="preventif"):
+    """
+    Prepare unified job data (Daily + Project + Preventive) untuk export ke Google Apps Script
+    Format SAMA seperti prepare_job_data_for_export
     
-    return payload
+    job_ids_with_type: list of strings dalam format "id_type" (e.g., ["1_daily", "2_project", "3_preventive"])
+    export_type: "preventif" atau "evaluasi"
+    Returns: dict dengan structured data sesuai Google Apps Script template
+    """
+    items, tanggal = collect_unified_export_items(job_ids_with_type, export_type)
+    if not items:
+        return None
+    return build_payload(items, export_type, tanggal)
 
 
 def send_to_google_apps_script(payload, export_type="preventif"):
@@ -247,7 +251,9 @@ def send_to_google_apps_script(payload, export_type="preventif"):
     
     try:
         # Send POST request ke Google Apps Script
-        response = requests.post(
+        # Session pool bersama; POST tidak di-retry setelah terkirim (hindari ekspor ganda)
+        response = http_post(
+            'gas',
             gas_url,
             json=payload,
             timeout=30
@@ -273,3 +279,183 @@ def send_to_google_apps_script(payload, export_type="preventif"):
 
 
 
+
+
+# ==============================================================================
+# EXPORT PIPELINE (Celery + status polling + dedup content hash)
+# ==============================================================================
+# View hanya memvalidasi input dan mengantrikan export; task Celery membangun payload,
+# memecah seleksi besar menjadi beberapa call GAS (satu dokumen per bagian), dan menyimpan
+# progress di tabel GasExportJob yang di-poll frontend lewat export_status_view.
+# Payload yang isinya sama persis dengan export sebelumnya (hash SHA-256, tabel GasExportSent)
+# tidak dikirim ulang - hasil GAS sebelumnya dikembalikan (kecuali request force=true).
+# State di database, bukan cache: cache default (LocMemCache) per proses, sedangkan worker
+# Celery dan web server adalah proses terpisah.
+GAS_EXPORT_CHUNK_SIZE = getattr(settings, 'GAS_EXPORT_CHUNK_SIZE', 40)
+GAS_EXPORT_STATUS_RETENTION = timedelta(days=7)
+GAS_EXPORT_DEDUP_TIMEOUT = getattr(settings, 'GAS_EXPORT_DEDUP_TIMEOUT', 60 * 60 * 24)
+
+EXPORT_STATE_FIELDS = [
+    'status', 'message', 'data', 'parts', 'total_parts', 'done_parts', 'total_jobs', 'export_type', 'user_id',
+]
+
+EXPORT_KIND_DAILY = 'daily'
+EXPORT_KIND_UNIFIED = 'unified'
+
+
+def chunk_payloads(items, export_type, tanggal, chunk_size=None):
+    """Pecah item menjadi beberapa payload (maksimal chunk_size row per call GAS)"""
+    chunk_size = chunk_size or GAS_EXPORT_CHUNK_SIZE
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    payloads = []
+    for index, chunk in enumerate(chunks, start=1):
+        payload = build_payload(chunk, export_type, tanggal)
+        if len(chunks) > 1:
+            payload["part"] = index
+            payload["totalParts"] = len(chunks)
+        payloads.append(payload)
+    return payloads
+
+
+def payload_hash(payload):
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def get_export_status(export_id):
+    from .models import GasExportJob
+    return GasExportJob.objects.filter(export_id=export_id).values(*EXPORT_STATE_FIELDS).first()
+
+
+def _set_export_status(export_id, **fields):
+    from .models import GasExportJob
+    GasExportJob.objects.filter(export_id=export_id).update(updated_at=timezone.now(), **fields)
+    return get_export_status(export_id) or fields
+
+
+def send_payload_deduplicated(payload, export_type, force=False):
+    """
+    Kirim payload ke GAS kecuali payload identik sudah berhasil dikirim dalam
+    GAS_EXPORT_DEDUP_TIMEOUT detik terakhir.
+
+    Returns:
+        dict hasil send_to_google_apps_script (+ 'cached': True jika dilewati)
+    """
+    from .models import GasExportSent
+
+    digest = payload_hash(payload)
+    now = timezone.now()
+    if not force:
+        cached = GasExportSent.objects.filter(
+            payload_hash=digest, sent_at__gte=now - timedelta(seconds=GAS_EXPORT_DEDUP_TIMEOUT)
+        ).values_list('result', flat=True).first()
+        if cached:
+            return dict(cached, cached=True)
+
+    result = send_to_google_apps_script(payload, export_type)
+    if result.get('status') == 'success':
+        GasExportSent.objects.update_or_create(
+            payload_hash=digest,
+            defaults={'export_type': export_type, 'result': result, 'sent_at': timezone.now()},
+        )
+    return result
+
+
+def purge_export_records(now=None):
+    """Hapus status export lama dan hash payload yang sudah lewat jendela dedup"""
+    from .models import GasExportJob, GasExportSent
+
+    now = now or timezone.now()
+    GasExportJob.objects.filter(created_at__lt=now - GAS_EXPORT_STATUS_RETENTION).delete()
+    GasExportSent.objects.filter(sent_at__lt=now - timedelta(seconds=GAS_EXPORT_DEDUP_TIMEOUT)).delete()
+
+
+def _collect_items(kind, ids, export_type):
+    if kind == EXPORT_KIND_UNIFIED:
+        return collect_unified_export_items(ids, export_type)
+    return collect_daily_export_items(ids, export_type)
+
+
+def run_export(export_id, kind, ids, export_type, force=False):
+    """
+    Jalankan satu export (dipanggil task Celery, atau inline jika broker tidak tersedia).
+
+    Status akhir (GasExportJob):
+        {'status': 'success'|'error', 'message', 'data' (hasil GAS bagian pertama),
+         'parts': [{'part', 'status', 'message', 'cached', 'pdfDownloadUrl'}], ...}
+    """
+    _set_export_status(export_id, status='running')
+    try:
+        items, tanggal = _collect_items(kind, ids, export_type)
+        if not items:
+            return _set_export_status(export_id, status='error', message='Job tidak ditemukan')
+
+        payloads = chunk_payloads(items, export_type, tanggal)
+        _set_export_status(export_id, total_parts=len(payloads), done_parts=0, total_jobs=len(items))
+
+        parts, first_data = [], None
+        for index, payload in enumerate(payloads, start=1):
+            result = send_payload_deduplicated(payload, export_type, force=force)
+            data = result.get('data') or {}
+            if first_data is None and result.get('status') == 'success':
+                first_data = data
+            parts.append({
+                'part': index,
+                'status': result.get('status'),
+                'message': result.get('message', ''),
+                'cached': result.get('cached', False),
+                'pdfDownloadUrl': data.get('pdfDownloadUrl') if isinstance(data, dict) else None,
+            })
+            _set_export_status(export_id, done_parts=index, parts=parts)
+    except Exception as e:
+        logger.exception(f'[GAS Export] Export {export_id} gagal')
+        return _set_export_status(export_id, status='error', message=f'Error: {str(e)}')
+
+    failed = [part for part in parts if part['status'] != 'success']
+    if failed:
+        message = f"{len(failed)} dari {len(parts)} bagian gagal: {failed[0]['message']}"
+        return _set_export_status(export_id, status='error', message=message, data=first_data or {})
+
+    skipped = sum(1 for part in parts if part['cached'])
+    message = "Data berhasil diekspor"
+    if skipped == len(parts):
+        message = "Data tidak berubah sejak export terakhir - dokumen sebelumnya dipakai ulang"
+    elif len(parts) > 1:
+        message = f"Data berhasil diekspor dalam {len(parts)} bagian"
+    return _set_export_status(export_id, status='success', message=message, data=first_data or {})
+
+
+def start_export(kind, ids, export_type, user, force=False):
+    """
+    Antrikan export ke Celery dan kembalikan export_id untuk polling.
+    Jika broker tidak bisa dihubungi, export dijalankan inline (perilaku lama).
+    """
+    from .models import GasExportJob
+
+    purge_export_records()
+    export_id = uuid.uuid4().hex
+    GasExportJob.objects.create(
+        export_id=export_id, user=user, kind=kind, export_type=export_type, total_jobs=len(ids),
+    )
+
+    def enqueue():
+        try:
+            from .tasks import run_gas_export
+            run_gas_export.delay(export_id, kind, list(ids), export_type, force)
+        except Exception as e:
+            logger.warning(f'[GAS Export] Gagal mengantrikan export, jalankan inline: {e}')
+            run_export(export_id, kind, ids, export_type, force=force)
+
+    # Worker baru boleh membaca row GasExportJob setelah commit
+    transaction.on_commit(enqueue)
+    return export_id
+
+
+def export_status_payload(export_id, user):
+    """Status export untuk response polling (None jika tidak ada / bukan milik user)"""
+    state = get_export_status(export_id)
+    if not state or (state.get('user_id') != user.id and not user.is_superuser):
+        return None
+    payload = {key: value for key, value in state.items() if key != 'user_id'}
+    payload['export_id'] = export_id
+    return payload
@@ -13,6 +13,8 @@ import logging
 from datetime import datetime
 from django.conf import settings
 
+from core.services.http_client import http_post
+
 logger = logging.getLogger(__name__)
 
 
@@ -110,7 +112,9 @@ class FonteService:
         }
         
         try:
-            response = requests.post(
+            # Session pool bersama + circuit breaker (POST hanya di-retry jika gagal connect)
+            response = http_post(
+                'fonnte',
                 self.API_URL,
                 data=payload,  # form-data, bukan JSON
                 headers=self.get_headers(),
@@ -180,75 +184,77 @@ class FonteService:
     
     def send_bulk_messages(self, recipients_messages):
         """
-        Send multiple WA messages (with delay to avoid rate limiting).
-        
+        Enqueue multiple WA messages ke WhatsApp outbox (non-blocking).
+
+        Sebelumnya pesan dikirim satu per satu dengan time.sleep(0.5) di request yang sama.
+        Sekarang semua pesan masuk outbox dengan satu bulk INSERT; pengiriman, rate limit
+        per departemen dan retry ditangani worker Celery (core/whatsapp_outbox.py).
+
         Args:
             recipients_messages (list): List of dicts
                 [
                     {'target': '08123456789', 'message': 'Hello 1'},
-                    {'target': '08129876543', 'message': 'Hello 2'},
+                    {'target': '08129876543', 'message': 'Hello 2',
+                     'idempotency_key': 'reminder:12:5'},  # optional
                     ...
                 ]
-        
+
         Returns:
-            dict: Summary of bulk send
+            dict: Summary of bulk enqueue
                 {
                     'total': int,
-                    'sent': int,
+                    'queued': int,
                     'failed': int,
                     'results': [
-                        {'target': '...', 'success': bool, 'message_id': '...', ...}
+                        {'target': '...', 'success': bool, 'outbox_id': int, ...}
                     ]
                 }
         """
-        import time
-        
+        from core.whatsapp_outbox import enqueue_whatsapp_batch
+
         results = {
             'total': len(recipients_messages),
-            'sent': 0,
+            'queued': 0,
             'failed': 0,
             'results': []
         }
-        
-        for idx, recipient in enumerate(recipients_messages):
+
+        items = []
+        for recipient in recipients_messages:
             target = recipient.get('target')
             message = recipient.get('message')
-            
-            if not target or not message:
+
+            if not target or not message or not self._validate_phone(target):
                 results['failed'] += 1
                 results['results'].append({
                     'target': target,
                     'success': False,
-                    'error': 'Missing target or message'
+                    'error': 'Missing or invalid target / message'
                 })
                 continue
-            
-            # Send message
-            response = self.send_message(target, message)
-            
-            if response['success']:
-                results['sent'] += 1
-            else:
-                results['failed'] += 1
-            
-            # Add to results
+            items.append({
+                'target': self._normalize_phone(target),
+                'message': message,
+                'idempotency_key': recipient.get('idempotency_key'),
+                'ref': recipient.get('ref'),
+            })
+
+        for outbox in enqueue_whatsapp_batch(items, departemen=self.settings.departemen):
+            results['queued'] += 1
             results['results'].append({
-                'target': target,
-                'message_id': response.get('message_id'),
-                **response
+                'target': outbox.target,
+                'success': True,
+                'outbox_id': outbox.id,
+                'status': outbox.status,
             })
-            
-            # Delay antara requests (avoid rate limiting) - 0.5 detik
-            if idx < len(recipients_messages) - 1:
-                time.sleep(0.5)
-        
+
         logger.info(
-            f'[Fonnte] Bulk send completed. '
-            f'Total: {results["total"]}, Sent: {results["sent"]}, Failed: {results["failed"]}'
+            f'[Fonnte] Bulk enqueue completed. '
+            f'Total: {results["total"]}, Queued: {results["queued"]}, Failed: {results["failed"]}'
         )
-        
+
         return results
-    
+
     def _validate_phone(self, phone_number):
         """
         Validate phone number format.
@@ -313,8 +319,11 @@ class FonteService:
                 'message': 'Test',
                 'countryCode': self.country_code
             }
-            response = requests.post(
+            response = http_post(
+                'fonnte',
                 self.API_URL,
+                endpoint='/send (test)',
+                retries=0,
                 data=payload,  # form-data, bukan JSON!
                 headers=self.get_headers(),
                 timeout=5
@@ -3,9 +3,8 @@ Google Calendar Service Helper
 Untuk manage event creation di Google Calendar
 """
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from django.conf import settings
+from .services.google_clients import get_google_credentials, get_google_service
 from datetime import datetime, timedelta
 
 # Scopes untuk Google Calendar API
@@ -25,14 +24,12 @@ class GoogleCalendarService:
             calendar_id (str): Google Calendar ID. Jika None, gunakan dari settings.GOOGLE_CALENDAR_ID
         """
         try:
-            # Load credentials dari JSON file
-            self.credentials = service_account.Credentials.from_service_account_file(
-                settings.GOOGLE_CALENDAR_CREDENTIALS_FILE,
-                scopes=SCOPES
+            # Credentials & discovery document di-cache per proses, Resource per thread
+            # (lihat core/services/google_clients.py)
+            self.credentials = get_google_credentials(settings.GOOGLE_CALENDAR_CREDENTIALS_FILE, SCOPES)
+            self.service = get_google_service(
+                'calendar', 'v3', settings.GOOGLE_CALENDAR_CREDENTIALS_FILE, SCOPES
             )
-            
-            # Build Google Calendar API client
-            self.service = build('calendar', 'v3', credentials=self.credentials)
             self.calendar_id = calendar_id or settings.GOOGLE_CALENDAR_ID
             print(f"[GCS] GoogleCalendarService initialized with calendar_id: {self.calendar_id}")
             
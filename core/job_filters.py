@@ -0,0 +1,461 @@
+"""
+Job filter specification - parsing filter GET params SATU KALI untuk dashboard & semua export job.
+
+Sebelumnya dashboard_view, export_daily_jobs_pdf/excel dan export_project_jobs_pdf/excel
+masing-masing mem-parse month/year/date range/PIC/aset/sort dengan aturan yang
+sedikit berbeda (misal: export hanya filter by `pic`), sehingga filter yang sama
+menghasilkan SQL berbeda dan tidak bisa berbagi cache.
+
+Usage:
+    spec = JobFilterSpec.from_request(request)
+    daily_jobs = spec.jobs('Daily')          # list Job, urut sesuai sort, sudah prefetch
+    total = spec.count('Daily')              # dari cache ID (tanpa COUNT DISTINCT)
+    cache_key = spec.cache_key('export')     # key stabil per user + filter
+
+Hasil (ordered job IDs) di-cache per `spec.hash` dan otomatis invalid ketika
+version stamp berubah:
+- versi global (bump_job_filter_version): Project & perubahan hierarki user
+- versi tim (cache_utils.bump_team_data_version): Job & JobDate milik anggota tim
+"""
+
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Q, Count, F, IntegerField, ExpressionWrapper, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .cache_utils import get_user_accessible_projects, get_team_data_version
+from .tree_filters import subtree_q
+
+
+# Cache key & TTL untuk hasil filter
+JOB_FILTER_VERSION_KEY = 'job_filter_version'
+JOB_FILTER_CACHE_TIMEOUT = 600  # 10 menit
+
+
+def get_job_filter_version():
+    """Return versi data job saat ini (dipakai sebagai bagian dari cache key)"""
+    return cache.get_or_set(JOB_FILTER_VERSION_KEY, 1, None)
+
+
+def bump_job_filter_version():
+    """
+    Invalidate semua hasil JobFilterSpec yang ter-cache (semua user).
+    Dipanggil dari signals saat Project atau hierarchy user berubah.
+    """
+    try:
+        cache.incr(JOB_FILTER_VERSION_KEY)
+    except ValueError:
+        # Key belum ada / sudah expired
+        cache.set(JOB_FILTER_VERSION_KEY, 2, None)
+
+
+class JobFilterSpec:
+    """
+    Spesifikasi filter job yang sudah di-parse & divalidasi.
+
+    Semua nilai disimpan dalam bentuk ternormalisasi (int / date / None) sehingga
+    dua request dengan filter yang sama selalu menghasilkan queryset & hash yang sama,
+    tidak peduli urutan atau format param di URL.
+    """
+
+    # Mapping param `sort` -> field database
+    SORT_FIELDS = {
+        'nama_pekerjaan': 'nama_pekerjaan',
+        'pic': 'pic__username',
+        'line': 'aset__parent__parent__nama',
+        'mesin': 'aset__parent__nama',
+        'sub_mesin': 'aset__nama',
+        'aset': 'aset__nama',
+        'departemen': 'aset_departemen__parent__parent__nama',
+        'bagian': 'aset_departemen__parent__nama',
+        'sub_bagian': 'aset_departemen__nama',
+        'fokus': 'fokus',
+        'prioritas': 'prioritas',
+        'updated_at': 'updated_at',
+        'progress': 'progress_sort',  # Annotated (lihat _order_by)
+    }
+    DEFAULT_SORT = 'updated_at'
+    DEFAULT_ORDER = 'desc'
+
+    # Param aset yang di-parse sebagai integer ID
+    ASET_PARAMS = ['line', 'mesin', 'sub_mesin', 'departemen', 'bagian', 'sub_bagian']
+
+    def __init__(self, user, params, default_sort=None, default_order=None):
+        """
+        Args:
+            user: CustomUser yang melakukan request (scope tim & project)
+            params: QueryDict / dict berisi GET params
+            default_sort: Sort default jika param `sort` tidak ada
+            default_order: 'asc' / 'desc' default jika param `order` tidak ada
+        """
+        self.user = user
+        self.errors = []
+        self._params = params
+        self._default_sort = default_sort or self.DEFAULT_SORT
+        self._default_order = default_order or self.DEFAULT_ORDER
+        self._parse()
+
+    @classmethod
+    def from_request(cls, request, **kwargs):
+        """Buat spec dari request.GET milik user yang login"""
+        return cls(request.user, request.GET, **kwargs)
+
+    # ==========================================================================
+    # PARSING & VALIDASI
+    # ==========================================================================
+    def _get(self, key):
+        value = self._params.get(key, '')
+        return value.strip() if isinstance(value, str) else value
+
+    def _parse_int(self, key):
+        value = self._get(key)
+        if value in ('', None, '0'):
+            return None
+        try:
+            number = int(value)
+        except (ValueError, TypeError):
+            self.errors.append(f"Parameter '{key}' tidak valid: {value}")
+            return None
+        if number <= 0:
+            self.errors.append(f"Parameter '{key}' tidak valid: {value}")
+            return None
+        return number
+
+    def _parse_date(self, key):
+        value = self._get(key)
+        if not value:
+            return None
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            self.errors.append(f"Format tanggal '{key}' tidak valid: {value}")
+            return None
+
+    def _parse(self):
+        today = datetime.date.today()
+
+        # === BULAN & TAHUN (0 / kosong = "Semua") ===
+        self.year = self._parse_int('year') or 0
+        self.month = self._parse_int('month') or 0
+        if self.month and not 1 <= self.month <= 12:
+            self.errors.append(f"Bulan tidak valid: {self.month}")
+            self.month = 0
+        if self.year and not 1900 <= self.year <= 9999:
+            self.errors.append(f"Tahun tidak valid: {self.year}")
+            self.year = 0
+        # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
+        if self.month and not self.year:
+            self.year = today.year
+
+        # === DATE RANGE (lebih prioritas dari bulan/tahun) ===
+        self.date_from = self._parse_date('date_from')
+        self.date_to = self._parse_date('date_to')
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            self.date_from, self.date_to = self.date_to, self.date_from
+
+        # === PIC: '' (semua tim), 'my_jobs', atau ID user dalam tim ===
+        pic_param = self._get('pic')
+        self.pic = ''
+        if pic_param == 'my_jobs':
+            self.pic = 'my_jobs'
+        elif pic_param:
+            pic_id = self._parse_int('pic')
+            if pic_id and (pic_id == self.user.id or pic_id in self.subordinate_ids):
+                self.pic = pic_id
+            elif pic_id:
+                self.errors.append(f"PIC {pic_id} bukan bagian dari tim Anda")
+
+        # === ASET MESIN & ASET DEPARTEMEN ===
+        for key in self.ASET_PARAMS:
+            setattr(self, key, self._parse_int(key))
+
+        # === SORT ===
+        # Terima `sort`/`order` (dashboard) maupun `sort_by`/`sort_order` (link export lama)
+        sort_by = self._get('sort') or self._get('sort_by') or self._default_sort
+        if sort_by not in self.SORT_FIELDS:
+            self.errors.append(f"Sort tidak dikenal: {sort_by}")
+            sort_by = self._default_sort
+        self.sort_by = sort_by
+
+        sort_order = self._get('order') or self._get('sort_order') or self._default_order
+        self.sort_order = sort_order if sort_order in ('asc', 'desc') else self._default_order
+
+    # ==========================================================================
+    # PROPERTIES
+    # ==========================================================================
+    @property
+    def subordinate_ids(self):
+        if not hasattr(self, '_subordinate_ids'):
+            self._subordinate_ids = self.user.get_all_subordinates()
+        return self._subordinate_ids
+
+    @property
+    def has_date_range(self):
+        return bool(self.date_from or self.date_to)
+
+    @property
+    def filter_all_dates(self):
+        """True jika tidak ada filter tanggal sama sekali ("Semua")"""
+        return not (self.month or self.year or self.has_date_range)
+
+    @property
+    def date_bounds(self):
+        """
+        Return (start, end_exclusive) dari filter tanggal aktif.
+
+        Bulan/tahun di-compile menjadi range tanggal sehingga query memakai
+        index pada JobDate.tanggal (bukan EXTRACT(month/year) per row).
+        """
+        if self.has_date_range:
+            end = self.date_to + datetime.timedelta(days=1) if self.date_to else None
+            return self.date_from, end
+        if self.month:
+            start = datetime.date(self.year, self.month, 1)
+            if self.month == 12:
+                end = datetime.date(self.year + 1, 1, 1)
+            else:
+                end = datetime.date(self.year, self.month + 1, 1)
+            return start, end
+        if self.year:
+            return datetime.date(self.year, 1, 1), datetime.date(self.year + 1, 1, 1)
+        return None, None
+
+    def normalized(self):
+        """Dict filter ternormalisasi - dasar untuk hash & cache key"""
+        date_from, date_to = self.date_bounds
+        return {
+            'user': self.user.id,
+            'date_from': date_from.isoformat() if date_from else None,
+            'date_to': date_to.isoformat() if date_to else None,
+            'pic': self.pic,
+            **{key: getattr(self, key) for key in self.ASET_PARAMS},
+            'sort': self.sort_by,
+            'order': self.sort_order,
+        }
+
+    @property
+    def hash(self):
+        """Hash stabil dari filter (sama untuk filter yang sama, apapun format URL-nya)"""
+        if not hasattr(self, '_hash'):
+            payload = json.dumps(self.normalized(), sort_keys=True, default=str)
+            self._hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return self._hash
+
+    def cache_key(self, namespace, *parts):
+        """
+        Cache key yang otomatis invalid ketika data job tim user berubah.
+
+        Version stamp tim user ikut di-bump saat job bawahan berubah,
+        sehingga filter PIC ke bawahan manapun juga ter-cover.
+        """
+        suffix = ':'.join(str(part) for part in parts)
+        version = f"{get_job_filter_version()}.{get_team_data_version(self.user.id)}"
+        key = f"job_filter:{namespace}:v{version}:{self.hash}"
+        return f"{key}:{suffix}" if suffix else key
+
+    # ==========================================================================
+    # COMPILE KE QUERY
+    # ==========================================================================
+    def team_q(self):
+        """Scope tim: job di mana PIC atau assigned_to adalah anggota tim terpilih"""
+        user = self.user
+        if self.pic == 'my_jobs':
+            return Q(pic_id=user.id) | Q(assigned_to_id=user.id)
+        if self.pic:
+            if self.pic == user.id:
+                team_ids = [user.id] + self.subordinate_ids
+            else:
+                from .models import CustomUser
+                selected_user = CustomUser.objects.get(id=self.pic)
+                team_ids = selected_user.get_all_subordinates() + [selected_user.id]
+            return Q(pic_id__in=team_ids) | Q(assigned_to_id__in=team_ids)
+        team_ids = [user.id] + self.subordinate_ids
+        return Q(pic_id__in=team_ids) | Q(assigned_to_id__in=team_ids)
+
+    def project_q(self):
+        """Hanya job dari project yang bisa diakses user (atau job tanpa project)"""
+        accessible_project_ids = get_user_accessible_projects(self.user)
+        return Q(project_id__in=accessible_project_ids) | Q(project_id__isnull=True)
+
+    def aset_q(self):
+        """
+        Filter aset: level paling spesifik yang dipilih yang dipakai.
+
+        Memakai range nested-set MPTT (tree_id/lft/rght) sehingga node di level
+        mana pun (Line, Mesin, dst) match seluruh subtree-nya dengan satu range scan.
+        """
+        from .models import AsetMesin, AsetDepartemen
+        q = Q()
+        if self.sub_mesin:
+            q &= Q(aset_id=self.sub_mesin)
+        elif self.mesin or self.line:
+            q &= subtree_q(AsetMesin, self.mesin or self.line, prefix='aset')
+
+        if self.sub_bagian:
+            q &= Q(aset_departemen_id=self.sub_bagian)
+        elif self.bagian or self.departemen:
+            q &= subtree_q(AsetDepartemen, self.bagian or self.departemen, prefix='aset_departemen')
+        return q
+
+    def jobdate_q(self, prefix=''):
+        """Q untuk JobDate.tanggal sesuai filter tanggal (prefix: misal 'tanggal_pelaksanaan__')"""
+        start, end = self.date_bounds
+        q = Q()
+        if start:
+            q &= Q(**{f'{prefix}tanggal__gte': start})
+        if end:
+            q &= Q(**{f'{prefix}tanggal__lt': end})
+        return q
+
+    def filter_dates(self, job_dates):
+        """Filter JobDate (sudah di-prefetch) di Python tanpa query tambahan"""
+        start, end = self.date_bounds
+        return [
+            jd for jd in job_dates
+            if (start is None or jd.tanggal >= start) and (end is None or jd.tanggal < end)
+        ]
+
+    def base_queryset(self, tipe_job=None):
+        """
+        Queryset Job dengan filter tim + project + aset (TANPA filter tanggal).
+
+        Tidak ada JOIN many-to-many sehingga tidak perlu DISTINCT.
+        """
+        from .models import Job
+        qs = Job.objects.filter(self.team_q(), self.project_q(), self.aset_q())
+        if tipe_job:
+            qs = qs.filter(tipe_job=tipe_job)
+        return qs
+
+    def queryset(self, tipe_job=None):
+        """
+        Queryset Job lengkap sesuai filter (termasuk tanggal) dan sudah ter-sort.
+
+        Filter tanggal memakai subquery `id IN (SELECT job_id FROM jobdate ...)`
+        sehingga satu job dengan banyak tanggal tidak menghasilkan row duplikat.
+        """
+        from .models import JobDate
+        qs = self.base_queryset(tipe_job)
+        if not self.filter_all_dates:
+            qs = qs.filter(id__in=JobDate.objects.filter(self.jobdate_q()).values('job_id'))
+        return self._order_by(qs)
+
+    @property
+    def keyset_ordering(self):
+        """
+        Ordering untuk keyset pagination, atau None jika sort tidak mendukung.
+        Hanya sort updated_at (kolom NOT NULL di tabel job sendiri) + id yang dipakai.
+        """
+        if self.sort_by != 'updated_at':
+            return None
+        prefix = '-' if self.sort_order == 'desc' else ''
+        return (f'{prefix}updated_at', f'{prefix}id')
+
+    def _order_by(self, qs):
+        field = self.SORT_FIELDS[self.sort_by]
+        if self.sort_by == 'progress':
+            # Progress = % tanggal Done, dihitung di SQL (bukan sort Python)
+            qs = qs.annotate(
+                _total_dates=Count('tanggal_pelaksanaan'),
+                _done_dates=Count('tanggal_pelaksanaan', filter=Q(tanggal_pelaksanaan__status='Done')),
+            ).annotate(
+                progress_sort=Coalesce(
+                    ExpressionWrapper(
+                        F('_done_dates') * 100 / NullIf(F('_total_dates'), 0),
+                        output_field=IntegerField(),
+                    ),
+                    Value(0),
+                )
+            )
+        prefix = '-' if self.sort_order == 'desc' else ''
+        # ID sebagai tie-breaker supaya urutan stabil antar halaman
+        return qs.order_by(f'{prefix}{field}', f'{prefix}id')
+
+    # ==========================================================================
+    # HASIL (CACHED)
+    # ==========================================================================
+    def job_ids(self, tipe_job=None):
+        """List ID job (urut sesuai sort), di-cache per hash filter"""
+        key = self.cache_key('ids', tipe_job or 'all')
+        ids = cache.get(key)
+        if ids is None:
+            ids = list(self.queryset(tipe_job).values_list('id', flat=True))
+            cache.set(key, ids, JOB_FILTER_CACHE_TIMEOUT)
+        return ids
+
+    def count(self, tipe_job=None):
+        """Jumlah job sesuai filter (dari cache ID, tanpa COUNT DISTINCT)"""
+        return len(self.job_ids(tipe_job))
+
+    def fetch(self, ids):
+        """Ambil object Job untuk list ID dengan relasi lengkap, urutan dipertahankan"""
+        from .models import Job
+        jobs = Job.objects.filter(id__in=ids).select_related(
+            'pic',
+            'assigned_to',
+            'project',
+            'aset__parent__parent',
+            'aset_departemen__parent__parent',
+        ).prefetch_related(
+            'personil_ditugaskan',
+            'tanggal_pelaksanaan',
+            'attachments',
+        ).in_bulk()
+        return [jobs[job_id] for job_id in ids if job_id in jobs]
+
+    def jobs(self, tipe_job=None):
+        """List Job sesuai filter (untuk export)"""
+        return self.fetch(self.job_ids(tipe_job))
+
+    def mesin_progress(self):
+        """
+        Progress per Mesin (parent dari Sub Mesin) untuk job tim - satu query agregat.
+
+        Returns:
+            List dict {'nama', 'progress'} urut progress tertinggi
+        """
+        from .models import JobDate
+        rows = JobDate.objects.filter(
+            self.jobdate_q(),
+            job__in=self.base_queryset().filter(aset__level=2),
+        ).values(
+            'job__aset__parent_id', 'job__aset__parent__nama'
+        ).annotate(
+            total=Count('id'),
+            done=Count('id', filter=Q(status='Done')),
+        )
+        progress_data = [
+            {
+                'nama': row['job__aset__parent__nama'],
+                'progress': int((row['done'] / row['total']) * 100),
+            }
+            for row in rows if row['total']
+        ]
+        return sorted(progress_data, key=lambda x: x['progress'], reverse=True)
+
+    # ==========================================================================
+    # CONTEXT TEMPLATE
+    # ==========================================================================
+    def template_context(self):
+        """Nilai filter dalam format yang dipakai template (ID sebagai string)"""
+        def as_str(value):
+            return str(value) if value else ''
+
+        return {
+            'current_month': self.month,
+            'current_year': self.year,
+            'selected_pic_id': as_str(self.pic),
+            'selected_line_id': as_str(self.line),
+            'selected_mesin_id': as_str(self.mesin),
+            'selected_sub_mesin_id': as_str(self.sub_mesin),
+            'selected_departemen_id': as_str(self.departemen),
+            'selected_bagian_id': as_str(self.bagian),
+            'selected_sub_bagian_id': as_str(self.sub_bagian),
+            'selected_date_from': self.date_from.isoformat() if self.date_from else '',
+            'selected_date_to': self.date_to.isoformat() if self.date_to else '',
+            'sort_by': self.sort_by,
+            'sort_order': self.sort_order,
+        }
@@ -0,0 +1,370 @@
+"""
+Sync incremental Google Calendar -> LeaveEvent (ijin/cuti), di luar request user.
+
+Sebelumnya leave_event_view memanggil sync secara sinkron di SETIAP page load:
+events().list(q='cuti', maxResults=100) tanpa pagination, lalu per event query
+LeaveEvent.exists(), Departemen.get() dan Karyawan icontains.
+
+Sekarang (dijalankan Celery, lihat core.tasks.sync_leave_calendars):
+1. Per departemen disimpan nextSyncToken Calendar API (LeaveCalendarSync). Run berikutnya
+   hanya mengambil event yang berubah sejak token itu, termasuk event yang dihapus
+   (status 'cancelled'). Token kedaluwarsa (HTTP 410) -> full sync ulang.
+2. Semua halaman hasil di-page dengan pageToken sampai nextSyncToken didapat.
+3. Map event_id -> LeaveEvent dan nama -> Karyawan dibuat SEKALI per run di memori.
+4. Perubahan ditulis dengan bulk_create / bulk_update / satu DELETE.
+5. Satu departemen hanya di-sync oleh satu run pada satu waktu: baris LeaveCalendarSync
+   dikunci (select_for_update skip_locked) selama sync; run lain yang datang bersamaan
+   (beat + trigger view) melewati departemen tersebut, jadi sync_token yang sama tidak
+   pernah dipakai dua kali dan LeaveEvent tidak terbuat dobel.
+6. View hanya mengantrikan satu task selama sync_requested_at masih berlaku.
+
+Catatan: syncToken tidak bisa dikombinasikan dengan parameter `q`, jadi filter "cuti"
+dilakukan di sisi aplikasi. Event yang dibuat dari aplikasi menyimpan beberapa ID
+(comma-separated, satu per tanggal) di LeaveEvent.google_event_id; ID ke-i berpasangan
+dengan tanggal ke-i.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Departemen, Karyawan, LeaveCalendarSync, LeaveEvent
+
+logger = logging.getLogger(__name__)
+
+LEAVE_KEYWORD = 'cuti'
+PAGE_SIZE = 250
+SYNC_STALE_AFTER = timedelta(minutes=10)
+
+
+# ==============================================================================
+# IN-MEMORY MAPS
+# ==============================================================================
+class KaryawanMatcher:
+    """Cocokkan nama dari judul event ke Karyawan tanpa query per event"""
+
+    def __init__(self):
+        self.karyawan = list(Karyawan.objects.only('id', 'nama_lengkap'))
+        self.by_name = {}
+        for karyawan in self.karyawan:
+            self.by_name.setdefault(karyawan.nama_lengkap.strip().lower(), karyawan)
+
+    def match(self, nama):
+        key = (nama or '').strip().lower()
+        if not key:
+            return None
+        if key in self.by_name:
+            return self.by_name[key]
+        # Fallback perilaku lama (icontains), hanya jika hasilnya tunggal
+        candidates = [k for k in self.karyawan if key in k.nama_lengkap.lower()]
+        return candidates[0] if len(candidates) == 1 else None
+
+
+def build_event_map():
+    """
+    Map google event id -> (LeaveEvent, index) untuk semua LeaveEvent yang punya event id.
+    Satu query, hanya kolom yang dibutuhkan untuk update.
+    """
+    event_map = {}
+    rows = LeaveEvent.objects.exclude(google_event_id__isnull=True).exclude(google_event_id='').only(
+        'id', 'google_event_id', 'tanggal', 'nama_orang', 'deskripsi', 'karyawan_id', 'departemen_id'
+    )
+    for leave_event in rows:
+        for index, event_id in enumerate(leave_event.get_google_event_ids()):
+            event_map[event_id] = (leave_event, index)
+    return event_map
+
+
+# ==============================================================================
+# PARSING
+# ==============================================================================
+def event_dates(event):
+    """List tanggal 'YYYY-MM-DD' yang dicakup event (end all-day event bersifat eksklusif)"""
+    start = event.get('start', {})
+    end = event.get('end', {})
+    start_raw = (start.get('date') or start.get('dateTime') or '')[:10]
+    if not start_raw:
+        return []
+    if not start.get('date'):
+        return [start_raw]
+
+    try:
+        first = date.fromisoformat(start_raw)
+        last = date.fromisoformat((end.get('date') or start_raw)[:10]) - timedelta(days=1)
+    except ValueError:
+        return [start_raw]
+    days = max((last - first).days, 0)
+    return [(first + timedelta(days=offset)).isoformat() for offset in range(days + 1)]
+
+
+def parse_nama(summary):
+    """Format judul event: "{Nama} cuti" """
+    return summary.replace(' cuti', '').replace(' Cuti', '').strip()
+
+
+def is_leave_event(event):
+    return LEAVE_KEYWORD in (event.get('summary') or '').lower()
+
+
+# ==============================================================================
+# APPLY CHANGES
+# ==============================================================================
+class _ChangeSet:
+    def __init__(self):
+        self.to_create = {}   # event_id -> LeaveEvent baru
+        self.to_update = {}   # pk -> LeaveEvent
+        self.to_delete = set()
+
+    def summary(self):
+        return {
+            'created': len(self.to_create),
+            'updated': len(self.to_update),
+            'deleted': len(self.to_delete),
+        }
+
+
+def _remove_event_from(leave_event, index, event_id, changes):
+    """Event dihapus di Google: buang ID (dan tanggal pasangannya) dari LeaveEvent"""
+    ids = leave_event.get_google_event_ids()
+    dates = leave_event.get_tanggal_list()
+    if event_id not in ids:
+        return
+    if len(ids) <= 1:
+        changes.to_delete.add(leave_event.pk)
+        changes.to_update.pop(leave_event.pk, None)
+        return
+    if len(dates) == len(ids):
+        dates.pop(index)
+        leave_event.tanggal = ','.join(dates)
+    ids.remove(event_id)
+    leave_event.google_event_id = ','.join(ids)
+    changes.to_update[leave_event.pk] = leave_event
+
+
+def _update_from_event(leave_event, index, event, matcher, changes):
+    ids = leave_event.get_google_event_ids()
+    dates = leave_event.get_tanggal_list()
+    new_dates = event_dates(event)
+    changed = False
+
+    if len(ids) <= 1:
+        nama = parse_nama(event.get('summary', ''))
+        if new_dates and dates != new_dates:
+            leave_event.tanggal = ','.join(new_dates)
+            changed = True
+        if nama and nama != leave_event.nama_orang:
+            leave_event.nama_orang = nama
+            leave_event.karyawan = matcher.match(nama) or leave_event.karyawan
+            changed = True
+        description = event.get('description', '')
+        if description != (leave_event.deskripsi or '') and description:
+            leave_event.deskripsi = description
+            changed = True
+    elif new_dates and len(dates) == len(ids) and dates[index] != new_dates[0]:
+        # Event per-tanggal milik LeaveEvent multi-tanggal yang digeser di Google
+        dates[index] = new_dates[0]
+        leave_event.tanggal = ','.join(dates)
+        changed = True
+
+    if changed:
+        changes.to_update[leave_event.pk] = leave_event
+
+
+def apply_events(events, departemen, event_map, matcher):
+    """Terapkan daftar event (hasil list Calendar API) ke changeset"""
+    changes = _ChangeSet()
+    for event in events:
+        event_id = event.get('id')
+        if not event_id:
+            continue
+        mapped = event_map.get(event_id)
+
+        if event.get('status') == 'cancelled':
+            if mapped:
+                _remove_event_from(mapped[0], mapped[1], event_id, changes)
+            else:
+                changes.to_create.pop(event_id, None)
+            continue
+
+        if mapped:
+            if mapped[0].pk not in changes.to_delete:
+                _update_from_event(mapped[0], mapped[1], event, matcher, changes)
+            continue
+
+        if not is_leave_event(event):
+            continue
+
+        dates = event_dates(event)
+        if not dates:
+            continue
+        nama = parse_nama(event.get('summary', ''))
+        changes.to_create[event_id] = LeaveEvent(
+            google_event_id=event_id,
+            karyawan=matcher.match(nama),
+            nama_orang=nama,
+            tipe_leave='Cuti',
+            tanggal=','.join(dates),
+            deskripsi=event.get('description', ''),
+            created_by=None,
+            departemen=departemen,
+        )
+    return changes
+
+
+def _write_changes(changes):
+    if changes.to_delete:
+        LeaveEvent.objects.filter(pk__in=changes.to_delete).delete()
+    if changes.to_update:
+        now = timezone.now()
+        rows = list(changes.to_update.values())
+        for row in rows:
+            row.updated_at = now
+        LeaveEvent.objects.bulk_update(
+            rows,
+            ['google_event_id', 'tanggal', 'nama_orang', 'karyawan', 'deskripsi', 'updated_at'],
+            batch_size=500,
+        )
+    if changes.to_create:
+        LeaveEvent.objects.bulk_create(list(changes.to_create.values()), batch_size=500)
+
+
+# ==============================================================================
+# SYNC
+# ==============================================================================
+def _list_changes(service, calendar_id, sync_token):
+    """
+    Ambil semua halaman event (incremental jika sync_token ada).
+
+    Returns:
+        (events, next_sync_token)
+    """
+    events = []
+    page_token = None
+    while True:
+        params = {'calendarId': calendar_id, 'maxResults': PAGE_SIZE, 'showDeleted': True}
+        if sync_token:
+            params['syncToken'] = sync_token
+        if page_token:
+            params['pageToken'] = page_token
+        result = service.events().list(**params).execute()
+        events.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return events, result.get('nextSyncToken', '')
+
+
+@transaction.atomic
+def sync_departemen_leave_events(departemen, event_map=None, matcher=None, map_built_at=None):
+    """
+    Sync incremental satu departemen. Baris LeaveCalendarSync dikunci sampai selesai.
+
+    Args:
+        map_built_at: Waktu event_map dibuat - jika departemen sudah di-sync run lain
+                      setelah itu, map sudah basi dan departemen dilewati
+
+    Returns:
+        dict summary {'created', 'updated', 'deleted', 'full_sync'}, atau {'skipped': True}
+        jika departemen sedang / baru saja di-sync run lain
+    """
+    from googleapiclient.errors import HttpError
+    from .google_calendar_service import get_google_calendar_service
+
+    calendar_id = departemen.google_calendar_id
+    LeaveCalendarSync.objects.get_or_create(departemen=departemen)
+    state = LeaveCalendarSync.objects.select_for_update(skip_locked=True).filter(departemen=departemen).first()
+    if state is None or (map_built_at and state.last_synced_at and state.last_synced_at >= map_built_at):
+        logger.info(f'[LeaveSync] {departemen} sedang / sudah di-sync run lain, dilewati')
+        return {'skipped': True}
+    sync_token = state.sync_token if state.calendar_id == calendar_id else ''
+
+    service = get_google_calendar_service(calendar_id=calendar_id).service
+    try:
+        events, next_token = _list_changes(service, calendar_id, sync_token)
+    except HttpError as e:
+        if getattr(e, 'status_code', None) == 410 or getattr(e.resp, 'status', None) == 410:
+            # Sync token kedaluwarsa -> full sync
+            logger.info(f'[LeaveSync] Sync token {departemen} kedaluwarsa, full sync')
+            sync_token = ''
+            events, next_token = _list_changes(service, calendar_id, '')
+        else:
+            raise
+
+    event_map = build_event_map() if event_map is None else event_map
+    matcher = matcher or KaryawanMatcher()
+    changes = apply_events(events, departemen, event_map, matcher)
+
+    now = timezone.now()
+    _write_changes(changes)
+    state.calendar_id = calendar_id
+    state.sync_token = next_token
+    state.last_synced_at = now
+    if not sync_token:
+        state.last_full_sync_at = now
+    state.sync_requested_at = None
+    state.last_error = ''
+    state.save()
+
+    # Map dipakai ulang departemen berikutnya di run yang sama
+    for leave_event in changes.to_create.values():
+        event_map[leave_event.google_event_id] = (leave_event, 0)
+
+    summary = changes.summary()
+    summary['full_sync'] = not sync_token
+    return summary
+
+
+def sync_all_leave_calendars(departemen_ids=None):
+    """
+    Sync semua departemen yang punya google_calendar_id.
+    Map event & karyawan dibuat sekali untuk seluruh run.
+    """
+    departemen_qs = Departemen.objects.exclude(google_calendar_id__isnull=True).exclude(google_calendar_id='')
+    if departemen_ids:
+        departemen_qs = departemen_qs.filter(id__in=departemen_ids)
+
+    map_built_at = timezone.now()
+    event_map = build_event_map()
+    matcher = KaryawanMatcher()
+    results = {}
+    for departemen in departemen_qs:
+        try:
+            results[departemen.id] = sync_departemen_leave_events(departemen, event_map, matcher, map_built_at)
+        except Exception as e:
+            logger.exception(f'[LeaveSync] Error sync departemen {departemen}: {e}')
+            LeaveCalendarSync.objects.update_or_create(
+                departemen=departemen, defaults={'last_error': str(e)[:2000], 'sync_requested_at': None}
+            )
+            results[departemen.id] = {'error': str(e)}
+    return results
+
+
+def request_leave_sync_if_stale(departemen):
+    """
+    Dipanggil dari view: antrikan sync di background jika data departemen sudah basi.
+    Tidak pernah memanggil Google API di request path.
+
+    sync_requested_at di-set dengan UPDATE bersyarat sebelum .delay(), jadi page load
+    berikutnya tidak mengantrikan task kedua selama task pertama belum jalan
+    (kecuali sudah lewat SYNC_STALE_AFTER - task dianggap hilang).
+    """
+    now = timezone.now()
+    stale_before = now - SYNC_STALE_AFTER
+    LeaveCalendarSync.objects.get_or_create(departemen=departemen)
+    claimed = LeaveCalendarSync.objects.filter(
+        Q(last_synced_at__isnull=True) | Q(last_synced_at__lt=stale_before),
+        Q(sync_requested_at__isnull=True) | Q(sync_requested_at__lt=stale_before),
+        departemen=departemen,
+    ).update(sync_requested_at=now)
+    if not claimed:
+        return False
+    try:
+        from .tasks import sync_leave_calendars
+        sync_leave_calendars.delay(departemen_ids=[departemen.id])
+        return True
+    except Exception as e:
+        logger.warning(f'[LeaveSync] Gagal mengantrikan sync {departemen}: {e}')
+        LeaveCalendarSync.objects.filter(departemen=departemen).update(sync_requested_at=None)
+        return False
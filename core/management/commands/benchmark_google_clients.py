@@ -0,0 +1,124 @@
+"""
+Django management command untuk benchmark akuisisi Google API client (cold vs warm).
+Cara jalankan:
+    python manage.py benchmark_google_clients
+    python manage.py benchmark_google_clients --credentials path/ke/service_account.json --iterations 50
+    python manage.py benchmark_google_clients --dummy-credentials   # tanpa file credentials asli
+
+Tidak ada request ke Google: yang diukur hanya load credentials + build Resource.
+"""
+
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.google_clients import GoogleClientFactory
+
+APIS = [
+    ('sheets', 'v4', ['https://www.googleapis.com/auth/spreadsheets']),
+    ('calendar', 'v3', ['https://www.googleapis.com/auth/calendar']),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Google API client: build per call (lama) vs factory cold vs factory warm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--credentials', type=str, help='Path service account JSON')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--dummy-credentials',
+            action='store_true',
+            help='Generate service account JSON sementara (key RSA acak) untuk benchmark lokal'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        temp_path = None
+
+        if options['dummy_credentials']:
+            credentials_path = temp_path = self._write_dummy_credentials()
+        else:
+            credentials_path = options.get('credentials') or getattr(settings, 'GOOGLE_CALENDAR_CREDENTIALS_FILE', None)
+            if not credentials_path or not os.path.exists(credentials_path):
+                raise CommandError(
+                    'Credentials tidak ditemukan. Pakai --credentials <path> atau --dummy-credentials.'
+                )
+
+        try:
+            self.stdout.write("=" * 80)
+            self.stdout.write(self.style.SUCCESS(f"GOOGLE CLIENT BENCHMARK ({iterations} iterasi)"))
+            self.stdout.write("=" * 80)
+            for api, version, scopes in APIS:
+                self._benchmark(api, version, scopes, credentials_path, iterations)
+        finally:
+            if temp_path:
+                os.remove(temp_path)
+
+    def _benchmark(self, api, version, scopes, credentials_path, iterations):
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
+        def legacy():
+            credentials = service_account.Credentials.from_service_account_file(credentials_path, scopes=scopes)
+            build(api, version, credentials=credentials)
+
+        factory = GoogleClientFactory()
+
+        def cold():
+            factory.clear()
+            factory.get_service(api, version, credentials_path, scopes)
+
+        def warm():
+            factory.get_service(api, version, credentials_path, scopes)
+
+        factory.get_service(api, version, credentials_path, scopes)  # warm-up sebelum ukur warm
+
+        self.stdout.write(f"\n[{api} {version}]")
+        self.stdout.write("-" * 80)
+        results = {}
+        for label, func in (('build per call (lama)', legacy), ('factory cold', cold), ('factory warm', warm)):
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = statistics.median(timings)
+            self.stdout.write(
+                f"   {label:<24} median {statistics.median(timings):9.3f} ms   "
+                f"min {min(timings):9.3f} ms   max {max(timings):9.3f} ms"
+            )
+
+        warm_ms = results['factory warm'] or 0.001
+        self.stdout.write(self.style.SUCCESS(
+            f"   Speedup warm vs lama: {results['build per call (lama)'] / warm_ms:,.0f}x"
+        ))
+
+    def _write_dummy_credentials(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        data = {
+            'type': 'service_account',
+            'project_id': 'benchmark',
+            'private_key_id': 'benchmark',
+            'private_key': pem,
+            'client_email': 'benchmark@benchmark.iam.gserviceaccount.com',
+            'client_id': '0',
+            'token_uri': 'https://oauth2.googleapis.com/token',
+        }
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as f:
+            json.dump(data, f)
+        return path
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_add_google_sheet_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asetdepartemen',
+            index=models.Index(fields=['tree_id', 'lft', 'rght'], name='core_asetdept_subtree_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asetmesin',
+            index=models.Index(fields=['tree_id', 'lft', 'rght'], name='core_asetmesin_subtree_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_aset_subtree_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['tipe_job', '-updated_at', '-id'], name='core_job_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdate',
+            index=models.Index(fields=['status', 'tanggal', 'id'], name='core_jobdate_overdue_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppRateBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_key', models.CharField(max_length=50, unique=True)),
+                ('tokens', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Rate Bucket',
+                'verbose_name_plural': 'WhatsApp Rate Buckets',
+            },
+        ),
+        migrations.CreateModel(
+            name='WhatsAppOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(help_text='Key unik per pesan logis - enqueue ulang dengan key sama tidak membuat pesan baru', max_length=150, unique=True)),
+                ('provider', models.CharField(choices=[('fonnte', 'Fonnte (per departemen)'), ('wa_api', 'WhatsApp API (global)')], default='fonnte', max_length=10)),
+                ('target', models.CharField(max_length=20)),
+                ('message', models.TextField()),
+                ('ref_model', models.CharField(blank=True, default='', max_length=100)),
+                ('ref_id', models.CharField(blank=True, default='', max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Menunggu'), ('sending', 'Sedang Dikirim'), ('sent', 'Terkirim'), ('failed', 'Gagal'), ('cancelled', 'Dibatalkan')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('last_status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('provider_message_id', models.CharField(blank=True, default='', max_length=100)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('departemen', models.ForeignKey(blank=True, help_text='Menentukan token Fonnte & bucket rate limit', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='whatsapp_outbox', to='core.departemen')),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Outbox',
+                'verbose_name_plural': 'WhatsApp Outbox',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_waoutbox_due_idx'), models.Index(fields=['ref_model', 'ref_id'], name='core_waoutbox_ref_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_whatsapp_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveCalendarSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(blank=True, help_text='Calendar ID saat sync_token dibuat (token di-reset jika calendar berganti)', max_length=255)),
+                ('sync_token', models.CharField(blank=True, max_length=500)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('departemen', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='leave_calendar_sync', to='core.departemen')),
+            ],
+            options={
+                'verbose_name': 'Leave Calendar Sync',
+                'verbose_name_plural': 'Leave Calendar Sync',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_document_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransitionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('from_status', models.CharField(max_length=30)),
+                ('to_status', models.CharField(max_length=30)),
+                ('reason', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Status Transition Log',
+                'verbose_name_plural': 'Status Transition Logs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['model_label', 'object_id'], name='status_log_object_idx'), models.Index(fields=['-created_at'], name='status_log_created_idx')],
+            },
+        ),
+    ]
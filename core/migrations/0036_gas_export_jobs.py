@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_status_sweeper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GasExportSent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload_hash', models.CharField(max_length=64, unique=True)),
+                ('export_type', models.CharField(max_length=20)),
+                ('result', models.JSONField(default=dict)),
+                ('sent_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'GAS Export Sent Payload',
+                'verbose_name_plural': 'GAS Export Sent Payloads',
+            },
+        ),
+        migrations.CreateModel(
+            name='GasExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export_id', models.CharField(max_length=32, unique=True)),
+                ('kind', models.CharField(max_length=20)),
+                ('export_type', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Antri'), ('running', 'Berjalan'), ('success', 'Berhasil'), ('error', 'Gagal')], default='queued', max_length=10)),
+                ('message', models.TextField(blank=True, default='')),
+                ('total_jobs', models.PositiveIntegerField(default=0)),
+                ('total_parts', models.PositiveIntegerField(blank=True, null=True)),
+                ('done_parts', models.PositiveIntegerField(default=0)),
+                ('parts', models.JSONField(blank=True, default=list)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='gas_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'GAS Export Job',
+                'verbose_name_plural': 'GAS Export Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
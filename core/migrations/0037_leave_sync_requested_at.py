@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_gas_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavecalendarsync',
+            name='sync_requested_at',
+            field=models.DateTimeField(blank=True, help_text='Task sync sudah diantrikan (dikosongkan setelah sync selesai)', null=True),
+        ),
+    ]
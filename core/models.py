@@ -5,6 +5,7 @@ import os
 import json 
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.cache import cache 
+from django.utils import timezone
 
 # ==============================================================================
 # 1. MODEL AKUN / USER (UNTUK LOGIN)
@@ -363,6 +364,10 @@ class AsetMesin(MPTTModel):
     class Meta:
         verbose_name = "Aset Mesin"
         verbose_name_plural = "Daftar Aset Mesin" 
+        indexes = [
+            # Range scan subtree (lihat core/tree_filters.py)
+            models.Index(fields=['tree_id', 'lft', 'rght'], name='core_asetmesin_subtree_idx'),
+        ]
     def __str__(self):
         try:
             ancestors = self.get_ancestors(include_self=True)
@@ -417,6 +422,8 @@ class AsetDepartemen(MPTTModel):
         verbose_name_plural = "Daftar Aset Departemen"
         indexes = [
             models.Index(fields=['departemen']),
+            # Range scan subtree (lihat core/tree_filters.py)
+            models.Index(fields=['tree_id', 'lft', 'rght'], name='core_asetdept_subtree_idx'),
         ]
     
     def __str__(self):
@@ -726,6 +733,7 @@ class Job(models.Model):
             models.Index(fields=['pic', 'tipe_job']),  # For dashboard filtering
             models.Index(fields=['project', 'status']),  # For project detail
             models.Index(fields=['aset', 'status']),  # For asset filtering
+            models.Index(fields=['tipe_job', '-updated_at', '-id'], name='core_job_keyset_idx'),  # Keyset pagination dashboard
         ]
 
     def __str__(self):
@@ -775,11 +783,17 @@ class Job(models.Model):
         """
         Menghitung persentase progres berdasarkan tanggal yang 'Done'.
         """
-        total_dates = self.tanggal_pelaksanaan.count()
+        # Jika tanggal sudah di-prefetch (dashboard/export), hitung tanpa query tambahan
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('tanggal_pelaksanaan')
+        if prefetched is not None:
+            total_dates = len(prefetched)
+            done_dates = sum(1 for jd in prefetched if jd.status == 'Done')
+        else:
+            total_dates = self.tanggal_pelaksanaan.count()
+            done_dates = self.tanggal_pelaksanaan.filter(status='Done').count() if total_dates else 0
+        
         if total_dates == 0:
             return 0 # Tidak ada tanggal, progres 0
-            
-        done_dates = self.tanggal_pelaksanaan.filter(status='Done').count()
         
         # Hitung persentase
         progress = (done_dates / total_dates) * 100
@@ -893,6 +907,9 @@ class JobDate(models.Model):
         ordering = ['tanggal']
         verbose_name = "Tanggal Pengerjaan"
         verbose_name_plural = "Tanggal Pengerjaan" 
+        indexes = [
+            models.Index(fields=['status', 'tanggal', 'id'], name='core_jobdate_overdue_idx'),  # Keyset list overdue
+        ]
 
     def __str__(self):
         return f"{self.job.nama_pekerjaan} - {self.tanggal} ({self.status})"
@@ -1109,6 +1126,40 @@ class LeaveEvent(models.Model):
         return []
 
 
+class LeaveCalendarSync(models.Model):
+    """
+    State sync incremental Google Calendar -> LeaveEvent per departemen.
+    Menyimpan nextSyncToken dari Calendar API (lihat core/leave_calendar_sync.py).
+    """
+    departemen = models.OneToOneField(
+        Departemen,
+        on_delete=models.CASCADE,
+        related_name='leave_calendar_sync'
+    )
+    calendar_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Calendar ID saat sync_token dibuat (token di-reset jika calendar berganti)"
+    )
+    sync_token = models.CharField(max_length=500, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    sync_requested_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Task sync sudah diantrikan (dikosongkan setelah sync selesai)"
+    )
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Leave Calendar Sync"
+        verbose_name_plural = "Leave Calendar Sync"
+    
+    def __str__(self):
+        return f"Leave sync - {self.departemen.nama_departemen}"
+
+
 # ==============================================================================
 # 7. MODEL USER OVERDUE JOB PREFERENCE (UNTUK FILTER NOTIFIKASI)
 # ==============================================================================
@@ -1208,18 +1259,37 @@ class MaintenanceMode(models.Model):
         verbose_name = "Maintenance Mode"
         verbose_name_plural = "Maintenance Mode"
     
+    # Dicek middleware di SETIAP request; di-cache supaya halaman yang dilayani dari
+    # cache (misal public inventory 304) tidak menyentuh database sama sekali
+    CACHE_KEY = 'maintenance_mode_active'
+    CACHE_TIMEOUT = 60
+    
     def __str__(self):
         status = "AKTIF" if self.is_active else "NONAKTIF"
         return f"Maintenance Mode: {status}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.CACHE_KEY)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete(self.CACHE_KEY)
+        return result
+    
     @staticmethod
     def is_maintenance_active():
         """Cek apakah maintenance mode aktif"""
+        active = cache.get(MaintenanceMode.CACHE_KEY)
+        if active is not None:
+            return active
         try:
             mode = MaintenanceMode.objects.first()
-            return mode.is_active if mode else False
+            active = mode.is_active if mode else False
         except:
             return False
+        cache.set(MaintenanceMode.CACHE_KEY, active, MaintenanceMode.CACHE_TIMEOUT)
+        return active
 
 
 # ==============================================================================
@@ -1281,28 +1351,205 @@ class FonnteSettings(models.Model):
         return f"Fontte Settings - {self.departemen.nama_departemen}"
     
     def test_connection(self):
-        """Test connection ke Fontte API"""
-        import requests
+        """Test connection ke Fonnte API (lewat FonteService - session pool & circuit breaker)"""
+        from .fontte_service import FonteService
         try:
-            response = requests.post(
-                'https://api.fontte.com/send',
-                data={
-                    'target': '628123456789',  # Test number
-                    'message': 'Test dari sistem',
-                    'countryCode': self.country_code
-                },
-                headers={
-                    'Authorization': self.token
-                },
-                timeout=5
-            )
-            # Status 200, 201, 400 masih berarti API responding
-            # 500+ berarti server error
-            return response.status_code < 500
-        except Exception as e:
+            return FonteService(self).test_connection()
+        except ValueError:
             return False
 
 
+# ==============================================================================
+# WHATSAPP OUTBOX - ANTRIAN PENGIRIMAN WA ASYNC
+# ==============================================================================
+class WhatsAppOutbox(models.Model):
+    """
+    Antrian pesan WhatsApp yang dikirim oleh Celery worker (lihat core/whatsapp_outbox.py).
+
+    View/signal hanya INSERT row ini (di dalam transaksi yang sama dengan data bisnisnya),
+    pengiriman HTTP ke Fonnte/WABot dilakukan worker dengan rate limit per departemen,
+    retry exponential backoff dan status pengiriman yang bisa dilacak.
+    """
+    PROVIDER_FONNTE = 'fonnte'  # FonteService dengan FonnteSettings departemen
+    PROVIDER_WA_API = 'wa_api'  # WhatsAppAPI global (WABot / Fontte dari settings.py)
+    PROVIDER_CHOICES = [
+        (PROVIDER_FONNTE, 'Fonnte (per departemen)'),
+        (PROVIDER_WA_API, 'WhatsApp API (global)'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Menunggu'),
+        (STATUS_SENDING, 'Sedang Dikirim'),
+        (STATUS_SENT, 'Terkirim'),
+        (STATUS_FAILED, 'Gagal'),
+        (STATUS_CANCELLED, 'Dibatalkan'),
+    ]
+
+    idempotency_key = models.CharField(
+        max_length=150,
+        unique=True,
+        help_text="Key unik per pesan logis - enqueue ulang dengan key sama tidak membuat pesan baru"
+    )
+    provider = models.CharField(max_length=10, choices=PROVIDER_CHOICES, default=PROVIDER_FONNTE)
+    departemen = models.ForeignKey(
+        Departemen,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='whatsapp_outbox',
+        help_text="Menentukan token Fonnte & bucket rate limit"
+    )
+    target = models.CharField(max_length=20)
+    message = models.TextField()
+
+    # Referensi opsional ke object bisnis (misal 'preventive_jobs.ChecklistShareLog', id)
+    ref_model = models.CharField(max_length=100, blank=True, default='')
+    ref_id = models.CharField(max_length=50, blank=True, default='')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    provider_message_id = models.CharField(max_length=100, blank=True, default='')
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "WhatsApp Outbox"
+        verbose_name_plural = "WhatsApp Outbox"
+        ordering = ['-created_at']
+        indexes = [
+            # Query claim worker: status pending & jatuh tempo, urut next_attempt_at
+            models.Index(fields=['status', 'next_attempt_at'], name='core_waoutbox_due_idx'),
+            models.Index(fields=['ref_model', 'ref_id'], name='core_waoutbox_ref_idx'),
+        ]
+
+    def __str__(self):
+        return f"WA {self.target} [{self.status}] ({self.idempotency_key})"
+
+
+class WhatsAppRateBucket(models.Model):
+    """
+    Token bucket rate limit pengiriman WA (satu row per departemen / provider global).
+    Disimpan di DB dan di-update dengan select_for_update supaya konsisten antar worker.
+    """
+    bucket_key = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "WhatsApp Rate Bucket"
+        verbose_name_plural = "WhatsApp Rate Buckets"
+
+    def __str__(self):
+        return f"{self.bucket_key}: {self.tokens:.1f} token"
+
+
+class DocumentSequence(models.Model):
+    """
+    Counter nomor dokumen (kode barang INV-, no_urut meeting per base, dst).
+    Dinaikkan dengan select_for_update lewat core.services.sequences - lihat modul tersebut.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Document Sequence"
+        verbose_name_plural = "Document Sequences"
+
+    def __str__(self):
+        return f"{self.key}: {self.last_value}"
+
+
+class StatusTransitionLog(models.Model):
+    """
+    Audit perubahan status otomatis berbasis waktu (lihat core.status_sweeper).
+    Ditulis dengan bulk_create oleh sweeper - satu row per objek yang berubah status.
+    """
+    model_label = models.CharField(max_length=100)  # 'toolkeeper.peminjaman', dst
+    object_id = models.CharField(max_length=64)
+    from_status = models.CharField(max_length=30)
+    to_status = models.CharField(max_length=30)
+    reason = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Status Transition Log"
+        verbose_name_plural = "Status Transition Logs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['model_label', 'object_id'], name='status_log_object_idx'),
+            models.Index(fields=['-created_at'], name='status_log_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}:{self.object_id} {self.from_status} -> {self.to_status}"
+
+
+class GasExportJob(models.Model):
+    """
+    Status satu export job ke Google Apps Script (lihat core.export_handlers - EXPORT PIPELINE).
+    Disimpan di database (bukan cache) karena ditulis worker Celery dan di-poll proses web.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Antri'),
+        (STATUS_RUNNING, 'Berjalan'),
+        (STATUS_SUCCESS, 'Berhasil'),
+        (STATUS_ERROR, 'Gagal'),
+    ]
+
+    export_id = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='gas_exports')
+    kind = models.CharField(max_length=20)
+    export_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    message = models.TextField(blank=True, default='')
+    total_jobs = models.PositiveIntegerField(default=0)
+    total_parts = models.PositiveIntegerField(null=True, blank=True)
+    done_parts = models.PositiveIntegerField(default=0)
+    parts = models.JSONField(default=list, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "GAS Export Job"
+        verbose_name_plural = "GAS Export Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.export_id} ({self.export_type}): {self.status}"
+
+
+class GasExportSent(models.Model):
+    """Hash payload yang sudah berhasil dikirim ke GAS (dedup export identik antar proses)"""
+    payload_hash = models.CharField(max_length=64, unique=True)
+    export_type = models.CharField(max_length=20)
+    result = models.JSONField(default=dict)
+    sent_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "GAS Export Sent Payload"
+        verbose_name_plural = "GAS Export Sent Payloads"
+
+    def __str__(self):
+        return f"{self.payload_hash[:12]} ({self.export_type}) {self.sent_at:%Y-%m-%d %H:%M}"
+
+
 # ==============================================================================
 # 8. MODEL GOOGLE API SETTINGS (GLOBAL CONFIGURATION)
 # ==============================================================================
@@ -0,0 +1,234 @@
+"""
+Keyset (cursor) pagination.
+
+Paginator offset bawaan Django menjalankan COUNT(*) penuh + OFFSET scan di setiap halaman,
+sehingga halaman ke-100 jauh lebih mahal dari halaman pertama. Keyset pagination memakai
+nilai kolom urut dari row terakhir sebagai batas:
+
+    WHERE (updated_at, id) < (:last_updated_at, :last_id) ORDER BY updated_at DESC, id DESC LIMIT n+1
+
+sehingga biaya per halaman konstan (index range scan) berapa pun kedalamannya.
+
+Syarat:
+- Ordering harus total (kolom terakhir unik, biasanya 'id') dan kolomnya NOT NULL.
+- Navigasi hanya Awal / Sebelumnya / Selanjutnya / Akhir (tanpa lompat ke nomor halaman).
+- Total count opsional (lihat capped_count) - tidak dihitung per halaman.
+
+Usage:
+    paginator = KeysetPaginator(queryset, ordering=('-updated_at', '-id'), per_page=20)
+    page = paginator.get_page(request.GET.get('cursor'))
+    page.object_list, page.next_cursor, page.previous_cursor
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.db.models import Q
+
+
+CURSOR_NEXT = 'n'
+CURSOR_PREV = 'p'
+CURSOR_LAST = 'last'  # Cursor khusus: halaman terakhir (urutan dibalik tanpa batas)
+
+
+# ==============================================================================
+# CURSOR ENCODING
+# ==============================================================================
+def _dump_value(value):
+    if isinstance(value, datetime.datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, datetime.date):
+        return ['d', value.isoformat()]
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, list) and len(value) == 2:
+        tag, raw = value
+        if tag == 'dt':
+            return datetime.datetime.fromisoformat(raw)
+        if tag == 'd':
+            return datetime.date.fromisoformat(raw)
+    return value
+
+
+def encode_cursor(values, direction=CURSOR_NEXT):
+    """Encode nilai key row batas menjadi string aman untuk URL"""
+    raw = json.dumps([direction, [_dump_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, key_count):
+    """
+    Decode cursor dari URL.
+
+    Returns:
+        (direction, values) - (None, None) untuk halaman pertama / cursor tidak valid,
+        (CURSOR_PREV, None) untuk halaman terakhir.
+    """
+    if not cursor:
+        return None, None
+    if cursor == CURSOR_LAST:
+        return CURSOR_PREV, None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values = [_load_value(v) for v in values]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        return None, None
+    if direction not in (CURSOR_NEXT, CURSOR_PREV) or len(values) != key_count:
+        return None, None
+    return direction, values
+
+
+# ==============================================================================
+# KEYSET PREDICATE
+# ==============================================================================
+def parse_ordering(ordering):
+    """('-updated_at', 'id') -> [('updated_at', True), ('id', False)]"""
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def keyset_q(ordering, values, reverse=False):
+    """
+    Q object untuk row SETELAH `values` menurut `ordering`
+    (atau SEBELUM jika reverse=True).
+
+    (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+    Ditulis sebagai OR berantai (bukan row-value comparison) supaya jalan di semua DB
+    dan mendukung arah campuran (asc/desc) per kolom.
+    """
+    keys = parse_ordering(ordering)
+    q = Q()
+    for i, (field, descending) in enumerate(keys):
+        lookup = 'lt' if descending != reverse else 'gt'
+        branch = Q(**{f'{field}__{lookup}': values[i]})
+        for j, (prev_field, _) in enumerate(keys[:i]):
+            branch &= Q(**{prev_field: values[j]})
+        q |= branch
+    return q
+
+
+def row_key(row, ordering):
+    """Ambil nilai key dari model instance atau dict (values())"""
+    fields = [field for field, _ in parse_ordering(ordering)]
+    if isinstance(row, dict):
+        return [row[field] for field in fields]
+    return [getattr(row, field) for field in fields]
+
+
+def capped_count(queryset, limit=1000):
+    """
+    Count yang dibatasi: COUNT atas subquery LIMIT limit+1, jadi biaya maksimal `limit` row.
+
+    Returns:
+        (count, is_exact) - jika is_exact False, tampilkan sebagai "{limit}+"
+    """
+    count = queryset.order_by()[:limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
+
+
+def format_count(count, is_exact):
+    """Label count untuk template: 250 / '1000+'"""
+    return count if is_exact else f'{count}+'
+
+
+# ==============================================================================
+# PAGINATOR
+# ==============================================================================
+class KeysetPage(Sequence):
+    """
+    Satu halaman hasil keyset pagination.
+    Atribut has_next/has_previous kompatibel dengan Page Django; navigasi memakai cursor.
+
+    Key row pertama/terakhir diambil saat halaman dibuat, jadi object_list boleh
+    diganti sesudahnya (misal di-hydrate jadi object lengkap) tanpa merusak cursor.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = list(object_list)
+        self.ordering = ordering
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self._first_key = row_key(self.object_list[0], ordering) if self.object_list else None
+        self._last_key = row_key(self.object_list[-1], ordering) if self.object_list else None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<KeysetPage ({len(self)} items)>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or self._last_key is None:
+            return ''
+        return encode_cursor(self._last_key, CURSOR_NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or self._first_key is None:
+            return ''
+        return encode_cursor(self._first_key, CURSOR_PREV)
+
+    @property
+    def last_cursor(self):
+        return CURSOR_LAST
+
+
+class KeysetPaginator:
+    """
+    Paginator berbasis cursor untuk queryset dengan ordering total.
+
+    Args:
+        queryset: Queryset (boleh .only()/.values() asalkan field ordering ikut terambil)
+        ordering: Tuple field urut, kolom terakhir harus unik (misal ('-updated_at', '-id'))
+        per_page: Jumlah row per halaman
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        direction, values = decode_cursor(cursor, len(self.ordering))
+
+        if direction == CURSOR_PREV:
+            # Ambil mundur (urutan dibalik) lalu balik lagi hasilnya
+            qs = self.queryset.order_by(*reverse_ordering(self.ordering))
+            if values is not None:
+                qs = qs.filter(keyset_q(self.ordering, values, reverse=True))
+            rows = list(qs[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, self.ordering, has_next=values is not None, has_previous=has_previous)
+
+        qs = self.queryset.order_by(*self.ordering)
+        if values is not None:
+            qs = qs.filter(keyset_q(self.ordering, values))
+        rows = list(qs[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return KeysetPage(rows[:self.per_page], self.ordering, has_next=has_next, has_previous=values is not None)
@@ -0,0 +1,180 @@
+"""
+Process-wide factory untuk Google API client (Sheets, Calendar).
+
+Sebelumnya GoogleSheetsService._connect dan GoogleCalendarService.__init__ membaca file
+credentials dan memanggil googleapiclient.discovery.build setiap kali service dibuat -
+parse discovery document (Sheets v4 ~350 KB JSON) memakan ratusan ms, dan
+get_sheets_service() dipanggil di setiap signal.
+
+Factory ini:
+- Cache Credentials per (file, scopes); dimuat ulang otomatis jika file berubah (rotasi key)
+  dan di-refresh di bawah lock sebelum token kedaluwarsa.
+- Memakai discovery document statis yang ikut terpasang dengan google-api-python-client
+  (tanpa request ke discovery endpoint), di-parse SEKALI per proses.
+- Menyerahkan Resource per THREAD: httplib2.Http di dalam Resource tidak thread-safe,
+  jadi setiap thread (worker web / thread pool / Celery) punya instance sendiri yang
+  dipakai ulang selama credentials-nya sama.
+
+Usage:
+    from core.services.google_clients import get_google_service
+
+    service = get_google_service('sheets', 'v4', credentials_path, SCOPES)
+    service.spreadsheets().values().append(...).execute()
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from googleapiclient.discovery import build, build_from_document
+
+logger = logging.getLogger(__name__)
+
+# Refresh token jika sisa umur kurang dari ini (hindari token expired di tengah batch)
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+def resolve_credentials_path(path):
+    """Path absolut credentials (path relatif dianggap relatif ke BASE_DIR)"""
+    if not path:
+        raise ValueError("Google credentials path tidak ditemukan")
+    if not os.path.isabs(path):
+        path = os.path.join(settings.BASE_DIR, path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Credentials file tidak ditemukan: {path}")
+    return path
+
+
+class _CachedCredentials:
+    def __init__(self, key, credentials, mtime, generation):
+        self.key = key
+        self.credentials = credentials
+        self.mtime = mtime
+        self.generation = generation
+        self.lock = threading.Lock()
+
+
+class GoogleClientFactory:
+    """Cache credentials, discovery document, dan Resource per thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._credentials = {}
+        self._documents = {}
+        self._generation = 0
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Credentials
+    # ------------------------------------------------------------------
+    def _get_entry(self, credentials_path, scopes):
+        path = resolve_credentials_path(credentials_path)
+        key = (path, tuple(sorted(scopes)))
+        mtime = os.path.getmtime(path)
+
+        entry = self._credentials.get(key)
+        if entry is not None and entry.mtime == mtime:
+            return entry
+
+        with self._lock:
+            entry = self._credentials.get(key)
+            if entry is None or entry.mtime != mtime:
+                credentials = service_account.Credentials.from_service_account_file(path, scopes=list(scopes))
+                self._generation += 1
+                entry = _CachedCredentials(key, credentials, mtime, self._generation)
+                self._credentials[key] = entry
+                logger.debug(f"[GoogleClients] Credentials dimuat: {os.path.basename(path)}")
+            return entry
+
+    def _ensure_fresh(self, entry):
+        credentials = entry.credentials
+        expiry = credentials.expiry
+        if credentials.token and expiry and expiry - REFRESH_MARGIN > datetime.datetime.utcnow():
+            return
+        with entry.lock:
+            expiry = credentials.expiry
+            if credentials.token and expiry and expiry - REFRESH_MARGIN > datetime.datetime.utcnow():
+                return
+            credentials.refresh(Request())
+
+    def get_credentials(self, credentials_path, scopes, refresh=False):
+        """
+        Credentials service account ter-cache.
+
+        Args:
+            refresh: Pastikan token valid sekarang (request ke Google jika perlu).
+                     Tanpa refresh, token diambil lazily saat request pertama.
+        """
+        entry = self._get_entry(credentials_path, scopes)
+        if refresh:
+            self._ensure_fresh(entry)
+        return entry.credentials
+
+    # ------------------------------------------------------------------
+    # Discovery & service
+    # ------------------------------------------------------------------
+    def get_discovery_document(self, api, version):
+        """Discovery document statis (ter-parse) atau None jika tidak ikut terpasang"""
+        key = (api, version)
+        if key not in self._documents:
+            from googleapiclient.discovery_cache import get_static_doc
+
+            raw = get_static_doc(api, version)
+            with self._lock:
+                self._documents[key] = json.loads(raw) if raw else None
+        return self._documents[key]
+
+    def get_service(self, api, version, credentials_path, scopes):
+        """
+        Resource Google API untuk thread saat ini.
+
+        Instance dipakai ulang di thread yang sama selama credentials tidak dimuat ulang.
+        """
+        entry = self._get_entry(credentials_path, scopes)
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+
+        key = (api, version, entry.key)
+        generation, service = services.get(key, (None, None))
+        if service is None or generation != entry.generation:
+            # Belum ada, atau credentials sudah dimuat ulang sejak instance ini dibuat
+            document = self.get_discovery_document(api, version)
+            if document is not None:
+                service = build_from_document(document, credentials=entry.credentials)
+            else:
+                service = build(api, version, credentials=entry.credentials, cache_discovery=False)
+            services[key] = (entry.generation, service)
+        if entry.credentials.token:
+            # Token pertama diambil lazily oleh AuthorizedHttp; selanjutnya refresh lebih awal
+            # di bawah lock supaya thread-thread tidak refresh bersamaan saat token habis
+            self._ensure_fresh(entry)
+        return service
+
+    def clear(self):
+        """Kosongkan semua cache (dipakai benchmark / setelah ganti credentials manual)"""
+        with self._lock:
+            self._credentials = {}
+            self._documents = {}
+            self._generation += 1
+        self._local = threading.local()
+
+
+_factory = GoogleClientFactory()
+
+
+def get_google_client_factory():
+    return _factory
+
+
+def get_google_service(api, version, credentials_path, scopes):
+    return _factory.get_service(api, version, credentials_path, scopes)
+
+
+def get_google_credentials(credentials_path, scopes, refresh=False):
+    return _factory.get_credentials(credentials_path, scopes, refresh=refresh)
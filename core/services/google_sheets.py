@@ -4,13 +4,10 @@ Google Sheets Service untuk meeting reminder sync.
 Auto-append meeting data ke Google Sheets untuk kemudian di-process oleh GAS.
 """
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from django.conf import settings
 import logging
-import os
-from datetime import datetime
+
+from .google_clients import get_google_service
 
 logger = logging.getLogger(__name__)
 
@@ -57,26 +54,44 @@ class GoogleSheetsService:
                     "Set di GoogleAPISettings atau pass sebagai parameter."
                 )
             
-            # Convert relative path to absolute if needed
-            if not os.path.isabs(creds_path):
-                creds_path = os.path.join(settings.BASE_DIR, creds_path)
-            
-            if not os.path.exists(creds_path):
-                raise FileNotFoundError(f"Credentials file tidak ditemukan: {creds_path}")
-            
-            # Authenticate
-            credentials = Credentials.from_service_account_file(
-                creds_path,
-                scopes=SCOPES
-            )
-            
-            self.service = build('sheets', 'v4', credentials=credentials)
-            logger.info(f"✅ Google Sheets Service connected successfully")
+            # Credentials & discovery document di-cache per proses, Resource per thread
+            self.service = get_google_service('sheets', 'v4', creds_path, SCOPES)
+            logger.debug(f"✅ Google Sheets Service connected successfully")
             
         except Exception as e:
             logger.error(f"❌ Error connecting to Google Sheets: {str(e)}")
             raise
     
+    @staticmethod
+    def build_meeting_row(meeting_data):
+        """
+        Row Meetings sheet dari meeting_data dict.
+        
+        Returns:
+            [No_Dokumen, Agenda, Tanggal, Waktu_Mulai, Waktu_Selesai, Lokasi, Peserta, "No"]
+        """
+        # Extract data dari meeting_data dict
+        no_dokumen = meeting_data.get('no_dokumen', '')
+        agenda = meeting_data.get('agenda', '')
+        tanggal = meeting_data.get('tanggal', '')  # format: YYYY-MM-DD
+        waktu_mulai = meeting_data.get('waktu_mulai', '')  # format: HH:MM
+        waktu_selesai = meeting_data.get('waktu_selesai', '')  # format: HH:MM
+        lokasi = meeting_data.get('lokasi', '')
+        peserta = meeting_data.get('peserta', '')  # comma-separated
+        
+        # Format tanggal jika Date object
+        if hasattr(tanggal, 'strftime'):
+            tanggal = tanggal.strftime('%Y-%m-%d')
+        
+        # Format waktu jika Time object
+        if hasattr(waktu_mulai, 'strftime'):
+            waktu_mulai = waktu_mulai.strftime('%H:%M')
+        if hasattr(waktu_selesai, 'strftime'):
+            waktu_selesai = waktu_selesai.strftime('%H:%M')
+        
+        # Col 7 (Sudah_Kirim) = "No" (not yet sent)
+        return [no_dokumen, agenda, tanggal, waktu_mulai, waktu_selesai, lokasi, peserta, "No"]
+    
     def append_meeting_row(self, spreadsheet_id, meeting_data):
         """
         Append meeting row ke Meetings sheet di spreadsheet.
@@ -86,6 +101,16 @@ class GoogleSheetsService:
             meeting_data: Dict dengan keys: no_dokumen, agenda, tanggal, 
                          waktu_mulai, waktu_selesai, lokasi, peserta
         
+        Returns:
+            Dict dengan result dari append operation
+        """
+        return self.append_meeting_rows(spreadsheet_id, [meeting_data])
+    
+    def append_meeting_rows(self, spreadsheet_id, meetings_data):
+        """
+        Append banyak meeting sekaligus dengan SATU values().append call.
+        Urutan row di sheet mengikuti urutan meetings_data.
+        
         Returns:
             Dict dengan result dari append operation
         """
@@ -96,51 +121,39 @@ class GoogleSheetsService:
             raise ValueError("Spreadsheet ID harus diisi")
         
         try:
-            # Extract data dari meeting_data dict
-            no_dokumen = meeting_data.get('no_dokumen', '')
-            agenda = meeting_data.get('agenda', '')
-            tanggal = meeting_data.get('tanggal', '')  # format: YYYY-MM-DD
-            waktu_mulai = meeting_data.get('waktu_mulai', '')  # format: HH:MM
-            waktu_selesai = meeting_data.get('waktu_selesai', '')  # format: HH:MM
-            lokasi = meeting_data.get('lokasi', '')
-            peserta = meeting_data.get('peserta', '')  # comma-separated
-            
-            # Format tanggal jika Date object
-            if hasattr(tanggal, 'strftime'):
-                tanggal = tanggal.strftime('%Y-%m-%d')
-            
-            # Format waktu jika Time object
-            if hasattr(waktu_mulai, 'strftime'):
-                waktu_mulai = waktu_mulai.strftime('%H:%M')
-            if hasattr(waktu_selesai, 'strftime'):
-                waktu_selesai = waktu_selesai.strftime('%H:%M')
-            
-            # Prepare row: [No_Dokumen, Agenda, Tanggal, Waktu_Mulai, Waktu_Selesai, Lokasi, Peserta, "No"]
-            # Col 7 (Sudah_Kirim) = "No" (not yet sent)
-            row = [no_dokumen, agenda, tanggal, waktu_mulai, waktu_selesai, lokasi, peserta, "No"]
-            
-            # Append row ke Meetings sheet
-            body = {
-                'values': [row]
-            }
+            rows = [self.build_meeting_row(meeting_data) for meeting_data in meetings_data]
             
             result = self.service.spreadsheets().values().append(
                 spreadsheetId=spreadsheet_id,
                 range=f"{SHEET_MEETINGS}!A:H",  # Append ke columns A-H
                 valueInputOption='USER_ENTERED',
-                body=body
+                insertDataOption='INSERT_ROWS',
+                body={'values': rows}
             ).execute()
             
-            logger.info(f"✅ Meeting {no_dokumen} appended to sheet {spreadsheet_id}")
+            logger.info(f"✅ {len(rows)} meeting row(s) appended to sheet {spreadsheet_id}")
             return result
             
         except HttpError as e:
             logger.error(f"❌ Google Sheets API error: {str(e)}")
             raise
         except Exception as e:
-            logger.error(f"❌ Error appending meeting row: {str(e)}")
+            logger.error(f"❌ Error appending meeting rows: {str(e)}")
             raise
     
+    def get_existing_document_numbers(self, spreadsheet_id):
+        """
+        Set No_Dokumen (kolom A) yang sudah ada di Meetings sheet.
+        Dipakai worker sync supaya retry / backfill tidak membuat row dobel.
+        """
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"{SHEET_MEETINGS}!A:A",
+            majorDimension='COLUMNS',
+        ).execute()
+        columns = result.get('values', [])
+        return {value for value in (columns[0] if columns else []) if value}
+    
     def test_connection(self, spreadsheet_id):
         """
         Test connection dengan membaca header dari Meetings sheet.
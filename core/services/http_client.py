@@ -0,0 +1,349 @@
+"""
+Shared HTTP client untuk semua integrasi keluar (Fonnte, WABot, TinyURL, Google Apps Script).
+
+Sebelumnya setiap integrasi memanggil requests.post/get tanpa Session, sehingga setiap
+request membayar DNS + TCP + TLS handshake dari nol, dan provider yang sedang down membuat
+setiap pemanggil menunggu sampai timeout.
+
+Yang disediakan modul ini:
+- Session keep-alive per host (pool koneksi ter-tuning, dibuat ulang setelah fork worker)
+- Retry dengan exponential backoff + full jitter. Request non-idempotent (POST) hanya di-retry
+  jika gagal di fase connect (request belum sampai ke server), kecuali retry_unsafe=True.
+- Circuit breaker per host: setelah N kegagalan beruntun, request langsung gagal
+  (CircuitOpenError) selama cooldown, lalu satu request percobaan (half-open).
+- Metrik per endpoint (jumlah call, error, total latency, histogram latency) di cache
+  bersama, sehingga angka dari web & worker Celery terkumpul di satu tempat.
+
+Usage:
+    from core.services.http_client import http_post
+
+    response = http_post('fonnte', 'https://api.fonnte.com/send', data=payload, timeout=10)
+
+CircuitOpenError adalah subclass requests.exceptions.ConnectionError, jadi blok
+`except requests.exceptions.ConnectionError` yang sudah ada tetap menangkapnya.
+
+Settings (opsional):
+    HTTP_CLIENT_POOL_MAXSIZE          - koneksi keep-alive per host (default 20)
+    HTTP_CLIENT_MAX_RETRIES           - retry default (default 2)
+    HTTP_CLIENT_BREAKER_THRESHOLD     - kegagalan beruntun sebelum circuit open (default 5)
+    HTTP_CLIENT_BREAKER_RESET_SECONDS - lama circuit open sebelum half-open (default 30)
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+POOL_MAXSIZE = getattr(settings, 'HTTP_CLIENT_POOL_MAXSIZE', 20)
+MAX_RETRIES = getattr(settings, 'HTTP_CLIENT_MAX_RETRIES', 2)
+BREAKER_THRESHOLD = getattr(settings, 'HTTP_CLIENT_BREAKER_THRESHOLD', 5)
+BREAKER_RESET_SECONDS = getattr(settings, 'HTTP_CLIENT_BREAKER_RESET_SECONDS', 30)
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+METRICS_ENDPOINTS_KEY = 'http_metrics_endpoints'
+METRICS_KEY = 'http_metrics:{endpoint}:{field}'
+METRICS_TIMEOUT = 60 * 60 * 24 * 7  # 7 hari
+LATENCY_BUCKETS_MS = (100, 300, 1000, 3000, 10000)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Provider dianggap down - request ditolak tanpa koneksi ke server"""
+
+
+# ==============================================================================
+# CIRCUIT BREAKER
+# ==============================================================================
+class CircuitBreaker:
+    """Circuit breaker sederhana per host (state di memori proses, thread-safe)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_request(self):
+        """
+        Raise CircuitOpenError jika request harus ditolak.
+        Returns: True jika request ini adalah percobaan half-open (wajib ditutup dengan end_trial)
+        """
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True  # Satu request percobaan
+                return True
+        raise CircuitOpenError(f'Circuit breaker {self.name} open - provider sedang tidak tersedia')
+
+    def end_trial(self):
+        """Lepas slot percobaan half-open apa pun hasilnya (termasuk exception non-requests)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f'[HTTP] Circuit {self.name} closed kembali')
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f'[HTTP] Circuit {self.name} open setelah {self.failures} kegagalan')
+                self.opened_at = time.monotonic()
+                return True
+        return False
+
+
+# ==============================================================================
+# METRICS
+# ==============================================================================
+_registered_keys = set()
+_registered_lock = threading.Lock()
+
+
+def _incr(key, delta=1):
+    try:
+        if key not in _registered_keys:
+            cache.add(key, 0, METRICS_TIMEOUT)
+            _registered_keys.add(key)
+        cache.incr(key, delta)
+    except ValueError:
+        # Key expired / cache di-flush - mulai dari awal
+        cache.set(key, delta, METRICS_TIMEOUT)
+
+
+def _register_endpoint(endpoint):
+    with _registered_lock:
+        if endpoint in _registered_keys:
+            return
+        _registered_keys.add(endpoint)
+    endpoints = cache.get(METRICS_ENDPOINTS_KEY) or []
+    if endpoint not in endpoints:
+        cache.set(METRICS_ENDPOINTS_KEY, sorted(set(endpoints) | {endpoint}), METRICS_TIMEOUT)
+
+
+def record_metric(endpoint, elapsed_ms, error=False, circuit_open=False):
+    """Catat satu call (tidak pernah raise - metrik tidak boleh merusak request)"""
+    try:
+        _register_endpoint(endpoint)
+        _incr(METRICS_KEY.format(endpoint=endpoint, field='calls'))
+        if circuit_open:
+            _incr(METRICS_KEY.format(endpoint=endpoint, field='circuit_open'))
+            return
+        _incr(METRICS_KEY.format(endpoint=endpoint, field='latency_ms'), int(elapsed_ms))
+        bucket = next((limit for limit in LATENCY_BUCKETS_MS if elapsed_ms < limit), 'inf')
+        _incr(METRICS_KEY.format(endpoint=endpoint, field=f'le_{bucket}'))
+        if error:
+            _incr(METRICS_KEY.format(endpoint=endpoint, field='errors'))
+    except Exception as e:
+        logger.debug(f'[HTTP] Gagal mencatat metrik {endpoint}: {e}')
+
+
+def get_http_metrics():
+    """
+    Snapshot metrik semua endpoint.
+
+    Returns:
+        List dict {'endpoint', 'calls', 'errors', 'circuit_open', 'avg_ms', 'error_rate', 'histogram'}
+    """
+    endpoints = cache.get(METRICS_ENDPOINTS_KEY) or []
+    fields = ['calls', 'errors', 'circuit_open', 'latency_ms'] + [
+        f'le_{limit}' for limit in LATENCY_BUCKETS_MS
+    ] + ['le_inf']
+    keys = [METRICS_KEY.format(endpoint=endpoint, field=field) for endpoint in endpoints for field in fields]
+    values = cache.get_many(keys)
+
+    metrics = []
+    for endpoint in endpoints:
+        row = {field: values.get(METRICS_KEY.format(endpoint=endpoint, field=field), 0) for field in fields}
+        timed_calls = row['calls'] - row['circuit_open']
+        metrics.append({
+            'endpoint': endpoint,
+            'calls': row['calls'],
+            'errors': row['errors'],
+            'circuit_open': row['circuit_open'],
+            'avg_ms': round(row['latency_ms'] / timed_calls) if timed_calls else None,
+            'error_rate': round((row['errors'] + row['circuit_open']) * 100.0 / row['calls'], 1) if row['calls'] else 0,
+            'histogram': {field[3:]: row[field] for field in fields if field.startswith('le_')},
+        })
+    return metrics
+
+
+# ==============================================================================
+# CLIENT
+# ==============================================================================
+def _failed_before_send(exc):
+    """
+    True jika request pasti belum sampai ke server (aman di-retry walau POST):
+    connect timeout, DNS / koneksi ditolak, TLS handshake gagal.
+    Read timeout / koneksi putus di tengah jalan dianggap sudah terkirim.
+    """
+    if isinstance(exc, (requests.exceptions.ConnectTimeout, requests.exceptions.SSLError)):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+class IntegrationClient:
+    """Registry Session & circuit breaker per host untuk proses ini"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sessions = {}
+        self._breakers = {}
+
+    def _reset_after_fork(self):
+        # Session/socket tidak boleh dipakai bersama antar proses (prefork worker Celery)
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._sessions = {}
+            self._breakers = {}
+
+    def get_session(self, host):
+        with self._lock:
+            self._reset_after_fork()
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def get_breaker(self, host):
+        with self._lock:
+            self._reset_after_fork()
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host)
+            return breaker
+
+    def breaker_states(self):
+        return {host: breaker.state for host, breaker in self._breakers.items()}
+
+    def request(self, service, method, url, endpoint=None, retries=None, retry_unsafe=False, **kwargs):
+        """
+        Kirim request lewat session pool host tujuan.
+
+        Args:
+            service: Nama integrasi untuk metrik ('fonnte', 'wabot', 'tinyurl', 'gas', ...)
+            method: HTTP method
+            url: URL lengkap
+            endpoint: Label metrik (default: path URL)
+            retries: Jumlah retry (default HTTP_CLIENT_MAX_RETRIES)
+            retry_unsafe: Izinkan retry request non-idempotent setelah request terkirim
+            **kwargs: Diteruskan ke Session.request (timeout wajib diisi pemanggil)
+
+        Returns:
+            requests.Response (status apa pun - pemanggil tetap memeriksa status_code)
+
+        Raises:
+            requests.exceptions.RequestException (termasuk CircuitOpenError)
+        """
+        method = method.upper()
+        parts = urlsplit(url)
+        host = parts.netloc
+        label = f'{service}:{method} {endpoint or parts.path or "/"}'
+        retries = MAX_RETRIES if retries is None else retries
+        can_retry_sent = retry_unsafe or method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', 30)
+
+        session = self.get_session(host)
+        breaker = self.get_breaker(host)
+
+        attempt = 0
+        while True:
+            try:
+                is_trial = breaker.before_request()
+            except CircuitOpenError:
+                record_metric(label, 0, error=True, circuit_open=True)
+                raise
+
+            started = time.monotonic()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                elapsed_ms = (time.monotonic() - started) * 1000
+                record_metric(label, elapsed_ms, error=True)
+                breaker.record_failure()
+                if attempt >= retries or (not _failed_before_send(e) and not can_retry_sent):
+                    raise
+                logger.warning(f'[HTTP] {label} gagal ({e.__class__.__name__}), retry {attempt + 1}/{retries}')
+            else:
+                elapsed_ms = (time.monotonic() - started) * 1000
+                server_error = response.status_code >= 500
+                record_metric(label, elapsed_ms, error=server_error or response.status_code == 429)
+                if server_error:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= retries or not can_retry_sent:
+                    return response
+                logger.warning(f'[HTTP] {label} status {response.status_code}, retry {attempt + 1}/{retries}')
+            finally:
+                # Exception di luar RequestException tidak boleh membuat breaker macet di half-open
+                if is_trial:
+                    breaker.end_trial()
+
+            attempt += 1
+            # Full jitter: sleep acak antara 0 .. base * 2^attempt
+            time.sleep(random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))))
+
+
+_client = IntegrationClient()
+
+
+def get_http_client():
+    return _client
+
+
+def http_request(service, method, url, **kwargs):
+    return _client.request(service, method, url, **kwargs)
+
+
+def http_get(service, url, **kwargs):
+    return _client.request(service, 'GET', url, **kwargs)
+
+
+def http_post(service, url, **kwargs):
+    return _client.request(service, 'POST', url, **kwargs)
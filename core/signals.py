@@ -1,9 +1,12 @@
 """
 Signals untuk auto-sync NotulenItem status dengan Job progress
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import JobDate, Job
+from .models import JobDate, Job, Attachment, Project, CustomUser, AsetMesin, AsetDepartemen
+from .job_filters import bump_job_filter_version
+from .aset_tree import bump_aset_tree_version
+from .cache_utils import bump_team_data_version
 
 
 @receiver(post_save, sender=JobDate)
@@ -34,3 +37,107 @@ def revert_notulen_on_job_delete(sender, instance, **kwargs):
         instance.notulen_item.job_created = None
         instance.notulen_item.status = 'open'
         instance.notulen_item.save()
+
+
+# ==============================================================================
+# INVALIDASI CACHE JobFilterSpec (DASHBOARD & EXPORT)
+# ==============================================================================
+@receiver(pre_save, sender=Job)
+def remember_job_owners(sender, instance, **kwargs):
+    """Simpan PIC/assigned_to lama supaya tim lama juga ter-invalidate saat job dipindah"""
+    instance._old_owner_ids = ()
+    if instance.pk:
+        old = Job.objects.filter(pk=instance.pk).values_list('pic_id', 'assigned_to_id').first()
+        instance._old_owner_ids = old or ()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_team_cache_on_job(sender, instance, **kwargs):
+    """Job berubah: bump version tim PIC & assigned_to (lama dan baru) beserta atasannya"""
+    bump_team_data_version(
+        instance.pic_id,
+        instance.assigned_to_id,
+        *getattr(instance, '_old_owner_ids', ()),
+    )
+
+
+@receiver(post_save, sender=JobDate)
+@receiver(post_delete, sender=JobDate)
+def invalidate_team_cache_on_jobdate(sender, instance, **kwargs):
+    """Tanggal/status job berubah: bump version tim pemilik job"""
+    try:
+        job = instance.job
+    except Job.DoesNotExist:
+        return  # Job sudah terhapus (cascade) - sudah di-handle oleh signal Job
+    bump_team_data_version(job.pic_id, job.assigned_to_id)
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def invalidate_team_cache_on_attachment(sender, instance, **kwargs):
+    """Lampiran di-prefetch ke cache dashboard: bump version tim pemilik job"""
+    try:
+        job = instance.job
+    except Job.DoesNotExist:
+        return  # Job sudah terhapus (cascade) - sudah di-handle oleh signal Job
+    bump_team_data_version(job.pic_id, job.assigned_to_id)
+
+
+@receiver(m2m_changed, sender=Job.personil_ditugaskan.through)
+def invalidate_team_cache_on_personil(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Personil ditugaskan di-prefetch ke cache dashboard.
+    reverse=True: perubahan dari sisi Personil (pk_set = id job), untuk clear
+    id job dicatat di pre_clear karena post_clear tidak membawa pk_set.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_team_data_version(instance.pic_id, instance.assigned_to_id)
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_job_ids = list(instance.jobs_assigned.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_job_ids', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+    owners = Job.objects.filter(pk__in=pk_set or []).values_list('pic_id', 'assigned_to_id')
+    bump_team_data_version(*{owner_id for pair in owners for owner_id in pair})
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_job_filter_cache(sender, **kwargs):
+    """
+    Perubahan project (terutama is_shared) mengubah project yang bisa diakses
+    banyak user sekaligus, jadi semua hasil filter di-invalidate.
+    """
+    bump_job_filter_version()
+
+
+@receiver(post_save, sender=AsetMesin)
+@receiver(post_delete, sender=AsetMesin)
+@receiver(post_save, sender=AsetDepartemen)
+@receiver(post_delete, sender=AsetDepartemen)
+def invalidate_job_filter_cache_on_aset(sender, **kwargs):
+    """
+    Filter aset memakai subtree MPTT - pindah parent/hapus node mengubah
+    job mana yang masuk subtree, jadi hasil filter yang di-cache di-invalidate.
+    Payload tree untuk dropdown (api_aset_tree) juga diganti versinya.
+    """
+    bump_job_filter_version()
+    bump_aset_tree_version('mesin' if sender is AsetMesin else 'departemen')
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_job_filter_cache_on_hierarchy(sender, update_fields=None, **kwargs):
+    """
+    Hierarki (atasan) menentukan scope tim di JobFilterSpec.
+    Save parsial yang tidak menyentuh hierarki (misal last_login saat login) di-skip.
+    """
+    if update_fields is not None and 'atasan' not in update_fields:
+        return
+    bump_job_filter_version()
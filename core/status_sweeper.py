@@ -0,0 +1,162 @@
+"""
+Status sweeper: transisi status berbasis waktu, dijalankan Celery Beat (core.tasks.run_status_sweeper).
+
+Sebelumnya transisi ini dijalankan lazily:
+- PeminjamanListView.get_queryset menyimpan SETIAP peminjaman aktif/overdue di setiap
+  page load (flip ke overdue / selesai).
+- update_notulen_overdue me-load dan save() NotulenItem satu per satu.
+- PreventiveJobExecution yang lewat jadwal tetap 'Scheduled' dan status telatnya
+  diturunkan ulang (scheduled_date < today) di setiap query.
+
+Sekarang setiap transisi adalah UPDATE ... WHERE per batch:
+1. Ambil pk baris yang memenuhi kondisi (select_for_update skip_locked, jadi dua sweeper
+   / request yang sedang mengubah baris yang sama tidak saling tunggu).
+2. UPDATE ... WHERE pk IN (...) AND <kondisi yang sama>.
+3. StatusTransitionLog ditulis dengan bulk_create di transaksi yang sama.
+
+Transisi:
+    peminjaman_selesai   aktif/overdue -> selesai  (tidak ada detail dengan qty_kembali < qty_pinjam)
+    peminjaman_overdue   aktif -> overdue          (tgl_rencana_kembali lewat)
+    notulen_overdue      open/progress -> overdue  (target_deadline lewat)
+    preventive_late      Scheduled -> is_late=True (scheduled_date lewat)
+    preventive_unlate    is_late=True -> False     (Scheduled dan dijadwal ulang ke hari ini / depan)
+
+Settings (opsional):
+    STATUS_SWEEPER_BATCH_SIZE - baris per UPDATE (default 1000)
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import StatusTransitionLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'STATUS_SWEEPER_BATCH_SIZE', 1000)
+LATE_STATUS = 'Late'
+
+
+def _sweep(queryset, to_status, reason, update, from_status=None, log_to_status=None):
+    """
+    Jalankan satu transisi dalam batch UPDATE.
+
+    Args:
+        queryset: baris yang memenuhi kondisi transisi (WHERE)
+        update: kwargs untuk QuerySet.update()
+        from_status: label status asal di log (default nilai kolom status)
+        log_to_status: label status tujuan di log (default to_status)
+    Returns:
+        Jumlah baris yang berubah
+    """
+    model_label = queryset.model._meta.label_lower
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.select_for_update(skip_locked=True, of=('self',))
+                .order_by('pk')
+                .values_list('pk', 'status')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            updated = queryset.filter(pk__in=[pk for pk, _ in rows]).update(**update)
+            StatusTransitionLog.objects.bulk_create([
+                StatusTransitionLog(
+                    model_label=model_label,
+                    object_id=str(pk),
+                    from_status=from_status or status,
+                    to_status=log_to_status or to_status,
+                    reason=reason,
+                )
+                for pk, status in rows
+            ], batch_size=500)
+        total += updated
+        if len(rows) < BATCH_SIZE or not updated:
+            break
+    return total
+
+
+# ==============================================================================
+# TRANSISI
+# ==============================================================================
+def sweep_peminjaman_selesai():
+    from toolkeeper.models import DetailPeminjaman, Peminjaman
+
+    outstanding = DetailPeminjaman.objects.filter(peminjaman=OuterRef('pk'), qty_kembali__lt=F('qty_pinjam'))
+    queryset = Peminjaman.objects.filter(status__in=['aktif', 'overdue']).filter(~Exists(outstanding))
+    return _sweep(queryset, 'selesai', 'Semua alat sudah dikembalikan', {'status': 'selesai'})
+
+
+def sweep_peminjaman_overdue(now=None):
+    from toolkeeper.models import Peminjaman
+
+    now = now or timezone.now()
+    queryset = Peminjaman.objects.filter(status='aktif', tgl_rencana_kembali__lt=now)
+    return _sweep(queryset, 'overdue', 'Melewati tanggal rencana kembali', {'status': 'overdue'})
+
+
+def sweep_notulen_overdue(today=None):
+    from meetings.models import NotulenItem
+
+    today = today or timezone.now().date()
+    queryset = NotulenItem.objects.filter(status__in=['open', 'progress'], target_deadline__lt=today)
+    return _sweep(
+        queryset, 'overdue', 'Melewati target deadline',
+        {'status': 'overdue', 'updated_at': timezone.now()},
+    )
+
+
+def sweep_preventive_late(today=None):
+    from preventive_jobs.models import PreventiveJobExecution
+
+    today = today or timezone.now().date()
+    queryset = PreventiveJobExecution.objects.filter(
+        status='Scheduled', is_late=False, is_deleted=False, scheduled_date__lt=today
+    )
+    return _sweep(
+        queryset, LATE_STATUS, 'Melewati tanggal terjadwal',
+        {'is_late': True, 'updated_at': timezone.now()},
+    )
+
+
+def sweep_preventive_unlate(today=None):
+    from preventive_jobs.models import PreventiveJobExecution
+
+    today = today or timezone.now().date()
+    queryset = PreventiveJobExecution.objects.filter(status='Scheduled', is_late=True, scheduled_date__gte=today)
+    return _sweep(
+        queryset, 'Scheduled', 'Dijadwal ulang',
+        {'is_late': False, 'updated_at': timezone.now()},
+        from_status=LATE_STATUS,
+    )
+
+
+# Urutan penting: peminjaman yang sudah lengkap kembali ditutup sebelum dicek overdue
+SWEEPS = (
+    ('peminjaman_selesai', sweep_peminjaman_selesai),
+    ('peminjaman_overdue', sweep_peminjaman_overdue),
+    ('notulen_overdue', sweep_notulen_overdue),
+    ('preventive_late', sweep_preventive_late),
+    ('preventive_unlate', sweep_preventive_unlate),
+)
+
+
+def run_status_sweeper():
+    """
+    Jalankan semua transisi. Satu transisi gagal tidak menghentikan yang lain.
+
+    Returns:
+        dict {nama transisi: jumlah baris berubah (None jika error)}
+    """
+    counts = {}
+    for name, sweep in SWEEPS:
+        try:
+            counts[name] = sweep()
+        except Exception as e:
+            logger.exception(f'[StatusSweeper] {name} gagal: {e}')
+            counts[name] = None
+    return counts
@@ -0,0 +1,83 @@
+"""
+Celery tasks untuk core app.
+
+Dokumentasi: https://docs.celeryproject.io/
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, ignore_result=True)
+def process_whatsapp_outbox(self, batch_size=10, max_batches=100):
+    """
+    Consumer WhatsApp outbox (lihat core/whatsapp_outbox.py).
+
+    Di-trigger via transaction.on_commit setiap enqueue dan oleh Celery Beat tiap menit
+    (jaring pengaman untuk retry terjadwal / trigger yang gagal). Beberapa worker boleh
+    jalan paralel - claim memakai select_for_update(skip_locked=True).
+    batch_size dibatasi MAX_BATCH_SIZE (lihat STALE_SENDING_AFTER).
+    """
+    from core.whatsapp_outbox import MAX_BATCH_SIZE, process_outbox, has_due_messages
+
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+
+    totals = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+    for _ in range(max_batches):
+        summary = process_outbox(batch_size)
+        for key in totals:
+            totals[key] += summary[key]
+        if summary['claimed'] < batch_size:
+            break
+    else:
+        # Masih ada antrian - lanjutkan di task baru supaya worker tidak dimonopoli
+        if has_due_messages():
+            self.apply_async(kwargs={'batch_size': batch_size, 'max_batches': max_batches})
+
+    if totals['claimed']:
+        logger.info(
+            f"[WA Outbox] Claimed: {totals['claimed']}, Sent: {totals['sent']}, "
+            f"Retry: {totals['retry']}, Failed: {totals['failed']}"
+        )
+    return totals
+
+
+@shared_task(ignore_result=True)
+def sync_leave_calendars(departemen_ids=None):
+    """
+    Sync incremental Google Calendar -> LeaveEvent (lihat core/leave_calendar_sync.py).
+    Dijalankan Celery Beat tiap 10 menit dan di-trigger leave_event_view jika data basi.
+    """
+    from core.leave_calendar_sync import sync_all_leave_calendars
+
+    results = sync_all_leave_calendars(departemen_ids=departemen_ids)
+    logger.info(f"[LeaveSync] {results}")
+    return results
+
+
+@shared_task(ignore_result=True)
+def run_status_sweeper():
+    """
+    Transisi status berbasis waktu (lihat core/status_sweeper.py): peminjaman overdue/selesai,
+    notulen overdue, preventive telat. Dijalankan Celery Beat tiap 15 menit.
+    """
+    from core.status_sweeper import run_status_sweeper as sweep
+
+    counts = sweep()
+    if any(counts.values()) or None in counts.values():
+        logger.info(f"[StatusSweeper] {counts}")
+    return counts
+
+
+@shared_task(ignore_result=True)
+def run_gas_export(export_id, kind, ids, export_type, force=False):
+    """
+    Export job ke Google Apps Script (lihat core/export_handlers.py - EXPORT PIPELINE).
+    Progress disimpan di GasExportJob dan di-poll frontend lewat core:export_status.
+    """
+    from core.export_handlers import run_export
+
+    state = run_export(export_id, kind, ids, export_type, force=force)
+    logger.info(f"[GAS Export] {export_id}: {state.get('status')} - {state.get('message')}")
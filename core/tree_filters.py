@@ -0,0 +1,71 @@
+"""
+Subtree filter helpers untuk model MPTT (AsetMesin & AsetDepartemen).
+
+Sebelumnya filter aset memakai join berantai seperti
+`aset__parent__parent_id=line_id`, yang:
+- hard-code kedalaman 3 level (Line > Mesin > Sub Mesin)
+- join tabel aset 2-3 kali
+- tidak match job yang aset-nya ada di level lain (misal langsung di Mesin)
+
+Dengan nested set MPTT, semua descendant sebuah node memenuhi:
+    tree_id = node.tree_id AND lft >= node.lft AND rght <= node.rght
+sehingga filter level mana pun cukup SATU range scan ber-index
+(index (tree_id, lft, rght) di Meta model).
+
+Usage:
+    q = subtree_q(AsetMesin, line_id, prefix='aset')
+    jobs = Job.objects.filter(q)
+"""
+
+from django.db.models import Q
+
+
+def get_subtree_bounds(model, node_id):
+    """
+    Return (tree_id, lft, rght) untuk node, atau None jika node tidak ada.
+
+    Sengaja TIDAK di-cache: insert/move node di tree yang sama menggeser lft/rght
+    node lain, sedangkan lookup by PK ini murah.
+    """
+    if not node_id:
+        return None
+    return model._default_manager.filter(pk=node_id).values_list(
+        'tree_id', 'lft', 'rght'
+    ).first()
+
+
+def subtree_q(model, node_id, prefix='', include_self=True):
+    """
+    Q object: semua row yang (FK ke) node di dalam subtree `node_id`.
+
+    Args:
+        model: Model MPTT (AsetMesin / AsetDepartemen)
+        node_id: ID root subtree
+        prefix: Path FK dari model yang difilter, misal 'aset' untuk Job,
+                'job__aset' untuk JobDate. Kosong jika memfilter model MPTT itu sendiri.
+        include_self: Ikutkan node itu sendiri
+
+    Returns:
+        Q object. Jika node tidak ditemukan, Q yang tidak match apa pun.
+    """
+    bounds = get_subtree_bounds(model, node_id)
+    if bounds is None:
+        return Q(pk__in=[])
+    return subtree_q_from_bounds(bounds, prefix=prefix, include_self=include_self)
+
+
+def subtree_q_from_bounds(bounds, prefix='', include_self=True):
+    """Sama seperti subtree_q, tapi dari (tree_id, lft, rght) yang sudah diketahui"""
+    tree_id, lft, rght = bounds
+    field = f'{prefix}__' if prefix else ''
+    if include_self:
+        return Q(**{
+            f'{field}tree_id': tree_id,
+            f'{field}lft__gte': lft,
+            f'{field}rght__lte': rght,
+        })
+    return Q(**{
+        f'{field}tree_id': tree_id,
+        f'{field}lft__gt': lft,
+        f'{field}rght__lt': rght,
+    })
@@ -101,9 +101,11 @@ urlpatterns = [
     
     # URL API CASCADING ASET DEPARTEMEN (UNTUK MULTI-DEPARTEMEN)
     path('api/aset-children/', views.api_aset_children, name='api_aset_children'),
+    path('api/aset-tree/<str:kind>/', views.api_aset_tree, name='api_aset_tree'),
     
     # URL EXPORT KE GOOGLE APPS SCRIPT
     path('api/export-jobs/', views.export_jobs_to_gas, name='export_jobs_to_gas'),
+    path('api/export-jobs/<str:export_id>/status/', views.export_status_view, name='export_status'),
     
     # URL EXPORT PDF (BARU)
     path('export/daily-jobs-pdf/', views.export_daily_jobs_pdf, name='export_daily_jobs_pdf'),
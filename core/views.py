@@ -3,16 +3,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction 
 from .models import Job, Project, Personil, AsetMesin, AsetDepartemen, JobDate, CustomUser, LeaveEvent, Karyawan
-from .cache_utils import get_user_accessible_projects
+from .job_filters import JobFilterSpec
+from .pagination import (
+    KeysetPaginator, KeysetPage, CURSOR_PREV, capped_count, format_count,
+    decode_cursor, reverse_ordering,
+)
+from .aset_tree import ASET_TREE_KINDS, get_aset_tree_version, get_aset_tree_payload
+from .leave_calendar_sync import request_leave_sync_if_stale
+from django.core.cache import cache
 from django.http import JsonResponse, HttpResponseRedirect, HttpResponse
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 import requests
 import json
 from io import BytesIO
 import os
 import base64
 # Tambahkan 'Count', 'Case', 'Max' untuk kalkulasi
-from django.db.models import Q, Count, Case, When, IntegerField, Max 
+from django.db.models import Q, Count, Case, When, IntegerField, Max, F, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.urls import reverse
 import datetime 
 import calendar
@@ -35,42 +43,21 @@ from .forms import (
 # ==============================================================================
 # VIEW HALAMAN UTAMA (DASHBOARD) - (ROMBAK BESAR)
 # ==============================================================================
+DASHBOARD_CACHE_TIMEOUT = 900  # 15 menit (invalidasi utama lewat version stamp tim)
+
 @login_required(login_url='core:login')
 def dashboard_view(request):
     user = request.user
     
-    # === 1. LOGIKA FILTER (BULAN & TAHUN) ===
-    now = datetime.datetime.now()
-    try:
-        current_year_param = request.GET.get('year', '')
-        current_month_param = request.GET.get('month', '')
-        
-        # Jika kosong atau '0', gunakan nilai default
-        # Default: tampilkan "Semua" (0) ATAU jika user pilih hanya 1, default ke tahun sekarang
-        if current_year_param and current_year_param != '0':
-            current_year = int(current_year_param)
-        else:
-            current_year = 0  # Artinya "Semua tahun"
-        
-        if current_month_param and current_month_param != '0':
-            current_month = int(current_month_param)
-            # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
-            if current_year == 0:
-                current_year = now.year
-        else:
-            current_month = 0  # Artinya "Semua bulan"
-    except ValueError:
-        current_year = 0
-        current_month = 0
+    # === 1. PARSE SEMUA FILTER SEKALI (SHARED DENGAN EXPORT) ===
+    # Bulan/tahun, date range, PIC, aset & sort di-parse dan divalidasi oleh JobFilterSpec
+    spec = JobFilterSpec.from_request(request)
     
     # SAVE CURRENT FILTER TO SESSION (untuk persistence saat redirect)
     request.session['dashboard_filter_params'] = request.GET.urlencode()
     request.session.modified = True
     
-    # Flag untuk menentukan apakah filter aktif atau "Semua"
-    # Jika KEDUANYA 0, berarti "Semua". Jika salah satu ada value, filter aktif.
-    filter_all_dates = (current_month == 0 and current_year == 0)
-    
+    now = datetime.datetime.now()
     year_list = range(now.year - 2, now.year + 3) 
     month_list = [
         {"id": 1, "name": "Januari"}, {"id": 2, "name": "Februari"},
@@ -81,258 +68,7 @@ def dashboard_view(request):
         {"id": 11, "name": "November"}, {"id": 12, "name": "Desember"}
     ]
     
-    # === 3. LOGIKA FILTER PIC (KONSEP BARU ANDA) ===
-    subordinate_ids = user.get_all_subordinates()
-    subordinates_list = CustomUser.objects.filter(id__in=subordinate_ids).order_by('username')
-    
-    selected_pic_id = request.GET.get('pic', '')
-    
-    # === 3b. LOGIKA FILTER TANGGAL SPESIFIK (BARU) ===
-    selected_date_from = request.GET.get('date_from', '')
-    selected_date_to = request.GET.get('date_to', '')
-    
-    if selected_pic_id == 'my_jobs':
-        team_query = Q(pic=user) | Q(assigned_to=user)
-    elif selected_pic_id:
-        try:
-            selected_user = get_object_or_404(CustomUser, id=int(selected_pic_id))
-            selected_user_sub_ids = selected_user.get_all_subordinates()
-            team_ids = selected_user_sub_ids + [selected_user.id]
-            team_query = Q(pic_id__in=team_ids) | Q(assigned_to_id__in=team_ids)
-        except (ValueError, CustomUser.DoesNotExist):
-            team_query = (Q(pic=user) | Q(assigned_to=user)) | (Q(pic_id__in=subordinate_ids) | Q(assigned_to_id__in=subordinate_ids)) # Fallback
-    else:
-        team_query = (Q(pic=user) | Q(assigned_to=user)) | (Q(pic_id__in=subordinate_ids) | Q(assigned_to_id__in=subordinate_ids))
-
-    # === 2b. LOGIKA FILTER PROJECT SHARING (UPDATED - BIDIRECTIONAL + CACHED) ===
-    # Filter jobs hanya dari project yang bisa diakses user (bidirectional hierarchy):
-    # 1. Project yang dibuat user
-    # 2. Project yang di-share ke semua
-    # 3. Project dari subordinates (untuk supervisor review)
-    # 4. Project dari supervisors (untuk collaborative work)
-    # Cache enabled: get_user_accessible_projects() uses caching
-    accessible_project_ids = get_user_accessible_projects(user)
-    project_filter = Q(project__id__in=accessible_project_ids) | Q(project__isnull=True)
-
-    # === 3. LOGIKA FILTER ASET (BARU) ===
-    selected_line_id = request.GET.get('line', '')
-    selected_mesin_id = request.GET.get('mesin', '')
-    selected_sub_mesin_id = request.GET.get('sub_mesin', '')
-    
-    # === 3b. LOGIKA FILTER ASET DEPARTEMEN (UNTUK OPERASIONAL & OTHER) ===
-    selected_departemen_id = request.GET.get('departemen', '')
-    selected_bagian_id = request.GET.get('bagian', '')
-    selected_sub_bagian_id = request.GET.get('sub_bagian', '')
-    
-    # === 4. LOGIKA DATA TABEL (QUERY OPTIMASI BARU) ===
-    # Filter Job berdasarkan TIM + PROJECT ACCESSIBLE, TAPI JANGAN filter tanggal dulu
-    all_jobs_team_base = Job.objects.filter(team_query, project_filter).distinct()
-    
-    # Apply asset filters for AsetMesin (Teknik)
-    if selected_sub_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_id=selected_sub_mesin_id)
-    elif selected_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent_id=selected_mesin_id)
-    elif selected_line_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent__parent_id=selected_line_id)
-    
-    # Apply asset filters for AsetDepartemen (Operasional & others)
-    if selected_sub_bagian_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_departemen_id=selected_sub_bagian_id)
-    elif selected_bagian_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_departemen__parent_id=selected_bagian_id)
-    elif selected_departemen_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_departemen__parent__parent_id=selected_departemen_id)
-    
-    # Sekarang filter job yang punya tanggal di bulan/tahun terpilih
-    # PRIORITY: Jika ada date_range, IGNORE bulan/tahun filter (lebih spesifik)
-    has_date_range = selected_date_from or selected_date_to
-    
-    if filter_all_dates and not has_date_range:
-        all_jobs_team = all_jobs_team_base.select_related(
-            'pic', 
-            'assigned_to',
-            'project',
-            'aset__parent__parent',
-            'aset_departemen__parent__parent'
-        ).prefetch_related(
-            'personil_ditugaskan', 
-            'tanggal_pelaksanaan',
-            'attachments'
-        ).distinct()
-    else:
-        # Build filter dynamically based on what user selected
-        date_filter = Q()
-        
-        # Jika ada date_range, IGNORE bulan/tahun (date_range lebih prioritas)
-        if not has_date_range:
-            # Filter by bulan/tahun HANYA jika TIDAK ada date_range
-            if current_month != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-            if current_year != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        # Filter by tanggal range (date_from to date_to)
-        if selected_date_from:
-            try:
-                date_from_obj = datetime.datetime.strptime(selected_date_from, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__gte=date_from_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        if selected_date_to:
-            try:
-                date_to_obj = datetime.datetime.strptime(selected_date_to, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__lte=date_to_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        all_jobs_team = all_jobs_team_base.filter(date_filter).select_related(
-            'pic', 
-            'assigned_to',
-            'project',
-            'aset__parent__parent' 
-        ).prefetch_related(
-            'personil_ditugaskan', 
-            'tanggal_pelaksanaan',
-            'attachments'
-        ).distinct()
-
-    # === 3a. LOGIKA SORTING BARU ===
-    sort_by = request.GET.get('sort', 'updated_at')  # Default ke 'updated_at'
-    sort_order = request.GET.get('order', 'desc')  # Default descending
-    
-    # Mapping kolom sorting ke field database
-    sort_mapping = {
-        'nama_pekerjaan': 'nama_pekerjaan',
-        'pic': 'pic__username',
-        'line': 'aset__parent__parent__nama',
-        'mesin': 'aset__parent__nama',
-        'sub_mesin': 'aset__nama',
-        'departemen': 'aset_departemen__parent__parent__nama',
-        'bagian': 'aset_departemen__parent__nama',
-        'sub_bagian': 'aset_departemen__nama',
-        'fokus': 'fokus',
-        'prioritas': 'prioritas',
-        'updated_at': 'updated_at',
-    }
-    
-    # Dapatkan field sorting yang valid
-    sort_field = sort_mapping.get(sort_by, 'updated_at')
-    
-    # Tambahkan prefix - untuk descending
-    if sort_order == 'desc':
-        sort_field = f'-{sort_field}'
-    
-    # Apply sorting (kecuali untuk 'progress' yang perlu special handling)
-    if sort_by == 'progress':
-        # Untuk progress, kita akan sort di Python setelah query
-        # karena ini adalah calculated field
-        daily_job_data = list(all_jobs_team.filter(tipe_job='Daily'))
-        project_job_data = list(all_jobs_team.filter(tipe_job='Project'))
-        
-        # Sort berdasarkan get_progress_percent()
-        reverse_sort = (sort_order == 'desc')
-        daily_job_data.sort(key=lambda x: x.get_progress_percent(), reverse=reverse_sort)
-        project_job_data.sort(key=lambda x: x.get_progress_percent(), reverse=reverse_sort)
-    else:
-        # Sorting normal via database
-        daily_job_data = all_jobs_team.filter(tipe_job='Daily').order_by(sort_field)
-        project_job_data = all_jobs_team.filter(tipe_job='Project').order_by(sort_field)
-        
-    modal_form = JobDateStatusForm()
-
-    # === 5. LOGIKA DROPDOWN DATA ASET ===
-    # Get all Lines (level=0)
-    line_list = AsetMesin.objects.filter(level=0).order_by('nama')
-    
-    # Get Mesin based on selected Line (level=1) - with prefetch
-    mesin_list = AsetMesin.objects.none()
-    if selected_line_id:
-        mesin_list = AsetMesin.objects.filter(
-            parent_id=selected_line_id, level=1
-        ).order_by('nama').prefetch_related('parent', 'children')
-    
-    # Get Sub Mesin based on selected Mesin (level=2) - with prefetch
-    sub_mesin_list = AsetMesin.objects.none()
-    if selected_mesin_id:
-        sub_mesin_list = AsetMesin.objects.filter(
-            parent_id=selected_mesin_id, level=2
-        ).order_by('nama').prefetch_related('parent')
-    
-    # === 5b. LOGIKA DROPDOWN DATA ASET DEPARTEMEN (UNTUK OPERASIONAL & OTHER) ===
-    # Get all Departemen (level=0) - untuk semua user yang bukan Teknik
-    departemen_list = AsetDepartemen.objects.filter(level=0).order_by('nama')
-    
-    # Get Bagian based on selected Departemen (level=1) - with prefetch
-    bagian_list = AsetDepartemen.objects.none()
-    if selected_departemen_id:
-        bagian_list = AsetDepartemen.objects.filter(
-            parent_id=selected_departemen_id, level=1
-        ).order_by('nama').prefetch_related('parent', 'children')
-    
-    # Get Sub Bagian based on selected Bagian (level=2) - with prefetch
-    sub_bagian_list = AsetDepartemen.objects.none()
-    if selected_bagian_id:
-        sub_bagian_list = AsetDepartemen.objects.filter(
-            parent_id=selected_bagian_id, level=2
-        ).order_by('nama').prefetch_related('parent')
-    
-    # === 6. LOGIKA BARU: DASBOR PROGRES MESIN (KONSEP 2 ANDA) ===
-    
-    # Ambil semua Aset (Mesin, level=1) yang relevan dengan tim Anda
-    # dan punya job di bulan/tahun terpilih (atau semua jika filter_all_dates)
-    if filter_all_dates:
-        relevant_aset_ids = all_jobs_team_base.filter(
-            aset__level=2, # Ambil Sub-Mesin
-        ).values_list('aset__parent_id', flat=True).distinct() # Ambil ID Mesin (parent-nya)
-    else:
-        aset_date_filter = Q()
-        if current_month != 0:
-            aset_date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-        if current_year != 0:
-            aset_date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        relevant_aset_ids = all_jobs_team_base.filter(
-            aset__level=2 # Ambil Sub-Mesin
-        ).filter(aset_date_filter).values_list('aset__parent_id', flat=True).distinct() # Ambil ID Mesin (parent-nya)
-    
-    relevant_mesin = AsetMesin.objects.filter(id__in=relevant_aset_ids)
-
-    # Hitung progres untuk setiap mesin
-    progress_data = []
-    for mesin in relevant_mesin:
-        # Ambil semua JobDate yang terkait dengan mesin ini & filter
-        if filter_all_dates:
-            dates_in_mesin = JobDate.objects.filter(
-                job__in=all_jobs_team_base,      # Hanya job dari tim
-                job__aset__parent=mesin,         # Hanya job di bawah mesin ini
-            )
-        else:
-            date_filter_mesin = Q()
-            if current_month != 0:
-                date_filter_mesin &= Q(tanggal__month=current_month)
-            if current_year != 0:
-                date_filter_mesin &= Q(tanggal__year=current_year)
-            
-            dates_in_mesin = JobDate.objects.filter(
-                job__in=all_jobs_team_base,      # Hanya job dari tim
-                job__aset__parent=mesin,         # Hanya job di bawah mesin ini
-            ).filter(date_filter_mesin)
-        
-        total_dates = dates_in_mesin.count()
-        if total_dates > 0:
-            done_dates = dates_in_mesin.filter(status='Done').count()
-            progress = int((done_dates / total_dates) * 100)
-            progress_data.append({
-                'nama': mesin.nama,
-                'progress': progress
-            })
-    
-    # Urutkan berdasarkan progress (opsional, tapi bagus)
-    progress_data = sorted(progress_data, key=lambda x: x['progress'], reverse=True)
-    
-    # === 7. PAGINATION LOGIC (BARU) ===
+    # === 2. PAGINATION PARAMS ===
     # Get page size from GET parameter, default 20
     try:
         page_size = int(request.GET.get('page_size', 20))
@@ -349,13 +85,28 @@ def dashboard_view(request):
         daily_page = 1
         project_page = 1
     
-    # Paginate daily jobs
-    daily_paginator = Paginator(daily_job_data, page_size)
-    daily_page_obj = daily_paginator.get_page(daily_page)
+    # Cursor untuk keyset pagination (dipakai saat sort = updated_at)
+    daily_cursor = request.GET.get('daily_cursor', '')
+    project_cursor = request.GET.get('project_cursor', '')
+    
+    # === 3. DATA DASHBOARD (CACHED PER USER + FILTER SPEC) ===
+    # Key memakai version stamp tim user, sehingga write ke Job/JobDate/Project/hierarki
+    # yang mempengaruhi tim ini otomatis membuat cache invalid
+    cache_key = spec.cache_key(
+        'dashboard', page_size, daily_page, project_page, daily_cursor, project_cursor
+    )
+    dashboard_data = cache.get(cache_key)
+    if dashboard_data is None:
+        dashboard_data = _build_dashboard_data(
+            spec, page_size,
+            pages={'Daily': daily_page, 'Project': project_page},
+            cursors={'Daily': daily_cursor, 'Project': project_cursor},
+        )
+        cache.set(cache_key, dashboard_data, DASHBOARD_CACHE_TIMEOUT)
     
-    # Paginate project jobs
-    project_paginator = Paginator(project_job_data, page_size)
-    project_page_obj = project_paginator.get_page(project_page)
+    daily_page_obj = dashboard_data['daily_page_obj']
+    project_page_obj = dashboard_data['project_page_obj']
+    modal_form = JobDateStatusForm()
 
     # ==========================================================
     # === DETERMINE USER DEPARTEMEN TYPE (TEKNIK vs OPERASIONAL, etc) ===
@@ -364,6 +115,7 @@ def dashboard_view(request):
         user_departemen is not None and
         user_departemen.nama_departemen.strip().lower() == 'teknik'
     )
+    aset_tree_kind = 'mesin' if is_teknik else 'departemen'
     # ===================================================================
 
     context = {
@@ -371,58 +123,100 @@ def dashboard_view(request):
         'is_teknik': is_teknik,  # NEW: For conditional column display
         'daily_job_data': daily_page_obj.object_list,
         'daily_page_obj': daily_page_obj,
-        'daily_paginator': daily_paginator,
-        'daily_total_count': daily_paginator.count,
+        'daily_paginator': getattr(daily_page_obj, 'paginator', None),
+        'daily_total_count': dashboard_data['daily_total_count'],
+        'daily_cursor_query': _query_without(request, 'daily_cursor', 'daily_page'),
         
         'project_job_data': project_page_obj.object_list,
         'project_page_obj': project_page_obj,
-        'project_paginator': project_paginator,
-        'project_total_count': project_paginator.count,
+        'project_paginator': getattr(project_page_obj, 'paginator', None),
+        'project_total_count': dashboard_data['project_total_count'],
+        'project_cursor_query': _query_without(request, 'project_cursor', 'project_page'),
         
         'page_size': page_size,
         'page_size_options': [10, 20, 30, 40, 50, 100],
         
-        # Filter Context
-        'current_month': current_month,
-        'current_year': current_year,
+        # Filter Context (current_month, selected_*_id, sort_by, dll dari spec)
+        **spec.template_context(),
         'month_list': month_list,
         'year_list': year_list,
         'modal_form': modal_form, 
         
-        'subordinates_list': subordinates_list,
-        'selected_pic_id': selected_pic_id,
-        
-        # Asset Filter Context (BARU)
-        'line_list': line_list,
-        'mesin_list': mesin_list,
-        'sub_mesin_list': sub_mesin_list,
-        'selected_line_id': selected_line_id,
-        'selected_mesin_id': selected_mesin_id,
-        'selected_sub_mesin_id': selected_sub_mesin_id,
-        
-        # Asset Departemen Filter Context (BARU)
-        'departemen_list': departemen_list,
-        'bagian_list': bagian_list,
-        'sub_bagian_list': sub_bagian_list,
-        'selected_departemen_id': selected_departemen_id,
-        'selected_bagian_id': selected_bagian_id,
-        'selected_sub_bagian_id': selected_sub_bagian_id,
-        
-        # Date Range Filter Context (BARU)
-        'selected_date_from': selected_date_from,
-        'selected_date_to': selected_date_to,
-        
-        # Sorting Context (BARU)
-        'sort_by': sort_by,
-        'sort_order': sort_order,
+        'subordinates_list': dashboard_data['subordinates_list'],
+        
+        # Asset Filter Context: dropdown diisi client-side dari api_aset_tree
+        # (URL ber-versi -> browser cukup download ulang saat tree berubah)
+        'aset_tree_kind': aset_tree_kind,
+        'aset_tree_version': get_aset_tree_version(aset_tree_kind),
         
         'filter_params': request.GET.urlencode(),
+        'filter_hash': spec.hash,
         
-        'progress_data': progress_data, # <-- KIRIM DATA PROGRES BARU
+        'progress_data': dashboard_data['progress_data'], # <-- KIRIM DATA PROGRES BARU
     }
     return render(request, 'dashboard.html', context)
 
 
+def _query_without(request, *keys):
+    """Querystring GET saat ini tanpa key tertentu (untuk link pagination)"""
+    params = request.GET.copy()
+    for key in keys:
+        params.pop(key, None)
+    return params.urlencode()
+
+
+def _paginate_jobs(spec, tipe_job, page_size, page_number, cursor):
+    """
+    Return (page_obj, total_count_label) untuk satu tabel job.
+
+    - Sort updated_at (default): keyset pagination di (updated_at, id) -> biaya per halaman
+      konstan, total count dibatasi (capped) bukan COUNT penuh.
+    - Sort lain: paginate list ID ter-cache dari spec (offset di Python, bukan SQL OFFSET).
+    """
+    if spec.keyset_ordering:
+        queryset = spec.queryset(tipe_job)
+        paginator = KeysetPaginator(queryset.only('id', 'updated_at'), spec.keyset_ordering, page_size)
+        page_obj = paginator.get_page(cursor)
+        page_obj.object_list = spec.fetch([job.id for job in page_obj.object_list])
+        return page_obj, format_count(*capped_count(queryset))
+
+    paginator = Paginator(spec.job_ids(tipe_job), page_size)
+    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = spec.fetch(page_obj.object_list)
+    return page_obj, paginator.count
+
+
+def _build_dashboard_data(spec, page_size, pages, cursors):
+    """
+    Jalankan semua query berat dashboard untuk satu filter spec.
+    Hasilnya (list biasa & Page object, bukan queryset lazy) aman untuk di-cache.
+    """
+    # === DROPDOWN PIC (TIM SAYA) ===
+    subordinates_list = list(
+        CustomUser.objects.filter(id__in=spec.subordinate_ids).order_by('username')
+    )
+    
+    # === DATA TABEL ===
+    # Urutan (termasuk sort 'progress') sudah dihitung di SQL oleh spec.
+    # Object Job hanya di-fetch untuk halaman aktif.
+    daily_page_obj, daily_total_count = _paginate_jobs(
+        spec, 'Daily', page_size, pages['Daily'], cursors['Daily']
+    )
+    project_page_obj, project_total_count = _paginate_jobs(
+        spec, 'Project', page_size, pages['Project'], cursors['Project']
+    )
+
+    return {
+        'subordinates_list': subordinates_list,
+        'daily_page_obj': daily_page_obj,
+        'daily_total_count': daily_total_count,
+        'project_page_obj': project_page_obj,
+        'project_total_count': project_total_count,
+        # Satu query agregat (GROUP BY mesin) menggantikan 2 query COUNT per mesin
+        'progress_data': spec.mesin_progress(),
+    }
+
+
 # ==============================================================================
 # VIEW DETAIL PROJECT (QUERY OPTIMASI BARU)
 # ==============================================================================
@@ -1056,125 +850,13 @@ def export_daily_jobs_pdf(request):
     """
     user = request.user
     
-    # === 1. LOGIKA FILTER (BULAN & TAHUN) - SAMA SEPERTI DASHBOARD ===
-    now = datetime.datetime.now()
-    try:
-        current_year_param = request.GET.get('year', '')
-        current_month_param = request.GET.get('month', '')
-        
-        # Jika kosong atau '0', gunakan nilai default
-        if current_year_param and current_year_param != '0':
-            current_year = int(current_year_param)
-        else:
-            current_year = 0  # Artinya "Semua tahun"
-        
-        if current_month_param and current_month_param != '0':
-            current_month = int(current_month_param)
-            # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
-            if current_year == 0:
-                current_year = now.year
-        else:
-            current_month = 0  # Artinya "Semua bulan"
-    except ValueError:
-        current_year = 0
-        current_month = 0
-    
-    # === 1b. LOGIKA FILTER TANGGAL SPESIFIK (DATE RANGE) ===
-    selected_date_from = request.GET.get('date_from', '')
-    selected_date_to = request.GET.get('date_to', '')
-    has_date_range = selected_date_from or selected_date_to
-    
-    # Flag untuk menentukan apakah filter aktif atau "Semua"
-    filter_all_dates = (current_month == 0 and current_year == 0) and not has_date_range
+    # === 1. FILTER - SAMA PERSIS DENGAN DASHBOARD (JobFilterSpec) ===
+    spec = JobFilterSpec.from_request(request, default_sort='nama_pekerjaan', default_order='asc')
+    current_month = spec.month
+    current_year = spec.year
     
-    # === 2. LOGIKA FILTER PIC ===
-    subordinate_ids = user.get_all_subordinates()
-    selected_pic_id = request.GET.get('pic', '')
-    
-    if selected_pic_id == 'my_jobs':
-        team_query = Q(pic=user)
-    elif selected_pic_id:
-        try:
-            selected_user = get_object_or_404(CustomUser, id=int(selected_pic_id))
-            selected_user_sub_ids = selected_user.get_all_subordinates()
-            team_ids = selected_user_sub_ids + [selected_user.id]
-            team_query = Q(pic_id__in=team_ids)
-        except (ValueError, CustomUser.DoesNotExist):
-            team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    else:
-        team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-
-    # === 3. LOGIKA FILTER ASET ===
-    selected_line_id = request.GET.get('line', '')
-    selected_mesin_id = request.GET.get('mesin', '')
-    selected_sub_mesin_id = request.GET.get('sub_mesin', '')
-    
-    # === 3b. LOGIKA SORT ===
-    sort_by = request.GET.get('sort_by', 'nama_pekerjaan')
-    sort_order = request.GET.get('sort_order', 'asc')
-    
-    # Build sort field (add '-' prefix for descending)
-    if sort_order == 'desc':
-        sort_field = f'-{sort_by}'
-    else:
-        sort_field = sort_by
-    
-    # === 4. LOGIKA DATA TABEL ===
-    all_jobs_team_base = Job.objects.filter(team_query, tipe_job='Daily').distinct()
-    
-    if selected_sub_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_id=selected_sub_mesin_id)
-    elif selected_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent_id=selected_mesin_id)
-    elif selected_line_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent__parent_id=selected_line_id)
-    
-    # Filter untuk Daily Jobs (sama seperti dashboard)
-    if filter_all_dates:
-        # Ambil semua daily jobs tanpa filter tanggal
-        daily_job_data = all_jobs_team_base.select_related(
-            'pic', 
-            'project',
-            'aset__parent__parent' 
-        ).prefetch_related(
-            'personil_ditugaskan', 
-            'tanggal_pelaksanaan',
-            'attachments'
-        ).order_by(sort_field).distinct()
-    else:
-        # Build filter dynamically based on what user selected
-        date_filter = Q()
-        
-        # PRIORITY: Jika ada date_range, IGNORE bulan/tahun filter (lebih spesifik)
-        if not has_date_range:
-            # Filter by bulan/tahun HANYA jika TIDAK ada date_range
-            if current_month != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-            if current_year != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        # Filter by tanggal range (date_from to date_to)
-        if selected_date_from:
-            try:
-                date_from_obj = datetime.datetime.strptime(selected_date_from, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__gte=date_from_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        if selected_date_to:
-            try:
-                date_to_obj = datetime.datetime.strptime(selected_date_to, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__lte=date_to_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        daily_job_data = all_jobs_team_base.filter(date_filter).select_related(
-            'pic', 
-            'project',
-        'aset__parent__parent',
-        'aset_departemen__parent__parent'  # For Operasional users
-            'attachments'
-        ).order_by(sort_field).distinct()
+    # === 2. LOGIKA DATA TABEL (ID di-cache per hash filter) ===
+    daily_job_data = spec.jobs('Daily')
 
     # === 5. HITUNG SUMMARY ===
     summary = calculate_daily_jobs_summary(daily_job_data)
@@ -1242,146 +924,13 @@ def export_daily_jobs_pdf(request):
 def export_daily_jobs_excel(request):
     user = request.user
     
-    # === 1. LOGIKA FILTER (BULAN & TAHUN) - SAMA SEPERTI DASHBOARD ===
-    now = datetime.datetime.now()
-    try:
-        current_year_param = request.GET.get('year', '')
-        current_month_param = request.GET.get('month', '')
-        
-        # Jika kosong atau '0', gunakan nilai default
-        if current_year_param and current_year_param != '0':
-            current_year = int(current_year_param)
-        else:
-            current_year = 0  # Artinya "Semua tahun"
-        
-        if current_month_param and current_month_param != '0':
-            current_month = int(current_month_param)
-            # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
-            if current_year == 0:
-                current_year = now.year
-        else:
-            current_month = 0  # Artinya "Semua bulan"
-    except ValueError:
-        current_year = 0
-        current_month = 0
-    
-    # === 1b. LOGIKA FILTER TANGGAL SPESIFIK (DATE RANGE) ===
-    selected_date_from = request.GET.get('date_from', '')
-    selected_date_to = request.GET.get('date_to', '')
-    has_date_range = selected_date_from or selected_date_to
+    # === 1. FILTER - SAMA PERSIS DENGAN DASHBOARD (JobFilterSpec) ===
+    spec = JobFilterSpec.from_request(request, default_sort='nama_pekerjaan', default_order='asc')
+    current_month = spec.month
+    current_year = spec.year
     
-    # Flag untuk menentukan apakah filter aktif atau "Semua"
-    filter_all_dates = (current_month == 0 and current_year == 0) and not has_date_range
-    
-    # === 1c. LOGIKA FILTER PIC ===
-    subordinate_ids = user.get_all_subordinates()
-    selected_pic_id = request.GET.get('pic', '')
-    
-    if selected_pic_id == 'my_jobs':
-        team_query = Q(pic=user)
-    elif selected_pic_id:
-        try:
-            selected_user = get_object_or_404(CustomUser, id=int(selected_pic_id))
-            selected_user_sub_ids = selected_user.get_all_subordinates()
-            team_ids = selected_user_sub_ids + [selected_user.id]
-            team_query = Q(pic_id__in=team_ids)
-        except (ValueError, CustomUser.DoesNotExist):
-            team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    else:
-        team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    
-    # === 1d. LOGIKA FILTER ASET ===
-    selected_line_id = request.GET.get('line', '')
-    selected_mesin_id = request.GET.get('mesin', '')
-    selected_sub_mesin_id = request.GET.get('sub_mesin', '')
-    
-    # === 1e. LOGIKA SORT ===
-    sort_by = request.GET.get('sort_by', 'nama_pekerjaan')
-    sort_order = request.GET.get('sort_order', 'asc')
-    
-    # === 2. AMBIL DATA JOBS SESUAI FILTER ===
-    # Base query dengan filter PIC
-    all_jobs_team_base = Job.objects.filter(team_query, tipe_job='Daily').distinct()
-    
-    # Apply aset filters
-    if selected_sub_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_id=selected_sub_mesin_id)
-    elif selected_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent_id=selected_mesin_id)
-    elif selected_line_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent__parent_id=selected_line_id)
-    
-    # Filter berdasarkan bulan dan tahun (sama seperti dashboard)
-    if filter_all_dates:
-        # Ambil semua daily jobs tanpa filter tanggal
-        job_data = all_jobs_team_base.select_related(
-            'pic',
-            'aset__parent__parent',
-            'aset_departemen__parent__parent'  # For Operasional users
-        ).prefetch_related(
-            'tanggal_pelaksanaan'
-        ).distinct()
-    else:
-        # Build filter dynamically based on what user selected
-        date_filter = Q()
-        
-        # PRIORITY: Jika ada date_range, IGNORE bulan/tahun filter (lebih spesifik)
-        if not has_date_range:
-            # Filter by bulan/tahun HANYA jika TIDAK ada date_range
-            if current_month != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-            if current_year != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        # Filter by tanggal range (date_from to date_to)
-        if selected_date_from:
-            try:
-                date_from_obj = datetime.datetime.strptime(selected_date_from, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__gte=date_from_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        if selected_date_to:
-            try:
-                date_to_obj = datetime.datetime.strptime(selected_date_to, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__lte=date_to_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        job_data = all_jobs_team_base.filter(date_filter).select_related(
-            'pic',
-            'aset__parent__parent',
-            'aset_departemen__parent__parent'  # For Operasional users
-        ).prefetch_related(
-            'tanggal_pelaksanaan'
-        ).distinct()
-    
-    # === 2b. SORT DATA DENGAN PYTHON (LEBIH FLEXIBLE) ===
-    # Convert ke list dulu untuk Python sorting
-    job_data = list(job_data)
-    
-    # Define sort key function
-    def get_sort_value(job):
-        if sort_by == 'nama_pekerjaan':
-            return job.nama_pekerjaan.lower()
-        elif sort_by == 'pic':
-            return (job.pic.username if job.pic else '').lower()
-        elif sort_by == 'prioritas':
-            return job.prioritas if job.prioritas else 999
-        elif sort_by == 'fokus':
-            return job.get_fokus_display().lower() if job.fokus else ''
-        elif sort_by == 'aset':
-            return (job.aset.nama if job.aset else '').lower()
-        else:
-            return job.nama_pekerjaan.lower()
-    
-    # Apply sort
-    reverse_sort = (sort_order == 'desc')
-    try:
-        job_data.sort(key=get_sort_value, reverse=reverse_sort)
-    except Exception as e:
-        # If sort fails, keep original order
-        pass
+    # === 2. AMBIL DATA JOBS SESUAI FILTER (sudah ter-sort di SQL) ===
+    job_data = spec.jobs('Daily')
     
     # === 3. BUAT WORKBOOK EXCEL ===
     wb = Workbook()
@@ -1448,18 +997,8 @@ def export_daily_jobs_excel(request):
                 sub_bagian = "-"
             aset_data = [departemen, bagian, sub_bagian]
         
-        # Ambil jadwal (dengan filter bulan/tahun jika ada)
-        if filter_all_dates:
-            # Tampilkan semua jadwal
-            jadwal_dates = job.tanggal_pelaksanaan.all().values_list('tanggal', flat=True).order_by('tanggal')
-        else:
-            # Ambil jadwal sesuai filter bulan/tahun
-            date_filter_jadwal = Q()
-            if current_month != 0:
-                date_filter_jadwal &= Q(tanggal__month=current_month)
-            if current_year != 0:
-                date_filter_jadwal &= Q(tanggal__year=current_year)
-            jadwal_dates = job.tanggal_pelaksanaan.filter(date_filter_jadwal).values_list('tanggal', flat=True).order_by('tanggal')
+        # Ambil jadwal sesuai filter tanggal (dari data prefetch, tanpa query per job)
+        jadwal_dates = sorted(jd.tanggal for jd in spec.filter_dates(job.tanggal_pelaksanaan.all()))
         
         jadwal_str = ", ".join([str(d.strftime("%d/%m")) for d in jadwal_dates]) if jadwal_dates else "-"
         
@@ -1515,115 +1054,13 @@ def export_daily_jobs_excel(request):
 # ==============================================================================
 @login_required(login_url='core:login')
 def export_project_jobs_excel(request):
-    user = request.user
-    
-    # === 1. LOGIKA FILTER (BULAN & TAHUN) - SAMA SEPERTI DASHBOARD ===
-    now = datetime.datetime.now()
-    try:
-        current_year_param = request.GET.get('year', '')
-        current_month_param = request.GET.get('month', '')
-        
-        # Jika kosong atau '0', gunakan nilai default
-        if current_year_param and current_year_param != '0':
-            current_year = int(current_year_param)
-        else:
-            current_year = 0  # Artinya "Semua tahun"
-        
-        if current_month_param and current_month_param != '0':
-            current_month = int(current_month_param)
-            # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
-            if current_year == 0:
-                current_year = now.year
-        else:
-            current_month = 0  # Artinya "Semua bulan"
-    except ValueError:
-        current_year = 0
-        current_month = 0
+    # === 1. FILTER - SAMA PERSIS DENGAN DASHBOARD (JobFilterSpec) ===
+    spec = JobFilterSpec.from_request(request, default_sort='nama_pekerjaan', default_order='asc')
+    current_month = spec.month
+    current_year = spec.year
     
-    # === 1b. LOGIKA FILTER TANGGAL SPESIFIK (DATE RANGE) ===
-    selected_date_from = request.GET.get('date_from', '')
-    selected_date_to = request.GET.get('date_to', '')
-    has_date_range = selected_date_from or selected_date_to
-    
-    # Flag untuk menentukan apakah filter aktif atau "Semua"
-    filter_all_dates = (current_month == 0 and current_year == 0) and not has_date_range
-    
-    # === 2. LOGIKA FILTER PIC ===
-    subordinate_ids = user.get_all_subordinates()
-    selected_pic_id = request.GET.get('pic', '')
-    
-    if selected_pic_id == 'my_jobs':
-        team_query = Q(pic=user)
-    elif selected_pic_id:
-        try:
-            selected_user = get_object_or_404(CustomUser, id=int(selected_pic_id))
-            selected_user_sub_ids = selected_user.get_all_subordinates()
-            team_ids = selected_user_sub_ids + [selected_user.id]
-            team_query = Q(pic_id__in=team_ids)
-        except (ValueError, CustomUser.DoesNotExist):
-            team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    else:
-        team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    
-    # === 3. LOGIKA FILTER ASET ===
-    selected_line_id = request.GET.get('line', '')
-    selected_mesin_id = request.GET.get('mesin', '')
-    selected_sub_mesin_id = request.GET.get('sub_mesin', '')
-    
-    # === 4. LOGIKA DATA TABEL ===
-    all_jobs_team_base = Job.objects.filter(team_query, tipe_job='Project').distinct()
-    
-    if selected_sub_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_id=selected_sub_mesin_id)
-    elif selected_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent_id=selected_mesin_id)
-    elif selected_line_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent__parent_id=selected_line_id)
-    
-    # Filter berdasarkan bulan dan tahun (sama seperti dashboard)
-    if filter_all_dates:
-        # Ambil semua project jobs tanpa filter tanggal
-        project_jobs = all_jobs_team_base.select_related(
-            'pic', 
-            'project',
-            'aset',
-            'aset__parent',
-            'aset__parent__parent'
-        ).prefetch_related('tanggal_pelaksanaan').order_by('project__nama_project', 'nama_pekerjaan').distinct()
-    else:
-        # Build filter dynamically based on what user selected
-        date_filter = Q()
-        
-        # PRIORITY: Jika ada date_range, IGNORE bulan/tahun filter (lebih spesifik)
-        if not has_date_range:
-            # Filter by bulan/tahun HANYA jika TIDAK ada date_range
-            if current_month != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-            if current_year != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        # Filter by tanggal range (date_from to date_to)
-        if selected_date_from:
-            try:
-                date_from_obj = datetime.datetime.strptime(selected_date_from, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__gte=date_from_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        if selected_date_to:
-            try:
-                date_to_obj = datetime.datetime.strptime(selected_date_to, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__lte=date_to_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        project_jobs = all_jobs_team_base.filter(date_filter).select_related(
-            'pic', 
-            'project',
-            'aset',
-            'aset__parent',
-            'aset__parent__parent'
-        ).prefetch_related('tanggal_pelaksanaan').order_by('project__nama_project', 'nama_pekerjaan').distinct()
+    # === 4. LOGIKA DATA TABEL (ID di-cache per hash filter) ===
+    project_jobs = spec.jobs('Project')
     
     # === 5. BUAT WORKBOOK EXCEL ===
     wb = Workbook()
@@ -1660,7 +1097,8 @@ def export_project_jobs_excel(request):
     row_num = 1
     no = 0
     
-    # Group jobs by project
+    # Group jobs by project (urut nama project, job dalam project ikut urutan sort)
+    project_jobs = sorted(project_jobs, key=lambda j: j.project.nama_project if j.project else "")
     project_dict = {}
     for job in project_jobs:
         project_name = job.project.nama_project if job.project else "Tanpa Project"
@@ -1703,18 +1141,8 @@ def export_project_jobs_excel(request):
             mesin = job.aset.parent.nama if job.aset and job.aset.parent else "-"
             sub = job.aset.nama if job.aset else "-"
             
-            # Ambil jadwal (dengan filter bulan/tahun jika ada)
-            if filter_all_dates:
-                # Tampilkan semua jadwal
-                jadwal_dates = job.tanggal_pelaksanaan.all().values_list('tanggal', flat=True).order_by('tanggal')
-            else:
-                # Ambil jadwal sesuai filter bulan/tahun
-                date_filter_jadwal = Q()
-                if current_month != 0:
-                    date_filter_jadwal &= Q(tanggal__month=current_month)
-                if current_year != 0:
-                    date_filter_jadwal &= Q(tanggal__year=current_year)
-                jadwal_dates = job.tanggal_pelaksanaan.filter(date_filter_jadwal).values_list('tanggal', flat=True).order_by('tanggal')
+            # Ambil jadwal sesuai filter tanggal (dari data prefetch, tanpa query per job)
+            jadwal_dates = sorted(jd.tanggal for jd in spec.filter_dates(job.tanggal_pelaksanaan.all()))
             
             jadwal_str = ", ".join([str(d.strftime("%d/%m")) for d in jadwal_dates]) if jadwal_dates else "-"
             
@@ -1729,7 +1157,7 @@ def export_project_jobs_excel(request):
                 line,
                 mesin,
                 sub,
-                job.get_fokus_display(),
+                job.fokus if job.fokus else "-",
                 job.get_prioritas_display(),
                 jadwal_str,
                 progress
@@ -1778,121 +1206,16 @@ def export_project_jobs_pdf(request):
     """
     user = request.user
     
-    # === 1. LOGIKA FILTER (BULAN & TAHUN) - SAMA SEPERTI DASHBOARD ===
-    now = datetime.datetime.now()
-    try:
-        current_year_param = request.GET.get('year', '')
-        current_month_param = request.GET.get('month', '')
-        
-        # Jika kosong atau '0', gunakan nilai default
-        if current_year_param and current_year_param != '0':
-            current_year = int(current_year_param)
-        else:
-            current_year = 0  # Artinya "Semua tahun"
-        
-        if current_month_param and current_month_param != '0':
-            current_month = int(current_month_param)
-            # Jika user pilih bulan tapi tidak pilih tahun, default ke tahun sekarang
-            if current_year == 0:
-                current_year = now.year
-        else:
-            current_month = 0  # Artinya "Semua bulan"
-    except ValueError:
-        current_year = 0
-        current_month = 0
-    
-    # === 1b. LOGIKA FILTER TANGGAL SPESIFIK (DATE RANGE) ===
-    selected_date_from = request.GET.get('date_from', '')
-    selected_date_to = request.GET.get('date_to', '')
-    has_date_range = selected_date_from or selected_date_to
-    
-    # Flag untuk menentukan apakah filter aktif atau "Semua"
-    filter_all_dates = (current_month == 0 and current_year == 0) and not has_date_range
+    # === 1. FILTER - SAMA PERSIS DENGAN DASHBOARD (JobFilterSpec) ===
+    spec = JobFilterSpec.from_request(request, default_sort='nama_pekerjaan', default_order='asc')
+    current_month = spec.month
+    current_year = spec.year
     
-    # === 2. LOGIKA FILTER PIC ===
-    subordinate_ids = user.get_all_subordinates()
-    selected_pic_id = request.GET.get('pic', '')
-    
-    if selected_pic_id == 'my_jobs':
-        team_query = Q(pic=user)
-    elif selected_pic_id:
-        try:
-            selected_user = get_object_or_404(CustomUser, id=int(selected_pic_id))
-            selected_user_sub_ids = selected_user.get_all_subordinates()
-            team_ids = selected_user_sub_ids + [selected_user.id]
-            team_query = Q(pic_id__in=team_ids)
-        except (ValueError, CustomUser.DoesNotExist):
-            team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-    else:
-        team_query = Q(pic=user) | Q(pic_id__in=subordinate_ids)
-
-    # === 3. LOGIKA FILTER ASET ===
-    selected_line_id = request.GET.get('line', '')
-    selected_mesin_id = request.GET.get('mesin', '')
-    selected_sub_mesin_id = request.GET.get('sub_mesin', '')
-    
-    # === 4. LOGIKA DATA TABEL ===
-    all_jobs_team_base = Job.objects.filter(team_query).distinct()
-    
-    if selected_sub_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset_id=selected_sub_mesin_id)
-    elif selected_mesin_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent_id=selected_mesin_id)
-    elif selected_line_id:
-        all_jobs_team_base = all_jobs_team_base.filter(aset__parent__parent_id=selected_line_id)
-    
-    # Filter untuk Project Jobs (sama seperti dashboard)
-    if filter_all_dates:
-        # Ambil semua project jobs tanpa filter tanggal
-        project_jobs = all_jobs_team_base.filter(
-            tipe_job='Project'
-        ).select_related(
-            'pic', 
-            'project',
-            'aset__parent__parent' 
-        ).prefetch_related(
-            'personil_ditugaskan', 
-            'tanggal_pelaksanaan',
-            'attachments'
-        ).order_by('project__nama_project', 'nama_pekerjaan').distinct()
-    else:
-        # Build filter dynamically based on what user selected
-        date_filter = Q()
-        
-        # PRIORITY: Jika ada date_range, IGNORE bulan/tahun filter (lebih spesifik)
-        if not has_date_range:
-            # Filter by bulan/tahun HANYA jika TIDAK ada date_range
-            if current_month != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__month=current_month)
-            if current_year != 0:
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__year=current_year)
-        
-        # Filter by tanggal range (date_from to date_to)
-        if selected_date_from:
-            try:
-                date_from_obj = datetime.datetime.strptime(selected_date_from, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__gte=date_from_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        if selected_date_to:
-            try:
-                date_to_obj = datetime.datetime.strptime(selected_date_to, '%Y-%m-%d').date()
-                date_filter &= Q(tanggal_pelaksanaan__tanggal__lte=date_to_obj)
-            except (ValueError, TypeError):
-                pass
-        
-        project_jobs = all_jobs_team_base.filter(
-            tipe_job='Project'
-        ).filter(date_filter).select_related(
-            'pic', 
-            'project',
-            'aset__parent__parent' 
-        ).prefetch_related(
-            'personil_ditugaskan', 
-            'tanggal_pelaksanaan',
-            'attachments'
-        ).order_by('project__nama_project', 'nama_pekerjaan').distinct()
+    # === 4. LOGIKA DATA TABEL (ID di-cache per hash filter) ===
+    project_jobs = sorted(
+        spec.jobs('Project'),
+        key=lambda j: j.project.nama_project if j.project else ""
+    )
 
     # === 5. GRUP JOBS BERDASARKAN PROJECT ===
     project_dict = {}
@@ -1909,8 +1232,9 @@ def export_project_jobs_pdf(request):
     project_data = []
     for project_id, data in project_dict.items():
         jobs = data['jobs']
-        total_dates = sum(job.tanggal_pelaksanaan.count() for job in jobs)
-        done_dates = sum(job.tanggal_pelaksanaan.filter(status='Done').count() for job in jobs)
+        all_dates = [jd for job in jobs for jd in job.tanggal_pelaksanaan.all()]
+        total_dates = len(all_dates)
+        done_dates = sum(1 for jd in all_dates if jd.status == 'Done')
         
         progress = 0
         if total_dates > 0:
@@ -1992,8 +1316,12 @@ def export_jobs_to_gas(request):
     Expected POST data:
     {
         "job_ids": [1, 2, 3, ...],
-        "export_type": "preventif" atau "evaluasi"
+        "export_type": "preventif" atau "evaluasi",
+        "force": false  (opsional, kirim ulang walau data tidak berubah)
     }
+    
+    Export dijalankan di background (Celery); response berisi export_id dan status_url
+    yang di-poll frontend sampai status 'success' / 'error'.
     """
     if request.method != 'POST':
         return JsonResponse({"status": "error", "message": "Method not allowed"}, status=405)
@@ -2006,26 +1334,38 @@ def export_jobs_to_gas(request):
         
         if not job_ids:
             return JsonResponse({"status": "error", "message": "Tidak ada job yang dipilih"})
+        if export_type not in ('preventif', 'evaluasi'):
+            return JsonResponse({"status": "error", "message": "Jenis export tidak dikenali"})
         
-        # Import handler functions
-        from .export_handlers import prepare_job_data_for_export, send_to_google_apps_script
-        
-        # Prepare data
-        payload = prepare_job_data_for_export(job_ids, export_type)
-        if not payload:
-            return JsonResponse({"status": "error", "message": "Job tidak ditemukan"})
-        
-        # Send to Google Apps Script
-        result = send_to_google_apps_script(payload, export_type)
+        from .export_handlers import EXPORT_KIND_DAILY, start_export
         
-        return JsonResponse(result)
+        export_id = start_export(
+            EXPORT_KIND_DAILY, [int(job_id) for job_id in job_ids], export_type,
+            request.user, force=bool(data.get('force'))
+        )
+        return JsonResponse({
+            "status": "queued",
+            "export_id": export_id,
+            "status_url": reverse('core:export_status', args=[export_id]),
+        }, status=202)
     
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, TypeError, ValueError):
         return JsonResponse({"status": "error", "message": "Invalid JSON"})
     except Exception as e:
         return JsonResponse({"status": "error", "message": f"Error: {str(e)}"})
 
 
+@login_required(login_url='core:login')
+def export_status_view(request, export_id):
+    """Polling status export GAS (dipakai halaman Export Jobs dan Job Per Day)"""
+    from .export_handlers import export_status_payload
+    
+    payload = export_status_payload(export_id, request.user)
+    if payload is None:
+        return JsonResponse({"status": "error", "message": "Export tidak ditemukan atau sudah kedaluwarsa"}, status=404)
+    return JsonResponse(payload)
+
+
 # ==============================================================================
 # VIEW JOB PER DAY - UNTUK EXPORT KE GOOGLE APPS SCRIPT
 # ==============================================================================
@@ -2143,6 +1483,41 @@ def api_aset_children(request):
         return JsonResponse({"error": str(e)}, status=400)
 
 
+# ==============================================================================
+# API FULL ASSET TREE (VERSIONED) - CASCADING DROPDOWN CLIENT-SIDE
+# ==============================================================================
+ASET_TREE_MAX_AGE = 60 * 60 * 24 * 365  # URL ber-versi tidak pernah berubah isinya
+
+
+def _aset_tree_etag(request, kind):
+    if kind not in ASET_TREE_KINDS:
+        return None
+    return f"{kind}-{get_aset_tree_version(kind)}"
+
+
+@login_required(login_url='core:login')
+@require_http_methods(["GET"])
+@condition(etag_func=_aset_tree_etag)
+def api_aset_tree(request, kind):
+    """
+    Seluruh tree AsetMesin ('mesin') atau AsetDepartemen ('departemen') dalam satu payload.
+    Dropdown Line/Mesin/Sub Mesin & Departemen/Bagian/Sub Bagian di-cascade di browser.
+
+    - ETag = versi tree -> If-None-Match yang cocok dijawab 304 tanpa query DB
+    - ?v=<versi> yang cocok dengan versi saat ini -> Cache-Control immutable (1 tahun)
+    """
+    if kind not in ASET_TREE_KINDS:
+        return JsonResponse({"error": "kind harus 'mesin' atau 'departemen'"}, status=404)
+
+    version, payload = get_aset_tree_payload(kind)
+    response = JsonResponse(payload)
+    if request.GET.get('v') == version:
+        response['Cache-Control'] = f'private, max-age={ASET_TREE_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
+
 # ==============================================================================
 # API UNTUK FETCH ATTACHMENTS GALLERY (BARU)
 # ==============================================================================
@@ -2198,92 +1573,6 @@ def api_job_attachments(request, job_id):
 # ==============================================================================
 # VIEW LEAVE EVENT (IJIN/CUTI) - HALAMAN BARU
 # ==============================================================================
-def sync_leave_events_from_google_calendar(calendar_id=None):
-    """
-    Sync events dari Google Calendar ke database
-    Baca semua events yang nama-nya mengandung "cuti" dan simpan ke DB jika belum ada
-    
-    Args:
-        calendar_id (str): Google Calendar ID. Jika None, gunakan dari settings.GOOGLE_CALENDAR_ID
-    """
-    try:
-        from .google_calendar_service import get_google_calendar_service
-        from datetime import datetime
-        from django.conf import settings
-        
-        cal_service = get_google_calendar_service(calendar_id=calendar_id)
-        actual_calendar_id = calendar_id or settings.GOOGLE_CALENDAR_ID
-        
-        # Query semua events dengan keyword "cuti"
-        events_result = cal_service.service.events().list(
-            calendarId=actual_calendar_id,
-            q='cuti',  # Search untuk events dengan "cuti" di nama
-            maxResults=100
-        ).execute()
-        
-        events = events_result.get('items', [])
-        synced_count = 0
-        
-        for event in events:
-            event_id = event.get('id')
-            summary = event.get('summary', '')
-            
-            # Skip jika sudah ada di database
-            if LeaveEvent.objects.filter(google_event_id=event_id).exists():
-                continue
-            
-            # Parse data dari event
-            # Format: "{Nama} cuti"
-            nama_orang = summary.replace(' cuti', '').strip()
-            
-            # Get tanggal dari event
-            start = event.get('start', {})
-            end = event.get('end', {})
-            
-            start_date = start.get('date') or start.get('dateTime', '')
-            end_date = end.get('date') or end.get('dateTime', '')
-            
-            if start_date and end_date:
-                # Simplify: hanya ambil date part
-                start_date = start_date[:10]
-                end_date = end_date[:10]
-                
-                # Cari departemen yang punya calendar_id ini
-                try:
-                    departemen = Departemen.objects.get(google_calendar_id=actual_calendar_id)
-                except Departemen.DoesNotExist:
-                    departemen = None
-                
-                # Cari karyawan dengan nama yang match
-                try:
-                    karyawan = Karyawan.objects.get(nama_lengkap__icontains=nama_orang)
-                except Karyawan.DoesNotExist:
-                    karyawan = None
-                
-                # Create atau update LeaveEvent di database
-                leave_event, created = LeaveEvent.objects.get_or_create(
-                    google_event_id=event_id,
-                    defaults={
-                        'karyawan': karyawan,
-                        'nama_orang': nama_orang,
-                        'tipe_leave': 'Cuti',
-                        'tanggal': start_date,  # Atau bisa range jika perlu
-                        'deskripsi': event.get('description', ''),
-                        'created_by': None,
-                        'departemen': departemen,
-                    }
-                )
-                
-                if created:
-                    synced_count += 1
-        
-        return synced_count
-        
-    except Exception as e:
-        print(f"Error syncing from Google Calendar: {e}")
-        return 0
-
-
 @login_required(login_url='core:login')
 def leave_event_view(request):
     """
@@ -2300,9 +1589,10 @@ def leave_event_view(request):
         )
         return render(request, 'leave_event.html', {'form': None, 'error': True})
     
-    # Sync data dari Google Calendar menggunakan calendar_id dari departemen
+    # Halaman dirender dari DB lokal; sync Google Calendar berjalan di background
+    # (Celery, incremental per departemen) - di sini hanya diantrikan jika data basi
     calendar_id = user.departemen.google_calendar_id
-    sync_leave_events_from_google_calendar(calendar_id=calendar_id)
+    request_leave_sync_if_stale(user.departemen)
     
     if request.method == 'POST':
         form = LeaveEventForm(request.POST)
@@ -2374,9 +1664,10 @@ def leave_event_view(request):
     # Ambil daftar leave events yang pernah dibuat
     # Admin/superuser bisa lihat semua events, user biasa hanya departemen mereka
     if user.is_superuser or user.is_staff:
-        all_leave_events = LeaveEvent.objects.all().order_by('-created_at')
+        all_leave_events = LeaveEvent.objects.select_related('karyawan').order_by('-created_at')
     else:
-        all_leave_events = LeaveEvent.objects.filter(departemen=user.departemen).order_by('-created_at')
+        all_leave_events = LeaveEvent.objects.filter(departemen=user.departemen).select_related('karyawan').order_by('-created_at')
+    all_leave_events = list(all_leave_events)
     
     # Split data ke upcoming vs past (berdasarkan tanggal terakhir)
     from datetime import datetime as dt
@@ -2437,21 +1728,20 @@ def leave_event_view(request):
     for _ in range(first_day_weekday_indo):
         calendar_data.append({'date': None, 'leave_events': []})
     
+    # Index tanggal -> events sekali (bukan scan semua event untuk setiap hari)
+    leaves_by_date = {}
+    for event in all_leave_events:
+        for tanggal in event.get_tanggal_list():
+            leaves_by_date.setdefault(tanggal, []).append(event)
+    
     # Fill tanggal dengan data
     for day in range(1, num_days + 1):
         date_str = f"{current_year}-{current_month:02d}-{day:02d}"
         
-        # Cari leave events yang match tanggal ini
-        day_leaves = []
-        for event in all_leave_events:
-            tanggal_list = event.get_tanggal_list()
-            if date_str in tanggal_list:
-                day_leaves.append(event)
-        
         calendar_data.append({
             'date': day,
             'date_str': date_str,
-            'leave_events': day_leaves
+            'leave_events': leaves_by_date.get(date_str, [])
         })
     
     # Get month name
@@ -2834,126 +2124,211 @@ def job_quick_update_api(request, job_id):
         }, status=400)
 
 
+# Urutan sumber di list overdue (tie-breaker setelah tanggal, sebelum id)
+OVERDUE_SOURCE_RANKS = {'daily': 0, 'project': 1, 'preventive': 2}
+OVERDUE_PAGE_SIZE = 25
+
+
+def _full_name_expr(prefix):
+    """Ekspresi SQL setara CustomUser.get_full_name() (NULL jika kosong / user NULL)"""
+    return NullIf(Trim(Concat(f'{prefix}__first_name', Value(' '), f'{prefix}__last_name')), Value(''))
+
+
+def _overdue_after_q(date_field, rank, values, descending):
+    """
+    Keyset predicate untuk satu sumber di urutan global (tanggal, source_rank, id).
+    Rank sumber konstan, jadi perbandingannya disederhanakan per sumber.
+    """
+    if values is None:
+        return Q()
+    last_date, last_rank, last_id = values
+    after, after_or_equal = ('lt', 'lte') if descending else ('gt', 'gte')
+    if rank == last_rank:
+        return Q(**{f'{date_field}__{after}': last_date}) | Q(**{date_field: last_date, f'id__{after}': last_id})
+    # Sumber dengan rank "setelah" cursor boleh tanggal yang sama
+    rank_after = rank < last_rank if descending else rank > last_rank
+    return Q(**{f'{date_field}__{after_or_equal if rank_after else after}': last_date})
+
+
+def _overdue_sources(all_user_ids, filter_type, filter_prioritas, filter_assigned_to):
+    """
+    Queryset values() per sumber overdue dengan kolom seragam (sort_date, source_rank, row_id).
+    Semua filter dijalankan di SQL (sebelumnya di list Python).
+    """
+    from preventive_jobs.models import PreventiveJobExecution
+    today = datetime.datetime.now().date()
+    sources = []
+
+    for tipe in ('daily', 'project'):
+        if filter_type and filter_type != tipe:
+            continue
+        qs = JobDate.objects.filter(
+            Q(job__pic_id__in=all_user_ids) | Q(job__assigned_to_id__in=all_user_ids),
+            job__tipe_job='Daily' if tipe == 'daily' else 'Project',
+            status__in=['Open', 'Pending'],
+            tanggal__lt=today,
+        )
+        if filter_prioritas:
+            qs = qs.filter(job__prioritas=filter_prioritas)
+        if filter_assigned_to:
+            qs = qs.annotate(
+                assignee_name=Coalesce(_full_name_expr('job__assigned_to'), _full_name_expr('job__pic'))
+            ).filter(assignee_name=filter_assigned_to)
+        sources.append((OVERDUE_SOURCE_RANKS[tipe], 'tanggal', qs))
+
+    if not filter_type or filter_type == 'preventive':
+        qs = PreventiveJobExecution.objects.filter(
+            Q(template__pic_id__in=all_user_ids) | Q(assigned_to_id__in=all_user_ids),
+            status='Scheduled',
+            is_late=True,  # Ditandai core.status_sweeper
+        )
+        if filter_prioritas:
+            qs = qs.filter(template__prioritas=filter_prioritas)
+        if filter_assigned_to:
+            qs = qs.annotate(
+                assignee_name=Coalesce(_full_name_expr('assigned_to'), _full_name_expr('template__pic'))
+            ).filter(assignee_name=filter_assigned_to)
+        sources.append((OVERDUE_SOURCE_RANKS['preventive'], 'scheduled_date', qs))
+
+    return sources
+
+
+def _overdue_union(sources, cursor_values=None, descending=False):
+    """UNION ALL semua sumber (sudah difilter keyset) dengan kolom seragam"""
+    parts = [
+        qs.filter(_overdue_after_q(date_field, rank, cursor_values, descending)).annotate(
+            sort_date=F(date_field), source_rank=Value(rank), row_id=F('id'),
+        ).values_list('sort_date', 'source_rank', 'row_id').order_by()
+        for rank, date_field, qs in sources
+    ]
+    if not parts:
+        return None
+    return parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+
+def _overdue_keyset_page(sources, descending, cursor):
+    """
+    Satu halaman overdue dengan keyset di (sort_date, source_rank, row_id):
+    satu query UNION ALL ... ORDER BY ... LIMIT n+1, biaya konstan di halaman mana pun.
+    """
+    ordering = ('-sort_date', '-source_rank', '-row_id') if descending else ('sort_date', 'source_rank', 'row_id')
+    direction, values = decode_cursor(cursor, len(ordering))
+    backwards = direction == CURSOR_PREV
+    scan_descending = descending != backwards
+
+    union = _overdue_union(sources, values, scan_descending)
+    if union is None:
+        return KeysetPage([], ordering, has_next=False, has_previous=False)
+
+    scan_ordering = reverse_ordering(ordering) if backwards else ordering
+    rows = [
+        {'sort_date': d, 'source_rank': r, 'row_id': i}
+        for d, r, i in union.order_by(*scan_ordering)[:OVERDUE_PAGE_SIZE + 1]
+    ]
+    has_more = len(rows) > OVERDUE_PAGE_SIZE
+    rows = rows[:OVERDUE_PAGE_SIZE]
+    if backwards:
+        return KeysetPage(rows[::-1], ordering, has_next=values is not None, has_previous=has_more)
+    return KeysetPage(rows, ordering, has_next=has_more, has_previous=values is not None)
+
+
+def _overdue_items(rows):
+    """Ubah row keyset (rank, id) menjadi dict item untuk template - 2 query bulk"""
+    from preventive_jobs.models import PreventiveJobExecution
+    jobdate_ids = [row['row_id'] for row in rows if row['source_rank'] != OVERDUE_SOURCE_RANKS['preventive']]
+    execution_ids = [row['row_id'] for row in rows if row['source_rank'] == OVERDUE_SOURCE_RANKS['preventive']]
+    job_dates = JobDate.objects.select_related(
+        'job__pic', 'job__assigned_to', 'job__project'
+    ).in_bulk(jobdate_ids)
+    executions = PreventiveJobExecution.objects.select_related(
+        'template__pic', 'assigned_to', 'aset'
+    ).in_bulk(execution_ids)
+
+    items = []
+    for row in rows:
+        if row['source_rank'] == OVERDUE_SOURCE_RANKS['preventive']:
+            execution = executions.get(row['row_id'])
+            if execution is None:
+                continue
+            items.append({
+                'type': 'Preventive Job',
+                'type_short': 'preventive',
+                'id': execution.id,
+                'name': execution.template.nama_pekerjaan,
+                'days_overdue': execution.days_overdue(),
+                'url': f'/preventive/execution/{execution.id}/detail/',
+                'assigned_to': execution.assigned_to.get_full_name() if execution.assigned_to else execution.template.pic.get_full_name(),
+                'status': execution.status,
+                'tanggal': execution.scheduled_date,
+                'pic': execution.template.pic.get_full_name(),
+                'prioritas': execution.template.prioritas,
+                'fokus': execution.template.fokus,
+                'aset': execution.aset.nama if execution.aset else 'N/A',
+            })
+            continue
+
+        od = job_dates.get(row['row_id'])
+        if od is None:
+            continue
+        job = od.job
+        is_daily = row['source_rank'] == OVERDUE_SOURCE_RANKS['daily']
+        item = {
+            'type': 'Daily Job' if is_daily else 'Project Job',
+            'type_short': 'daily' if is_daily else 'project',
+            'id': job.id,
+            'name': job.nama_pekerjaan,
+            'days_overdue': od.days_overdue(),
+            'url': f'/daily-job/{job.id}/' if is_daily else f'/project-job/{job.id}/',
+            'assigned_to': job.assigned_to.get_full_name() if job.assigned_to else job.pic.get_full_name(),
+            'status': od.status,
+            'tanggal': od.tanggal,
+            'pic': job.pic.get_full_name(),
+            'prioritas': job.prioritas,
+            'fokus': job.fokus,
+        }
+        if not is_daily:
+            item['project'] = job.project.nama_project if job.project else 'N/A'
+        items.append(item)
+    return items
+
+
 @login_required(login_url='core:login')
 def overdue_jobs_list_view(request):
     """
     Halaman listing untuk semua overdue jobs (Daily, Project, Preventive)
     URL: /core/overdue-jobs/
-    Dengan filters: tipe job, departemen, assigned_to, date range
+    Dengan filters: tipe job, prioritas, assigned_to
+
+    Filter, sort & pagination dijalankan di database dengan keyset pagination
+    (cursor di tanggal, sumber, id) - tidak lagi membangun list Python semua item.
+    Total count dibatasi (capped) karena hanya untuk badge.
     """
     user = request.user
     subordinate_ids = user.get_all_subordinates()
     all_user_ids = [user.id] + subordinate_ids
     
-    overdue_items = []
-    
-    # 1. GET OVERDUE DAILY JOBS (Optimized with select_related)
-    daily_jobs_with_overdue = Job.objects.filter(
-        Q(pic_id__in=all_user_ids) | Q(assigned_to_id__in=all_user_ids),
-        tipe_job='Daily'
-    ).select_related('pic', 'assigned_to', 'project').prefetch_related('tanggal_pelaksanaan')
-    
-    for job in daily_jobs_with_overdue:
-        overdue_dates = job.get_overdue_dates()
-        if overdue_dates.exists():
-            for od in overdue_dates:
-                overdue_items.append({
-                    'type': 'Daily Job',
-                    'type_short': 'daily',
-                    'id': job.id,
-                    'name': job.nama_pekerjaan,
-                    'days_overdue': od.days_overdue(),
-                    'url': f'/daily-job/{job.id}/',
-                    'assigned_to': job.assigned_to.get_full_name() if job.assigned_to else job.pic.get_full_name(),
-                    'status': od.status,
-                    'tanggal': od.tanggal,
-                    'pic': job.pic.get_full_name(),
-                    'prioritas': job.prioritas,
-                    'fokus': job.fokus,
-                })
-    
-    # 2. GET OVERDUE PROJECT JOBS (Optimized with select_related)
-    project_jobs_with_overdue = Job.objects.filter(
-        Q(pic_id__in=all_user_ids) | Q(assigned_to_id__in=all_user_ids),
-        tipe_job='Project'
-    ).select_related('pic', 'assigned_to', 'project').prefetch_related('tanggal_pelaksanaan')
-    
-    for job in project_jobs_with_overdue:
-        overdue_dates = job.get_overdue_dates()
-        if overdue_dates.exists():
-            for od in overdue_dates:
-                overdue_items.append({
-                    'type': 'Project Job',
-                    'type_short': 'project',
-                    'id': job.id,
-                    'name': job.nama_pekerjaan,
-                    'days_overdue': od.days_overdue(),
-                    'url': f'/project-job/{job.id}/',
-                    'assigned_to': job.assigned_to.get_full_name() if job.assigned_to else job.pic.get_full_name(),
-                    'status': od.status,
-                    'tanggal': od.tanggal,
-                    'pic': job.pic.get_full_name(),
-                    'prioritas': job.prioritas,
-                    'fokus': job.fokus,
-                    'project': job.project.nama_project if job.project else 'N/A',
-                })
-    
-    # 3. GET OVERDUE PREVENTIVE JOB EXECUTIONS (Optimized with select_related)
-    from preventive_jobs.models import PreventiveJobExecution
-    
-    today = datetime.datetime.now().date()
-    overdue_preventive = PreventiveJobExecution.objects.filter(
-        Q(template__pic_id__in=all_user_ids) | Q(assigned_to_id__in=all_user_ids),
-        status='Scheduled',
-        scheduled_date__lt=today
-    ).select_related('template__pic', 'assigned_to', 'aset')
-    
-    for execution in overdue_preventive:
-        overdue_items.append({
-            'type': 'Preventive Job',
-            'type_short': 'preventive',
-            'id': execution.id,
-            'name': execution.template.nama_pekerjaan,
-            'days_overdue': execution.days_overdue(),
-            'url': f'/preventive/execution/{execution.id}/detail/',
-            'assigned_to': execution.assigned_to.get_full_name() if execution.assigned_to else execution.template.pic.get_full_name(),
-            'status': execution.status,
-            'tanggal': execution.scheduled_date,
-            'pic': execution.template.pic.get_full_name(),
-            'prioritas': execution.template.prioritas,
-            'fokus': execution.template.fokus,
-            'aset': execution.aset.nama if execution.aset else 'N/A',
-        })
-    
     # Apply filters if provided
     filter_type = request.GET.get('type', '')
     filter_prioritas = request.GET.get('prioritas', '')
     filter_assigned_to = request.GET.get('assigned_to', '')
     sort_by = request.GET.get('sort', 'days_overdue_desc')
+    if filter_type not in OVERDUE_SOURCE_RANKS:
+        filter_type = ''
     
-    if filter_type:
-        overdue_items = [item for item in overdue_items if item['type_short'] == filter_type]
-    
-    if filter_prioritas:
-        overdue_items = [item for item in overdue_items if item.get('prioritas') == filter_prioritas]
+    sources = _overdue_sources(all_user_ids, filter_type, filter_prioritas, filter_assigned_to)
     
-    if filter_assigned_to:
-        overdue_items = [item for item in overdue_items if item['assigned_to'] == filter_assigned_to]
+    # Sorting: days_overdue desc = tanggal paling lama dulu (asc)
+    descending = sort_by == 'days_overdue_asc'
+    page_obj = _overdue_keyset_page(sources, descending, request.GET.get('cursor', ''))
+    page_obj.object_list = _overdue_items(page_obj.object_list)
     
-    # Sorting
-    if sort_by == 'days_overdue_asc':
-        overdue_items = sorted(overdue_items, key=lambda x: x['days_overdue'])
-    else:  # default: days_overdue_desc
-        overdue_items = sorted(overdue_items, key=lambda x: x['days_overdue'], reverse=True)
-    
-    # Pagination
-    paginator = Paginator(overdue_items, 25)  # 25 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    union = _overdue_union(sources)
+    total_count = format_count(*capped_count(union)) if union is not None else 0
     
     context = {
         'page_obj': page_obj,
-        'total_count': len(overdue_items),
+        'total_count': total_count,
+        'cursor_query': _query_without(request, 'cursor', 'page'),
         'filter_type': filter_type,
         'filter_prioritas': filter_prioritas,
         'filter_assigned_to': filter_assigned_to,
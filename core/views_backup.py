@@ -333,4 +333,9 @@ def database_health_check(request):
         context['error'] = str(e)
         logger.error(f'Health check error: {str(e)}', exc_info=True)
     
+    # Metrik integrasi HTTP keluar (Fonnte, WABot, TinyURL, GAS)
+    from .services.http_client import get_http_metrics, get_http_client
+    context['http_metrics'] = get_http_metrics()
+    context['http_circuits'] = get_http_client().breaker_states()
+    
     return render(request, 'database_health.html', context)
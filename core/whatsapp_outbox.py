@@ -0,0 +1,411 @@
+"""
+WhatsApp outbox - pengiriman WA asynchronous lewat Celery.
+
+Sebelumnya FonteService.send_message / WhatsAppAPI.send_message dipanggil langsung dari
+view & signal (requests.post dengan timeout 10-30 detik), sehingga API Fonnte yang lambat
+langsung membuat request user ikut lambat.
+
+Alur sekarang:
+1. enqueue_whatsapp() / enqueue_whatsapp_batch() INSERT row WhatsAppOutbox di transaksi
+   yang sedang berjalan, lalu trigger worker via transaction.on_commit (tidak ada pesan
+   "hantu" jika transaksi di-rollback).
+2. Task core.tasks.process_whatsapp_outbox meng-claim row jatuh tempo
+   (select_for_update skip_locked), mengambil token dari bucket rate limit per departemen,
+   mengirim, lalu menyimpan status (sent / retry dengan exponential backoff / failed).
+   Row yang tertahan di 'sending' (worker mati) ditandai failed untuk retry manual, bukan
+   dikirim ulang otomatis - provider mungkin sudah menerima pesannya.
+   Hasil setiap pesan disimpan langsung setelah dikirim (UPDATE bersyarat status='sending'),
+   dan satu batch dibatasi MAX_BATCH_SIZE pesan supaya batch x timeout tetap jauh di bawah
+   STALE_SENDING_AFTER - worker yang masih jalan tidak pernah dianggap mati.
+3. Perubahan status dikirim lewat signal `whatsapp_delivery_status` supaya app lain
+   (misal ChecklistShareLog) bisa meng-update status pengirimannya sendiri.
+
+Idempotency: setiap pesan punya `idempotency_key` unik. Enqueue ulang dengan key yang sama
+(double submit, retry task) tidak membuat pesan kedua.
+
+Settings (opsional):
+    WHATSAPP_OUTBOX_RATE_PER_MINUTE  - token per menit per bucket (default 20)
+    WHATSAPP_OUTBOX_BURST            - kapasitas bucket (default 10)
+    WHATSAPP_OUTBOX_MAX_ATTEMPTS     - maksimal percobaan kirim (default 5)
+"""
+
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Dikirim setelah status pesan berubah menjadi sent / failed.
+# kwargs: outbox (WhatsAppOutbox), status (str)
+whatsapp_delivery_status = Signal()
+
+RATE_PER_MINUTE = getattr(settings, 'WHATSAPP_OUTBOX_RATE_PER_MINUTE', 20)
+BURST = getattr(settings, 'WHATSAPP_OUTBOX_BURST', 10)
+MAX_ATTEMPTS = getattr(settings, 'WHATSAPP_OUTBOX_MAX_ATTEMPTS', 5)
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60  # 1 jam
+STALE_SENDING_AFTER = timedelta(minutes=10)  # Worker mati saat status 'sending' -> failed (retry manual)
+SEND_TIMEOUT_SECONDS = 30  # Timeout terlama provider (WhatsAppAPI); Fonnte 10 detik
+# Batch terlama (semua timeout) maksimal setengah STALE_SENDING_AFTER
+MAX_BATCH_SIZE = int(STALE_SENDING_AFTER.total_seconds() // (2 * SEND_TIMEOUT_SECONDS))
+
+RESULT_FIELDS = [
+    'status', 'attempts', 'next_attempt_at', 'last_error', 'last_status_code',
+    'provider_message_id', 'sent_at', 'updated_at',
+]
+
+# Status code yang layak di-retry (timeout, rate limited, error server/koneksi)
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+# ==============================================================================
+# ENQUEUE
+# ==============================================================================
+def _schedule_processing():
+    """Trigger worker setelah transaksi commit (gagal trigger = diambil beat berikutnya)"""
+    def kick():
+        try:
+            from core.tasks import process_whatsapp_outbox
+            process_whatsapp_outbox.delay()
+        except Exception as e:
+            logger.warning(f"[WA Outbox] Gagal trigger worker, menunggu jadwal beat: {e}")
+    transaction.on_commit(kick)
+
+
+def _build_outbox(target, message, departemen=None, provider=None, idempotency_key=None,
+                  ref=None, send_at=None):
+    from .models import WhatsAppOutbox
+
+    ref_model, ref_id = ref if ref else ('', '')
+    return WhatsAppOutbox(
+        idempotency_key=(idempotency_key or f'wa:{uuid.uuid4().hex}')[:150],
+        provider=provider or WhatsAppOutbox.PROVIDER_FONNTE,
+        departemen=departemen,
+        target=''.join(filter(str.isdigit, str(target or '')))[:20],
+        message=message,
+        ref_model=ref_model,
+        ref_id=str(ref_id),
+        max_attempts=MAX_ATTEMPTS,
+        next_attempt_at=send_at or timezone.now(),
+    )
+
+
+def enqueue_whatsapp(target, message, departemen=None, provider=None, idempotency_key=None,
+                     ref=None, send_at=None):
+    """
+    Masukkan satu pesan WA ke outbox (non-blocking).
+
+    Args:
+        target: Nomor HP tujuan
+        message: Isi pesan
+        departemen: Departemen pengirim (token Fonnte & bucket rate limit)
+        provider: WhatsAppOutbox.PROVIDER_FONNTE (default) / PROVIDER_WA_API
+        idempotency_key: Key unik pesan logis; default random (selalu pesan baru)
+        ref: Tuple (model_label, id) object bisnis terkait, misal ('preventive_jobs.ChecklistShareLog', 12)
+        send_at: Jadwal kirim paling cepat (default sekarang)
+
+    Returns:
+        (WhatsAppOutbox, created) - created False jika key sudah pernah di-enqueue
+    """
+    from .models import WhatsAppOutbox
+
+    outbox = _build_outbox(target, message, departemen, provider, idempotency_key, ref, send_at)
+    try:
+        # Savepoint: IntegrityError (key duplikat) tidak merusak transaksi pemanggil
+        with transaction.atomic():
+            outbox.save()
+    except IntegrityError:
+        return WhatsAppOutbox.objects.get(idempotency_key=outbox.idempotency_key), False
+    _schedule_processing()
+    return outbox, True
+
+
+def enqueue_whatsapp_batch(items, departemen=None, provider=None):
+    """
+    Enqueue banyak pesan sekaligus dengan satu bulk INSERT.
+
+    Args:
+        items: List dict {'target', 'message', optional 'idempotency_key', 'ref', 'send_at'}
+
+    Returns:
+        List WhatsAppOutbox yang tersimpan (termasuk yang sudah ada sebelumnya untuk key sama)
+    """
+    from .models import WhatsAppOutbox
+
+    rows = [
+        _build_outbox(
+            item['target'], item['message'], departemen, provider,
+            item.get('idempotency_key'), item.get('ref'), item.get('send_at'),
+        )
+        for item in items
+    ]
+    if not rows:
+        return []
+    WhatsAppOutbox.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    _schedule_processing()
+    keys = [row.idempotency_key for row in rows]
+    stored = WhatsAppOutbox.objects.in_bulk(keys, field_name='idempotency_key')
+    return [stored[key] for key in keys if key in stored]
+
+
+# ==============================================================================
+# TOKEN BUCKET RATE LIMIT
+# ==============================================================================
+def bucket_key_for(outbox):
+    if outbox.departemen_id:
+        return f'dept:{outbox.departemen_id}'
+    return f'global:{outbox.provider}'
+
+
+def take_tokens(bucket_key, wanted, now=None):
+    """
+    Ambil sampai `wanted` token dari bucket (harus dipanggil di dalam transaction.atomic).
+
+    Returns:
+        (granted, seconds_until_next_token)
+    """
+    from .models import WhatsAppRateBucket
+
+    now = now or timezone.now()
+    rate_per_second = RATE_PER_MINUTE / 60.0
+    bucket, _ = WhatsAppRateBucket.objects.select_for_update().get_or_create(
+        bucket_key=bucket_key, defaults={'tokens': BURST, 'updated_at': now}
+    )
+    elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+    tokens = min(BURST, bucket.tokens + elapsed * rate_per_second)
+    granted = min(int(tokens), wanted)
+    bucket.tokens = tokens - granted
+    bucket.updated_at = now
+    bucket.save(update_fields=['tokens', 'updated_at'])
+
+    wait = max((1 - bucket.tokens) / rate_per_second, 0) if rate_per_second else 60
+    return granted, wait
+
+
+# ==============================================================================
+# WORKER
+# ==============================================================================
+def backoff_delay(attempts):
+    """Exponential backoff + jitter: 30s, 60s, 120s, ... maksimal 1 jam"""
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def fail_stale_sending():
+    """
+    Row yang tertahan di 'sending' lebih dari STALE_SENDING_AFTER (worker mati di tengah kirim)
+    ditandai failed, TIDAK dikirim ulang otomatis: provider mungkin sudah menerima pesannya,
+    jadi kirim ulang bisa membuat pesan WA dobel. Admin bisa retry manual (action outbox).
+
+    Returns:
+        Jumlah row yang ditandai failed
+    """
+    from .models import WhatsAppOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        stale = list(
+            WhatsAppOutbox.objects.select_for_update(skip_locked=True).filter(
+                status=WhatsAppOutbox.STATUS_SENDING, updated_at__lt=now - STALE_SENDING_AFTER
+            )
+        )
+        for outbox in stale:
+            outbox.status = WhatsAppOutbox.STATUS_FAILED
+            outbox.last_error = (
+                'Worker berhenti saat mengirim - status di provider tidak diketahui. '
+                'Cek manual sebelum kirim ulang.'
+            )
+            outbox.updated_at = now
+        WhatsAppOutbox.objects.bulk_update(stale, ['status', 'last_error', 'updated_at'])
+
+    for outbox in stale:
+        logger.warning(f"[WA Outbox] #{outbox.id} tertahan di 'sending', ditandai failed")
+        try:
+            whatsapp_delivery_status.send(sender=WhatsAppOutbox, outbox=outbox, status=outbox.status)
+        except Exception as e:
+            logger.error(f"[WA Outbox] Error handler status #{outbox.id}: {e}")
+    return len(stale)
+
+
+def claim_due_messages(batch_size=50):
+    """
+    Claim pesan jatuh tempo yang masih di dalam kuota rate limit.
+    Pesan di luar kuota dijadwalkan ulang ke saat token berikutnya tersedia.
+
+    Returns:
+        List WhatsAppOutbox berstatus 'sending' yang siap dikirim (maksimal MAX_BATCH_SIZE)
+    """
+    from .models import WhatsAppOutbox
+
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    fail_stale_sending()
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            WhatsAppOutbox.objects.select_for_update(skip_locked=True).filter(
+                status=WhatsAppOutbox.STATUS_PENDING, next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+
+        by_bucket = {}
+        for outbox in due:
+            by_bucket.setdefault(bucket_key_for(outbox), []).append(outbox)
+
+        claimed, deferred = [], []
+        for bucket_key, rows in sorted(by_bucket.items()):
+            granted, wait = take_tokens(bucket_key, len(rows), now)
+            for outbox in rows[:granted]:
+                outbox.status = WhatsAppOutbox.STATUS_SENDING
+                outbox.updated_at = now
+                claimed.append(outbox)
+            for outbox in rows[granted:]:
+                outbox.status = WhatsAppOutbox.STATUS_PENDING
+                outbox.next_attempt_at = now + timedelta(seconds=wait)
+                outbox.updated_at = now
+                deferred.append(outbox)
+
+        WhatsAppOutbox.objects.bulk_update(
+            claimed + deferred, ['status', 'next_attempt_at', 'updated_at']
+        )
+    return claimed
+
+
+class _SenderCache:
+    """Resolve client pengirim sekali per departemen/provider per batch"""
+
+    def __init__(self):
+        self._fonnte = {}
+        self._wa_api = None
+
+    def send(self, outbox):
+        from .models import WhatsAppOutbox
+
+        if outbox.provider == WhatsAppOutbox.PROVIDER_WA_API:
+            if self._wa_api is None:
+                from preventive_jobs.whatsapp_utils import WhatsAppAPI
+                self._wa_api = WhatsAppAPI()
+            return self._wa_api.send_message(outbox.target, outbox.message)
+
+        if outbox.departemen_id not in self._fonnte:
+            from .fontte_service import get_fonnte_service
+            self._fonnte[outbox.departemen_id] = get_fonnte_service(outbox.departemen)
+        fonnte = self._fonnte[outbox.departemen_id]
+        if fonnte is None:
+            return {
+                'success': False,
+                'error': 'FonnteSettings aktif tidak ditemukan untuk departemen',
+                'status_code': 400,
+            }
+        return fonnte.send_message(target=outbox.target, message=outbox.message)
+
+
+def _apply_result(outbox, result, now):
+    """Update field outbox sesuai hasil kirim. Return status final atau None jika retry."""
+    from .models import WhatsAppOutbox
+
+    outbox.attempts += 1
+    outbox.updated_at = now
+    outbox.last_status_code = result.get('status_code')
+
+    if result.get('success'):
+        outbox.status = WhatsAppOutbox.STATUS_SENT
+        outbox.sent_at = now
+        outbox.last_error = ''
+        outbox.provider_message_id = str(result.get('message_id') or '')[:100]
+        return outbox.status
+
+    outbox.last_error = str(result.get('error') or result.get('message') or 'Unknown error')[:2000]
+    status_code = result.get('status_code')
+    # Tanpa status code (WhatsAppAPI) dianggap error sementara -> retry
+    retryable = status_code is None or status_code in RETRYABLE_STATUS_CODES
+    if retryable and outbox.attempts < outbox.max_attempts:
+        outbox.status = WhatsAppOutbox.STATUS_PENDING
+        outbox.next_attempt_at = now + backoff_delay(outbox.attempts)
+        return None
+
+    outbox.status = WhatsAppOutbox.STATUS_FAILED
+    return outbox.status
+
+
+def _still_sending(outbox, **fields):
+    """
+    UPDATE row hanya jika masih 'sending' milik batch ini. False berarti row sudah ditandai
+    final oleh fail_stale_sending() dan tidak boleh ditimpa / dikirim.
+    """
+    from .models import WhatsAppOutbox
+
+    return bool(
+        WhatsAppOutbox.objects.filter(pk=outbox.pk, status=WhatsAppOutbox.STATUS_SENDING).update(**fields)
+    )
+
+
+def deliver(outboxes):
+    """
+    Kirim pesan yang sudah di-claim. Hasil setiap pesan disimpan (dan signal dikirim)
+    langsung setelah pesan itu terkirim, bukan di akhir batch.
+
+    Returns:
+        dict summary {'sent', 'retry', 'failed', 'skipped'}
+    """
+    from .models import WhatsAppOutbox
+
+    senders = _SenderCache()
+    summary = {'sent': 0, 'retry': 0, 'failed': 0, 'skipped': 0}
+
+    for outbox in outboxes:
+        # Heartbeat: umur 'sending' dihitung dari pesan ini mulai dikirim, bukan dari claim
+        outbox.updated_at = timezone.now()
+        if not _still_sending(outbox, updated_at=outbox.updated_at):
+            logger.warning(f"[WA Outbox] #{outbox.id} sudah bukan 'sending', dilewati")
+            summary['skipped'] += 1
+            continue
+
+        try:
+            result = senders.send(outbox)
+        except Exception as e:
+            logger.exception(f"[WA Outbox] Error kirim #{outbox.id}: {e}")
+            result = {'success': False, 'error': str(e)}
+
+        final_status = _apply_result(outbox, result, timezone.now())
+        if not _still_sending(outbox, **{field: getattr(outbox, field) for field in RESULT_FIELDS}):
+            logger.warning(f"[WA Outbox] #{outbox.id} sudah ditandai final, hasil kirim tidak disimpan")
+            summary['skipped'] += 1
+            continue
+
+        if final_status == WhatsAppOutbox.STATUS_SENT:
+            summary['sent'] += 1
+        elif final_status == WhatsAppOutbox.STATUS_FAILED:
+            summary['failed'] += 1
+        else:
+            summary['retry'] += 1
+            continue
+
+        try:
+            whatsapp_delivery_status.send(sender=WhatsAppOutbox, outbox=outbox, status=outbox.status)
+        except Exception as e:
+            logger.error(f"[WA Outbox] Error handler status #{outbox.id}: {e}")
+
+    return summary
+
+
+def process_outbox(batch_size=MAX_BATCH_SIZE):
+    """Satu putaran worker: claim + kirim. Return summary termasuk jumlah yang di-claim."""
+    claimed = claim_due_messages(batch_size)
+    summary = deliver(claimed) if claimed else {'sent': 0, 'retry': 0, 'failed': 0, 'skipped': 0}
+    summary['claimed'] = len(claimed)
+    return summary
+
+
+def has_due_messages():
+    from .models import WhatsAppOutbox
+    return WhatsAppOutbox.objects.filter(
+        status=WhatsAppOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now()
+    ).exists()
@@ -1,10 +1,12 @@
 from django.contrib import admin
-from .models import Barang, StockLevel
+from .models import Barang, StockLevel, StockMovement, StockSnapshot
+from .stock_ledger import opening_movements
 
 
 @admin.register(Barang)
 class BarangAdmin(admin.ModelAdmin):
-    list_display = ['kode', 'nama', 'status', 'lokasi_penyimpanan', 'created_at']
+    list_display = ['kode', 'nama', 'status', 'lokasi_penyimpanan', 'stok_minimum', 'titik_reorder', 'created_at']
+    list_editable = ['stok_minimum', 'titik_reorder']
     list_filter = ['status', 'created_at']
     search_fields = ['kode', 'nama', 'spesifikasi']
     readonly_fields = ['id', 'created_at', 'updated_at']
@@ -16,6 +18,9 @@ class BarangAdmin(admin.ModelAdmin):
         ('Storage', {
             'fields': ('lokasi_penyimpanan',)
         }),
+        ('Batas Stok', {
+            'fields': ('stok_minimum', 'titik_reorder')
+        }),
         ('Status', {
             'fields': ('status',)
         }),
@@ -33,6 +38,17 @@ class StockLevelAdmin(admin.ModelAdmin):
     search_fields = ['barang__kode', 'barang__nama']
     readonly_fields = ['id', 'updated_at']
     
+    def get_readonly_fields(self, request, obj=None):
+        # Stok yang sudah ada hanya berubah lewat ledger (StockMovement)
+        if obj is not None:
+            return self.readonly_fields + ['barang', 'qty', 'updated_by']
+        return self.readonly_fields
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            StockMovement.objects.bulk_create(opening_movements([obj], request.user, 'Stok awal (admin)'))
+    
     fieldsets = (
         ('Item', {
             'fields': ('barang',)
@@ -44,3 +60,37 @@ class StockLevelAdmin(admin.ModelAdmin):
             'fields': ('updated_by', 'updated_at', 'id'),
         }),
     )
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'barang', 'jenis', 'delta', 'qty_after', 'created_by']
+    list_filter = ['jenis', 'created_at']
+    search_fields = ['barang__kode', 'barang__nama', 'keterangan']
+    list_select_related = ['barang', 'created_by']
+    raw_id_fields = ['barang']
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['tanggal', 'barang', 'qty', 'qty_masuk', 'qty_keluar', 'jumlah_mutasi']
+    list_filter = ['tanggal']
+    search_fields = ['barang__kode', 'barang__nama']
+    list_select_related = ['barang']
+    date_hierarchy = 'tanggal'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,6 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
     verbose_name = 'Inventory Management'
+    
+    def ready(self):
+        import inventory.signals  # Invalidasi cache public inventory
@@ -7,7 +7,7 @@ class BarangForm(forms.ModelForm):
     
     class Meta:
         model = Barang
-        fields = ['kategori', 'nama', 'spesifikasi', 'lokasi_penyimpanan', 'status']
+        fields = ['kategori', 'nama', 'spesifikasi', 'lokasi_penyimpanan', 'stok_minimum', 'titik_reorder', 'status']
         widgets = {
             'kategori': forms.Select(attrs={
                 'class': 'form-select',
@@ -25,15 +25,47 @@ class BarangForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Rak A1, Bin 3, dll'
             }),
+            'stok_minimum': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': '0',
+            }),
+            'titik_reorder': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': '0',
+            }),
             'status': forms.Select(attrs={
                 'class': 'form-select'
             }),
         }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        stok_minimum = cleaned_data.get('stok_minimum') or 0
+        titik_reorder = cleaned_data.get('titik_reorder') or 0
+        if titik_reorder and stok_minimum > titik_reorder:
+            self.add_error('titik_reorder', 'Titik reorder tidak boleh lebih kecil dari stok minimum')
+        return cleaned_data
 
 
 class StockUpdateForm(forms.ModelForm):
-    """Form untuk update stok"""
+    """Form untuk update stok (disimpan sebagai mutasi lewat inventory.stock_ledger)"""
     
+    JENIS_CHOICES = [
+        ('', 'Otomatis (masuk / keluar)'),
+        ('opname', 'Stock Opname (hitung fisik)'),
+    ]
+    
+    jenis = forms.ChoiceField(
+        choices=JENIS_CHOICES,
+        required=False,
+        label='Jenis Update',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    qty_lama = forms.IntegerField(
+        required=False,
+        min_value=0,
+        widget=forms.HiddenInput()
+    )
     keterangan = forms.CharField(
         required=False,
         label='Keterangan/Alasan Update',
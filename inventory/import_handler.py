@@ -1,153 +1,94 @@
-import openpyxl
-from django.core.exceptions import ValidationError
-from .models import Barang, StockLevel
+from django.utils import timezone
 
+from core.excel_import import ChunkedExcelImporter, RowError
+from . import public_cache
+from .models import Barang, StockLevel, StockMovement
+from .stock_ledger import opening_movements
 
-class BarangImporter:
-    """Handle Excel import untuk Barang"""
+
+class BarangImporter(ChunkedExcelImporter):
+    """
+    Handle Excel import untuk Barang.
+    
+    Streaming read_only + bulk_create per chunk (lihat core/excel_import.py). Kode INV-
+    dialokasikan satu blok per chunk, bukan satu query per baris di Barang.save().
+    """
     
     REQUIRED_COLUMNS = ['Nama Barang', 'Kategori']
     OPTIONAL_COLUMNS = ['Spesifikasi', 'Lokasi Penyimpanan', 'Stok Awal']
     
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.workbook = None
-        self.worksheet = None
-        self.errors = []
-        self.success_count = 0
-        self.failed_rows = []
-    
-    def parse_file(self):
-        """Parse Excel file"""
-        try:
-            self.workbook = openpyxl.load_workbook(self.file_path)
-            self.worksheet = self.workbook.active
-            return True
-        except Exception as e:
-            self.errors.append(f"Error membaca file Excel: {str(e)}")
-            return False
+    def prepare(self):
+        # Get valid kategori values
+        self.valid_kategori = dict(Barang.CATEGORY_CHOICES)
+        self.valid_options = ', '.join(self.valid_kategori.keys())
     
-    def validate_headers(self):
-        """Validate header row"""
-        headers = []
-        for cell in self.worksheet[1]:
-            if cell.value:
-                headers.append(str(cell.value).strip())
+    def clean_row(self, row_num, values):
+        nama = values.get('Nama Barang')
+        kategori = values.get('Kategori')
+        spek = values.get('Spesifikasi')
+        lokasi = values.get('Lokasi Penyimpanan')
+        stok = values.get('Stok Awal') or 0
         
-        # Check required columns
-        for required_col in self.REQUIRED_COLUMNS:
-            if required_col not in headers:
-                self.errors.append(f"Kolom '{required_col}' tidak ditemukan. Kolom wajib: {', '.join(self.REQUIRED_COLUMNS)}")
-                return False
+        # Validate nama
+        if not nama or str(nama).strip() == '':
+            raise RowError('Nama Barang tidak boleh kosong', 'Nama Barang')
+        nama = str(nama).strip()
+        if len(nama) > Barang._meta.get_field('nama').max_length:
+            raise RowError('Nama Barang terlalu panjang (maks 255 karakter)', 'Nama Barang', nama)
         
-        return True
-    
-    def get_column_index(self, column_name):
-        """Get column index by name"""
-        for idx, cell in enumerate(self.worksheet[1], 1):
-            if cell.value and str(cell.value).strip() == column_name:
-                return idx
-        return None
-    
-    def import_data(self):
-        """Import data from Excel"""
-        if not self.parse_file():
-            return False
+        # Validate kategori
+        if not kategori:
+            raise RowError('Kategori tidak boleh kosong', 'Kategori')
+        kategori = str(kategori).strip().lower()
         
-        if not self.validate_headers():
-            return False
+        # Check if kategori valid
+        if kategori not in self.valid_kategori:
+            raise RowError(
+                f"Kategori '{kategori}' tidak valid. Pilih: {self.valid_options}", 'Kategori', kategori
+            )
         
-        # Get column indices
-        nama_idx = self.get_column_index('Nama Barang')
-        kategori_idx = self.get_column_index('Kategori')
-        spek_idx = self.get_column_index('Spesifikasi')
-        lokasi_idx = self.get_column_index('Lokasi Penyimpanan')
-        stok_idx = self.get_column_index('Stok Awal')
+        lokasi = str(lokasi).strip() if lokasi is not None else None
+        if lokasi and len(lokasi) > Barang._meta.get_field('lokasi_penyimpanan').max_length:
+            raise RowError('Lokasi Penyimpanan terlalu panjang (maks 100 karakter)', 'Lokasi Penyimpanan', lokasi)
         
-        # Get valid kategori values
-        valid_kategori = dict(Barang.CATEGORY_CHOICES)
-        
-        # Process rows (skip header)
-        for row_num, row in enumerate(self.worksheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                # Get values
-                nama = row[nama_idx - 1].value
-                kategori = row[kategori_idx - 1].value
-                spek = row[spek_idx - 1].value if spek_idx else None
-                lokasi = row[lokasi_idx - 1].value if lokasi_idx else None
-                stok = row[stok_idx - 1].value if stok_idx else 0
-                
-                # Validate nama
-                if not nama or str(nama).strip() == '':
-                    self.failed_rows.append({
-                        'row': row_num,
-                        'error': 'Nama Barang tidak boleh kosong'
-                    })
-                    continue
-                
-                nama = str(nama).strip()
-                
-                # Validate kategori
-                if not kategori:
-                    self.failed_rows.append({
-                        'row': row_num,
-                        'error': 'Kategori tidak boleh kosong'
-                    })
-                    continue
-                
-                kategori = str(kategori).strip().lower()
-                
-                # Check if kategori valid
-                if kategori not in valid_kategori:
-                    valid_options = ', '.join(dict(Barang.CATEGORY_CHOICES).keys())
-                    self.failed_rows.append({
-                        'row': row_num,
-                        'error': f"Kategori '{kategori}' tidak valid. Pilih: {valid_options}"
-                    })
-                    continue
-                
-                # Validate stok (must be number)
-                try:
-                    stok = int(stok) if stok else 0
-                    if stok < 0:
-                        stok = 0
-                except (ValueError, TypeError):
-                    self.failed_rows.append({
-                        'row': row_num,
-                        'error': f"Stok harus berupa angka, dapat '{stok}'"
-                    })
-                    continue
-                
-                # Create Barang
-                barang = Barang.objects.create(
-                    nama=nama,
-                    kategori=kategori,
-                    spesifikasi=spek,
-                    lokasi_penyimpanan=lokasi,
-                    status='active'
-                )
-                
-                # Create StockLevel
-                StockLevel.objects.create(
-                    barang=barang,
-                    qty=stok
-                )
-                
-                self.success_count += 1
-            
-            except Exception as e:
-                self.failed_rows.append({
-                    'row': row_num,
-                    'error': str(e)
-                })
+        # Validate stok (must be number)
+        try:
+            stok = int(stok) if stok else 0
+            if stok < 0:
+                stok = 0
+        except (ValueError, TypeError):
+            raise RowError(f"Stok harus berupa angka, dapat '{stok}'", 'Stok Awal', stok)
         
-        return True
-    
-    def get_result(self):
-        """Get import result"""
         return {
-            'success': self.success_count,
-            'failed': len(self.failed_rows),
-            'errors': self.errors,
-            'failed_rows': self.failed_rows
+            'nama': nama,
+            'kategori': kategori,
+            'spesifikasi': str(spek) if spek is not None else None,
+            'lokasi_penyimpanan': lokasi or None,
+            'stok': stok,
         }
+    
+    def persist_chunk(self, rows):
+        """Satu blok kode + bulk_create Barang, StockLevel & mutasi stok awal (transaksi dibuka oleh base class)"""
+        kode_list = Barang.allocate_kode_block(len(rows))
+        now = timezone.now()
+        barang_list = []
+        stock_levels = []
+        for kode, (row_num, data) in zip(kode_list, rows):
+            barang = Barang(
+                kode=kode,
+                nama=data['nama'],
+                kategori=data['kategori'],
+                spesifikasi=data['spesifikasi'],
+                lokasi_penyimpanan=data['lokasi_penyimpanan'],
+                status='active',
+                created_at=now,
+                updated_at=now,
+            )
+            barang_list.append(barang)
+            stock_levels.append(StockLevel(barang=barang, qty=data['stok'], updated_by=self.user))
+        
+        Barang.objects.bulk_create(barang_list)
+        StockLevel.objects.bulk_create(stock_levels)
+        StockMovement.objects.bulk_create(opening_movements(stock_levels, self.user, 'Stok awal (import Excel)'))
+        public_cache.invalidate()
+        return len(barang_list)
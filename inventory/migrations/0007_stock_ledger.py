@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def opening_movements(apps, schema_editor):
+    """Stok yang sudah ada dicatat sebagai mutasi 'awal' supaya ledger bisa direplay"""
+    StockLevel = apps.get_model('inventory', 'StockLevel')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            barang_id=stock.barang_id,
+            jenis='awal',
+            delta=stock.qty,
+            qty_after=stock.qty,
+            keterangan='Saldo awal ledger',
+            created_by_id=stock.updated_by_id,
+        )
+        for stock in StockLevel.objects.exclude(qty=0).only('barang_id', 'qty', 'updated_by_id')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_remove_stockexportschedule_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('jenis', models.CharField(choices=[('awal', 'Stok Awal'), ('masuk', 'Barang Masuk'), ('keluar', 'Barang Keluar'), ('opname', 'Stock Opname / Penyesuaian')], max_length=10)),
+                ('delta', models.IntegerField(help_text='Perubahan stok (+ masuk, - keluar)')),
+                ('qty_after', models.IntegerField(help_text='Stok setelah mutasi')),
+                ('keterangan', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('barang', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.barang')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Stock Movement',
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['barang', 'created_at'], name='stockmove_barang_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tanggal', models.DateField()),
+                ('qty', models.IntegerField(help_text='Stok di akhir hari')),
+                ('qty_masuk', models.PositiveIntegerField(default=0)),
+                ('qty_keluar', models.PositiveIntegerField(default=0)),
+                ('jumlah_mutasi', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('barang', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.barang')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'ordering': ['-tanggal'],
+                'indexes': [models.Index(fields=['tanggal'], name='stocksnapshot_tanggal_idx')],
+                'constraints': [models.UniqueConstraint(fields=('barang', 'tanggal'), name='stocksnapshot_barang_tanggal_uniq')],
+            },
+        ),
+        migrations.RunPython(opening_movements, migrations.RunPython.noop),
+    ]
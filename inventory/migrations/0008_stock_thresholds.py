@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='barang',
+            name='stok_minimum',
+            field=models.PositiveIntegerField(default=0, help_text='Stok kritis: di bawah / sama dengan angka ini barang harus segera diadakan'),
+        ),
+        migrations.AddField(
+            model_name='barang',
+            name='titik_reorder',
+            field=models.PositiveIntegerField(default=0, help_text='Reorder point: di bawah / sama dengan angka ini barang mulai dipesan ulang'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Length
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
@@ -62,24 +63,63 @@ class Barang(models.Model):
         default='active'
     )
     
+    # Batas stok (0 = tidak dipantau), dipakai inventory.stock_alerts
+    stok_minimum = models.PositiveIntegerField(
+        default=0,
+        help_text="Stok kritis: di bawah / sama dengan angka ini barang harus segera diadakan"
+    )
+    titik_reorder = models.PositiveIntegerField(
+        default=0,
+        help_text="Reorder point: di bawah / sama dengan angka ini barang mulai dipesan ulang"
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    KODE_PREFIX = 'INV-'
+    KODE_SEQUENCE = 'inventory.barang.kode'
+    
+    @classmethod
+    def kode_number(cls, kode):
+        """Nomor dari kode INV- (misal: INV-00001 → 1), None jika bukan format INV-"""
+        if not kode or not kode.startswith(cls.KODE_PREFIX):
+            return None
+        try:
+            return int(kode[len(cls.KODE_PREFIX):])
+        except ValueError:
+            return None
+    
+    @classmethod
+    def _last_kode_number(cls):
+        """Seed counter dari data lama: kode terpanjang lalu terbesar"""
+        last_kode = cls.objects.filter(kode__startswith=cls.KODE_PREFIX).order_by(
+            Length('kode').desc(), '-kode'
+        ).values_list('kode', flat=True).first()
+        return cls.kode_number(last_kode) or 0
+    
+    @classmethod
+    def allocate_kode_block(cls, count):
+        """
+        Reservasi `count` kode berurutan (INV-00001, ...) dari counter DocumentSequence.
+        Panggil di dalam transaksi yang sama dengan insert-nya.
+        """
+        from core.services.sequences import allocate_sequence
+        
+        numbers = allocate_sequence(cls.KODE_SEQUENCE, count, seed=cls._last_kode_number)
+        # Generate kode baru dengan format INV-00001
+        return [f'{cls.KODE_PREFIX}{num:05d}' for num in numbers]
+    
     def save(self, *args, **kwargs):
         """Auto-generate kode barang jika belum ada"""
-        if not self.kode:
-            # Cari barang terakhir dengan kode yang sudah ada
-            last_barang = Barang.objects.filter(kode__startswith='INV-').order_by('-created_at').first()
-            if last_barang:
-                # Extract nomor dari kode terakhir (misal: INV-00001 → 1)
-                last_num = int(last_barang.kode.split('-')[1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            # Generate kode baru dengan format INV-00001
-            self.kode = f'INV-{new_num:05d}'
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.kode:
+                self.kode = self.allocate_kode_block(1)[0]
+            elif self._state.adding and self.kode_number(self.kode):
+                # Kode INV- diisi manual: majukan counter supaya alokasi berikutnya tidak bentrok
+                from core.services.sequences import bump_sequence
+                bump_sequence(self.KODE_SEQUENCE, self.kode_number(self.kode))
+            super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Barang"
@@ -128,3 +168,82 @@ class StockLevel(models.Model):
     
     def __str__(self):
         return f"{self.barang.nama} - {self.qty}"
+
+
+class StockMovement(models.Model):
+    """
+    Ledger mutasi stok (append-only). Setiap perubahan StockLevel.qty dicatat
+    sebagai delta bertanda lewat inventory.stock_ledger - jangan ubah qty langsung.
+    """
+    JENIS_CHOICES = [
+        ('awal', 'Stok Awal'),
+        ('masuk', 'Barang Masuk'),
+        ('keluar', 'Barang Keluar'),
+        ('opname', 'Stock Opname / Penyesuaian'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    barang = models.ForeignKey(
+        Barang,
+        on_delete=models.CASCADE,
+        related_name='stock_movements'
+    )
+    jenis = models.CharField(max_length=10, choices=JENIS_CHOICES)
+    delta = models.IntegerField(help_text="Perubahan stok (+ masuk, - keluar)")
+    qty_after = models.IntegerField(help_text="Stok setelah mutasi")
+    keterangan = models.TextField(blank=True, default='')
+    
+    # Audit
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements'
+    )
+    
+    class Meta:
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['barang', 'created_at'], name='stockmove_barang_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.barang_id} {self.delta:+d} ({self.get_jenis_display()})"
+
+
+class StockSnapshot(models.Model):
+    """
+    Saldo akhir hari per barang (diisi task harian inventory.tasks.take_stock_snapshots).
+    Hanya hari yang punya mutasi yang punya baris; stok di tanggal lain = snapshot
+    terakhir sebelumnya.
+    """
+    id = models.BigAutoField(primary_key=True)
+    barang = models.ForeignKey(
+        Barang,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    tanggal = models.DateField()
+    qty = models.IntegerField(help_text="Stok di akhir hari")
+    qty_masuk = models.PositiveIntegerField(default=0)
+    qty_keluar = models.PositiveIntegerField(default=0)
+    jumlah_mutasi = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Stock Snapshot"
+        verbose_name_plural = "Stock Snapshots"
+        ordering = ['-tanggal']
+        constraints = [
+            models.UniqueConstraint(fields=['barang', 'tanggal'], name='stocksnapshot_barang_tanggal_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tanggal'], name='stocksnapshot_tanggal_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.barang_id} @ {self.tanggal}: {self.qty}"
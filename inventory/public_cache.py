@@ -0,0 +1,76 @@
+"""
+Cache halaman public inventory (PublicInventoryView / PublicInventoryJSONView).
+
+Halaman public dibuka tanpa login dari HP di lantai produksi dan di-refresh terus-menerus.
+Sebelumnya setiap hit menjalankan queryset + render template penuh.
+
+Sekarang:
+1. Satu version stamp global ({'version', 'last_modified'}) disimpan di cache tanpa timeout.
+   Stamp di-bump (setelah commit) setiap Barang / StockLevel berubah: lewat signal untuk
+   save()/delete(), dan eksplisit untuk jalur yang memakai update() / bulk_create
+   (stock_ledger, import Excel).
+2. Hasil render disimpan per (versi, varian html/json, parameter query yang dinormalisasi),
+   bersama ETag kuat (hash isi response). Bump versi = semua entry lama otomatis tidak terpakai.
+3. Request dengan If-None-Match / If-Modified-Since yang masih cocok dijawab 304 langsung
+   dari cache - tanpa query database.
+
+Settings (opsional):
+    PUBLIC_INVENTORY_CACHE_TIMEOUT - umur entry halaman di cache, detik (default 3600)
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'public_inventory_version'
+PAGE_KEY = 'public_inventory_page:{version}:{variant}:{params}'
+PAGE_TIMEOUT = getattr(settings, 'PUBLIC_INVENTORY_CACHE_TIMEOUT', 60 * 60)
+
+
+def _new_state():
+    return {'version': uuid.uuid4().hex[:12], 'last_modified': int(time.time())}
+
+
+def get_state():
+    """Version stamp sekarang (dibuat baru jika hilang dari cache)"""
+    state = cache.get(VERSION_KEY)
+    if state is None:
+        state = _new_state()
+        if not cache.add(VERSION_KEY, state, None):
+            state = cache.get(VERSION_KEY) or state
+    return state
+
+
+def bump_version():
+    cache.set(VERSION_KEY, _new_state(), None)
+
+
+def invalidate():
+    """Bump versi setelah transaksi yang sedang berjalan commit"""
+    transaction.on_commit(bump_version)
+
+
+def page_key(state, variant, params):
+    """Cache key satu halaman; params = list (nama, nilai) yang sudah dinormalisasi"""
+    digest = hashlib.md5(repr(sorted(params)).encode()).hexdigest()
+    return PAGE_KEY.format(version=state['version'], variant=variant, params=digest)
+
+
+def make_entry(content, content_type):
+    return {
+        'content': content,
+        'content_type': content_type,
+        'etag': f'"{hashlib.md5(content).hexdigest()}"',
+    }
+
+
+def get_page(key):
+    return cache.get(key)
+
+
+def set_page(key, entry):
+    cache.set(key, entry, PAGE_TIMEOUT)
@@ -0,0 +1,18 @@
+"""
+Signals untuk invalidasi cache inventory: halaman public (inventory/public_cache.py)
+dan daftar alert stok rendah (inventory/stock_alerts.py)
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Barang, StockLevel
+from . import public_cache
+from .stock_alerts import invalidate_stock_alerts
+
+
+@receiver(post_save, sender=Barang)
+@receiver(post_delete, sender=Barang)
+@receiver(post_save, sender=StockLevel)
+@receiver(post_delete, sender=StockLevel)
+def invalidate_inventory_caches(sender, **kwargs):
+    public_cache.invalidate()
+    invalidate_stock_alerts()
@@ -0,0 +1,210 @@
+"""
+Alert stok rendah / reorder untuk inventory.
+
+Setiap Barang punya dua batas (0 = tidak dipantau):
+    stok_minimum  - stok <= batas ini: 'kritis'
+    titik_reorder - stok <= batas ini: 'reorder' (mulai dipesan ulang)
+
+Alur (dijalankan Celery, lihat inventory.tasks):
+1. refresh_stock_alerts(): SATU query set-based ke StockLevel (JOIN Barang, WHERE
+   qty <= batas) menghasilkan semua barang rendah, ditambah satu query consumption rate
+   (StockSnapshot) untuk estimasi sisa hari. Hasilnya (list + jumlah per kategori)
+   disimpan di cache dan dibaca BarangListView tanpa query ulang. Cache dibuang setiap
+   stok / batas berubah, jadi daftar di UI tidak menunggu jadwal task.
+2. send_stock_alert_digest(): SATU pesan WA per storekeeper (grup Warehouse) berisi
+   seluruh daftar, lewat WhatsApp outbox. Idempotency key = tanggal + isi daftar, jadi
+   daftar yang sama tidak dikirim dua kali di hari yang sama.
+
+Settings (opsional):
+    INVENTORY_STOREKEEPER_GROUPS   - grup penerima digest (default ['Warehouse'])
+    INVENTORY_ALERT_DIGEST_MAX_ITEMS - maksimal baris barang per pesan (default 40)
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.utils import timezone
+
+from .models import Barang, StockLevel
+from .stock_ledger import consumption_rates
+
+logger = logging.getLogger(__name__)
+
+ALERT_CACHE_KEY = 'inventory_stock_alerts'
+STOREKEEPER_GROUPS = getattr(settings, 'INVENTORY_STOREKEEPER_GROUPS', ['Warehouse'])
+DIGEST_MAX_ITEMS = getattr(settings, 'INVENTORY_ALERT_DIGEST_MAX_ITEMS', 40)
+
+KRITIS = Q(barang__stok_minimum__gt=0, qty__lte=F('barang__stok_minimum'))
+REORDER = Q(barang__titik_reorder__gt=0, qty__lte=F('barang__titik_reorder'))
+
+
+# ==============================================================================
+# QUERY
+# ==============================================================================
+def low_stock_queryset():
+    """StockLevel barang aktif yang kritis / perlu reorder, dengan anotasi `level`"""
+    return (
+        StockLevel.objects.filter(barang__status='active')
+        .filter(KRITIS | REORDER)
+        .annotate(level=Case(When(KRITIS, then=Value('kritis')), default=Value('reorder'), output_field=CharField()))
+    )
+
+
+def low_stock_barang_ids():
+    """Subquery id barang rendah (untuk filter list)"""
+    return low_stock_queryset().values('barang_id')
+
+
+def compute_stock_alerts():
+    """
+    Hitung daftar alert (tanpa cache).
+
+    Returns:
+        dict {'generated_at', 'total', 'kritis', 'reorder', 'per_kategori', 'items'}
+    """
+    rows = list(
+        low_stock_queryset()
+        .values(
+            'barang_id', 'barang__kode', 'barang__nama', 'barang__kategori', 'barang__lokasi_penyimpanan',
+            'barang__stok_minimum', 'barang__titik_reorder', 'qty', 'level',
+        )
+        .order_by('barang__kategori', 'qty', 'barang__kode')
+    )
+    rates = consumption_rates([row['barang_id'] for row in rows]) if rows else {}
+    labels = dict(Barang.CATEGORY_CHOICES)
+
+    items, per_kategori = [], {}
+    for row in rows:
+        rate = rates.get(row['barang_id'])
+        batas = max(row['barang__stok_minimum'], row['barang__titik_reorder'])
+        items.append({
+            'barang_id': str(row['barang_id']),
+            'kode': row['barang__kode'],
+            'nama': row['barang__nama'],
+            'kategori': row['barang__kategori'],
+            'lokasi': row['barang__lokasi_penyimpanan'] or '',
+            'qty': row['qty'],
+            'stok_minimum': row['barang__stok_minimum'],
+            'titik_reorder': row['barang__titik_reorder'],
+            'kekurangan': max(batas - row['qty'], 0),
+            'level': row['level'],
+            'pemakaian_per_hari': round(rate, 2) if rate else None,
+            'sisa_hari': int(row['qty'] / rate) if rate else None,
+        })
+        counts = per_kategori.setdefault(row['barang__kategori'], {
+            'kategori': row['barang__kategori'],
+            'label': labels.get(row['barang__kategori'], row['barang__kategori']),
+            'kritis': 0,
+            'reorder': 0,
+            'total': 0,
+        })
+        counts[row['level']] += 1
+        counts['total'] += 1
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'total': len(items),
+        'kritis': sum(1 for item in items if item['level'] == 'kritis'),
+        'reorder': sum(1 for item in items if item['level'] == 'reorder'),
+        'per_kategori': list(per_kategori.values()),
+        'items': items,
+    }
+
+
+def refresh_stock_alerts():
+    alerts = compute_stock_alerts()
+    cache.set(ALERT_CACHE_KEY, alerts, None)
+    return alerts
+
+
+def invalidate_stock_alerts():
+    """Buang cache setelah commit; request berikutnya menghitung ulang (satu query)"""
+    transaction.on_commit(lambda: cache.delete(ALERT_CACHE_KEY))
+
+
+def get_stock_alerts():
+    """Alert dari cache (dihitung sekali jika cache kosong)"""
+    alerts = cache.get(ALERT_CACHE_KEY)
+    if alerts is None:
+        alerts = refresh_stock_alerts()
+    return alerts
+
+
+# ==============================================================================
+# DIGEST
+# ==============================================================================
+def storekeepers():
+    from core.models import CustomUser
+
+    return (
+        CustomUser.objects.filter(is_active=True, groups__name__in=STOREKEEPER_GROUPS)
+        .exclude(nomor_telepon__isnull=True).exclude(nomor_telepon='')
+        .select_related('departemen')
+        .distinct()
+    )
+
+
+def build_digest_message(alerts, today=None):
+    today = today or timezone.localdate()
+    lines = [
+        f"*Peringatan Stok Inventory* ({today.strftime('%d-%m-%Y')})",
+        f"Kritis: {alerts['kritis']} | Perlu reorder: {alerts['reorder']}",
+    ]
+    kategori = None
+    for item in alerts['items'][:DIGEST_MAX_ITEMS]:
+        if item['kategori'] != kategori:
+            kategori = item['kategori']
+            label = next(
+                (row['label'] for row in alerts['per_kategori'] if row['kategori'] == kategori), kategori
+            )
+            lines.append('')
+            lines.append(f'*{label}*')
+        icon = '🔴' if item['level'] == 'kritis' else '🟡'
+        batas = item['stok_minimum'] if item['level'] == 'kritis' else item['titik_reorder']
+        line = f"{icon} {item['kode']} {item['nama']} - stok {item['qty']} (batas {batas})"
+        if item['sisa_hari'] is not None:
+            line += f", ±{item['sisa_hari']} hari"
+        lines.append(line)
+    remaining = alerts['total'] - DIGEST_MAX_ITEMS
+    if remaining > 0:
+        lines.append('')
+        lines.append(f'...dan {remaining} barang lainnya (lihat menu Inventory)')
+    return '\n'.join(lines)
+
+
+def send_stock_alert_digest(alerts=None):
+    """
+    Satu pesan WA per storekeeper berisi seluruh alert.
+
+    Returns:
+        Jumlah pesan yang di-enqueue
+    """
+    from core.whatsapp_outbox import enqueue_whatsapp_batch
+
+    alerts = alerts if alerts is not None else get_stock_alerts()
+    if not alerts['total']:
+        return 0
+
+    today = timezone.localdate()
+    message = build_digest_message(alerts, today)
+    fingerprint = hashlib.md5(
+        ','.join(f"{item['barang_id']}:{item['level']}" for item in alerts['items']).encode()
+    ).hexdigest()[:16]
+
+    per_departemen = {}
+    for user in storekeepers():
+        per_departemen.setdefault(user.departemen, []).append({
+            'target': user.nomor_telepon,
+            'message': message,
+            'idempotency_key': f'stock-alert:{today.isoformat()}:{user.pk}:{fingerprint}',
+        })
+
+    queued = 0
+    for departemen, items in per_departemen.items():
+        queued += len(enqueue_whatsapp_batch(items, departemen=departemen))
+    logger.info(f'[StockAlert] Digest {alerts["total"]} barang untuk {queued} storekeeper')
+    return queued
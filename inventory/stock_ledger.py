@@ -0,0 +1,232 @@
+"""
+Ledger stok inventory (StockMovement + StockSnapshot).
+
+Sebelumnya StockUpdateView menimpa StockLevel.qty dengan angka absolut dari form:
+dua storekeeper yang mengupdate barang yang sama bersamaan saling menimpa
+(lost update), dan tidak ada riwayat sama sekali.
+
+Sekarang:
+1. Setiap perubahan adalah delta bertanda. Baris StockLevel dikunci (select_for_update),
+   lalu UPDATE ... SET qty = qty + delta (F expression), dan StockMovement dicatat di
+   transaksi yang sama - qty_after selalu konsisten dengan urutan mutasi.
+2. Form update stok mengirim stok yang dilihat user (qty_lama). Delta dihitung dari situ,
+   jadi dua pengambilan barang bersamaan sama-sama tercatat. Hanya stock opname
+   (hitung fisik) yang menyetel angka absolut.
+3. Task harian menulis StockSnapshot (saldo akhir hari + total masuk/keluar) untuk barang
+   yang punya mutasi hari itu. stock_at() dan consumption_rates() membaca snapshot
+   terakhir + mutasi setelahnya, tanpa replay seluruh ledger.
+
+Settings (opsional):
+    STOCK_SNAPSHOT_DAYS - jumlah hari terakhir yang ditulis ulang tiap run snapshot (default 3)
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from . import public_cache
+from .models import StockLevel, StockMovement, StockSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DAYS = getattr(settings, 'STOCK_SNAPSHOT_DAYS', 3)
+
+
+class StockError(Exception):
+    """Mutasi ditolak ledger (stok tidak cukup / tidak ada perubahan)"""
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# ==============================================================================
+# MUTASI
+# ==============================================================================
+@transaction.atomic
+def apply_movement(barang, delta, jenis, user=None, keterangan=''):
+    """
+    Terapkan delta ke StockLevel barang dan catat StockMovement.
+
+    Returns:
+        StockMovement yang dibuat
+    Raises:
+        StockError jika stok menjadi negatif
+    """
+    stock = StockLevel.objects.select_for_update().only('id', 'qty').get(barang=barang)
+    if stock.qty + delta < 0:
+        raise StockError(
+            f'Stok "{barang.nama}" tidak mencukupi. Dikurangi: {-delta}, Tersedia: {stock.qty}'
+        )
+    StockLevel.objects.filter(pk=stock.pk).update(
+        qty=F('qty') + delta,
+        updated_by=user,
+        updated_at=timezone.now(),
+    )
+    public_cache.invalidate()
+    from .stock_alerts import invalidate_stock_alerts
+    invalidate_stock_alerts()
+    return StockMovement.objects.create(
+        barang=barang,
+        jenis=jenis,
+        delta=delta,
+        qty_after=stock.qty + delta,
+        keterangan=keterangan,
+        created_by=user,
+    )
+
+
+@transaction.atomic
+def set_stock(barang, qty, user=None, keterangan='', qty_lama=None, jenis=None):
+    """
+    Terjemahkan input form "Stok Baru" menjadi mutasi.
+
+    Args:
+        qty: stok baru yang diisi user
+        qty_lama: stok yang dilihat user saat mengisi form. Jika ada, delta = qty - qty_lama
+                  (mutasi user lain di antaranya tetap dipertahankan).
+        jenis: 'opname' = hasil hitung fisik, stok disetel absolut ke qty.
+               Kosong = 'masuk' / 'keluar' sesuai tanda delta.
+    Returns:
+        StockMovement yang dibuat
+    Raises:
+        StockError jika tidak ada perubahan atau stok menjadi negatif
+    """
+    if jenis == 'opname' or qty_lama is None:
+        current = StockLevel.objects.select_for_update().values_list('qty', flat=True).get(barang=barang)
+        delta = qty - current
+    else:
+        delta = qty - qty_lama
+    if not delta:
+        raise StockError(f'Stok "{barang.nama}" tidak berubah')
+    jenis = jenis or ('masuk' if delta > 0 else 'keluar')
+    return apply_movement(barang, delta, jenis, user=user, keterangan=keterangan)
+
+
+def opening_movements(stock_levels, user=None, keterangan='Stok awal'):
+    """StockMovement 'awal' (belum disimpan) untuk StockLevel baru dengan qty > 0"""
+    return [
+        StockMovement(
+            barang_id=stock.barang_id,
+            jenis='awal',
+            delta=stock.qty,
+            qty_after=stock.qty,
+            keterangan=keterangan,
+            created_by=user,
+        )
+        for stock in stock_levels
+        if stock.qty
+    ]
+
+
+# ==============================================================================
+# SNAPSHOT
+# ==============================================================================
+@transaction.atomic
+def take_snapshots(day):
+    """
+    Tulis StockSnapshot tanggal `day` untuk semua barang yang punya mutasi hari itu.
+    Idempotent: snapshot tanggal yang sama ditulis ulang.
+
+    Saldo akhir hari = StockLevel.qty sekarang - total delta setelah hari itu.
+
+    Returns:
+        Jumlah snapshot yang ditulis
+    """
+    start, end = _day_start(day), _day_start(day + timedelta(days=1))
+    totals = (
+        StockMovement.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values('barang_id')
+        .annotate(
+            masuk=Sum(Case(When(delta__gt=0, then=F('delta')), default=Value(0), output_field=IntegerField())),
+            keluar=Sum(Case(When(delta__lt=0, then=-F('delta')), default=Value(0), output_field=IntegerField())),
+            jumlah=Count('id'),
+        )
+    )
+    totals = {row['barang_id']: row for row in totals}
+    if not totals:
+        StockSnapshot.objects.filter(tanggal=day).delete()
+        return 0
+
+    later = dict(
+        StockMovement.objects.filter(created_at__gte=end, barang_id__in=totals)
+        .values('barang_id').annotate(total=Sum('delta')).values_list('barang_id', 'total')
+    )
+    current = dict(StockLevel.objects.filter(barang_id__in=totals).values_list('barang_id', 'qty'))
+
+    StockSnapshot.objects.filter(tanggal=day).delete()
+    StockSnapshot.objects.bulk_create([
+        StockSnapshot(
+            barang_id=barang_id,
+            tanggal=day,
+            qty=current.get(barang_id, 0) - (later.get(barang_id) or 0),
+            qty_masuk=row['masuk'] or 0,
+            qty_keluar=row['keluar'] or 0,
+            jumlah_mutasi=row['jumlah'],
+        )
+        for barang_id, row in totals.items()
+    ], batch_size=500)
+    return len(totals)
+
+
+def run_daily_snapshots(today=None, days=None):
+    """
+    Tulis ulang snapshot `days` hari terakhir sampai kemarin. Lebih dari satu hari
+    supaya run beat yang terlewat ikut tertutup (take_snapshots idempotent).
+
+    Returns:
+        dict {tanggal iso: jumlah snapshot}
+    """
+    today = today or timezone.localdate()
+    days = days or SNAPSHOT_DAYS
+    results = {}
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        results[day.isoformat()] = take_snapshots(day)
+    return results
+
+
+# ==============================================================================
+# QUERY
+# ==============================================================================
+def stock_at(barang, day):
+    """Stok barang di akhir tanggal `day` (snapshot terakhir + mutasi setelahnya)"""
+    if day >= timezone.localdate():
+        return StockLevel.objects.filter(barang=barang).values_list('qty', flat=True).first() or 0
+
+    snapshot = (
+        StockSnapshot.objects.filter(barang=barang, tanggal__lte=day)
+        .order_by('-tanggal').values_list('tanggal', 'qty').first()
+    )
+    movements = StockMovement.objects.filter(barang=barang, created_at__lt=_day_start(day + timedelta(days=1)))
+    base = 0
+    if snapshot:
+        base = snapshot[1]
+        movements = movements.filter(created_at__gte=_day_start(snapshot[0] + timedelta(days=1)))
+    return base + (movements.aggregate(total=Sum('delta'))['total'] or 0)
+
+
+def consumption_rates(barang_ids=None, days=30, until=None):
+    """
+    Rata-rata pemakaian (qty keluar) per hari dalam `days` hari sampai kemarin.
+    Dibaca dari StockSnapshot (satu query GROUP BY).
+
+    Returns:
+        dict {barang_id: float qty per hari} (barang tanpa pemakaian tidak ada di dict)
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    snapshots = StockSnapshot.objects.filter(
+        tanggal__gt=until - timedelta(days=days), tanggal__lte=until, qty_keluar__gt=0
+    )
+    if barang_ids is not None:
+        snapshots = snapshots.filter(barang_id__in=barang_ids)
+    rows = snapshots.values('barang_id').annotate(total=Sum('qty_keluar')).values_list('barang_id', 'total')
+    return {barang_id: total / days for barang_id, total in rows}
+
+
+def consumption_rate(barang, days=30, until=None):
+    return consumption_rates([barang.pk], days=days, until=until).get(barang.pk, 0.0)
@@ -0,0 +1,37 @@
+"""
+Celery tasks untuk inventory app.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def take_stock_snapshots(days=None):
+    """
+    Tulis StockSnapshot harian dari ledger StockMovement (lihat inventory/stock_ledger.py).
+    Dijalankan Celery Beat setiap dini hari.
+    """
+    from inventory.stock_ledger import run_daily_snapshots
+
+    results = run_daily_snapshots(days=days)
+    logger.info(f"[StockSnapshot] {results}")
+    return results
+
+
+@shared_task(ignore_result=True)
+def refresh_stock_alerts(notify=False):
+    """
+    Hitung ulang alert stok rendah / reorder ke cache (lihat inventory/stock_alerts.py).
+    notify=True: kirim juga digest WA ke storekeeper (satu pesan per orang).
+    """
+    from inventory.stock_alerts import refresh_stock_alerts as refresh, send_stock_alert_digest
+
+    alerts = refresh()
+    summary = {'total': alerts['total'], 'kritis': alerts['kritis'], 'reorder': alerts['reorder']}
+    if notify:
+        summary['digest'] = send_stock_alert_digest(alerts)
+    logger.info(f"[StockAlert] {summary}")
+    return summary
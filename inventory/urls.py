@@ -6,6 +6,7 @@ app_name = 'inventory'
 urlpatterns = [
     # Public View (tanpa login)
     path('public/', views.PublicInventoryView.as_view(), name='public-list'),
+    path('public/json/', views.PublicInventoryJSONView.as_view(), name='public-list-json'),
     
     # Barang Management (protected)
     path('', views.BarangListView.as_view(), name='barang-list'),
@@ -15,6 +16,7 @@ urlpatterns = [
     
     # Import
     path('import/', views.BarangImportView.as_view(), name='barang-import'),
+    path('import/report/<str:token>/', views.BarangImportErrorReportView.as_view(), name='barang-import-report'),
     
     # Stock Update
     path('<uuid:barang_id>/update-stock/', views.StockUpdateView.as_view(), name='update-stock'),
@@ -3,6 +3,9 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView, V
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils import timezone
 from django.urls import reverse_lazy
 from django.template.loader import render_to_string
 from django.db import models
@@ -39,6 +42,10 @@ import os
 from .models import Barang, StockLevel
 from .forms import BarangForm, StockUpdateForm, BarangImportForm
 from .import_handler import BarangImporter
+from .stock_ledger import StockError, set_stock
+from .stock_alerts import get_stock_alerts, low_stock_barang_ids
+from . import public_cache
+from core.excel_import import get_cached_error_report
 
 
 # ==============================================================================
@@ -68,6 +75,10 @@ class BarangListView(LoginRequiredMixin, ListView):
         if kategori:
             queryset = queryset.filter(kategori=kategori)
         
+        # Filter stok rendah (kritis / perlu reorder)
+        if self.request.GET.get('stok') == 'rendah':
+            queryset = queryset.filter(id__in=low_stock_barang_ids())
+        
         # Sorting
         sort_by = self.request.GET.get('sort', 'kode')
         order = self.request.GET.get('order', 'asc')
@@ -83,8 +94,10 @@ class BarangListView(LoginRequiredMixin, ListView):
         context['current_kategori'] = self.request.GET.get('kategori', '')
         context['current_sort'] = self.request.GET.get('sort', 'kode')
         context['current_order'] = self.request.GET.get('order', 'asc')
+        context['current_stok'] = self.request.GET.get('stok', '')
         context['kategori_choices'] = Barang.CATEGORY_CHOICES
         context['can_edit_stock'] = can_edit_inventory(self.request.user)
+        context['stock_alerts'] = get_stock_alerts()
         return context
 
 
@@ -171,23 +184,30 @@ class StockUpdateView(LoginRequiredMixin, UserPassesTestMixin, View):
             form = StockUpdateForm(request.POST, instance=stock)
             
             if form.is_valid():
-                # Get old qty untuk audit
-                old_qty = stock.qty
                 new_qty = form.cleaned_data['qty']
+                try:
+                    movement = set_stock(
+                        barang,
+                        new_qty,
+                        user=request.user,
+                        keterangan=form.cleaned_data.get('keterangan', ''),
+                        qty_lama=form.cleaned_data.get('qty_lama'),
+                        jenis=form.cleaned_data.get('jenis') or None,
+                    )
+                except StockError as e:
+                    return JsonResponse({'success': False, 'error': str(e)}, status=409)
                 
-                # Update stock
-                stock.updated_by = request.user
-                stock.save()
-                
-                # Log untuk referensi (could be extended ke transaction table)
-                keterangan = form.cleaned_data.get('keterangan', '')
-                
+                old_qty = movement.qty_after - movement.delta
                 return JsonResponse({
                     'success': True,
-                    'message': f"Stok '{barang.nama}' berhasil diupdate dari {old_qty} menjadi {new_qty}",
+                    'message': (
+                        f"Stok '{barang.nama}' berhasil diupdate dari {old_qty} menjadi {movement.qty_after} "
+                        f"({movement.delta:+d}, {movement.get_jenis_display()})"
+                    ),
                     'barang_id': str(barang.id),
-                    'qty': new_qty,
-                    'updated_at': stock.updated_at.strftime('%d-%m-%Y %H:%M:%S')
+                    'qty': movement.qty_after,
+                    'delta': movement.delta,
+                    'updated_at': timezone.localtime(movement.created_at).strftime('%d-%m-%Y %H:%M:%S')
                 })
             else:
                 return JsonResponse({
@@ -206,14 +226,20 @@ class StockUpdateView(LoginRequiredMixin, UserPassesTestMixin, View):
 # 5. PUBLIC INVENTORY VIEW (Accessible without login - Mobile friendly)
 # ==============================================================================
 class PublicInventoryView(ListView):
-    """List stok barang untuk public (tanpa perlu login)"""
+    """
+    List stok barang untuk public (tanpa perlu login).
+    
+    Response di-cache per parameter query dan divalidasi ulang dengan ETag / Last-Modified
+    (lihat inventory/public_cache.py): refresh tanpa perubahan data dijawab 304 tanpa query DB.
+    """
     model = Barang
     template_name = 'inventory/public_inventory.html'
     context_object_name = 'barang_list'
     paginate_by = 100
+    cache_variant = 'html'
     
     def get_queryset(self):
-        queryset = Barang.objects.filter(status='active').select_related('stock_level')
+        queryset = Barang.objects.filter(status='active').select_related('stock_level__updated_by')
         
         # Search by kode atau nama
         search = self.request.GET.get('search')
@@ -235,6 +261,63 @@ class PublicInventoryView(ListView):
         context['current_search'] = self.request.GET.get('search', '')
         context['current_kategori'] = self.request.GET.get('kategori', '')
         return context
+    
+    def cache_params(self):
+        """Parameter yang mempengaruhi isi response (parameter lain diabaikan)"""
+        return [(name, self.request.GET.get(name, '')) for name in ('search', 'kategori', 'page')]
+    
+    def get(self, request, *args, **kwargs):
+        state = public_cache.get_state()
+        key = public_cache.page_key(state, self.cache_variant, self.cache_params())
+        entry = public_cache.get_page(key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code != 200:
+                return response
+            entry = public_cache.make_entry(response.content, response['Content-Type'])
+            public_cache.set_page(key, entry)
+        
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(state['last_modified'])
+        patch_cache_control(response, public=True, no_cache=True)
+        return get_conditional_response(
+            request, etag=entry['etag'], last_modified=state['last_modified'], response=response
+        )
+
+
+class PublicInventoryJSONView(PublicInventoryView):
+    """Varian JSON ringkas dari PublicInventoryView (client ringan / PWA)"""
+    cache_variant = 'json'
+    
+    FIELDS = ['kode', 'nama', 'kategori', 'spesifikasi', 'lokasi', 'qty', 'updated_at']
+    
+    def render_to_response(self, context, **response_kwargs):
+        page_obj = context['page_obj']
+        items = []
+        for barang in context['barang_list']:
+            stock = getattr(barang, 'stock_level', None)
+            items.append([
+                barang.kode,
+                barang.nama,
+                barang.kategori,
+                barang.spesifikasi or '',
+                barang.lokasi_penyimpanan or '',
+                stock.qty if stock else 0,
+                timezone.localtime(stock.updated_at).isoformat() if stock else None,
+            ])
+        return JsonResponse(
+            {
+                'count': page_obj.paginator.count,
+                'page': page_obj.number,
+                'num_pages': page_obj.paginator.num_pages,
+                'fields': self.FIELDS,
+                'items': items,
+            },
+            json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+        )
 
 
 # ==============================================================================
@@ -309,11 +392,14 @@ class BarangImportView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
                     temp_file.write(chunk)
                 temp_file.close()
                 
-                # Import dari file
-                importer = BarangImporter(temp_file.name)
+                # Import dari file (streaming, bulk insert per chunk)
+                importer = BarangImporter(temp_file.name, user=request.user)
                 importer.import_data()
                 result = importer.get_result()
                 
+                # Laporan baris gagal bisa diunduh sebagai Excel (disimpan sementara di cache)
+                result['report_token'] = importer.cache_error_report('inventory', request.user.id)
+                
                 # Pass result ke context
                 context = {
                     'form': form,
@@ -350,4 +436,24 @@ class BarangImportView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             'form': form,
             'has_result': False
         }
-        return render(request, self.template_name, context)
\ No newline at end of file
+        return render(request, self.template_name, context)
+
+
+class BarangImportErrorReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Download laporan baris gagal dari import terakhir (Excel)"""
+    login_url = 'login'
+    
+    def test_func(self):
+        return can_import_inventory(self.request.user)
+    
+    def get(self, request, token):
+        content = get_cached_error_report('inventory', request.user.id, token)
+        if content is None:
+            messages.error(request, "Laporan import sudah kedaluwarsa, silakan import ulang")
+            return redirect('inventory:barang-import')
+        response = HttpResponse(
+            content,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = 'attachment; filename="import_barang_gagal.xlsx"'
+        return response
\ No newline at end of file
@@ -4,10 +4,12 @@ from .models import Meeting, MeetingPeserta, NotulenItem, MeetingReminder
 
 @admin.register(Meeting)
 class MeetingAdmin(admin.ModelAdmin):
-    list_display = ('no_dokumen', 'tanggal_meeting', 'hari', 'status', 'agenda_short', 'get_peserta_count')
-    list_filter = ('status', 'tanggal_meeting', 'created_at')
+    list_display = ('no_dokumen', 'tanggal_meeting', 'hari', 'status', 'agenda_short', 'get_peserta_count', 'sheets_sync_status')
+    list_filter = ('status', 'sheets_sync_status', 'tanggal_meeting', 'created_at')
     search_fields = ('no_dokumen', 'agenda', 'tempat')
-    readonly_fields = ('no_dokumen', 'hari', 'qr_code_token', 'qr_code_created_at', 'created_at', 'updated_at', 'id', 'tanggal_dokumen')
+    readonly_fields = ('no_dokumen', 'hari', 'qr_code_token', 'qr_code_created_at', 'created_at', 'updated_at', 'id', 'tanggal_dokumen',
+                       'sheets_sync_status', 'sheets_sync_requested_at', 'sheets_sync_attempts', 'sheets_next_attempt_at',
+                       'sheets_synced_at', 'sheets_sync_error')
     fieldsets = (
         ('Dokumen', {
             'fields': ('id', 'no_dokumen_base', 'no_urut', 'no_dokumen', 'revisi', 'terbitan')
@@ -18,6 +20,11 @@ class MeetingAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('status',)
         }),
+        ('Google Sheets Sync', {
+            'fields': ('sheets_sync_status', 'sheets_sync_requested_at', 'sheets_sync_attempts',
+                       'sheets_next_attempt_at', 'sheets_synced_at', 'sheets_sync_error'),
+            'classes': ('collapse',)
+        }),
         ('QR Code Presensi', {
             'fields': ('qr_code_token', 'qr_code_active', 'qr_code_created_at'),
             'classes': ('collapse',)
@@ -109,10 +116,10 @@ class NotulenItemAdmin(admin.ModelAdmin):
 
 @admin.register(MeetingReminder)
 class MeetingReminderAdmin(admin.ModelAdmin):
-    list_display = ('meeting_doc', 'peserta_name', 'timing_type', 'scheduled_time', 'status_badge', 'sent_at')
+    list_display = ('meeting_doc', 'peserta_name', 'timing_type', 'scheduled_time', 'status_badge', 'sent_at', 'delivery_latency_ms')
     list_filter = ('timing_type', 'status', 'scheduled_time', 'meeting__tanggal_meeting')
     search_fields = ('meeting__no_dokumen', 'peserta__nama')
-    readonly_fields = ('id', 'created_at', 'updated_at', 'sent_at', 'message_id')
+    readonly_fields = ('id', 'created_at', 'updated_at', 'sent_at', 'message_id', 'task_id', 'delivery_latency_ms')
     
     fieldsets = (
         ('Meeting & Peserta', {
@@ -122,7 +129,7 @@ class MeetingReminderAdmin(admin.ModelAdmin):
             'fields': ('timing_type', 'scheduled_time')
         }),
         ('Status', {
-            'fields': ('status', 'sent_at', 'message_id')
+            'fields': ('status', 'sent_at', 'message_id', 'task_id', 'delivery_latency_ms')
         }),
         ('Error Tracking', {
             'fields': ('error_log',),
@@ -146,6 +153,7 @@ class MeetingReminderAdmin(admin.ModelAdmin):
         from django.utils.html import format_html
         colors = {
             'pending': 'orange',
+            'sending': 'blue',
             'sent': 'green',
             'failed': 'red'
         }
@@ -0,0 +1,68 @@
+"""
+Management command untuk sync Meeting -> Google Sheets.
+
+Backfill: meeting yang di-finalize SETELAH dibuat tidak pernah ter-sync oleh signal lama
+(hanya meeting baru yang langsung 'final'). Command ini menandai meeting final yang belum
+pernah masuk antrian sebagai pending. Worker mengecek kolom No_Dokumen di sheet sebelum
+append, jadi meeting yang dulu sudah ter-sync tidak akan dobel.
+
+Usage:
+    python manage.py sync_meetings_to_sheets --backfill              # tandai + queue worker
+    python manage.py sync_meetings_to_sheets --backfill --since 2025-01-01
+    python manage.py sync_meetings_to_sheets --backfill --dry-run
+    python manage.py sync_meetings_to_sheets --retry-failed --run-now  # proses langsung (tanpa Celery)
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from meetings.models import Meeting
+from meetings.sheets_sync import mark_meetings_dirty, process_pending_meetings
+
+
+class Command(BaseCommand):
+    help = 'Backfill / retry sync Meeting ke Google Sheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help='Queue meeting final yang belum pernah di-sync')
+        parser.add_argument('--retry-failed', action='store_true', help="Queue ulang meeting berstatus 'failed'")
+        parser.add_argument('--since', type=str, help='Hanya meeting dengan tanggal_meeting >= YYYY-MM-DD')
+        parser.add_argument('--dry-run', action='store_true', help='Hanya tampilkan jumlah, tanpa perubahan')
+        parser.add_argument('--run-now', action='store_true', help='Proses antrian langsung di proses ini')
+
+    def handle(self, *args, **options):
+        statuses = []
+        if options['backfill']:
+            statuses.append('')
+        if options['retry_failed']:
+            statuses.append('failed')
+
+        queryset = Meeting.objects.filter(status='final', sheets_sync_status__in=statuses)
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since harus berformat YYYY-MM-DD')
+            queryset = queryset.filter(tanggal_meeting__gte=since)
+
+        if statuses:
+            if options['dry_run']:
+                self.stdout.write(f'[DRY RUN] {queryset.count()} meeting akan di-queue')
+                return
+            with transaction.atomic():
+                queued = mark_meetings_dirty(queryset)
+            self.stdout.write(self.style.SUCCESS(f'✓ {queued} meeting masuk antrian sync'))
+
+        if options['run_now']:
+            while True:
+                summary = process_pending_meetings()
+                if not summary['claimed']:
+                    break
+                self.stdout.write(
+                    f"   Synced: {summary['synced']} ({summary['appended']} row baru), Failed: {summary['failed']}"
+                )
+            pending = Meeting.objects.filter(Q(sheets_sync_status='pending') | Q(sheets_sync_status='syncing')).count()
+            self.stdout.write(self.style.SUCCESS(f'✓ Selesai, {pending} meeting masih menunggu (backoff)'))
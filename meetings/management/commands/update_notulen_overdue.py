@@ -5,13 +5,14 @@ jika deadline sudah lewat dan status belum 'done'
 Usage:
     python manage.py update_notulen_overdue
 
-Bisa dijadwalkan via cron:
+Normalnya sudah dijalankan Celery Beat lewat core.tasks.run_status_sweeper;
+command ini untuk menjalankan manual / lewat cron jika Celery tidak aktif:
     0 * * * * cd /path/to/project && python manage.py update_notulen_overdue
 """
 
 from django.core.management.base import BaseCommand
-from django.utils.timezone import now
-from meetings.models import NotulenItem
+
+from core.status_sweeper import sweep_notulen_overdue
 
 
 class Command(BaseCommand):
@@ -19,28 +20,12 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         """
-        Cari semua NotulenItem yang:
-        1. Status bukan 'done'
+        Bulk UPDATE NotulenItem yang:
+        1. Status 'open' / 'progress'
         2. Target deadline sudah lewat
-        3. Update status ke 'overdue'
+        -> status 'overdue' (audit di StatusTransitionLog)
         """
-        today = now().date()
-        
-        # Query: status != 'done' AND target_deadline < today
-        overdue_items = NotulenItem.objects.filter(
-            status__in=['open', 'progress'],
-            target_deadline__lt=today
-        )
-        
-        updated_count = 0
-        for item in overdue_items:
-            item.status = 'overdue'
-            item.save()
-            updated_count += 1
-            self.stdout.write(
-                f"✓ Updated: {item.meeting.no_dokumen} - Item {item.no} → OVERDUE"
-            )
-        
+        updated_count = sweep_notulen_overdue()
         self.stdout.write(
-            self.style.SUCCESS(f'\nTotal {updated_count} items updated to OVERDUE status')
+            self.style.SUCCESS(f'Total {updated_count} items updated to OVERDUE status')
         )
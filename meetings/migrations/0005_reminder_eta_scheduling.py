@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0004_meetingreminder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetingreminder',
+            name='delivery_latency_ms',
+            field=models.IntegerField(blank=True, help_text='Selisih waktu kirim aktual terhadap scheduled_time (ms)', null=True),
+        ),
+        migrations.AddField(
+            model_name='meetingreminder',
+            name='task_id',
+            field=models.CharField(blank=True, default='', help_text='ID Celery task ETA yang akan mengirim reminder ini (kosong = belum dijadwalkan)', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='meetingreminder',
+            index=models.Index(fields=['status', 'scheduled_time'], name='meeting_reminder_due_idx'),
+        ),
+    ]
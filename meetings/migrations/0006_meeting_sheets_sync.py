@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0005_reminder_eta_scheduling'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_sync_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_sync_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_sync_requested_at',
+            field=models.DateTimeField(blank=True, help_text='Waktu meeting ditandai perlu sync (urutan append ke sheet)', null=True),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_sync_status',
+            field=models.CharField(blank=True, choices=[('', 'Tidak perlu'), ('pending', 'Menunggu sync'), ('syncing', 'Sedang sync'), ('synced', 'Tersync'), ('failed', 'Gagal')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='sheets_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['sheets_sync_status', 'sheets_sync_requested_at'], name='meeting_sheets_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meetings', '0006_meeting_sheets_sync'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='meetingreminder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
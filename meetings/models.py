@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now
 from django.core.exceptions import ValidationError
@@ -16,6 +17,14 @@ class Meeting(models.Model):
         ('closed', 'Closed'),
     ]
     
+    SHEETS_SYNC_CHOICES = [
+        ('', 'Tidak perlu'),
+        ('pending', 'Menunggu sync'),
+        ('syncing', 'Sedang sync'),
+        ('synced', 'Tersync'),
+        ('failed', 'Gagal'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # Penomoran dokumen
@@ -94,6 +103,23 @@ class Meeting(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True, null=True)
     
+    # Sync ke Google Sheets (diproses worker, lihat meetings/sheets_sync.py)
+    sheets_sync_status = models.CharField(
+        max_length=10,
+        choices=SHEETS_SYNC_CHOICES,
+        default='',
+        blank=True
+    )
+    sheets_sync_requested_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Waktu meeting ditandai perlu sync (urutan append ke sheet)"
+    )
+    sheets_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    sheets_sync_attempts = models.PositiveSmallIntegerField(default=0)
+    sheets_synced_at = models.DateTimeField(null=True, blank=True)
+    sheets_sync_error = models.TextField(blank=True, default='')
+    
     class Meta:
         verbose_name = "Meeting/Notulen Rapat"
         verbose_name_plural = "Daftar Meeting/Notulen"
@@ -103,6 +129,7 @@ class Meeting(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['qr_code_token']),
             models.Index(fields=['no_dokumen_base', 'no_urut']),
+            models.Index(fields=['sheets_sync_status', 'sheets_sync_requested_at'], name='meeting_sheets_sync_idx'),
         ]
         unique_together = [['no_dokumen_base', 'no_urut']]
     
@@ -124,25 +151,33 @@ class Meeting(models.Model):
             }
             self.hari = hari_map[self.tanggal_meeting.weekday()]
         
-        # Auto-generate no_urut jika belum ada
-        if not self.no_urut:
-            last_meeting = Meeting.objects.filter(
-                no_dokumen_base=self.no_dokumen_base
-            ).order_by('-no_urut').first()
-            
-            if last_meeting:
-                self.no_urut = last_meeting.no_urut + 1
-            else:
-                self.no_urut = 1
-        
-        # Auto-generate no_dokumen
-        self.no_dokumen = f"{self.no_dokumen_base}/{self.no_urut:04d}"
-        
-        # Auto-generate qr_code_token jika belum ada
-        if not self.qr_code_token:
-            self.qr_code_token = str(uuid.uuid4())
+        from core.services.sequences import bump_sequence, next_sequence_value
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Auto-generate no_urut jika belum ada (counter per base, aman untuk insert bersamaan)
+            if not self.no_urut:
+                self.no_urut = next_sequence_value(
+                    self.no_urut_sequence_key(self.no_dokumen_base),
+                    seed=lambda: Meeting.objects.filter(
+                        no_dokumen_base=self.no_dokumen_base
+                    ).aggregate(last=Max('no_urut'))['last'],
+                )
+            elif self._state.adding:
+                # no_urut diisi manual: majukan counter supaya alokasi berikutnya tidak bentrok
+                bump_sequence(self.no_urut_sequence_key(self.no_dokumen_base), self.no_urut)
+            
+            # Auto-generate no_dokumen
+            self.no_dokumen = f"{self.no_dokumen_base}/{self.no_urut:04d}"
+            
+            # Auto-generate qr_code_token jika belum ada
+            if not self.qr_code_token:
+                self.qr_code_token = str(uuid.uuid4())
+            
+            super().save(*args, **kwargs)
+    
+    @staticmethod
+    def no_urut_sequence_key(no_dokumen_base):
+        return f'meetings.meeting.no_urut:{no_dokumen_base}'
     
     def clean(self):
         """Validasi jam_selesai > jam_mulai"""
@@ -384,6 +419,7 @@ class MeetingReminder(models.Model):
     
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('sending', 'Sending'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
     ]
@@ -435,6 +471,19 @@ class MeetingReminder(models.Model):
         help_text="Error detail jika gagal"
     )
     
+    # Celery ETA scheduling (lihat meetings/reminder_scheduler.py)
+    task_id = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="ID Celery task ETA yang akan mengirim reminder ini (kosong = belum dijadwalkan)"
+    )
+    delivery_latency_ms = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Selisih waktu kirim aktual terhadap scheduled_time (ms)"
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -447,6 +496,7 @@ class MeetingReminder(models.Model):
             models.Index(fields=['meeting', 'status']),
             models.Index(fields=['scheduled_time']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'scheduled_time'], name='meeting_reminder_due_idx'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -0,0 +1,328 @@
+"""
+Dispatcher WA meeting reminder.
+
+Sebelumnya send_meeting_reminders memproses reminder satu per satu: query FonnteSettings
+per reminder, buat FonteService baru, kirim sinkron, lalu save() per row. Menjelang meeting
+besar (ratusan peserta) satu run bisa makan beberapa menit dan bertabrakan dengan run beat
+berikutnya.
+
+Alur sekarang per batch:
+1. Claim reminder jatuh tempo dengan select_for_update(skip_locked=True) dalam transaksi
+   PENDEK yang langsung menandai row 'sending' lalu commit - run lain hanya mengambil
+   'pending', jadi tidak ada double-send tanpa menahan lock selama HTTP.
+   Meeting, pembuat + departemen, dan user peserta ikut di-join (select_related).
+2. FonnteSettings di-resolve SEKALI per departemen (satu query untuk seluruh batch).
+3. Pesan dikirim paralel (di luar transaksi) lewat ThreadPoolExecutor terbatas; setiap
+   token Fonnte dibatasi jumlah request bersamaannya (semaphore per token).
+4. Status setiap reminder ditulis segera setelah kirimnya selesai (thread utama, urutan
+   selesai), dengan UPDATE bersyarat status='sending' - row yang sudah ditandai failed
+   oleh rekonsiliasi tidak pernah ditimpa.
+5. Row yang tertahan di 'sending' (worker mati di tengah kirim) ditandai failed oleh
+   rekonsiliasi, tidak dikirim ulang otomatis - provider mungkin sudah menerima pesannya.
+   Ukuran batch dibatasi MAX_BATCH_SIZE supaya batch / PER_TOKEN_CONCURRENCY x timeout
+   tetap setengah STALE_SENDING_AFTER (worker yang masih jalan tidak dianggap mati).
+
+Settings (opsional):
+    MEETING_REMINDER_WORKERS                - ukuran thread pool (default 8)
+    MEETING_REMINDER_PER_TOKEN_CONCURRENCY  - request paralel per token Fonnte (default 2)
+    MEETING_REMINDER_BATCH_SIZE             - reminder per batch (default & maksimal MAX_BATCH_SIZE)
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.fontte_service import FonteService
+from core.models import FonnteSettings
+from .models import MeetingReminder
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = getattr(settings, 'MEETING_REMINDER_WORKERS', 8)
+PER_TOKEN_CONCURRENCY = getattr(settings, 'MEETING_REMINDER_PER_TOKEN_CONCURRENCY', 2)
+STALE_SENDING_AFTER = timedelta(minutes=15)  # Worker mati saat status 'sending'
+SEND_TIMEOUT_SECONDS = 10  # FonteService.timeout
+# Batch terlama (semua reminder satu token, semua timeout) maksimal setengah STALE_SENDING_AFTER
+MAX_BATCH_SIZE = int(
+    STALE_SENDING_AFTER.total_seconds() // (2 * SEND_TIMEOUT_SECONDS) * PER_TOKEN_CONCURRENCY
+)
+BATCH_SIZE = min(getattr(settings, 'MEETING_REMINDER_BATCH_SIZE', MAX_BATCH_SIZE), MAX_BATCH_SIZE)
+
+REMINDER_UPDATE_FIELDS = [
+    'status', 'sent_at', 'message_id', 'error_log', 'delivery_latency_ms', 'updated_at',
+]
+
+
+def build_reminder_message(reminder):
+    """
+    Build WA reminder message.
+
+    Format:
+    🔔 Reminder Meeting - [MEETING DOC]
+    ⏰ Jam: [JAMULAI]
+    📍 Lokasi: [TEMPAT]
+    📌 Agenda: [AGENDA]
+
+    Peserta: [NAMA]
+    """
+    meeting = reminder.meeting
+
+    # Format jam
+    jam_mulai = meeting.jam_mulai.strftime('%H:%M')
+
+    # Shorten agenda jika terlalu panjang
+    agenda = meeting.agenda[:100]
+    if len(meeting.agenda) > 100:
+        agenda += '...'
+
+    message = (
+        f'🔔 *REMINDER MEETING*\n'
+        f'📄 Dokumen: {meeting.no_dokumen}\n'
+        f'⏰ Waktu: {jam_mulai}\n'
+        f'📍 Lokasi: {meeting.tempat}\n'
+        f'📌 Agenda: {agenda}\n'
+        f'👤 Peserta: {reminder.peserta.nama}\n'
+    )
+
+    return message.strip()
+
+
+def due_reminders_queryset(meeting_id=None, reminder_ids=None, now_time=None):
+    """Queryset reminder pending yang sudah jatuh tempo, dengan relasi yang dibutuhkan ter-join"""
+    queryset = MeetingReminder.objects.filter(
+        status='pending',
+        scheduled_time__lte=now_time or timezone.now(),
+    ).select_related(
+        'meeting__created_by__departemen',
+        'peserta__peserta',
+    ).order_by('scheduled_time', 'id')
+    if meeting_id:
+        queryset = queryset.filter(meeting_id=meeting_id)
+    if reminder_ids is not None:
+        queryset = queryset.filter(id__in=reminder_ids)
+    return queryset
+
+
+def _resolve_services(reminders):
+    """FonteService per departemen_id, dari satu query FonnteSettings"""
+    departemen_ids = {
+        reminder.meeting.created_by.departemen_id
+        for reminder in reminders
+        if reminder.meeting.created_by_id and reminder.meeting.created_by.departemen_id
+    }
+    services = {}
+    for fontte_settings in FonnteSettings.objects.filter(
+        departemen_id__in=departemen_ids, is_active=True
+    ).select_related('departemen'):
+        try:
+            services[fontte_settings.departemen_id] = FonteService(fontte_settings)
+        except ValueError as e:
+            logger.warning(f'[MeetingReminder] FonnteSettings {fontte_settings.departemen} tidak valid: {e}')
+    return services
+
+
+def _precheck(reminder, services):
+    """
+    Validasi reminder sebelum dikirim.
+
+    Returns:
+        (phone_number, service, None) jika siap kirim, atau (None, None, error) jika gagal
+    """
+    peserta = reminder.peserta
+    if peserta.tipe_peserta != 'internal' or not peserta.peserta_id:
+        # External peserta tidak bisa reminder via WA
+        return None, None, 'External peserta: no phone number'
+
+    phone_number = peserta.peserta.nomor_telepon
+    if not phone_number:
+        return None, None, 'Peserta tidak punya nomor telepon'
+
+    creator = reminder.meeting.created_by
+    service = services.get(creator.departemen_id) if creator else None
+    if service is None:
+        return None, None, 'No Fonnte settings configured untuk departemen ini'
+
+    return phone_number, service, None
+
+
+class _TokenLimiter:
+    """Semaphore per token Fonnte supaya satu akun tidak dibanjiri request paralel"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def for_token(self, token):
+        with self._lock:
+            if token not in self._semaphores:
+                self._semaphores[token] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[token]
+
+
+def _send(service, limiter, phone_number, message):
+    with limiter.for_token(service.token):
+        try:
+            return service.send_message(target=phone_number, message=message)
+        except Exception as e:
+            logger.exception(f'[MeetingReminder] Error kirim ke {phone_number}')
+            return {'success': False, 'error': str(e)}
+
+
+def _apply_response(reminder, response, now_time):
+    reminder.updated_at = now_time
+    if response.get('success'):
+        reminder.status = 'sent'
+        reminder.sent_at = now_time
+        reminder.message_id = response.get('message_id')
+        reminder.error_log = None
+        reminder.delivery_latency_ms = int((now_time - reminder.scheduled_time).total_seconds() * 1000)
+    else:
+        reminder.status = 'failed'
+        reminder.error_log = response.get('error', 'Unknown error')
+
+
+def _save_result(reminder):
+    """
+    Simpan hasil satu reminder hanya jika masih 'sending'.
+    False berarti rekonsiliasi sudah menandainya failed - hasil tidak ditimpa.
+    """
+    updated = MeetingReminder.objects.filter(pk=reminder.pk, status='sending').update(
+        **{field: getattr(reminder, field) for field in REMINDER_UPDATE_FIELDS}
+    )
+    if not updated:
+        logger.warning(f"[MeetingReminder] {reminder.id} sudah bukan 'sending', hasil kirim tidak disimpan")
+    return bool(updated)
+
+
+def dispatch_batch(batch_size=None, meeting_id=None, reminder_ids=None, max_workers=None,
+                   dry_run=False):
+    """
+    Claim, kirim, dan simpan status satu batch reminder jatuh tempo.
+
+    Args:
+        batch_size: Maksimal reminder per batch
+        meeting_id: Batasi ke satu meeting (UUID)
+        reminder_ids: Batasi ke reminder tertentu (dipakai task ETA)
+        max_workers: Ukuran thread pool
+        dry_run: Hanya build pesan, tanpa kirim / update status (tanpa lock)
+
+    Returns:
+        List dict hasil per reminder:
+        {'reminder': MeetingReminder, 'phone': str, 'message': str, 'success': bool, 'error': str}
+    """
+    batch_size = batch_size or BATCH_SIZE
+    max_workers = max_workers or MAX_WORKERS
+    queryset = due_reminders_queryset(meeting_id=meeting_id, reminder_ids=reminder_ids)
+
+    if dry_run:
+        reminders = list(queryset[:batch_size])
+        services = _resolve_services(reminders)
+        results = []
+        for reminder in reminders:
+            phone_number, service, error = _precheck(reminder, services)
+            results.append({
+                'reminder': reminder,
+                'phone': phone_number,
+                'message': build_reminder_message(reminder),
+                'success': error is None,
+                'error': error,
+            })
+        return results
+
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    with transaction.atomic():
+        # of=('self',): hanya row reminder yang di-lock (outer join ke peserta/creator
+        # tidak boleh FOR UPDATE di PostgreSQL)
+        reminders = list(
+            queryset.select_for_update(skip_locked=True, of=('self',))[:batch_size]
+        )
+        if not reminders:
+            return []
+        claimed_at = timezone.now()
+        MeetingReminder.objects.filter(id__in=[reminder.id for reminder in reminders]).update(
+            status='sending', updated_at=claimed_at
+        )
+    # Lock dilepas di sini; kirim + simpan hasil di luar transaksi claim
+
+    services = _resolve_services(reminders)
+    limiter = _TokenLimiter(PER_TOKEN_CONCURRENCY)
+    results = []
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='meeting-reminder') as pool:
+        for reminder in reminders:
+            phone_number, service, error = _precheck(reminder, services)
+            message = build_reminder_message(reminder)
+            result = {
+                'reminder': reminder, 'phone': phone_number, 'message': message,
+                'success': False, 'error': error,
+            }
+            results.append(result)
+            if error:
+                _apply_response(reminder, {'success': False, 'error': error}, timezone.now())
+                _save_result(reminder)
+                continue
+            futures[pool.submit(_send, service, limiter, phone_number, message)] = result
+
+        # Simpan per reminder begitu kirimnya selesai (query DB hanya di thread ini)
+        for future in as_completed(futures):
+            result = futures[future]
+            response = future.result()
+            _apply_response(result['reminder'], response, timezone.now())
+            result['success'] = bool(response.get('success'))
+            result['error'] = None if result['success'] else response.get('error', 'Unknown error')
+            _save_result(result['reminder'])
+
+    for result in results:
+        if not result['success']:
+            logger.warning(f"Failed to send reminder {result['reminder'].id}: {result['error']}")
+    return results
+
+
+def fail_stale_sending(now_time=None):
+    """
+    Reminder yang tertahan di 'sending' lebih dari STALE_SENDING_AFTER ditandai failed
+    (tidak dikirim ulang otomatis supaya peserta tidak menerima WA dobel).
+
+    Returns:
+        Jumlah reminder yang ditandai failed
+    """
+    now_time = now_time or timezone.now()
+    count = MeetingReminder.objects.filter(
+        status='sending', updated_at__lt=now_time - STALE_SENDING_AFTER
+    ).update(
+        status='failed',
+        error_log='Worker berhenti saat mengirim - status di Fonnte tidak diketahui, cek manual',
+        updated_at=now_time,
+    )
+    if count:
+        logger.warning(f"[MeetingReminder] {count} reminder tertahan di 'sending', ditandai failed")
+    return count
+
+
+def dispatch_due_reminders(batch_size=None, meeting_id=None, reminder_ids=None, max_workers=None,
+                           max_batches=50):
+    """
+    Proses batch berulang sampai tidak ada reminder jatuh tempo yang bisa di-claim.
+
+    Returns:
+        (results, summary dict {'sent', 'failed'})
+    """
+    all_results = []
+    for _ in range(max_batches):
+        results = dispatch_batch(
+            batch_size=batch_size, meeting_id=meeting_id, reminder_ids=reminder_ids,
+            max_workers=max_workers,
+        )
+        if not results:
+            break
+        all_results.extend(results)
+
+    sent = sum(1 for result in all_results if result['success'])
+    return all_results, {'sent': sent, 'failed': len(all_results) - sent}
@@ -0,0 +1,280 @@
+"""
+Penjadwalan meeting reminder dengan Celery ETA.
+
+Sebelumnya reminder hanya diambil oleh beat yang polling tiap 5 menit, sehingga reminder
+"10 menit sebelum" bisa terlambat sampai 5 menit dan setiap poll men-scan MeetingReminder.
+
+Sekarang setiap grup reminder (meeting, timing_type, scheduled_time) dijadwalkan sebagai
+SATU task `send_scheduled_meeting_reminders` dengan eta = scheduled_time; task mengirim semua
+reminder pending di grup itu lewat dispatcher paralel (reminder_dispatcher.py).
+ID task disimpan di MeetingReminder.task_id.
+
+Konsistensi:
+- Task memvalidasi ulang (status pending + scheduled_time masih sama) sebelum kirim, jadi task
+  lama yang gagal di-revoke tidak pernah mengirim jadwal yang sudah berubah.
+- Perubahan tanggal/jam meeting -> reschedule_meeting_reminders (revoke task lama, hitung ulang).
+- Peserta baru -> reminder-nya ikut grup task yang sudah ada (task memfilter per grup).
+- Hanya reminder dalam ETA_HORIZON yang diberi task (ETA panjang di Redis rawan redelivery
+  setelah visibility_timeout); sisanya dijadwalkan oleh sweep rekonsiliasi
+  (reconcile_meeting_reminders) yang juga mengirim reminder yang terlewat.
+
+Settings (opsional):
+    MEETING_REMINDER_ETA_HORIZON_MINUTES  - jarak maksimal ETA dijadwalkan (default 50)
+    MEETING_REMINDER_MISSED_GRACE_SECONDS - reminder pending lewat dari ini dianggap terlewat (default 120)
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .models import MeetingReminder, MeetingPeserta
+
+logger = logging.getLogger(__name__)
+
+ETA_HORIZON = timedelta(minutes=getattr(settings, 'MEETING_REMINDER_ETA_HORIZON_MINUTES', 50))
+MISSED_GRACE = timedelta(seconds=getattr(settings, 'MEETING_REMINDER_MISSED_GRACE_SECONDS', 120))
+
+
+# ==============================================================================
+# JADWAL REMINDER
+# ==============================================================================
+def calculate_reminder_times(meeting):
+    """Return {timing_type: scheduled_time} untuk meeting"""
+    from .signals import _calculate_reminder_time_1day_08am, _calculate_reminder_time_10min_before
+
+    return {
+        '1day_08am': _calculate_reminder_time_1day_08am(meeting.tanggal_meeting),
+        '10min_before': _calculate_reminder_time_10min_before(meeting.tanggal_meeting, meeting.jam_mulai),
+    }
+
+
+def build_missing_reminders(meeting, peserta_list, existing=()):
+    """
+    MeetingReminder (belum disimpan) untuk kombinasi peserta x timing yang belum ada
+    dan jadwalnya belum lewat.
+
+    Args:
+        existing: Iterable (peserta_id, timing_type) yang sudah punya reminder
+    """
+    existing = set(existing)
+    now_time = timezone.now()
+    reminders = []
+    for timing_type, scheduled_time in calculate_reminder_times(meeting).items():
+        if scheduled_time <= now_time:
+            continue
+        for peserta in peserta_list:
+            if (peserta.id, timing_type) in existing:
+                continue
+            reminders.append(MeetingReminder(
+                meeting=meeting,
+                peserta=peserta,
+                timing_type=timing_type,
+                scheduled_time=scheduled_time,
+            ))
+    return reminders
+
+
+# ==============================================================================
+# CELERY ETA TASKS
+# ==============================================================================
+def _revoke(task_ids):
+    """Revoke task ETA setelah commit (best effort - task juga memvalidasi ulang sendiri)"""
+    task_ids = sorted({task_id for task_id in task_ids if task_id})
+    if not task_ids:
+        return
+
+    def revoke():
+        try:
+            from celery import current_app
+            current_app.control.revoke(task_ids)
+        except Exception as e:
+            logger.warning(f'[MeetingReminder] Gagal revoke {len(task_ids)} task: {e}')
+    transaction.on_commit(revoke)
+
+
+def _apply_after_commit(task_id, meeting_id, timing_type, scheduled_time):
+    def apply():
+        from .tasks import send_scheduled_meeting_reminders
+        try:
+            send_scheduled_meeting_reminders.apply_async(
+                args=[str(meeting_id), timing_type, scheduled_time.isoformat()],
+                eta=scheduled_time,
+                task_id=task_id,
+            )
+        except Exception as e:
+            # Reminder tetap pending; sweep rekonsiliasi akan mengirimnya
+            logger.warning(f'[MeetingReminder] Gagal menjadwalkan task {task_id}: {e}')
+    transaction.on_commit(apply)
+
+
+def schedule_pending_reminders(queryset=None):
+    """
+    Beri task ETA untuk reminder pending dalam horizon yang belum punya task.
+
+    Reminder baru yang masuk grup yang sudah dijadwalkan cukup ikut task_id grup tersebut.
+
+    Returns:
+        Jumlah task baru yang dijadwalkan
+    """
+    if queryset is None:
+        queryset = MeetingReminder.objects.all()
+    now_time = timezone.now()
+    rows = list(
+        queryset.filter(
+            status='pending',
+            scheduled_time__gt=now_time - MISSED_GRACE,
+            scheduled_time__lte=now_time + ETA_HORIZON,
+        ).values_list('id', 'meeting_id', 'timing_type', 'scheduled_time', 'task_id')
+    )
+
+    groups = {}
+    for reminder_id, meeting_id, timing_type, scheduled_time, task_id in rows:
+        group = groups.setdefault((meeting_id, timing_type, scheduled_time), {'task_id': '', 'unscheduled': []})
+        if task_id:
+            group['task_id'] = task_id
+        else:
+            group['unscheduled'].append(reminder_id)
+
+    scheduled = 0
+    with transaction.atomic():
+        for (meeting_id, timing_type, scheduled_time), group in groups.items():
+            if not group['unscheduled']:
+                continue
+            task_id = group['task_id']
+            if not task_id:
+                task_id = uuid.uuid4().hex
+                _apply_after_commit(task_id, meeting_id, timing_type, scheduled_time)
+                scheduled += 1
+            MeetingReminder.objects.filter(id__in=group['unscheduled']).update(task_id=task_id)
+    return scheduled
+
+
+def schedule_meeting_reminders(meeting_id):
+    return schedule_pending_reminders(MeetingReminder.objects.filter(meeting_id=meeting_id))
+
+
+def reschedule_meeting_reminders(meeting):
+    """
+    Dipanggil ketika tanggal/jam meeting berubah: revoke task lama, pindahkan reminder
+    pending ke jadwal baru, hapus yang jadwal barunya sudah lewat, buat yang belum ada.
+    """
+    times = calculate_reminder_times(meeting)
+    now_time = timezone.now()
+    pending = list(MeetingReminder.objects.filter(meeting=meeting, status='pending'))
+
+    old_task_ids = set()
+    to_update, to_delete = [], []
+    for reminder in pending:
+        new_time = times.get(reminder.timing_type)
+        if new_time == reminder.scheduled_time:
+            continue
+        old_task_ids.add(reminder.task_id)
+        if new_time is None or new_time <= now_time:
+            to_delete.append(reminder.id)
+            continue
+        reminder.scheduled_time = new_time
+        reminder.task_id = ''
+        reminder.updated_at = now_time
+        to_update.append(reminder)
+
+    with transaction.atomic():
+        if to_delete:
+            MeetingReminder.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            MeetingReminder.objects.bulk_update(to_update, ['scheduled_time', 'task_id', 'updated_at'])
+
+        # Jadwal baru bisa membuka reminder yang dulu dilewati (misal H-1 yang sekarang masih di depan)
+        existing = MeetingReminder.objects.filter(meeting=meeting).values_list('peserta_id', 'timing_type')
+        missing = build_missing_reminders(meeting, MeetingPeserta.objects.filter(meeting=meeting), existing)
+        if missing:
+            MeetingReminder.objects.bulk_create(missing, ignore_conflicts=True)
+
+        _revoke(old_task_ids)
+        schedule_meeting_reminders(meeting.id)
+
+    logger.info(
+        f'[MeetingReminder] Reschedule {meeting.no_dokumen}: {len(to_update)} dipindah, '
+        f'{len(to_delete)} dihapus, {len(missing)} dibuat'
+    )
+
+
+def revoke_meeting_reminders(meeting_id):
+    """Revoke semua task ETA meeting (dipanggil sebelum meeting dihapus)"""
+    _revoke(
+        MeetingReminder.objects.filter(meeting_id=meeting_id, status='pending')
+        .exclude(task_id='').values_list('task_id', flat=True).distinct()
+    )
+
+
+# ==============================================================================
+# REKONSILIASI & METRIK
+# ==============================================================================
+def reconcile_meeting_reminders():
+    """
+    Safety net berfrekuensi rendah:
+    1. Kirim reminder pending yang terlewat (worker mati, task hilang, gagal dijadwalkan)
+       dan tandai failed reminder yang tertahan di 'sending'
+    2. Jadwalkan task ETA untuk reminder yang baru masuk horizon
+
+    Returns:
+        dict summary
+    """
+    from .reminder_dispatcher import dispatch_due_reminders, fail_stale_sending
+
+    stale = fail_stale_sending()
+    missed_ids = list(
+        MeetingReminder.objects.filter(
+            status='pending', scheduled_time__lte=timezone.now() - MISSED_GRACE
+        ).values_list('id', flat=True)
+    )
+    summary = {'missed': len(missed_ids), 'stale': stale, 'sent': 0, 'failed': 0}
+    if missed_ids:
+        logger.warning(f'[MeetingReminder] {len(missed_ids)} reminder terlewat, dikirim oleh sweep')
+        _, result = dispatch_due_reminders(reminder_ids=missed_ids)
+        summary.update(result)
+
+    summary['scheduled'] = schedule_pending_reminders()
+    return summary
+
+
+def reminder_latency_stats(days=7):
+    """
+    Statistik latency pengiriman (sent_at - scheduled_time) reminder terkirim.
+
+    Returns:
+        dict {'count', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms', 'by_timing': {...}}
+    """
+    queryset = MeetingReminder.objects.filter(
+        status='sent',
+        sent_at__gte=timezone.now() - timedelta(days=days),
+        delivery_latency_ms__isnull=False,
+    )
+    totals = queryset.aggregate(count=Count('id'), avg_ms=Avg('delivery_latency_ms'), max_ms=Max('delivery_latency_ms'))
+
+    def percentile(fraction):
+        if not totals['count']:
+            return None
+        index = min(int(totals['count'] * fraction), totals['count'] - 1)
+        return queryset.order_by('delivery_latency_ms').values_list('delivery_latency_ms', flat=True)[index]
+
+    by_timing = {
+        row['timing_type']: {'count': row['count'], 'avg_ms': round(row['avg_ms'] or 0), 'max_ms': row['max_ms']}
+        for row in queryset.values('timing_type').annotate(
+            count=Count('id'), avg_ms=Avg('delivery_latency_ms'), max_ms=Max('delivery_latency_ms')
+        ).order_by()
+    }
+
+    return {
+        'days': days,
+        'count': totals['count'],
+        'avg_ms': round(totals['avg_ms']) if totals['avg_ms'] is not None else None,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'max_ms': totals['max_ms'],
+        'by_timing': by_timing,
+    }
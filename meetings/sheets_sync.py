@@ -0,0 +1,246 @@
+"""
+Pipeline sync Meeting -> Google Sheets (Meetings sheet, diproses lanjut oleh GAS).
+
+Sebelumnya signal post_save membangun Sheets client dan melakukan satu values().append
+per meeting DI DALAM request user, dan hanya untuk meeting yang dibuat langsung berstatus
+'final' - meeting draft yang di-finalize belakangan tidak pernah masuk sheet.
+
+Sekarang:
+1. Signal hanya menandai meeting 'final' sebagai dirty (sheets_sync_status='pending')
+   dan men-trigger worker setelah commit.
+2. Worker (sync_meetings_to_google_sheets_task) claim meeting pending, group per spreadsheet,
+   dan mengirim semua row satu spreadsheet dengan SATU values().append.
+3. Urutan: row di-append urut sheets_sync_requested_at (urutan finalize). Jika meeting tertua
+   sebuah spreadsheet sedang backoff, meeting yang lebih baru di spreadsheet itu ikut
+   menunggu, jadi urutan di sheet tidak pernah terbalik.
+4. Retry dengan exponential backoff; setelah MAX_ATTEMPTS status 'failed'.
+5. Sebelum append, kolom A (No_Dokumen) dibaca sekali per spreadsheet: row yang sudah ada
+   tidak di-append lagi (aman untuk retry setelah timeout dan untuk backfill).
+
+Settings (opsional):
+    MEETING_SHEETS_SYNC_BATCH_SIZE   - maksimal meeting per run (default 200)
+    MEETING_SHEETS_SYNC_MAX_ATTEMPTS - percobaan sebelum 'failed' (default 6)
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Meeting, MeetingPeserta
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'MEETING_SHEETS_SYNC_BATCH_SIZE', 200)
+MAX_ATTEMPTS = getattr(settings, 'MEETING_SHEETS_SYNC_MAX_ATTEMPTS', 6)
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 3600
+STALE_SYNCING_AFTER = timedelta(minutes=10)
+
+
+# ==============================================================================
+# DIRTY MARKING
+# ==============================================================================
+def _schedule_processing():
+    """Trigger worker setelah transaksi commit (gagal trigger = diambil beat berikutnya)"""
+    def kick():
+        try:
+            from .tasks import sync_meetings_to_google_sheets_task
+            sync_meetings_to_google_sheets_task.delay()
+        except Exception as e:
+            logger.warning(f'[GoogleSheets] Gagal trigger worker, menunggu jadwal beat: {e}')
+    transaction.on_commit(kick)
+
+
+def mark_meetings_dirty(queryset):
+    """
+    Tandai meeting final yang belum pernah di-queue / gagal sebagai pending.
+
+    Returns:
+        Jumlah meeting yang ditandai
+    """
+    now = timezone.now()
+    updated = queryset.filter(status='final').filter(
+        Q(sheets_sync_status='') | Q(sheets_sync_status='failed')
+    ).update(
+        sheets_sync_status='pending',
+        sheets_sync_requested_at=now,
+        sheets_next_attempt_at=now,
+        sheets_sync_attempts=0,
+        sheets_sync_error='',
+    )
+    if updated:
+        _schedule_processing()
+    return updated
+
+
+def mark_meeting_dirty(meeting):
+    """Dipanggil dari post_save: queue meeting yang (baru) final"""
+    if meeting.status != 'final' or meeting.sheets_sync_status in ('pending', 'syncing', 'synced'):
+        return False
+    if not mark_meetings_dirty(Meeting.objects.filter(pk=meeting.pk)):
+        return False
+    meeting.sheets_sync_status = 'pending'
+    return True
+
+
+# ==============================================================================
+# WORKER
+# ==============================================================================
+def _spreadsheet_id(meeting):
+    departemen = meeting.created_by.departemen if meeting.created_by else None
+    return departemen.google_sheet_id if departemen else None
+
+
+def claim_pending_meetings(batch_size=None):
+    """
+    Claim meeting pending, dikelompokkan per spreadsheet.
+
+    Satu spreadsheet hanya diproses jika meeting tertuanya sudah jatuh tempo
+    (menjaga urutan append). Meeting tanpa spreadsheet dikembalikan ke status ''.
+
+    Returns:
+        dict {spreadsheet_id: [Meeting, ...]} berstatus 'syncing'
+    """
+    batch_size = batch_size or BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            Meeting.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('created_by__departemen')
+            .filter(
+                Q(sheets_sync_status='pending') |
+                Q(sheets_sync_status='syncing', updated_at__lt=now - STALE_SYNCING_AFTER)
+            )
+            .order_by('sheets_sync_requested_at', 'id')[:batch_size]
+        )
+
+        groups, unconfigured = {}, []
+        for meeting in rows:
+            spreadsheet_id = _spreadsheet_id(meeting)
+            if not spreadsheet_id:
+                meeting.sheets_sync_status = ''
+                meeting.sheets_sync_error = 'Departemen pemilik meeting tidak punya google_sheet_id'
+                unconfigured.append(meeting)
+                continue
+            groups.setdefault(spreadsheet_id, []).append(meeting)
+
+        claimed = {}
+        for spreadsheet_id, meetings in groups.items():
+            first = meetings[0]
+            if first.sheets_sync_status == 'pending' and first.sheets_next_attempt_at and first.sheets_next_attempt_at > now:
+                continue
+            for meeting in meetings:
+                meeting.sheets_sync_status = 'syncing'
+                meeting.updated_at = now
+            claimed[spreadsheet_id] = meetings
+
+        changed = unconfigured + [meeting for meetings in claimed.values() for meeting in meetings]
+        if changed:
+            Meeting.objects.bulk_update(changed, ['sheets_sync_status', 'sheets_sync_error', 'updated_at'])
+    return claimed
+
+
+def _peserta_map(meetings):
+    """meeting_id -> 'user1, user2' (satu query untuk seluruh batch)"""
+    names = {}
+    rows = MeetingPeserta.objects.filter(
+        meeting_id__in=[meeting.id for meeting in meetings], peserta__isnull=False
+    ).values_list('meeting_id', 'peserta__username')
+    for meeting_id, username in rows:
+        names.setdefault(meeting_id, []).append(username)
+    return {meeting_id: ', '.join(usernames) for meeting_id, usernames in names.items()}
+
+
+def build_meeting_data(meeting, peserta_str=''):
+    return {
+        'no_dokumen': meeting.no_dokumen,
+        'agenda': meeting.agenda,
+        'tanggal': meeting.tanggal_meeting,
+        'waktu_mulai': meeting.jam_mulai,
+        'waktu_selesai': meeting.jam_selesai,
+        'lokasi': meeting.tempat,
+        'peserta': peserta_str,
+    }
+
+
+def _sync_spreadsheet(sheets_service, spreadsheet_id, meetings, peserta_map):
+    """Satu read kolom A + satu append untuk semua meeting di spreadsheet ini"""
+    existing = sheets_service.get_existing_document_numbers(spreadsheet_id)
+    to_append = [meeting for meeting in meetings if meeting.no_dokumen not in existing]
+    if to_append:
+        sheets_service.append_meeting_rows(
+            spreadsheet_id,
+            [build_meeting_data(meeting, peserta_map.get(meeting.id, '')) for meeting in to_append],
+        )
+    return len(to_append)
+
+
+def _mark_result(meetings, error=None):
+    now = timezone.now()
+    for meeting in meetings:
+        meeting.updated_at = now
+        if error is None:
+            meeting.sheets_sync_status = 'synced'
+            meeting.sheets_synced_at = now
+            meeting.sheets_sync_error = ''
+            continue
+        meeting.sheets_sync_attempts += 1
+        meeting.sheets_sync_error = str(error)[:2000]
+        if meeting.sheets_sync_attempts >= MAX_ATTEMPTS:
+            meeting.sheets_sync_status = 'failed'
+        else:
+            meeting.sheets_sync_status = 'pending'
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (meeting.sheets_sync_attempts - 1), BACKOFF_MAX_SECONDS)
+            meeting.sheets_next_attempt_at = now + timedelta(seconds=delay)
+    Meeting.objects.bulk_update(
+        meetings,
+        ['sheets_sync_status', 'sheets_synced_at', 'sheets_sync_error', 'sheets_sync_attempts',
+         'sheets_next_attempt_at', 'updated_at'],
+    )
+
+
+def process_pending_meetings(batch_size=None):
+    """
+    Satu run worker.
+
+    Returns:
+        dict {'claimed', 'spreadsheets', 'synced', 'appended', 'failed'}
+    """
+    summary = {'claimed': 0, 'spreadsheets': 0, 'synced': 0, 'appended': 0, 'failed': 0}
+    claimed = claim_pending_meetings(batch_size)
+    if not claimed:
+        return summary
+
+    from core.services import get_sheets_service
+    sheets_service = get_sheets_service()
+    all_meetings = [meeting for meetings in claimed.values() for meeting in meetings]
+    summary['claimed'] = len(all_meetings)
+    if not sheets_service:
+        _mark_result(all_meetings, error='Gagal inisialisasi Google Sheets service')
+        summary['failed'] = len(all_meetings)
+        return summary
+
+    peserta_map = _peserta_map(all_meetings)
+    for spreadsheet_id, meetings in claimed.items():
+        summary['spreadsheets'] += 1
+        try:
+            summary['appended'] += _sync_spreadsheet(sheets_service, spreadsheet_id, meetings, peserta_map)
+        except Exception as e:
+            logger.exception(f'❌ [GoogleSheets] Gagal sync {len(meetings)} meeting ke {spreadsheet_id}: {e}')
+            _mark_result(meetings, error=e)
+            summary['failed'] += len(meetings)
+            continue
+        _mark_result(meetings)
+        summary['synced'] += len(meetings)
+        logger.info(f'✅ [GoogleSheets] {len(meetings)} meeting synced ke sheet {spreadsheet_id}')
+    return summary
+
+
+def has_pending_meetings():
+    return Meeting.objects.filter(
+        sheets_sync_status='pending', sheets_next_attempt_at__lte=timezone.now()
+    ).exists()
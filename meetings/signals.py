@@ -1,15 +1,21 @@
 """
 Django signals untuk meetings app.
 
-Auto-create MeetingReminder ketika Meeting dibuat.
+Auto-create MeetingReminder ketika Meeting dibuat dan jadwalkan ulang
+ketika tanggal/jam meeting atau daftar peserta berubah.
 """
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from datetime import timedelta, time
-from django.utils.timezone import now, make_aware
 
 from .models import Meeting, MeetingReminder, MeetingPeserta
+from .reminder_scheduler import (
+    build_missing_reminders,
+    schedule_meeting_reminders,
+    reschedule_meeting_reminders,
+    revoke_meeting_reminders,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +29,8 @@ def auto_create_meeting_reminders(sender, instance, created, **kwargs):
     Membuat 2 reminders:
     1. H-1 jam 08:00 pagi
     2. 10 menit sebelum jam mulai
+    
+    Reminder dijadwalkan sebagai Celery task ETA (lihat reminder_scheduler.py).
     """
     if not created:
         return  # Only for new meetings
@@ -31,49 +39,18 @@ def auto_create_meeting_reminders(sender, instance, created, **kwargs):
     
     try:
         # Get all peserta untuk meeting ini
-        peserta_list = MeetingPeserta.objects.filter(meeting=meeting)
+        peserta_list = list(MeetingPeserta.objects.filter(meeting=meeting))
         
-        if not peserta_list.exists():
+        if not peserta_list:
             logger.info(f'[MeetingReminder] No peserta untuk meeting {meeting.no_dokumen}')
             return
         
-        reminders_to_create = []
-        
-        for peserta in peserta_list:
-            # Reminder 1: H-1 jam 08:00
-            reminder_1_time = _calculate_reminder_time_1day_08am(meeting.tanggal_meeting)
-            
-            # Reminder 2: 10 menit sebelum
-            reminder_2_time = _calculate_reminder_time_10min_before(
-                meeting.tanggal_meeting,
-                meeting.jam_mulai
-            )
-            
-            # Cek reminder 1 tidak di masa lalu
-            if reminder_1_time > now():
-                reminders_to_create.append(
-                    MeetingReminder(
-                        meeting=meeting,
-                        peserta=peserta,
-                        timing_type='1day_08am',
-                        scheduled_time=reminder_1_time
-                    )
-                )
-            
-            # Cek reminder 2 tidak di masa lalu
-            if reminder_2_time > now():
-                reminders_to_create.append(
-                    MeetingReminder(
-                        meeting=meeting,
-                        peserta=peserta,
-                        timing_type='10min_before',
-                        scheduled_time=reminder_2_time
-                    )
-                )
+        reminders_to_create = build_missing_reminders(meeting, peserta_list)
         
         # Bulk create
         if reminders_to_create:
             MeetingReminder.objects.bulk_create(reminders_to_create)
+            schedule_meeting_reminders(meeting.id)
             logger.info(
                 f'[MeetingReminder] Created {len(reminders_to_create)} reminders '
                 f'untuk meeting {meeting.no_dokumen}'
@@ -83,12 +60,48 @@ def auto_create_meeting_reminders(sender, instance, created, **kwargs):
         logger.exception(f'Error creating reminders untuk meeting {meeting.id}: {str(e)}')
 
 
+@receiver(pre_save, sender=Meeting)
+def remember_meeting_schedule(sender, instance, **kwargs):
+    """Simpan tanggal/jam lama supaya post_save tahu apakah reminder perlu dijadwal ulang"""
+    instance._previous_schedule = None
+    if instance._state.adding:
+        return
+    instance._previous_schedule = Meeting.objects.filter(pk=instance.pk).values_list(
+        'tanggal_meeting', 'jam_mulai'
+    ).first()
+
+
+@receiver(post_save, sender=Meeting)
+def reschedule_reminders_on_meeting_change(sender, instance, created, **kwargs):
+    """Revoke & jadwal ulang reminder ketika tanggal atau jam mulai meeting berubah"""
+    previous = getattr(instance, '_previous_schedule', None)
+    if created or previous is None:
+        return
+    if previous == (instance.tanggal_meeting, instance.jam_mulai):
+        return
+    
+    try:
+        reschedule_meeting_reminders(instance)
+    except Exception as e:
+        logger.exception(f'Error reschedule reminders untuk meeting {instance.id}: {str(e)}')
+
+
+@receiver(pre_delete, sender=Meeting)
+def revoke_reminders_on_meeting_delete(sender, instance, **kwargs):
+    """Revoke task ETA reminder sebelum meeting (dan reminder-nya) dihapus"""
+    try:
+        revoke_meeting_reminders(instance.id)
+    except Exception as e:
+        logger.exception(f'Error revoke reminders untuk meeting {instance.id}: {str(e)}')
+
+
 @receiver(post_save, sender=MeetingPeserta)
 def create_reminders_for_new_peserta(sender, instance, created, **kwargs):
     """
     Auto-create reminders ketika peserta baru ditambahkan ke meeting.
     
     Ini untuk handle kasus peserta ditambahkan setelah meeting dibuat.
+    Reminder peserta baru ikut task ETA grup yang sudah ada.
     """
     if not created:
         return  # Only for new peserta
@@ -97,51 +110,17 @@ def create_reminders_for_new_peserta(sender, instance, created, **kwargs):
     meeting = peserta.meeting
     
     try:
-        # Cek reminder sudah ada untuk peserta ini
         existing = MeetingReminder.objects.filter(
             meeting=meeting,
             peserta=peserta
-        ).exists()
+        ).values_list('peserta_id', 'timing_type')
         
-        if existing:
-            return  # Sudah ada reminder untuk peserta ini
-        
-        reminders_to_create = []
-        
-        # Reminder 1: H-1 jam 08:00
-        reminder_1_time = _calculate_reminder_time_1day_08am(meeting.tanggal_meeting)
-        
-        # Reminder 2: 10 menit sebelum
-        reminder_2_time = _calculate_reminder_time_10min_before(
-            meeting.tanggal_meeting,
-            meeting.jam_mulai
-        )
-        
-        # Cek reminder 1 tidak di masa lalu
-        if reminder_1_time > now():
-            reminders_to_create.append(
-                MeetingReminder(
-                    meeting=meeting,
-                    peserta=peserta,
-                    timing_type='1day_08am',
-                    scheduled_time=reminder_1_time
-                )
-            )
-        
-        # Cek reminder 2 tidak di masa lalu
-        if reminder_2_time > now():
-            reminders_to_create.append(
-                MeetingReminder(
-                    meeting=meeting,
-                    peserta=peserta,
-                    timing_type='10min_before',
-                    scheduled_time=reminder_2_time
-                )
-            )
+        reminders_to_create = build_missing_reminders(meeting, [peserta], existing)
         
         # Bulk create
         if reminders_to_create:
             MeetingReminder.objects.bulk_create(reminders_to_create)
+            schedule_meeting_reminders(meeting.id)
             logger.info(
                 f'[MeetingReminder] Created {len(reminders_to_create)} reminders '
                 f'untuk peserta {peserta.nama} di meeting {meeting.no_dokumen}'
@@ -230,82 +209,26 @@ def _calculate_reminder_time_10min_before(meeting_date, meeting_time):
 @receiver(post_save, sender=Meeting)
 def sync_meeting_to_google_sheets(sender, instance, created, **kwargs):
     """
-    Auto-sync meeting ke Google Sheets ketika meeting dibuat atau updated.
+    Tandai meeting untuk di-sync ke Google Sheets ketika berstatus 'final'.
     
-    Hanya sync jika:
-    1. Meeting baru (created=True)
-    2. Status meeting adalah 'final' (meeting sudah finalized)
-    3. Departemen punya google_sheet_id yang dikonfigurasi
+    Tidak ada call ke Google API di sini: meeting hanya ditandai pending dan worker
+    (meetings/sheets_sync.py) meng-append semua meeting pending per spreadsheet
+    dalam satu call. Berlaku untuk meeting baru maupun draft yang di-finalize belakangan.
     
     Sync data: [No_Dokumen, Agenda, Tanggal, Waktu_Mulai, Waktu_Selesai, Lokasi, Peserta, "No"]
     """
-    if not created:
-        return  # Only sync untuk meeting baru
-    
-    meeting = instance
-    
-    # Check: Status meeting harus 'final' untuk di-sync ke sheets
-    if meeting.status != 'final':
-        logger.info(f'[GoogleSheets] Meeting {meeting.no_dokumen} berstatus {meeting.status}, skip sync')
+    if kwargs.get('raw'):
         return
     
     try:
-        # Get departemen dari pemilik meeting (created_by)
-        if not meeting.created_by or not meeting.created_by.departemen:
-            logger.warning(f'[GoogleSheets] Meeting {meeting.no_dokumen} tidak punya departemen info')
-            return
-        
-        departemen = meeting.created_by.departemen
-        
-        # Check: Departemen harus punya google_sheet_id
-        if not departemen.google_sheet_id:
-            logger.warning(
-                f'[GoogleSheets] Departemen {departemen.nama_departemen} '
-                f'tidak punya google_sheet_id, skip sync'
-            )
-            return
-        
-        # Get list peserta sebagai comma-separated string
-        peserta_names = list(
-            meeting.peserta.values_list('username', flat=True)
-        )
-        peserta_str = ', '.join(peserta_names) if peserta_names else ''
-        
-        # Prepare meeting data untuk append ke sheets
-        meeting_data = {
-            'no_dokumen': meeting.no_dokumen,
-            'agenda': meeting.agenda,
-            'tanggal': meeting.tanggal_meeting,  # Date object, akan di-convert di service
-            'waktu_mulai': meeting.jam_mulai,    # Time object, akan di-convert di service
-            'waktu_selesai': meeting.jam_selesai,  # Time object
-            'lokasi': meeting.tempat,
-            'peserta': peserta_str
-        }
-        
-        # Initialize Google Sheets service dan append
-        from core.services import get_sheets_service
-        sheets_service = get_sheets_service()
-        
-        if not sheets_service:
-            logger.error(f'[GoogleSheets] Failed to initialize sheets service')
-            return
-        
-        # Append meeting row ke sheets
-        result = sheets_service.append_meeting_row(
-            spreadsheet_id=departemen.google_sheet_id,
-            meeting_data=meeting_data
-        )
-        
-        logger.info(
-            f'✅ [GoogleSheets] Meeting {meeting.no_dokumen} synced ke sheet '
-            f'{departemen.google_sheet_id}'
-        )
-        
+        from .sheets_sync import mark_meeting_dirty
+        if mark_meeting_dirty(instance):
+            logger.info(f'[GoogleSheets] Meeting {instance.no_dokumen} masuk antrian sync')
     except Exception as e:
         logger.exception(
-            f'❌ [GoogleSheets] Error syncing meeting {meeting.no_dokumen}: {str(e)}'
+            f'❌ [GoogleSheets] Error queue sync meeting {instance.no_dokumen}: {str(e)}'
         )
-        # Don't raise - ini optional feature, don't break meeting creation
+        # Don't raise - ini optional feature, don't break meeting save
 
 
 def ready():
@@ -15,9 +15,9 @@ logger = logging.getLogger(__name__)
 @shared_task(bind=True, max_retries=3)
 def send_meeting_reminders_task(self):
     """
-    Celery task untuk mengirim meeting reminders.
+    Celery task untuk mengirim semua meeting reminders yang jatuh tempo (manual / fallback).
     
-    Dijalankan setiap 5 menit oleh Celery Beat.
+    Pengiriman normal memakai task ETA send_scheduled_meeting_reminders.
     
     Retry: Up to 3 times with exponential backoff
     """
@@ -41,6 +41,100 @@ def send_meeting_reminders_task(self):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3, ignore_result=True)
+def send_scheduled_meeting_reminders(self, meeting_id, timing_type, scheduled_for):
+    """
+    Task ETA: kirim satu grup reminder (meeting, timing_type, scheduled_time).
+    
+    Dijadwalkan oleh meetings/reminder_scheduler.py dengan eta = scheduled_time.
+    Jadwal divalidasi ulang di sini, jadi task lama (meeting sudah digeser) tidak mengirim apa pun.
+    """
+    from datetime import datetime
+    from .models import MeetingReminder
+    from .reminder_dispatcher import dispatch_due_reminders
+    
+    scheduled_time = datetime.fromisoformat(scheduled_for)
+    
+    # ETA bisa jalan sedikit lebih awal (clock skew worker) - tunda sampai jatuh tempo
+    if scheduled_time > timezone.now():
+        self.apply_async(
+            args=[meeting_id, timing_type, scheduled_for],
+            eta=scheduled_time,
+            task_id=self.request.id,
+        )
+        return
+    
+    reminder_ids = list(
+        MeetingReminder.objects.filter(
+            meeting_id=meeting_id,
+            timing_type=timing_type,
+            scheduled_time=scheduled_time,
+            status='pending',
+        ).values_list('id', flat=True)
+    )
+    if not reminder_ids:
+        logger.info(f'[Celery Task] Reminder grup {meeting_id}/{timing_type} sudah tidak berlaku, skip')
+        return
+    
+    try:
+        results, summary = dispatch_due_reminders(reminder_ids=reminder_ids)
+    except Exception as exc:
+        logger.exception(f'[Celery Task] Error kirim reminder grup {meeting_id}/{timing_type}')
+        raise self.retry(exc=exc, countdown=30)
+    
+    latencies = [
+        result['reminder'].delivery_latency_ms for result in results
+        if result['success'] and result['reminder'].delivery_latency_ms is not None
+    ]
+    logger.info(
+        f'[Celery Task] Reminder {meeting_id}/{timing_type}: {summary["sent"]} sent, '
+        f'{summary["failed"]} failed, max latency {max(latencies) if latencies else "-"} ms'
+    )
+
+
+@shared_task(ignore_result=True)
+def reconcile_meeting_reminders_task():
+    """
+    Sweep rekonsiliasi reminder (Celery Beat, frekuensi rendah).
+    Mengirim reminder yang terlewat dan menjadwalkan task ETA untuk reminder yang masuk horizon.
+    """
+    from .reminder_scheduler import reconcile_meeting_reminders
+    
+    summary = reconcile_meeting_reminders()
+    logger.info(f'[Celery Task] Reconcile meeting reminders: {summary}')
+    return summary
+
+
+@shared_task(bind=True, ignore_result=True)
+def sync_meetings_to_google_sheets_task(self, batch_size=200, max_batches=10):
+    """
+    Worker sync Meeting -> Google Sheets (lihat meetings/sheets_sync.py).
+    
+    Di-trigger via transaction.on_commit saat meeting di-finalize dan oleh Celery Beat
+    (jaring pengaman untuk retry terjadwal / trigger yang gagal).
+    """
+    from .sheets_sync import process_pending_meetings, has_pending_meetings
+    
+    totals = {'claimed': 0, 'spreadsheets': 0, 'synced': 0, 'appended': 0, 'failed': 0}
+    for _ in range(max_batches):
+        summary = process_pending_meetings(batch_size)
+        for key in totals:
+            totals[key] += summary[key]
+        if summary['claimed'] < batch_size:
+            break
+    else:
+        # Masih ada antrian - lanjutkan di task baru supaya worker tidak dimonopoli
+        if has_pending_meetings():
+            self.apply_async(kwargs={'batch_size': batch_size, 'max_batches': max_batches})
+    
+    if totals['claimed']:
+        logger.info(
+            f"[GoogleSheets] Claimed: {totals['claimed']}, Synced: {totals['synced']} "
+            f"({totals['appended']} row baru, {totals['spreadsheets']} spreadsheet), Failed: {totals['failed']}"
+        )
+    return totals
+
+
 @shared_task
 def debug_task():
     """Debug task untuk testing Celery"""
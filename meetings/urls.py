@@ -59,6 +59,9 @@ urlpatterns = [
     path('config/reminder-settings/', 
          views.MeetingReminderSettingsView.as_view(), 
          name='reminder-settings'),
+    path('config/reminder-latency/', 
+         views.MeetingReminderLatencyView.as_view(), 
+         name='reminder-latency'),
     path('config/google-api-settings/', 
          views.GoogleAPISettingsView.as_view(), 
          name='google-api-settings'),
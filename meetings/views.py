@@ -1403,6 +1403,31 @@ class MeetingReminderSettingsView(LoginRequiredMixin, View):
 
 
 
+class MeetingReminderLatencyView(LoginRequiredMixin, View):
+    """
+    JSON metrik latency pengiriman reminder (sent_at - scheduled_time).
+    Hanya untuk staff / kepala departemen.
+    
+    Query params:
+        days: Rentang hari ke belakang (default 7, maksimal 90)
+    """
+    login_url = 'login'
+    
+    def get(self, request):
+        from .reminder_scheduler import reminder_latency_stats
+        
+        user = request.user
+        if not user.is_staff and not hasattr(user, 'departemen_dipimpin'):
+            return JsonResponse({'success': False, 'error': 'Forbidden'}, status=403)
+        
+        try:
+            days = min(max(int(request.GET.get('days', 7)), 1), 90)
+        except (TypeError, ValueError):
+            days = 7
+        
+        return JsonResponse({'success': True, 'latency': reminder_latency_stats(days)})
+
+
 class GoogleAPISettingsView(LoginRequiredMixin, View):
     """
     Global Google API settings page.
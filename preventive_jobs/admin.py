@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .measurements import sync_result_measurements
 from .models import (
     PreventiveJobTemplate,
     PreventiveJobExecution,
@@ -7,6 +8,7 @@ from .models import (
     ChecklistTemplate,
     ChecklistItem,
     ChecklistResult,
+    ChecklistMeasurement,
     WhatsAppContact,
     ChecklistShareLog,
 )
@@ -270,6 +272,29 @@ class ChecklistResultAdmin(admin.ModelAdmin):
         """Order by tanggal_pengisian descending"""
         qs = super().get_queryset(request)
         return qs.select_related('execution', 'checklist_template', 'diisi_oleh').order_by('-tanggal_pengisian')
+    
+    def save_model(self, request, obj, form, change):
+        """hasil_pengukuran bisa diedit di sini - tabel measurement ikut ditulis ulang"""
+        super().save_model(request, obj, form, change)
+        sync_result_measurements(obj)
+
+
+@admin.register(ChecklistMeasurement)
+class ChecklistMeasurementAdmin(admin.ModelAdmin):
+    """
+    Admin (read-only) hasil pengukuran ternormalisasi, diturunkan dari ChecklistResult
+    """
+    list_display = ['tanggal', 'aset', 'item', 'nilai_numeric', 'nilai_text', 'status']
+    list_filter = ['status', 'tanggal']
+    search_fields = ['item__item_pemeriksaan', 'aset__nama']
+    date_hierarchy = 'tanggal'
+    list_select_related = ['aset', 'item']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(WhatsAppContact)
@@ -5,3 +5,6 @@ class PreventiveJobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'preventive_jobs'
     verbose_name = 'Preventive Job Management (V2)'
+
+    def ready(self):
+        import preventive_jobs.signals  # Register signals when app is ready
@@ -0,0 +1,280 @@
+"""
+Import item checklist dari Excel / CSV dengan replace berbasis diff.
+
+Sebelumnya checklist_items_import_excel membaca seluruh upload ke BytesIO, membuka
+workbook penuh, menghapus SEMUA item template lalu create() satu per satu. Selain lambat,
+ID item berubah setiap import sehingga ChecklistResult (hasil_pengukuran / status_item
+di-key dengan str(item.id)) kehilangan pasangan itemnya.
+
+Sekarang:
+1. File dibaca streaming (openpyxl read_only / csv reader), divalidasi per baris.
+2. Baris dicocokkan dengan item yang ada (lihat diff_items):
+   a. teks item + no_urut sama
+   b. teks item sama (item hanya pindah urutan)
+   c. no_urut dan tipe item sama (teks diedit di posisi yang sama)
+   Item yang cocok mempertahankan ID-nya; hanya kolom yang berubah yang di-update.
+3. Perubahan diterapkan dalam satu transaksi: satu DELETE (item yang dihapus),
+   bulk_update, bulk_create.
+4. dry_run=True hanya mengembalikan preview (tambah / ubah / hapus) tanpa menyimpan.
+
+Format kolom (sama dengan download template):
+    No | Item Type | Item Pemeriksaan | Standar/Normal | Unit | Min | Max | Pilihan Text | Tindakan/Remark
+"""
+
+import csv
+import logging
+from io import TextIOWrapper
+
+import openpyxl
+from django.db import transaction
+from django.utils import timezone
+
+from core.excel_import import RowError
+from .models import ChecklistItem
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    'no', 'item_type', 'item_pemeriksaan', 'standar_normal', 'unit',
+    'nilai_min', 'nilai_max', 'text_options', 'tindakan_remark',
+]
+COLUMN_LABELS = {
+    'item_type': 'Item Type',
+    'nilai_min': 'Min',
+    'nilai_max': 'Max',
+}
+ITEM_TYPES = [value for value, _ in ChecklistItem.ITEM_TYPE_CHOICES]
+ITEM_FIELDS = [
+    'no_urut', 'item_type', 'item_pemeriksaan', 'standar_normal', 'unit',
+    'nilai_min', 'nilai_max', 'text_options', 'tindakan_remark',
+]
+
+
+# ==============================================================================
+# READ
+# ==============================================================================
+def _iter_rows(uploaded_file):
+    """Baris data (tanpa header) sebagai tuple, streaming"""
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+    if name.endswith('.csv'):
+        reader = csv.reader(TextIOWrapper(uploaded_file, encoding='utf-8-sig'))
+        next(reader, None)
+        yield from reader
+        return
+
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(min_row=2, values_only=True)
+    finally:
+        workbook.close()
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _float(value, column):
+    if value is None or _text(value) == '':
+        return None
+    try:
+        return float(str(value).replace(',', '.')) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{COLUMN_LABELS[column]} harus berupa angka, dapat '{value}'", COLUMN_LABELS[column], value)
+
+
+def clean_row(row):
+    values = dict(zip(COLUMNS, list(row) + [None] * (len(COLUMNS) - len(row))))
+    item_type = _text(values['item_type']).lower() or 'numeric'
+    if item_type not in ITEM_TYPES:
+        item_type = 'numeric'  # Default jika tidak valid (perilaku lama)
+    return {
+        'item_type': item_type,
+        'item_pemeriksaan': _text(values['item_pemeriksaan'])[:255],
+        'standar_normal': _text(values['standar_normal'])[:255],
+        'unit': _text(values['unit'])[:50] or None,
+        'nilai_min': _float(values['nilai_min'], 'nilai_min'),
+        'nilai_max': _float(values['nilai_max'], 'nilai_max'),
+        'text_options': _text(values['text_options'])[:500],
+        'tindakan_remark': _text(values['tindakan_remark'])[:255] or None,
+    }
+
+
+def read_items(uploaded_file):
+    """
+    Returns:
+        (items, errors) - items berisi dict field ChecklistItem dengan no_urut 1..n,
+        errors berisi {'row', 'column', 'value', 'error'}
+    """
+    items, errors = [], []
+    for row_num, row in enumerate(_iter_rows(uploaded_file), start=2):
+        # Baris tanpa Item Pemeriksaan (kolom C) dilewati, termasuk baris kosong template
+        if not row or len(row) < 3 or not _text(row[2]):
+            continue
+        try:
+            item = clean_row(row)
+        except RowError as e:
+            errors.append({
+                'row': row_num,
+                'column': e.column or '',
+                'value': '' if e.value is None else str(e.value)[:100],
+                'error': e.message,
+            })
+            continue
+        item['no_urut'] = len(items) + 1
+        items.append(item)
+    return items, errors
+
+
+# ==============================================================================
+# DIFF
+# ==============================================================================
+def _key(text):
+    return ' '.join((text or '').split()).casefold()
+
+
+def _same(old, new):
+    if old in (None, '') and new in (None, ''):
+        return True
+    return old == new
+
+
+def _final_no_urut(pair):
+    item, changes = pair
+    return changes['no_urut'][1] if 'no_urut' in changes else item.no_urut
+
+
+def diff_items(existing, incoming):
+    """
+    Cocokkan item lama dengan baris baru.
+
+    Returns:
+        dict {'add': [dict], 'update': [(ChecklistItem, {field: (lama, baru)})],
+              'remove': [ChecklistItem], 'unchanged': [ChecklistItem]}
+    """
+    unmatched = {item.pk: item for item in existing}
+    pending = list(incoming)
+    pairs = []
+
+    def match(key_existing, key_incoming):
+        index = {}
+        for item in unmatched.values():
+            index.setdefault(key_existing(item), []).append(item)
+        remaining = []
+        for data in pending:
+            candidates = index.get(key_incoming(data))
+            if candidates:
+                item = candidates.pop(0)
+                del unmatched[item.pk]
+                pairs.append((item, data))
+            else:
+                remaining.append(data)
+        return remaining
+
+    pending = match(lambda i: (_key(i.item_pemeriksaan), i.no_urut), lambda d: (_key(d['item_pemeriksaan']), d['no_urut']))
+    pending = match(lambda i: _key(i.item_pemeriksaan), lambda d: _key(d['item_pemeriksaan']))
+    pending = match(lambda i: (i.no_urut, i.item_type), lambda d: (d['no_urut'], d['item_type']))
+
+    updates, unchanged = [], []
+    for item, data in pairs:
+        changes = {
+            field: (getattr(item, field), data[field])
+            for field in ITEM_FIELDS
+            if not _same(getattr(item, field), data[field])
+        }
+        if changes:
+            updates.append((item, changes))
+        else:
+            unchanged.append(item)
+
+    return {
+        'add': pending,
+        'update': sorted(updates, key=_final_no_urut),
+        'remove': sorted(unmatched.values(), key=lambda item: item.no_urut),
+        'unchanged': unchanged,
+    }
+
+
+def preview(diff):
+    """Ringkasan diff yang bisa di-serialize ke JSON"""
+    return {
+        'added': [
+            {'no_urut': data['no_urut'], 'item_pemeriksaan': data['item_pemeriksaan'], 'item_type': data['item_type']}
+            for data in diff['add']
+        ],
+        'updated': [
+            {
+                'id': item.pk,
+                'no_urut': _final_no_urut((item, changes)),
+                'item_pemeriksaan': item.item_pemeriksaan,
+                'changes': {field: [old, new] for field, (old, new) in changes.items()},
+            }
+            for item, changes in diff['update']
+        ],
+        'removed': [
+            {'id': item.pk, 'no_urut': item.no_urut, 'item_pemeriksaan': item.item_pemeriksaan}
+            for item in diff['remove']
+        ],
+        'unchanged': len(diff['unchanged']),
+    }
+
+
+# ==============================================================================
+# APPLY
+# ==============================================================================
+@transaction.atomic
+def apply_diff(template, diff):
+    """
+    Terapkan diff. Urutan menjaga unique (checklist_template, no_urut):
+    hapus -> no_urut item yang pindah diparkir ke nilai negatif -> bulk_update -> bulk_create.
+    Riwayat ChecklistMeasurement item yang dihapus tetap ada (FK item SET_NULL).
+    """
+    now = timezone.now()
+    if diff['remove']:
+        ChecklistItem.objects.filter(pk__in=[item.pk for item in diff['remove']]).delete()
+
+    moved = [item for item, changes in diff['update'] if 'no_urut' in changes]
+    if moved:
+        for item in moved:
+            item.no_urut = -item.pk
+        ChecklistItem.objects.bulk_update(moved, ['no_urut'], batch_size=500)
+
+    if diff['update']:
+        fields = set()
+        for item, changes in diff['update']:
+            for field, (_, new) in changes.items():
+                setattr(item, field, new)
+            item.updated_at = now
+            fields.update(changes)
+        ChecklistItem.objects.bulk_update(
+            [item for item, _ in diff['update']], sorted(fields) + ['updated_at'], batch_size=500
+        )
+
+    ChecklistItem.objects.bulk_create(
+        [ChecklistItem(checklist_template=template, **data) for data in diff['add']], batch_size=500
+    )
+
+
+def import_checklist_items(template, uploaded_file, dry_run=False):
+    """
+    Returns:
+        dict {'success', 'dry_run', 'errors', 'preview', 'total'}
+        success False jika ada baris invalid (tidak ada yang disimpan)
+    """
+    items, errors = read_items(uploaded_file)
+    result = {'success': not errors, 'dry_run': dry_run, 'errors': errors, 'total': len(items) + len(errors)}
+    if errors:
+        return result
+
+    with transaction.atomic():
+        # Kunci item template supaya dua import bersamaan tidak saling menimpa
+        existing = list(ChecklistItem.objects.select_for_update().filter(checklist_template=template))
+        diff = diff_items(existing, items)
+        result['preview'] = preview(diff)
+        if not dry_run:
+            apply_diff(template, diff)
+    if not dry_run:
+        logger.info(
+            f"[Checklist Import] {template.nomor}: +{len(diff['add'])} ~{len(diff['update'])} "
+            f"-{len(diff['remove'])} ={len(diff['unchanged'])}"
+        )
+    return result
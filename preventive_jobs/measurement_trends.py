@@ -0,0 +1,214 @@
+"""
+Tren hasil pengukuran per (mesin, item checklist) untuk grafik.
+
+Pengukuran harian satu mesin selama beberapa tahun bisa berisi puluhan ribu titik - terlalu
+banyak untuk dikirim dan digambar di HP. Endpoint tren (measurement_trend_api) mengembalikan
+paling banyak `points` titik:
+
+1. mode 'bucket' (default): rentang tanggal dibagi menjadi <= points bucket dengan lebar sama,
+   tiap bucket berisi n / min / max / avg / jumlah di luar batas. Spike tetap terlihat (min/max).
+2. mode 'lttb': Largest-Triangle-Three-Buckets - memilih titik asli yang paling menjaga
+   bentuk garis, cocok untuk line chart sederhana.
+   Jika jumlah titik <= points, seri mentah dikirim apa adanya (mode 'raw').
+
+Batas kontrol diambil dari ChecklistItem.nilai_min / nilai_max. Ringkasan (count, min, max,
+avg, di bawah / di atas batas) dihitung dalam SATU query agregat di database.
+
+Hasil di-cache per (mesin, item, rentang, mode, points, batas). Setiap seri punya version
+stamp sendiri yang di-bump (setelah commit) saat measurement seri itu ditulis ulang / dihapus,
+jadi entry lama otomatis tidak terpakai tanpa perlu menghapus key satu per satu.
+
+Settings (opsional):
+    MEASUREMENT_TREND_CACHE_TIMEOUT - umur entry tren di cache, detik (default 21600)
+    MEASUREMENT_TREND_MAX_POINTS    - batas atas parameter points (default 2000)
+"""
+
+import math
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q
+
+from .models import ChecklistMeasurement
+
+CACHE_TIMEOUT = getattr(settings, 'MEASUREMENT_TREND_CACHE_TIMEOUT', 6 * 60 * 60)
+MAX_POINTS = getattr(settings, 'MEASUREMENT_TREND_MAX_POINTS', 2000)
+MIN_POINTS = 10
+DEFAULT_POINTS = 200
+MODES = ('bucket', 'lttb')
+
+VERSION_KEY = 'measurement_trend_version:{aset}:{item}'
+TREND_KEY = 'measurement_trend:{aset}:{item}:{version}:{start}:{end}:{mode}:{points}:{lo}:{hi}'
+
+
+# ==============================================================================
+# CACHE
+# ==============================================================================
+def series_version(aset_id, item_id):
+    key = VERSION_KEY.format(aset=aset_id, item=item_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(key, version, None):
+            version = cache.get(key) or version
+    return version
+
+
+def invalidate_series(pairs):
+    """Bump version seri (aset_id, item_id) setelah transaksi yang sedang berjalan commit"""
+    keys = [VERSION_KEY.format(aset=aset_id, item=item_id) for aset_id, item_id in set(pairs)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def trend_key(aset_id, item, start, end, mode, points):
+    return TREND_KEY.format(
+        aset=aset_id, item=item.pk, version=series_version(aset_id, item.pk),
+        start=start.isoformat(), end=end.isoformat(), mode=mode, points=points,
+        lo=item.nilai_min, hi=item.nilai_max,
+    )
+
+
+# ==============================================================================
+# DOWNSAMPLING
+# ==============================================================================
+def is_out(value, lo, hi):
+    return (lo is not None and value < lo) or (hi is not None and value > hi)
+
+
+def bucketize(points, start, end, budget, lo=None, hi=None):
+    """
+    Agregasi titik (tanggal, nilai) terurut ke <= budget bucket dengan lebar hari yang sama.
+
+    Returns:
+        list dict {'t', 'n', 'min', 'max', 'avg', 'out'} - hanya bucket yang berisi data
+    """
+    width = max(1, math.ceil(((end - start).days + 1) / budget))
+    buckets = []
+    current = None
+    for tanggal, value in points:
+        index = (tanggal - start).days // width
+        if current is None or current['index'] != index:
+            current = {'index': index, 'n': 0, 'min': value, 'max': value, 'sum': 0.0, 'out': 0}
+            buckets.append(current)
+        current['n'] += 1
+        current['sum'] += value
+        current['min'] = min(current['min'], value)
+        current['max'] = max(current['max'], value)
+        current['out'] += is_out(value, lo, hi)
+
+    return [
+        {
+            't': (start + timedelta(days=bucket['index'] * width)).isoformat(),
+            'n': bucket['n'],
+            'min': bucket['min'],
+            'max': bucket['max'],
+            'avg': round(bucket['sum'] / bucket['n'], 4),
+            'out': bucket['out'],
+        }
+        for bucket in buckets
+    ]
+
+
+def lttb(points, budget):
+    """
+    Largest-Triangle-Three-Buckets: pilih `budget` titik asli dari seri (tanggal, nilai) terurut.
+    Titik pertama dan terakhir selalu dipertahankan.
+    """
+    total = len(points)
+    if budget >= total or budget < 3:
+        return list(points)
+
+    xs = [tanggal.toordinal() for tanggal, _ in points]
+    ys = [value for _, value in points]
+    every = (total - 2) / (budget - 2)
+    selected = [points[0]]
+    a = 0
+    for i in range(budget - 2):
+        # Rata-rata bucket berikutnya = titik ketiga segitiga
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, total)
+        span = next_end - next_start or 1
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(points[best])
+        a = best
+    selected.append(points[-1])
+    return selected
+
+
+# ==============================================================================
+# QUERY
+# ==============================================================================
+def summarize(queryset, lo, hi):
+    """count / min / max / avg / below / above dalam satu query agregat"""
+    aggregates = {
+        'count': Count('id'),
+        'min': Min('nilai_numeric'),
+        'max': Max('nilai_numeric'),
+        'avg': Avg('nilai_numeric'),
+    }
+    if lo is not None:
+        aggregates['below'] = Count('id', filter=Q(nilai_numeric__lt=lo))
+    if hi is not None:
+        aggregates['above'] = Count('id', filter=Q(nilai_numeric__gt=hi))
+    summary = {'below': 0, 'above': 0, **queryset.aggregate(**aggregates)}
+    if summary['avg'] is not None:
+        summary['avg'] = round(summary['avg'], 4)
+    summary['out_of_range'] = summary['below'] + summary['above']
+    return summary
+
+
+def build_trend(aset_id, item, start, end, mode='bucket', points=DEFAULT_POINTS):
+    """
+    Data tren satu seri (tanpa cache).
+
+    Returns:
+        dict {'limits', 'summary', 'mode', 'downsampled', 'series'}
+    """
+    lo, hi = item.nilai_min, item.nilai_max
+    queryset = ChecklistMeasurement.objects.filter(
+        aset_id=aset_id, item_id=item.pk, tanggal__gte=start, tanggal__lte=end, nilai_numeric__isnull=False
+    )
+    summary = summarize(queryset, lo, hi)
+
+    raw = []
+    if summary['count']:
+        raw = list(queryset.order_by('tanggal', 'id').values_list('tanggal', 'nilai_numeric'))
+
+    if len(raw) <= points:
+        mode = 'raw'
+    if mode == 'bucket':
+        series = bucketize(raw, start, end, points, lo, hi)
+    else:
+        selected = lttb(raw, points) if mode == 'lttb' else raw
+        series = [{'t': tanggal.isoformat(), 'v': value, 'out': is_out(value, lo, hi)} for tanggal, value in selected]
+
+    return {
+        'limits': {'min': lo, 'max': hi},
+        'summary': summary,
+        'mode': mode,
+        'downsampled': mode != 'raw',
+        'series': series,
+    }
+
+
+def get_trend(aset_id, item, start, end, mode='bucket', points=DEFAULT_POINTS):
+    """Data tren dari cache (dihitung sekali per rentang / versi seri)"""
+    key = trend_key(aset_id, item, start, end, mode, points)
+    trend = cache.get(key)
+    if trend is None:
+        trend = build_trend(aset_id, item, start, end, mode, points)
+        cache.set(key, trend, CACHE_TIMEOUT)
+    return trend
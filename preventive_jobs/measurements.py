@@ -0,0 +1,139 @@
+"""
+Hasil pengukuran checklist ternormalisasi (ChecklistMeasurement).
+
+Sebelumnya hasil checklist hanya tersimpan sebagai JSON di ChecklistResult.hasil_pengukuran
+(key = str(item.id), value = {nilai, status, remark}). Pertanyaan seperti "tren nilai item X
+di mesin Y tiga bulan terakhir" atau "item yang paling sering NG" harus memuat dan mem-parse
+JSON semua result di Python.
+
+Sekarang:
+1. Setiap kali hasil checklist disimpan (save_checklist_result_view / save_checklist_via_token),
+   sync_result_measurements() menulis ulang baris ChecklistMeasurement result tersebut:
+   satu DELETE + satu bulk_create dalam transaksi yang sama.
+2. Nilai di-parse sekali di sini: item numeric -> nilai_numeric (koma desimal diterima),
+   item teks -> nilai_text. Status diambil dari value JSON, fallback ke status_item.
+3. Tanggal pengukuran = actual_date execution, fallback tanggal pengisian (tanggal lokal).
+4. Data lama di-backfill oleh migration 0022 dengan build_measurements() yang sama.
+5. Cache tren seri yang tersentuh di-invalidate (lihat measurement_trends).
+6. Item yang dihapus dari template tidak menghapus riwayatnya: FK item menjadi NULL
+   dan baris tersebut tidak disentuh lagi oleh sync.
+
+JSON tetap menjadi sumber data form; tabel ini murni turunan untuk query.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .measurement_trends import invalidate_series
+from .models import ChecklistItem, ChecklistMeasurement
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('OK', 'NG')
+
+
+def parse_item_id(key):
+    """Key JSON -> id item (format lama 'item_12' juga diterima), None jika bukan id"""
+    key = str(key).strip()
+    if key.startswith('item_'):
+        key = key[len('item_'):]
+    return int(key) if key.isdigit() else None
+
+
+def parse_numeric(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def measurement_date(result, execution):
+    """Tanggal pengukuran: actual_date execution, fallback tanggal pengisian"""
+    if execution is not None and execution.actual_date:
+        return execution.actual_date
+    if result.tanggal_pengisian:
+        return timezone.localdate(result.tanggal_pengisian)
+    if execution is not None:
+        return execution.scheduled_date
+    return timezone.localdate()
+
+
+def build_measurements(result, execution, items, model=ChecklistMeasurement):
+    """
+    Instance measurement (belum disimpan) dari hasil_pengukuran satu result.
+
+    Args:
+        execution: execution milik result (boleh None)
+        items: dict {item_id: ChecklistItem} - item yang tidak ada di dict dilewati
+        model: class ChecklistMeasurement (migration mengirim model historis)
+    """
+    hasil = result.hasil_pengukuran or {}
+    status_item = result.status_item or {}
+    if not isinstance(hasil, dict):
+        return []
+
+    tanggal = measurement_date(result, execution)
+    aset_id = execution.aset_id if execution is not None else None
+    measurements = {}
+    for key, value in hasil.items():
+        item = items.get(parse_item_id(key))
+        if item is None:
+            continue
+        if isinstance(value, dict):
+            nilai = value.get('nilai')
+            status = value.get('status') or status_item.get(str(key)) or status_item.get(str(item.pk))
+            remark = value.get('remark')
+        else:
+            nilai, status, remark = value, status_item.get(str(key)) or status_item.get(str(item.pk)), None
+
+        nilai_numeric = parse_numeric(nilai) if item.item_type == 'numeric' else None
+        status = _text(status).upper()
+        measurements[item.pk] = model(
+            result_id=result.pk,
+            execution_id=result.execution_id,
+            item_id=item.pk,
+            aset_id=aset_id,
+            tanggal=tanggal,
+            nilai_numeric=nilai_numeric,
+            nilai_text='' if nilai_numeric is not None else _text(nilai)[:255],
+            status=status if status in STATUSES else '',
+            remark=_text(remark)[:255],
+        )
+    return list(measurements.values())
+
+
+@transaction.atomic
+def sync_result_measurements(result, execution=None):
+    """
+    Tulis ulang ChecklistMeasurement untuk satu ChecklistResult.
+
+    Returns:
+        Jumlah baris yang ditulis
+    """
+    execution = execution or result.execution
+    item_ids = {parse_item_id(key) for key in (result.hasil_pengukuran or {})} - {None}
+    items = ChecklistItem.objects.filter(pk__in=item_ids).only('id', 'item_type')
+    if result.checklist_template_id:
+        items = items.filter(checklist_template_id=result.checklist_template_id)
+
+    measurements = build_measurements(result, execution, {item.pk: item for item in items})
+    # Baris yang itemnya sudah dihapus (item NULL) adalah riwayat - tidak ikut ditulis ulang
+    existing = ChecklistMeasurement.objects.filter(result=result, item__isnull=False)
+    # Cache tren seri lama (termasuk item yang hilang dari JSON) dan baru dibuang setelah commit
+    invalidate_series(
+        list(existing.values_list('aset_id', 'item_id'))
+        + [(measurement.aset_id, measurement.item_id) for measurement in measurements]
+    )
+    existing.delete()
+    ChecklistMeasurement.objects.bulk_create(measurements, batch_size=500)
+    return len(measurements)
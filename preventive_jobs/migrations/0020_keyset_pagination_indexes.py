@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_keyset_pagination_indexes'),
+        ('preventive_jobs', '0019_alter_checklistresult_status_overall'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='preventivejobexecution',
+            index=models.Index(fields=['scheduled_date', 'id'], name='prev_exec_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_existing_late(apps, schema_editor):
+    """Tandai execution Scheduled yang sudah lewat jadwal (selanjutnya oleh status sweeper)"""
+    PreventiveJobExecution = apps.get_model('preventive_jobs', 'PreventiveJobExecution')
+    PreventiveJobExecution.objects.filter(
+        status='Scheduled', is_deleted=False, scheduled_date__lt=timezone.now().date()
+    ).update(is_late=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preventive_jobs', '0020_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preventivejobexecution',
+            name='is_late',
+            field=models.BooleanField(default=False, verbose_name='Terlambat'),
+        ),
+        migrations.AddIndex(
+            model_name='preventivejobexecution',
+            index=models.Index(fields=['status', 'is_late'], name='prev_exec_late_idx'),
+        ),
+        migrations.RunPython(mark_existing_late, migrations.RunPython.noop),
+    ]
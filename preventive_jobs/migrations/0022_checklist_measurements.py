@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_measurements(apps, schema_editor):
+    """Turunkan ChecklistMeasurement dari hasil_pengukuran JSON yang sudah ada (per batch)"""
+    from preventive_jobs.measurements import build_measurements, parse_item_id
+
+    ChecklistResult = apps.get_model('preventive_jobs', 'ChecklistResult')
+    ChecklistItem = apps.get_model('preventive_jobs', 'ChecklistItem')
+    ChecklistMeasurement = apps.get_model('preventive_jobs', 'ChecklistMeasurement')
+
+    results = (
+        ChecklistResult.objects.exclude(hasil_pengukuran={})
+        .select_related('execution').order_by('pk')
+    )
+    last_pk = 0
+    while True:
+        batch = list(results.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        item_ids = {
+            parse_item_id(key)
+            for result in batch if isinstance(result.hasil_pengukuran, dict)
+            for key in result.hasil_pengukuran
+        } - {None}
+        items = {
+            item.pk: item
+            for item in ChecklistItem.objects.filter(pk__in=item_ids).only('id', 'item_type', 'checklist_template_id')
+        }
+        measurements = []
+        for result in batch:
+            result_items = {
+                pk: item for pk, item in items.items()
+                if not result.checklist_template_id or item.checklist_template_id == result.checklist_template_id
+            }
+            measurements.extend(
+                build_measurements(result, result.execution, result_items, model=ChecklistMeasurement)
+            )
+        ChecklistMeasurement.objects.bulk_create(measurements, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_status_sweeper'),
+        ('preventive_jobs', '0021_status_sweeper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChecklistMeasurement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tanggal', models.DateField(help_text='Tanggal aktual execution (atau tanggal pengisian jika belum ada)', verbose_name='Tanggal Pengukuran')),
+                ('nilai_numeric', models.FloatField(blank=True, null=True, verbose_name='Nilai (Angka)')),
+                ('nilai_text', models.CharField(blank=True, default='', max_length=255, verbose_name='Nilai (Teks)')),
+                ('status', models.CharField(blank=True, default='', help_text='OK / NG (kosong jika belum dinilai)', max_length=10, verbose_name='Status')),
+                ('remark', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('aset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='checklist_measurements', to='core.asetmesin', verbose_name='Mesin/Aset')),
+                ('execution', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='checklist_measurements', to='preventive_jobs.preventivejobexecution')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='measurements', to='preventive_jobs.checklistitem')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='measurements', to='preventive_jobs.checklistresult')),
+            ],
+            options={
+                'verbose_name': 'Checklist Measurement',
+                'verbose_name_plural': 'Checklist Measurements',
+                'ordering': ['-tanggal'],
+                'indexes': [models.Index(fields=['item', 'tanggal'], name='measurement_item_date_idx'), models.Index(fields=['aset', 'item', 'tanggal'], name='measurement_aset_item_idx'), models.Index(fields=['aset', 'tanggal'], name='measurement_aset_date_idx'), models.Index(fields=['status', 'item'], name='measurement_status_item_idx')],
+                'constraints': [models.UniqueConstraint(fields=('result', 'item'), name='measurement_result_item_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_measurements, migrations.RunPython.noop),
+    ]
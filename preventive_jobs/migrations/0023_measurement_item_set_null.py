@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('preventive_jobs', '0022_checklist_measurements'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checklistmeasurement',
+            name='item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='measurements', to='preventive_jobs.checklistitem'),
+        ),
+    ]
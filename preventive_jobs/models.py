@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from core.models import AsetMesin
 import json
@@ -519,6 +519,13 @@ class PreventiveJobExecution(models.Model):
         verbose_name="Ada Lampiran"
     )
     
+    # Ditandai core.status_sweeper saat masih Scheduled melewati scheduled_date
+    # (dipakai query overdue supaya tidak perlu menurunkan ulang dari tanggal)
+    is_late = models.BooleanField(
+        default=False,
+        verbose_name="Terlambat"
+    )
+    
     # SOFT DELETE FIELDS
     is_deleted = models.BooleanField(
         default=False,
@@ -554,6 +561,8 @@ class PreventiveJobExecution(models.Model):
             models.Index(fields=['status', 'scheduled_date']),
             models.Index(fields=['assigned_to']),
             models.Index(fields=['template']),
+            models.Index(fields=['scheduled_date', 'id'], name='prev_exec_keyset_idx'),  # Keyset pagination list execution
+            models.Index(fields=['status', 'is_late'], name='prev_exec_late_idx'),  # Overdue (ditandai status sweeper)
         ]
     
     def __str__(self):
@@ -885,35 +894,28 @@ class ChecklistTemplate(models.Model):
         return f"{self.nomor} - {self.nama}"
     
     def save(self, *args, **kwargs):
-        # Auto-generate nomor jika belum ada
-        if not self.nomor:
-            from datetime import datetime
-            year = datetime.now().year
+        # Auto-generate nomor jika belum ada (counter per tahun, aman untuk insert bersamaan)
+        with transaction.atomic():
+            if not self.nomor:
+                from datetime import datetime
+                from core.services.sequences import next_sequence_value
+                year = datetime.now().year
+                prefix = f"CHKL-{year}-"
+                
+                def last_seq():
+                    # Seed dari data lama: sequence tertinggi tahun ini
+                    numbers = [0]
+                    for nomor in ChecklistTemplate.objects.filter(nomor__startswith=prefix).values_list('nomor', flat=True):
+                        try:
+                            numbers.append(int(nomor.split('-')[-1]))
+                        except (ValueError, IndexError):
+                            continue
+                    return max(numbers)
+                
+                next_seq = next_sequence_value(f'preventive_jobs.checklist_template.nomor:{year}', seed=last_seq)
+                self.nomor = f"{prefix}{next_seq:03d}"
             
-            # Find the highest sequence number for this year
-            latest = ChecklistTemplate.objects.filter(
-                nomor__startswith=f"CHKL-{year}-"
-            ).order_by('nomor').last()
-            
-            if latest and latest.nomor:
-                try:
-                    # Extract sequence number from existing nomor
-                    seq = int(latest.nomor.split('-')[-1])
-                    next_seq = seq + 1
-                except (ValueError, IndexError):
-                    next_seq = 1
-            else:
-                next_seq = 1
-            
-            # Generate unique nomor
-            self.nomor = f"CHKL-{year}-{next_seq:03d}"
-            
-            # Double-check for uniqueness (race condition prevention)
-            while ChecklistTemplate.objects.filter(nomor=self.nomor).exists():
-                next_seq += 1
-                self.nomor = f"CHKL-{year}-{next_seq:03d}"
-        
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
 
 # ==============================================================================
@@ -1172,6 +1174,106 @@ class ChecklistResult(models.Model):
         return f"Checklist Result - {self.execution} ({self.status_overall})"
 
 
+# ==============================================================================
+# 7b. MODEL CHECKLIST MEASUREMENT (HASIL PENGUKURAN TERNORMALISASI)
+# ==============================================================================
+class ChecklistMeasurement(models.Model):
+    """
+    Satu baris per item per hasil checklist, diturunkan dari ChecklistResult.hasil_pengukuran.
+    
+    JSON tetap menjadi sumber data form; tabel ini untuk query tren / analitik
+    (pengukuran item X di mesin Y dalam rentang tanggal, item yang paling sering NG)
+    tanpa mem-parse JSON di Python.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    result = models.ForeignKey(
+        ChecklistResult,
+        on_delete=models.CASCADE,
+        related_name='measurements'
+    )
+    
+    execution = models.ForeignKey(
+        PreventiveJobExecution,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='checklist_measurements'
+    )
+    
+    # SET_NULL: item yang dihapus dari template (misal lewat import) tidak ikut
+    # menghapus riwayat pengukurannya
+    item = models.ForeignKey(
+        ChecklistItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='measurements'
+    )
+    
+    aset = models.ForeignKey(
+        AsetMesin,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='checklist_measurements',
+        verbose_name="Mesin/Aset"
+    )
+    
+    tanggal = models.DateField(
+        verbose_name="Tanggal Pengukuran",
+        help_text="Tanggal aktual execution (atau tanggal pengisian jika belum ada)"
+    )
+    
+    nilai_numeric = models.FloatField(
+        blank=True,
+        null=True,
+        verbose_name="Nilai (Angka)"
+    )
+    
+    nilai_text = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name="Nilai (Teks)"
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        blank=True,
+        default='',
+        verbose_name="Status",
+        help_text="OK / NG (kosong jika belum dinilai)"
+    )
+    
+    remark = models.CharField(
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Checklist Measurement"
+        verbose_name_plural = "Checklist Measurements"
+        ordering = ['-tanggal']
+        constraints = [
+            models.UniqueConstraint(fields=['result', 'item'], name='measurement_result_item_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['item', 'tanggal'], name='measurement_item_date_idx'),
+            models.Index(fields=['aset', 'item', 'tanggal'], name='measurement_aset_item_idx'),
+            models.Index(fields=['aset', 'tanggal'], name='measurement_aset_date_idx'),
+            models.Index(fields=['status', 'item'], name='measurement_status_item_idx'),
+        ]
+    
+    def __str__(self):
+        nilai = self.nilai_numeric if self.nilai_numeric is not None else self.nilai_text
+        return f"{self.item_id} @ {self.tanggal}: {nilai} ({self.status or '-'})"
+
+
 # ==============================================================================
 # MODEL UNTUK MANAGE KONTAK WHATSAPP
 # ==============================================================================
@@ -0,0 +1,29 @@
+"""
+Signals untuk preventive_jobs app
+"""
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from core.whatsapp_outbox import whatsapp_delivery_status
+from .measurement_trends import invalidate_series
+from .models import ChecklistResult, ChecklistShareLog
+
+
+@receiver(whatsapp_delivery_status)
+def update_share_log_delivery_status(sender, outbox, status, **kwargs):
+    """
+    Sinkronkan status_pengiriman ChecklistShareLog dengan hasil WhatsApp outbox.
+    Pesan share checklist di-enqueue dengan ref=('preventive_jobs.ChecklistShareLog', id).
+    """
+    if outbox.ref_model != 'preventive_jobs.ChecklistShareLog' or not outbox.ref_id:
+        return
+
+    ChecklistShareLog.objects.filter(pk=outbox.ref_id).update(
+        status_pengiriman='sent' if status == outbox.STATUS_SENT else 'failed',
+        error_message='' if status == outbox.STATUS_SENT else outbox.last_error,
+    )
+
+
+@receiver(pre_delete, sender=ChecklistResult)
+def invalidate_measurement_trends(sender, instance, **kwargs):
+    """Measurement ikut terhapus (CASCADE) - buang cache tren seri yang terdampak"""
+    invalidate_series(instance.measurements.values_list('aset_id', 'item_id'))
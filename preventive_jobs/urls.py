@@ -49,6 +49,7 @@ urlpatterns = [
     path('checklist/items-api/save/', views.checklist_items_save_api, name='checklist_items_save_api'),
     path('checklist/<int:pk>/download-template/', views.checklist_template_download_excel, name='checklist_download_template'),
     path('checklist/items-api/import/', views.checklist_items_import_excel, name='checklist_items_import'),
+    path('measurements/trend/<int:aset_id>/<int:item_id>/', views.measurement_trend_api, name='measurement_trend_api'),
     
     # EXECUTION TRACKING
     path('execution/', views.preventive_execution_list_view, name='execution_list'),
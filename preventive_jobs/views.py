@@ -27,7 +27,10 @@ from .forms import (
     PreventiveJobAttachmentForm,
     PreventiveJobAttachmentFormSet,
 )
-from core.models import AsetMesin, CustomUser, Job
+from .measurements import sync_result_measurements
+from core.models import AsetMesin, CustomUser, Job, WhatsAppOutbox
+from core.pagination import KeysetPaginator
+from core.whatsapp_outbox import enqueue_whatsapp
 from core.export_handlers import send_to_google_apps_script, prepare_unified_job_data_for_export
 
 logger = logging.getLogger(__name__)
@@ -74,7 +77,7 @@ def preventive_index_view(request):
     completed_jobs = executions_this_month.filter(status='Done').count()
     overdue_jobs = executions_this_month.filter(
         status='Scheduled',
-        scheduled_date__lt=today
+        is_late=True
     ).count()
     
     compliance_rate = (completed_jobs / total_jobs * 100) if total_jobs > 0 else 0
@@ -183,7 +186,7 @@ def preventive_dashboard_view(request):
     done_jobs = executions_query.filter(status='Done').count()
     late_jobs = executions_query.filter(
         status='Scheduled',
-        scheduled_date__lt=today
+        is_late=True
     ).count()
     
     compliance_rate = (done_jobs / total_jobs * 100) if total_jobs > 0 else 0
@@ -729,10 +732,20 @@ def preventive_execution_list_view(request):
     ).order_by(sort_param)
     
     # === PAGINATION ===
-    from django.core.paginator import Paginator
-    paginator = Paginator(executions, 20)
-    page_number = request.GET.get('page')
-    executions_page = paginator.get_page(page_number)
+    # Sort jadwal (default): keyset pagination di (scheduled_date, id) -> tanpa COUNT
+    # penuh & OFFSET scan, biaya per halaman konstan. Sort kolom lain: offset biasa.
+    if sort_param in ('scheduled_date', '-scheduled_date'):
+        id_order = '-id' if sort_param.startswith('-') else 'id'
+        paginator = KeysetPaginator(executions, (sort_param, id_order), 20)
+        executions_page = paginator.get_page(request.GET.get('cursor'))
+    else:
+        from django.core.paginator import Paginator
+        paginator = Paginator(executions, 20)
+        page_number = request.GET.get('page')
+        executions_page = paginator.get_page(page_number)
+    cursor_params = request.GET.copy()
+    cursor_params.pop('cursor', None)
+    cursor_params.pop('page', None)
     
     # === MONTH LIST FOR FILTER ===
     month_choices = [
@@ -765,6 +778,7 @@ def preventive_execution_list_view(request):
     
     context = {
         'executions': executions_page,
+        'cursor_query': cursor_params.urlencode(),
         'search_query': search_query,
         'selected_status': selected_status,
         'selected_month': selected_month,
@@ -1156,7 +1170,7 @@ def preventive_compliance_report_view(request):
     today = timezone.now().date()
     overdue_jobs = executions.filter(
         status='Scheduled',
-        scheduled_date__lt=today
+        is_late=True
     )
     if overdue_jobs.exists():
         avg_overdue_days = sum([
@@ -1904,6 +1918,9 @@ def save_checklist_result_view(request, execution_id):
         execution.status = 'Done'
         execution.save(update_fields=['status', 'updated_at'])
         
+        # Tulis ulang hasil pengukuran ternormalisasi (untuk query tren per item / mesin)
+        sync_result_measurements(checklist_result, execution)
+        
         return JsonResponse({
             'success': True,
             'message': 'Checklist result saved successfully',
@@ -2301,116 +2318,88 @@ def checklist_template_download_excel(request, pk):
 @require_http_methods(['POST'])
 def checklist_items_import_excel(request):
     """
-    Import items dari Excel file
+    Import items dari Excel / CSV (lihat preventive_jobs/checklist_import.py).
+    
+    Item yang cocok (teks / no urut) mempertahankan ID-nya, sehingga ChecklistResult lama
+    tetap terhubung. POST dry_run=1 hanya mengembalikan preview tambah / ubah / hapus.
     """
-    from .models import ChecklistTemplate, ChecklistItem
+    from .models import ChecklistTemplate
+    from .checklist_import import import_checklist_items
+    
+    template_id = request.POST.get('template_id')
+    excel_file = request.FILES.get('file')
+    if not template_id or not excel_file:
+        return JsonResponse({'success': False, 'message': 'Template ID dan file wajib diisi'}, status=400)
+    
+    template = get_object_or_404(ChecklistTemplate, pk=template_id)
+    dry_run = request.POST.get('dry_run') in ('1', 'true', 'on')
     
     try:
-        template_id = request.POST.get('template_id')
-        excel_file = request.FILES.get('file')
-        
-        if not template_id or not excel_file:
-            return JsonResponse({'success': False, 'message': 'Template ID dan file wajib diisi'}, status=400)
-        
-        template = get_object_or_404(ChecklistTemplate, pk=template_id)
-        
-        # Read Excel file
-        try:
-            from openpyxl import load_workbook
-            from io import BytesIO
-            
-            # Load workbook
-            wb = load_workbook(BytesIO(excel_file.read()))
-            ws = wb.active
-            
-            # Skip header row
-            items_to_create = []
-            for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=1):
-                if not row or not row[2]:  # Skip if no Item Pemeriksaan (now column 3, was column 2)
-                    continue
-                
-                # Determine item_type from column B (column index 1)
-                item_type = str(row[1] or 'numeric').lower().strip() if row[1] else 'numeric'
-                if item_type not in ['numeric', 'text']:
-                    item_type = 'numeric'  # Default if invalid
-                
-                items_to_create.append({
-                    'no_urut': row_idx,
-                    'item_type': item_type,
-                    'item_pemeriksaan': str(row[2] or ''),
-                    'standar_normal': str(row[3] or ''),
-                    'unit': str(row[4] or '') if row[4] else None,
-                    'nilai_min': float(row[5]) if row[5] and str(row[5]).strip() else None,
-                    'nilai_max': float(row[6]) if row[6] and str(row[6]).strip() else None,
-                    'text_options': str(row[7] or '') if row[7] else '',
-                    'tindakan_remark': str(row[8] or '') if row[8] else None,
-                })
-            
-            # Delete existing items
-            template.items.all().delete()
-            
-            # Create new items
-            for item_data in items_to_create:
-                ChecklistItem.objects.create(
-                    checklist_template=template,
-                    **item_data
-                )
-            
-            return JsonResponse({
-                'success': True,
-                'message': f'{len(items_to_create)} items berhasil diimport dari Excel'
-            })
-        
-        except ImportError:
-            # Fallback to CSV reading
-            import csv
-            from io import TextIOWrapper
-            
-            items_to_create = []
-            csv_file = TextIOWrapper(excel_file, encoding='utf-8')
-            reader = csv.reader(csv_file)
-            next(reader)  # Skip header
-            
-            for row_idx, row in enumerate(reader, start=1):
-                if not row or len(row) < 3 or not row[2]:  # Check column 3 (Item Pemeriksaan)
-                    continue
-                
-                # Determine item_type from column B (index 1)
-                item_type = str(row[1] or 'numeric').lower().strip() if len(row) > 1 and row[1] else 'numeric'
-                if item_type not in ['numeric', 'text']:
-                    item_type = 'numeric'
-                
-                items_to_create.append({
-                    'no_urut': row_idx,
-                    'item_type': item_type,
-                    'item_pemeriksaan': str(row[2] or ''),
-                    'standar_normal': str(row[3] or '') if len(row) > 3 else '',
-                    'unit': str(row[4] or '') if len(row) > 4 and row[4] else None,
-                    'nilai_min': float(row[5]) if len(row) > 5 and row[5] and str(row[5]).strip() else None,
-                    'nilai_max': float(row[6]) if len(row) > 6 and row[6] and str(row[6]).strip() else None,
-                    'text_options': str(row[7] or '') if len(row) > 7 and row[7] else '',
-                    'tindakan_remark': str(row[8] or '') if len(row) > 8 and row[8] else None,
-                })
-            
-            # Delete existing items
-            template.items.all().delete()
-            
-            # Create new items
-            for item_data in items_to_create:
-                ChecklistItem.objects.create(
-                    checklist_template=template,
-                    **item_data
-                )
-            
-            return JsonResponse({
-                'success': True,
-                'message': f'{len(items_to_create)} items berhasil diimport dari CSV'
-            })
-        
+        result = import_checklist_items(template, excel_file, dry_run=dry_run)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+        logger.warning(f"[Checklist Import] Gagal import template {template_id}: {e}")
+        return JsonResponse({'success': False, 'message': f'Error membaca file: {e}'}, status=400)
+    
+    if not result['success']:
+        errors = result['errors']
+        detail = '; '.join(f"Baris {error['row']}: {error['error']}" for error in errors[:5])
+        result['message'] = f"{len(errors)} baris tidak valid, tidak ada yang disimpan. {detail}"
+        return JsonResponse(result, status=400)
+    
+    summary = result['preview']
+    counts = (
+        f"{len(summary['added'])} ditambah, {len(summary['updated'])} diubah, "
+        f"{len(summary['removed'])} dihapus, {summary['unchanged']} tetap"
+    )
+    if dry_run:
+        result['message'] = f'Preview import: {counts}'
+    else:
+        result['message'] = f'{result["total"]} items berhasil diimport ({counts})'
+    return JsonResponse(result)
+
+
+@login_required(login_url='core:login')
+@require_http_methods(['GET'])
+def measurement_trend_api(request, aset_id, item_id):
+    """
+    Tren hasil pengukuran satu item checklist di satu mesin (lihat preventive_jobs/measurement_trends.py).
+    
+    GET params:
+        - start, end: YYYY-MM-DD (default 365 hari terakhir s/d hari ini)
+        - points: jumlah titik maksimal (default 200)
+        - mode: bucket (min/max/avg per bucket) / lttb (titik asli terpilih)
+    """
+    from .models import ChecklistItem
+    from . import measurement_trends as trends
+    
+    aset = get_object_or_404(AsetMesin.objects.only('id', 'nama'), pk=aset_id)
+    item = get_object_or_404(
+        ChecklistItem.objects.only('id', 'item_pemeriksaan', 'unit', 'nilai_min', 'nilai_max'), pk=item_id
+    )
+    
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=365)
+        points = int(request.GET.get('points') or trends.DEFAULT_POINTS)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Format start / end / points tidak valid'}, status=400)
+    if start > end:
+        return JsonResponse({'success': False, 'message': 'start harus sebelum end'}, status=400)
+    
+    mode = request.GET.get('mode') or 'bucket'
+    if mode not in trends.MODES:
+        return JsonResponse({'success': False, 'message': f"mode harus salah satu dari {', '.join(trends.MODES)}"}, status=400)
+    points = min(max(points, trends.MIN_POINTS), trends.MAX_POINTS)
+    
+    trend = trends.get_trend(aset.pk, item, start, end, mode=mode, points=points)
+    return JsonResponse({
+        'success': True,
+        'aset': {'id': aset.pk, 'nama': aset.nama},
+        'item': {'id': item.pk, 'item_pemeriksaan': item.item_pemeriksaan, 'unit': item.unit or ''},
+        'range': {'start': start.isoformat(), 'end': end.isoformat()},
+        'points': points,
+        **trend,
+    })
 
 
 # ==============================================================================
@@ -2578,7 +2567,8 @@ def export_unified_jobs_to_gas(request, export_type=None):
                     ("preventif" atau "evaluasi")
     """
     import json
-    from core.export_handlers import prepare_unified_job_data_for_export, send_to_google_apps_script
+    from django.urls import reverse
+    from core.export_handlers import EXPORT_KIND_UNIFIED, start_export
     
     try:
         body = json.loads(request.body)
@@ -2594,18 +2584,16 @@ def export_unified_jobs_to_gas(request, export_type=None):
                 'message': 'Invalid parameters'
             }, status=400)
         
-        # === PREPARE DATA DENGAN HANDLER BARU (SAME FORMAT SEBAGAI EXPORT JOBS) ===
-        payload = prepare_unified_job_data_for_export(job_ids_str, export_type)
-        if not payload:
-            return JsonResponse({
-                'status': 'error',
-                'message': 'No valid jobs to export'
-            }, status=400)
-        
-        # === SEND TO GOOGLE APPS SCRIPT (SAMA DENGAN EXPORT JOBS) ===
-        result = send_to_google_apps_script(payload, export_type)
-        
-        return JsonResponse(result)
+        # === EXPORT DI BACKGROUND (Celery) - FRONTEND POLL status_url ===
+        export_id = start_export(
+            EXPORT_KIND_UNIFIED, [str(job_id) for job_id in job_ids_str], export_type,
+            request.user, force=bool(body.get('force'))
+        )
+        return JsonResponse({
+            'status': 'queued',
+            'export_id': export_id,
+            'status_url': reverse('core:export_status', args=[export_id]),
+        }, status=202)
     
     except json.JSONDecodeError:
         return JsonResponse({
@@ -3060,33 +3048,24 @@ def generate_share_link(request, execution_id):
                     status_pengiriman='pending'
                 )
                 
-                # Send via API if requested and enabled
+                # Send via API if requested and enabled - masuk WhatsApp outbox,
+                # status_pengiriman di-update worker lewat signal whatsapp_delivery_status
                 if send_via_api and fontte:
-                    api_result = fontte.send_message(nomor_wa, message)
-                    
-                    if api_result['success']:
-                        share_log.status_pengiriman = 'sent'
-                        share_log.save()
-                        
-                        results.append({
-                            'nama': nama,
-                            'nomor_wa': nomor_wa,
-                            'success': True,
-                            'share_url': share_url,
-                            'message': '✓ Pesan berhasil dikirim ke WhatsApp'
-                        })
-                    else:
-                        share_log.status_pengiriman = 'failed'
-                        share_log.error_message = api_result.get('error', 'Unknown error')
-                        share_log.save()
-                        
-                        results.append({
-                            'nama': nama,
-                            'nomor_wa': nomor_wa,
-                            'success': False,
-                            'share_url': share_url,
-                            'message': f'✗ Gagal kirim: {api_result.get("message", "Unknown error")}'
-                        })
+                    enqueue_whatsapp(
+                        nomor_wa,
+                        message,
+                        provider=WhatsAppOutbox.PROVIDER_WA_API,
+                        idempotency_key=f'checklist-share:{share_log.id}',
+                        ref=('preventive_jobs.ChecklistShareLog', share_log.id),
+                    )
+
+                    results.append({
+                        'nama': nama,
+                        'nomor_wa': nomor_wa,
+                        'success': True,
+                        'share_url': share_url,
+                        'message': '✓ Pesan masuk antrian pengiriman WhatsApp'
+                    })
                 else:
                     # Just generate link, don't send via API (or API disabled)
                     wa_share_link = f"https://wa.me/{fontte._normalize_phone(nomor_wa) if fontte else nomor_wa.replace(' ', '')}?text={requests.utils.quote(message)}"
@@ -3344,6 +3323,9 @@ def save_checklist_via_token(request):
             execution.actual_date = timezone.now().date()
             execution.save()
         
+        # Setelah actual_date diset supaya tanggal pengukuran ikut tanggal pelaksanaan
+        sync_result_measurements(checklist_result, execution)
+        
         return JsonResponse({
             'success': True,
             'message': '✓ Checklist berhasil disimpan! Terima kasih.',
@@ -3,6 +3,7 @@ Utilities untuk WhatsApp Integration via Fontte API atau Custom WABot API
 """
 
 import requests
+import hashlib
 import logging
 from django.conf import settings
 from django.core import signing
@@ -11,6 +12,8 @@ from django.utils import timezone
 from datetime import timedelta
 import json
 
+from core.services.http_client import http_get, http_post
+
 logger = logging.getLogger(__name__)
 
 
@@ -94,14 +97,15 @@ class WhatsAppAPI:
                 "message": message,
             }
             
-            response = requests.post(url, json=payload, headers=self.headers, timeout=30)
+            response = http_post('wabot', url, json=payload, headers=self.headers, timeout=30)
             
             if response.status_code in [200, 201]:
                 logger.info(f"✓ Pesan WA berhasil dikirim ke {phone} via WABot")
                 return {
                     'success': True,
                     'data': response.json() if response.text else {},
-                    'message': 'Pesan berhasil dikirim'
+                    'message': 'Pesan berhasil dikirim',
+                    'status_code': response.status_code
                 }
             else:
                 error_msg = response.text
@@ -109,7 +113,8 @@ class WhatsAppAPI:
                 return {
                     'success': False,
                     'error': error_msg,
-                    'message': f'Gagal kirim pesan: {response.status_code}'
+                    'message': f'Gagal kirim pesan: {response.status_code}',
+                    'status_code': response.status_code
                 }
         
         except Exception as e:
@@ -131,14 +136,15 @@ class WhatsAppAPI:
                 "secret": False,
             }
             
-            response = requests.post(url, json=payload, headers=self.headers, timeout=30)
+            response = http_post('fonnte', url, json=payload, headers=self.headers, timeout=30)
             
             if response.status_code in [200, 201]:
                 logger.info(f"✓ Pesan WA berhasil dikirim ke {phone} via Fontte")
                 return {
                     'success': True,
                     'data': response.json(),
-                    'message': 'Pesan berhasil dikirim'
+                    'message': 'Pesan berhasil dikirim',
+                    'status_code': response.status_code
                 }
             else:
                 error_msg = response.text
@@ -146,7 +152,8 @@ class WhatsAppAPI:
                 return {
                     'success': False,
                     'error': error_msg,
-                    'message': f'Gagal kirim pesan: {response.status_code}'
+                    'message': f'Gagal kirim pesan: {response.status_code}',
+                    'status_code': response.status_code
                 }
         
         except Exception as e:
@@ -180,7 +187,7 @@ class WhatsAppAPI:
             else:
                 # Fontte has test endpoint
                 url = f"{self.base_url}/auth/test"
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = http_get('fonnte', url, headers=self.headers, timeout=10, retries=0)
                 return response.status_code == 200
         except:
             return False
@@ -328,7 +335,8 @@ def shorten_url(long_url):
         import urllib.parse
         # TinyURL API: https://tinyurl.com/api-create.php?url=...
         tinyurl_api = f"https://tinyurl.com/api-create.php?url={urllib.parse.quote(long_url)}"
-        response = requests.get(tinyurl_api, timeout=5)
+        # Retry cepat 1x; circuit breaker membuat share tetap jalan (URL asli) saat TinyURL down
+        response = http_get('tinyurl', tinyurl_api, endpoint='/api-create.php', timeout=5, retries=1)
         
         if response.status_code == 200:
             short_url = response.text.strip()
@@ -410,15 +418,24 @@ Status: {checklist_result.status_overall}
 Terima kasih! ✅
 """
         
-        # Kirim ke PIC jika punya nomor WA
+        # Kirim ke PIC jika punya nomor WA (via outbox, tidak menahan request pengisi checklist)
         if pic.nomor_telepon:
-            fontte = FontteAPI()
-            result = fontte.send_message(pic.nomor_telepon, message)
-            
-            if result['success']:
-                logger.info(f"Notifikasi berhasil dikirim ke PIC {pic.username}")
-            else:
-                logger.error(f"Gagal kirim notifikasi ke PIC: {result.get('error')}")
+            from core.models import WhatsAppOutbox
+            from core.whatsapp_outbox import enqueue_whatsapp
+
+            # Key per pengisian (checklist yang diisi ulang = notifikasi baru), bukan per result;
+            # retry untuk pengisian yang sama tetap tidak membuat pesan kedua
+            submission = int(checklist_result.tanggal_pengisian.timestamp() * 1000)
+            digest = hashlib.sha1(message.encode('utf-8')).hexdigest()[:12]
+            outbox, created = enqueue_whatsapp(
+                pic.nomor_telepon,
+                message,
+                provider=WhatsAppOutbox.PROVIDER_WA_API,
+                idempotency_key=f'checklist-filled:{checklist_result.id}:{submission}:{digest}',
+                ref=('preventive_jobs.ChecklistResult', checklist_result.id),
+            )
+            if created:
+                logger.info(f"Notifikasi ke PIC {pic.username} masuk antrian (outbox #{outbox.id})")
         else:
             logger.info(f"PIC {pic.username} tidak punya nomor WA")
     
@@ -1,6 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
-from .models import Tool, Peminjaman, DetailPeminjaman, Pengembalian, DetailPengembalian
+from . import ledger
+from .models import Tool, Peminjaman, DetailPeminjaman, Pengembalian, DetailPengembalian, ToolMovement
 
 
 # ============================================================
@@ -8,13 +13,17 @@ from .models import Tool, Peminjaman, DetailPeminjaman, Pengembalian, DetailPeng
 # ============================================================
 @admin.register(Tool)
 class ToolAdmin(admin.ModelAdmin):
-    list_display = ['nama', 'jumlah_total', 'get_jumlah_tersedia', 'spesifikasi']
+    list_display = ['nama', 'jumlah_total', 'qty_dipinjam', 'get_jumlah_tersedia', 'spesifikasi']
     search_fields = ['nama', 'spesifikasi']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'qty_dipinjam', 'qty_tersedia', 'created_at', 'updated_at']
+    actions = ['rebuild_saldo']
     fieldsets = (
         ('Informasi Alat', {
             'fields': ('id', 'nama', 'spesifikasi', 'jumlah_total')
         }),
+        ('Saldo', {
+            'fields': ('qty_dipinjam', 'qty_tersedia')
+        }),
         ('Timestamp', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -31,13 +40,65 @@ class ToolAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: green;">{}</span>', tersedia)
     get_jumlah_tersedia.short_description = 'Tersedia'
+    
+    @admin.action(description='Rekalkulasi saldo dari data peminjaman & pengembalian')
+    def rebuild_saldo(self, request, queryset):
+        from .ledger import rebuild_balances
+        corrected = rebuild_balances(tool_ids=list(queryset.values_list('pk', flat=True)), user=request.user)
+        messages.success(request, f'{corrected} tool dikoreksi')
 
 
 # ============================================================
 # DETAIL PEMINJAMAN INLINE
 # ============================================================
+class DetailPeminjamanAdminFormSet(BaseInlineFormSet):
+    """
+    Validasi perubahan detail terhadap saldo ledger sebelum disimpan
+    (ledger.adjust_borrow di save_related tetap menjadi guard terakhir).
+    """
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+
+        before = ledger.outstanding_by_tool(self.instance)
+        after = {}
+        for form in self.forms:
+            if not form.cleaned_data:
+                continue
+            qty_kembali = form.instance.qty_kembali if form.instance.pk else 0
+            if form.cleaned_data.get('DELETE'):
+                if qty_kembali:
+                    raise ValidationError(
+                        f'"{form.instance.tool.nama}" sudah dikembalikan {qty_kembali} unit dan tidak bisa dihapus'
+                    )
+                continue
+            tool = form.cleaned_data.get('tool')
+            qty_pinjam = form.cleaned_data.get('qty_pinjam') or 0
+            if tool is None:
+                continue
+            if qty_pinjam < qty_kembali:
+                form.add_error('qty_pinjam', f'Sudah dikembalikan {qty_kembali} unit')
+                continue
+            after[tool] = after.get(tool, 0) + qty_pinjam - qty_kembali
+
+        # Peminjaman selesai tidak memegang stok
+        if self.instance.status not in ledger.ACTIVE_STATUSES:
+            return
+        for tool, qty in after.items():
+            delta = qty - before.get(tool.pk, 0)
+            if delta > 0:
+                tersedia = Tool.objects.values_list('qty_tersedia', flat=True).get(pk=tool.pk)
+                if delta > tersedia:
+                    raise ValidationError(
+                        f'Stok "{tool.nama}" tidak mencukupi. Diminta: {delta}, Tersedia: {tersedia}'
+                    )
+
+
 class DetailPeminjamanInline(admin.TabularInline):
     model = DetailPeminjaman
+    formset = DetailPeminjamanAdminFormSet
     extra = 1
     fields = ['tool', 'qty_pinjam', 'kondisi_pinjam']
     readonly_fields = ['id']
@@ -83,6 +144,31 @@ class PeminjamanAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: orange;">Belum Lengkap</span>')
     get_is_complete.short_description = 'Status Pengembalian'
+    
+    # Semua perubahan detail / status lewat ledger supaya saldo Tool tidak drift
+    def save_model(self, request, obj, form, change):
+        # Saldo sebelum edit, dibaca (dan dikunci) sebelum status baru tersimpan
+        obj._ledger_before = ledger.outstanding_by_tool(obj, lock=True)
+        super().save_model(request, obj, form, change)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        obj = form.instance
+        if not change and obj.status in ledger.ACTIVE_STATUSES:
+            ledger.record_borrow(list(obj.detail_peminjaman.all()), user=request.user)
+        else:
+            ledger.adjust_borrow(obj, getattr(obj, '_ledger_before', {}), user=request.user)
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            ledger.release_borrow(obj, user=request.user)
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for obj in queryset:
+                ledger.release_borrow(obj, user=request.user)
+            super().delete_queryset(request, queryset)
 
 
 # ============================================================
@@ -95,6 +181,24 @@ class DetailPeminjamanAdmin(admin.ModelAdmin):
     search_fields = ['peminjaman__peminjam__nama', 'tool__nama']
     readonly_fields = ['id', 'qty_kembali', 'qty_belum_kembali']
     
+    # Tambah / edit lewat PeminjamanAdmin supaya saldo ledger ikut disesuaikan
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, DetailPeminjaman.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            peminjaman_list = list(Peminjaman.objects.filter(pk__in=queryset.values('peminjaman_id')))
+            before = {p.pk: ledger.outstanding_by_tool(p, lock=True) for p in peminjaman_list}
+            super().delete_queryset(request, queryset)
+            for peminjaman in peminjaman_list:
+                ledger.adjust_borrow(peminjaman, before[peminjaman.pk], user=request.user)
+    
     def get_qty_kembali(self, obj):
         return obj.qty_kembali
     get_qty_kembali.short_description = 'Qty Kembali'
@@ -111,8 +215,42 @@ class DetailPeminjamanAdmin(admin.ModelAdmin):
 # ============================================================
 # DETAIL PENGEMBALIAN INLINE
 # ============================================================
+class DetailPengembalianAdminFormSet(BaseInlineFormSet):
+    """Qty kembali per alat tidak boleh melebihi qty pinjam (dikurangi pengembalian lain)"""
+
+    def clean(self):
+        super().clean()
+        peminjaman = self.instance.peminjaman if self.instance.peminjaman_id else None
+        if any(self.errors) or peminjaman is None:
+            return
+
+        qty_pinjam = dict(
+            DetailPeminjaman.objects.filter(peminjaman=peminjaman)
+            .values('tool_id').annotate(total=Sum('qty_pinjam')).values_list('tool_id', 'total')
+        )
+        returned = dict(
+            DetailPengembalian.objects.filter(pengembalian__peminjaman=peminjaman)
+            .exclude(pengembalian_id=self.instance.pk)
+            .values('tool_id').annotate(total=Sum('qty_kembali')).values_list('tool_id', 'total')
+        )
+        for form in self.forms:
+            tool = form.cleaned_data.get('tool') if form.cleaned_data else None
+            if tool is None or form.cleaned_data.get('DELETE'):
+                continue
+            if tool.pk not in qty_pinjam:
+                form.add_error('tool', f'"{tool.nama}" tidak termasuk dalam peminjaman ini')
+                continue
+            returned[tool.pk] = returned.get(tool.pk, 0) + (form.cleaned_data.get('qty_kembali') or 0)
+            if returned[tool.pk] > qty_pinjam[tool.pk]:
+                form.add_error(
+                    'qty_kembali',
+                    f'Total kembali "{tool.nama}" ({returned[tool.pk]}) melebihi qty pinjam ({qty_pinjam[tool.pk]})'
+                )
+
+
 class DetailPengembalianInline(admin.TabularInline):
     model = DetailPengembalian
+    formset = DetailPengembalianAdminFormSet
     extra = 1
     fields = ['tool', 'qty_kembali', 'kondisi_kembali']
     readonly_fields = ['id']
@@ -137,6 +275,41 @@ class PengembalianAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    # Pengembalian yang diubah di admin bisa menyentuh detail mana saja -
+    # qty_kembali & saldo alat yang terlibat dihitung ulang lewat ledger
+    @staticmethod
+    def _tool_ids(pengembalian_ids):
+        return set(
+            DetailPengembalian.objects.filter(pengembalian_id__in=pengembalian_ids)
+            .values_list('tool_id', flat=True)
+        )
+    
+    def save_model(self, request, obj, form, change):
+        obj._ledger_tool_ids = self._tool_ids([obj.pk]) if change else set()
+        super().save_model(request, obj, form, change)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        obj = form.instance
+        if not change:
+            ledger.record_returns(obj.peminjaman, list(obj.detail_pengembalian.select_related('tool')), user=request.user)
+            return
+        tool_ids = getattr(obj, '_ledger_tool_ids', set()) | self._tool_ids([obj.pk])
+        if tool_ids:
+            ledger.rebuild_balances(tool_ids=tool_ids, user=request.user)
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            tool_ids = self._tool_ids([obj.pk])
+            super().delete_model(request, obj)
+            ledger.rebuild_balances(tool_ids=tool_ids, user=request.user)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            tool_ids = self._tool_ids(list(queryset.values_list('pk', flat=True)))
+            super().delete_queryset(request, queryset)
+            ledger.rebuild_balances(tool_ids=tool_ids, user=request.user)
 
 
 # ============================================================
@@ -148,3 +321,40 @@ class DetailPengembalianAdmin(admin.ModelAdmin):
     list_filter = ['pengembalian', 'tool', 'kondisi_kembali']
     search_fields = ['pengembalian__peminjaman__peminjam__nama', 'tool__nama']
     readonly_fields = ['id']
+    
+    # Tambah / edit lewat PengembalianAdmin supaya saldo ledger ikut dihitung ulang
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, DetailPengembalian.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            tool_ids = set(queryset.values_list('tool_id', flat=True))
+            super().delete_queryset(request, queryset)
+            ledger.rebuild_balances(tool_ids=tool_ids, user=request.user)
+
+
+# ============================================================
+# TOOL MOVEMENT ADMIN (ledger, read-only)
+# ============================================================
+@admin.register(ToolMovement)
+class ToolMovementAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'tool', 'jenis', 'qty', 'peminjaman', 'keterangan', 'created_by']
+    list_filter = ['jenis', 'created_at']
+    search_fields = ['tool__nama', 'peminjaman__peminjam__nama_lengkap', 'keterangan']
+    list_select_related = ['tool', 'peminjaman__peminjam', 'created_by']
+    raw_id_fields = ['tool', 'peminjaman', 'detail_peminjaman', 'detail_pengembalian', 'created_by']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -37,6 +37,12 @@ class ToolImportForm(forms.Form):
             'accept': '.xlsx,.xls',
         })
     )
+    update_existing = forms.BooleanField(
+        label='Update jumlah alat yang sudah ada',
+        help_text='Jika dicentang, alat dengan nama yang sudah ada di-update jumlahnya (bukan dianggap error)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
 
 
 class DetailPeminjamanForm(forms.ModelForm):
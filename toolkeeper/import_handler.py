@@ -0,0 +1,112 @@
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from core.excel_import import ChunkedExcelImporter, RowError
+from .models import Tool
+
+
+class ToolImporter(ChunkedExcelImporter):
+    """
+    Import Tool dari Excel (kolom A: Nama Alat, B: Spesifikasi, C: Jumlah; baris 1 header).
+    
+    Streaming read_only + bulk_create per chunk (lihat core/excel_import.py). Duplikat dicek
+    dengan satu query `nama__in` per chunk; duplikat di dalam file sendiri ditolak saat
+    validasi baris.
+    
+    update_existing=True (upsert): alat yang sudah ada di-update jumlah_total-nya
+    (saldo qty_tersedia ikut disesuaikan), bukan dilaporkan sebagai error.
+    """
+    
+    POSITIONAL_COLUMNS = ['Nama Alat', 'Spesifikasi', 'Jumlah']
+    
+    def __init__(self, file_path, chunk_size=None, user=None, update_existing=False):
+        super().__init__(file_path, chunk_size=chunk_size, user=user)
+        self.update_existing = update_existing
+        self.created_count = 0
+        self.updated_count = 0
+    
+    def prepare(self):
+        self.seen_names = {}
+        self.nama_max_length = Tool._meta.get_field('nama').max_length
+    
+    def clean_row(self, row_num, values):
+        nama = values.get('Nama Alat')
+        spesifikasi = values.get('Spesifikasi')
+        jumlah = values.get('Jumlah')
+        
+        if nama is None or str(nama).strip() == '':
+            raise RowError('Nama alat kosong', 'Nama Alat')
+        nama = str(nama).strip()
+        if len(nama) > self.nama_max_length:
+            raise RowError(f'Nama alat terlalu panjang (maks {self.nama_max_length} karakter)', 'Nama Alat', nama)
+        
+        try:
+            jumlah = int(jumlah) if jumlah else 0
+        except (ValueError, TypeError):
+            raise RowError(f'Jumlah harus angka (nilai: {jumlah})', 'Jumlah', jumlah)
+        if jumlah < 0:
+            raise RowError('Jumlah tidak boleh negatif', 'Jumlah', jumlah)
+        
+        # Duplikat di dalam file
+        if nama in self.seen_names:
+            raise RowError(f"'{nama}' duplikat dengan baris {self.seen_names[nama]}", 'Nama Alat', nama)
+        self.seen_names[nama] = row_num
+        
+        return {
+            'nama': nama,
+            'spesifikasi': str(spesifikasi) if spesifikasi else '',
+            'jumlah_total': jumlah,
+        }
+    
+    def prepare_chunk(self, rows):
+        """Satu query nama__in per chunk untuk alat yang sudah ada"""
+        existing = set(
+            Tool.objects.filter(nama__in=[data['nama'] for _, data in rows]).values_list('nama', flat=True)
+        )
+        accepted = []
+        for row_num, data in rows:
+            data['existing'] = data['nama'] in existing
+            if data['existing'] and not self.update_existing:
+                self.add_failed_row(row_num, f"'{data['nama']}' sudah ada di database", 'Nama Alat', data['nama'])
+                continue
+            accepted.append((row_num, data))
+        return accepted
+    
+    def persist_chunk(self, rows):
+        """bulk_create alat baru + satu UPDATE untuk alat yang sudah ada (transaksi dibuka base class)"""
+        now = timezone.now()
+        new_tools = [
+            Tool(
+                nama=data['nama'],
+                spesifikasi=data['spesifikasi'],
+                jumlah_total=data['jumlah_total'],
+                qty_tersedia=data['jumlah_total'],  # bulk_create tidak lewat Tool.save()
+                created_at=now,
+                updated_at=now,
+            )
+            for _, data in rows if not data['existing']
+        ]
+        Tool.objects.bulk_create(new_tools)
+        
+        updates = {data['nama']: data['jumlah_total'] for _, data in rows if data['existing']}
+        if updates:
+            queryset = Tool.objects.filter(nama__in=list(updates))
+            queryset.update(
+                jumlah_total=Case(
+                    *[When(nama=nama, then=Value(jumlah)) for nama, jumlah in updates.items()],
+                    output_field=IntegerField(),
+                ),
+                updated_at=now,
+            )
+            # Saldo tersedia mengikuti total baru, qty yang sedang dipinjam tetap
+            queryset.update(qty_tersedia=F('jumlah_total') - F('qty_dipinjam'))
+        
+        self.created_count += len(new_tools)
+        self.updated_count += len(updates)
+        return len(new_tools) + len(updates)
+    
+    def get_result(self):
+        result = super().get_result()
+        result['created'] = self.created_count
+        result['updated'] = self.updated_count
+        return result
@@ -0,0 +1,304 @@
+"""
+Ledger stok alat (toolkeeper).
+
+Sebelumnya Tool.jumlah_tersedia menjalankan dua SUM per tool, dan
+DetailPeminjaman.qty_kembali / Peminjaman.is_complete satu SUM per baris detail -
+halaman list & report yang menampilkan semua alat menjalankan ratusan aggregate query.
+
+Sekarang saldo disimpan sebagai kolom biasa:
+- Tool.qty_dipinjam / Tool.qty_tersedia
+- DetailPeminjaman.qty_kembali
+
+Setiap pinjam / kembali / koreksi:
+1. Mengubah saldo dengan UPDATE ... SET x = x + n (F expression) di transaksi yang sama
+   dengan baris Peminjaman / Pengembalian-nya. UPDATE ber-guard (qty_tersedia >= n,
+   qty_kembali + n <= qty_pinjam) sehingga dua request bersamaan tidak bisa
+   meminjam stok yang sama atau mengembalikan melebihi sisa pinjaman.
+2. Mencatat ToolMovement (append-only) sebagai jejak audit.
+
+Hanya peminjaman aktif / overdue yang memegang stok (seperti hitungan lama).
+Saldo bisa direkonstruksi dari DetailPeminjaman / DetailPengembalian dengan
+rebuild_balances() (admin action "Rekalkulasi saldo").
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import DetailPeminjaman, DetailPengembalian, Peminjaman, Tool, ToolMovement
+
+logger = logging.getLogger(__name__)
+
+
+# Hanya peminjaman berstatus ini yang mengurangi stok (sama dengan hitungan lama jumlah_tersedia)
+ACTIVE_STATUSES = ('aktif', 'overdue')
+
+
+class LedgerError(Exception):
+    """Transaksi ditolak ledger (stok tidak cukup / qty kembali melebihi sisa)"""
+
+
+# ==============================================================================
+# SALDO
+# ==============================================================================
+def _move_tool(tool_id, delta, check_stock=True):
+    """Geser saldo tool: delta positif = keluar (dipinjam), negatif = masuk (kembali)"""
+    queryset = Tool.objects.filter(pk=tool_id)
+    if check_stock and delta > 0:
+        queryset = queryset.filter(qty_tersedia__gte=delta)
+    updated = queryset.update(
+        qty_dipinjam=F('qty_dipinjam') + delta,
+        qty_tersedia=F('qty_tersedia') - delta,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        tool = Tool.objects.only('nama', 'qty_tersedia').get(pk=tool_id)
+        raise LedgerError(
+            f'Stok "{tool.nama}" tidak mencukupi. Diminta: {delta}, Tersedia: {tool.qty_tersedia}'
+        )
+
+
+def _movement(detail, jenis, qty, user=None, detail_pengembalian=None, keterangan=''):
+    return ToolMovement(
+        tool_id=detail.tool_id,
+        jenis=jenis,
+        qty=qty,
+        peminjaman_id=detail.peminjaman_id,
+        detail_peminjaman=detail,
+        detail_pengembalian=detail_pengembalian,
+        keterangan=keterangan,
+        created_by=user,
+    )
+
+
+# ==============================================================================
+# PINJAM
+# ==============================================================================
+@transaction.atomic
+def record_borrow(details, user=None):
+    """
+    Catat detail peminjaman baru (sudah tersimpan) ke ledger.
+
+    Raises:
+        LedgerError jika stok salah satu tool tidak cukup (seluruh transaksi di-rollback)
+    """
+    movements = []
+    # Urut per tool supaya dua peminjaman bersamaan mengunci baris Tool dengan urutan sama
+    for detail in sorted(details, key=lambda detail: str(detail.tool_id)):
+        if detail.qty_pinjam <= 0:
+            continue
+        _move_tool(detail.tool_id, detail.qty_pinjam)
+        movements.append(_movement(detail, 'pinjam', detail.qty_pinjam, user))
+    ToolMovement.objects.bulk_create(movements)
+    return len(movements)
+
+
+def outstanding_by_tool(peminjaman, lock=False):
+    """
+    {tool_id: qty belum kembali} untuk satu peminjaman - kosong jika status peminjaman
+    (dibaca dari database) bukan aktif / overdue, karena stoknya tidak sedang dipegang.
+
+    Args:
+        lock: Kunci baris Peminjaman (select_for_update) supaya edit & pengembalian
+              untuk peminjaman yang sama berjalan berurutan
+    """
+    queryset = Peminjaman.objects.select_for_update() if lock else Peminjaman.objects.all()
+    status = queryset.filter(pk=peminjaman.pk).values_list('status', flat=True).first()
+    if status not in ACTIVE_STATUSES:
+        return {}
+    outstanding = {}
+    rows = DetailPeminjaman.objects.filter(peminjaman=peminjaman).values_list('tool_id', 'qty_pinjam', 'qty_kembali')
+    for tool_id, qty_pinjam, qty_kembali in rows:
+        if qty_kembali > qty_pinjam:
+            tool = Tool.objects.only('nama').get(pk=tool_id)
+            raise LedgerError(
+                f'Qty pinjam "{tool.nama}" ({qty_pinjam}) lebih kecil dari yang sudah dikembalikan ({qty_kembali})'
+            )
+        outstanding[tool_id] = outstanding.get(tool_id, 0) + qty_pinjam - qty_kembali
+    return outstanding
+
+
+@transaction.atomic
+def adjust_borrow(peminjaman, before, user=None):
+    """
+    Sesuaikan saldo setelah detail / status peminjaman diedit.
+
+    Args:
+        before: hasil outstanding_by_tool(peminjaman, lock=True) sebelum formset disimpan
+    Returns:
+        Jumlah tool yang saldonya berubah
+    """
+    after = outstanding_by_tool(peminjaman)
+    details = {
+        detail.tool_id: detail
+        for detail in DetailPeminjaman.objects.filter(peminjaman=peminjaman)
+    }
+    movements = []
+    for tool_id in sorted(set(before) | set(after), key=str):
+        delta = after.get(tool_id, 0) - before.get(tool_id, 0)
+        if not delta:
+            continue
+        _move_tool(tool_id, delta)
+        detail = details.get(tool_id)
+        movements.append(ToolMovement(
+            tool_id=tool_id,
+            jenis='koreksi',
+            qty=delta,
+            peminjaman=peminjaman,
+            detail_peminjaman=detail,
+            keterangan='Edit peminjaman' if detail else 'Alat dihapus dari peminjaman',
+            created_by=user,
+        ))
+    ToolMovement.objects.bulk_create(movements)
+    return len(movements)
+
+
+@transaction.atomic
+def release_borrow(peminjaman, user=None):
+    """
+    Kembalikan sisa pinjaman ke stok sebelum Peminjaman dihapus.
+    Dipanggil SEBELUM delete (detail masih ada untuk dihitung).
+
+    Returns:
+        Jumlah tool yang saldonya berubah
+    """
+    outstanding = outstanding_by_tool(peminjaman, lock=True)
+    movements = []
+    for tool_id, qty in sorted(outstanding.items(), key=lambda item: str(item[0])):
+        if not qty:
+            continue
+        _move_tool(tool_id, -qty, check_stock=False)
+        movements.append(ToolMovement(
+            tool_id=tool_id,
+            jenis='koreksi',
+            qty=-qty,
+            peminjaman=peminjaman,
+            keterangan='Peminjaman dihapus',
+            created_by=user,
+        ))
+    ToolMovement.objects.bulk_create(movements)
+    return len(movements)
+
+
+# ==============================================================================
+# KEMBALI
+# ==============================================================================
+@transaction.atomic
+def record_return(detail, qty, user=None, detail_pengembalian=None):
+    """
+    Catat pengembalian qty alat untuk satu DetailPeminjaman.
+
+    Raises:
+        LedgerError jika qty melebihi sisa yang belum dikembalikan
+    """
+    if qty <= 0:
+        raise LedgerError('Jumlah dikembalikan harus lebih dari 0')
+    updated = (
+        DetailPeminjaman.objects.filter(pk=detail.pk)
+        .alias(qty_kembali_baru=F('qty_kembali') + qty)
+        .filter(qty_kembali_baru__lte=F('qty_pinjam'))
+        .update(qty_kembali=F('qty_kembali') + qty)
+    )
+    if not updated:
+        sisa = DetailPeminjaman.objects.filter(pk=detail.pk).values_list(
+            F('qty_pinjam') - F('qty_kembali'), flat=True
+        ).first()
+        raise LedgerError(
+            f'Qty kembali "{detail.tool.nama}" ({qty}) melebihi sisa yang belum dikembalikan ({sisa or 0})'
+        )
+    _move_tool(detail.tool_id, -qty, check_stock=False)
+    ToolMovement.objects.create(
+        tool_id=detail.tool_id,
+        jenis='kembali',
+        qty=-qty,
+        peminjaman_id=detail.peminjaman_id,
+        detail_peminjaman=detail,
+        detail_pengembalian=detail_pengembalian,
+        created_by=user,
+    )
+    detail.qty_kembali += qty
+
+
+@transaction.atomic
+def record_returns(peminjaman, detail_pengembalian_list, user=None):
+    """Catat semua DetailPengembalian (sudah tersimpan) dari satu event pengembalian"""
+    details = {
+        detail.tool_id: detail
+        for detail in DetailPeminjaman.objects.filter(peminjaman=peminjaman).select_related('tool')
+    }
+    for detail_pengembalian in detail_pengembalian_list:
+        detail = details.get(detail_pengembalian.tool_id)
+        if detail is None:
+            raise LedgerError(f'"{detail_pengembalian.tool.nama}" tidak termasuk dalam peminjaman ini')
+        record_return(detail, detail_pengembalian.qty_kembali, user, detail_pengembalian)
+
+
+# ==============================================================================
+# REKALKULASI
+# ==============================================================================
+@transaction.atomic
+def rebuild_balances(tool_ids=None, user=None):
+    """
+    Hitung ulang saldo dari DetailPeminjaman / DetailPengembalian.
+
+    Dipakai setelah data diubah di luar ledger (misal edit pengembalian di admin).
+    Hanya peminjaman aktif / overdue yang dihitung sebagai dipinjam.
+    Selisih dicatat sebagai ToolMovement 'koreksi'.
+
+    Returns:
+        Jumlah tool yang saldonya dikoreksi
+    """
+    tools = Tool.objects.select_for_update().order_by('pk')
+    details = DetailPeminjaman.objects.all()
+    returns = DetailPengembalian.objects.all()
+    if tool_ids is not None:
+        tools = tools.filter(pk__in=tool_ids)
+        details = details.filter(tool_id__in=tool_ids)
+        returns = returns.filter(tool_id__in=tool_ids)
+    tools = list(tools)
+
+    returned = {
+        (row['pengembalian__peminjaman_id'], row['tool_id']): row['total']
+        for row in returns.values('pengembalian__peminjaman_id', 'tool_id').annotate(total=Sum('qty_kembali'))
+    }
+
+    changed_details = []
+    dipinjam = {}
+    rows = details.select_related('peminjaman').only(
+        'id', 'peminjaman_id', 'peminjaman__status', 'tool_id', 'qty_pinjam', 'qty_kembali'
+    )
+    for detail in rows:
+        qty_kembali = min(returned.get((detail.peminjaman_id, detail.tool_id), 0), detail.qty_pinjam)
+        if qty_kembali != detail.qty_kembali:
+            detail.qty_kembali = qty_kembali
+            changed_details.append(detail)
+        if detail.peminjaman.status in ACTIVE_STATUSES:
+            dipinjam[detail.tool_id] = dipinjam.get(detail.tool_id, 0) + detail.qty_pinjam - qty_kembali
+    DetailPeminjaman.objects.bulk_update(changed_details, ['qty_kembali'], batch_size=500)
+
+    now = timezone.now()
+    changed_tools, movements = [], []
+    for tool in tools:
+        qty_dipinjam = dipinjam.get(tool.pk, 0)
+        if qty_dipinjam == tool.qty_dipinjam and tool.qty_tersedia == tool.jumlah_total - qty_dipinjam:
+            continue
+        if qty_dipinjam != tool.qty_dipinjam:
+            movements.append(ToolMovement(
+                tool=tool,
+                jenis='koreksi',
+                qty=qty_dipinjam - tool.qty_dipinjam,
+                keterangan='Rekalkulasi saldo',
+                created_by=user,
+            ))
+        tool.qty_dipinjam = qty_dipinjam
+        tool.qty_tersedia = tool.jumlah_total - qty_dipinjam
+        tool.updated_at = now
+        changed_tools.append(tool)
+    Tool.objects.bulk_update(changed_tools, ['qty_dipinjam', 'qty_tersedia', 'updated_at'], batch_size=500)
+    ToolMovement.objects.bulk_create(movements, batch_size=500)
+
+    if changed_tools or changed_details:
+        logger.info(f'[Toolkeeper] Rekalkulasi saldo: {len(changed_tools)} tool, {len(changed_details)} detail dikoreksi')
+    return len(changed_tools)
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    """Isi saldo awal dari DetailPeminjaman / DetailPengembalian yang sudah ada"""
+    Tool = apps.get_model('toolkeeper', 'Tool')
+    DetailPeminjaman = apps.get_model('toolkeeper', 'DetailPeminjaman')
+    DetailPengembalian = apps.get_model('toolkeeper', 'DetailPengembalian')
+    ToolMovement = apps.get_model('toolkeeper', 'ToolMovement')
+
+    returned = {
+        (row['pengembalian__peminjaman_id'], row['tool_id']): row['total']
+        for row in DetailPengembalian.objects.values('pengembalian__peminjaman_id', 'tool_id').annotate(
+            total=Sum('qty_kembali')
+        )
+    }
+
+    details, dipinjam = [], {}
+    rows = DetailPeminjaman.objects.select_related('peminjaman').only(
+        'id', 'peminjaman_id', 'peminjaman__status', 'tool_id', 'qty_pinjam'
+    )
+    for detail in rows:
+        detail.qty_kembali = min(returned.get((detail.peminjaman_id, detail.tool_id), 0), detail.qty_pinjam)
+        details.append(detail)
+        # Sama dengan hitungan lama Tool.jumlah_tersedia: hanya peminjaman aktif / overdue
+        if detail.peminjaman.status in ('aktif', 'overdue'):
+            dipinjam[detail.tool_id] = dipinjam.get(detail.tool_id, 0) + detail.qty_pinjam - detail.qty_kembali
+    DetailPeminjaman.objects.bulk_update(details, ['qty_kembali'], batch_size=500)
+
+    tools, movements = [], []
+    for tool in Tool.objects.only('id', 'jumlah_total'):
+        tool.qty_dipinjam = dipinjam.get(tool.id, 0)
+        tool.qty_tersedia = tool.jumlah_total - tool.qty_dipinjam
+        tools.append(tool)
+        if tool.qty_dipinjam:
+            movements.append(ToolMovement(tool=tool, jenis='koreksi', qty=tool.qty_dipinjam, keterangan='Saldo awal'))
+    Tool.objects.bulk_update(tools, ['qty_dipinjam', 'qty_tersedia'], batch_size=500)
+    ToolMovement.objects.bulk_create(movements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toolkeeper', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detailpeminjaman',
+            name='qty_kembali',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='qty_dipinjam',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='qty_tersedia',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ToolMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('jenis', models.CharField(choices=[('pinjam', 'Pinjam'), ('kembali', 'Kembali'), ('koreksi', 'Koreksi')], max_length=20)),
+                ('qty', models.IntegerField()),
+                ('keterangan', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tool_movements', to=settings.AUTH_USER_MODEL)),
+                ('detail_peminjaman', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='toolkeeper.detailpeminjaman')),
+                ('detail_pengembalian', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='toolkeeper.detailpengembalian')),
+                ('peminjaman', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='toolkeeper.peminjaman')),
+                ('tool', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='toolkeeper.tool')),
+            ],
+            options={
+                'verbose_name': 'Pergerakan Alat',
+                'verbose_name_plural': 'Pergerakan Alat',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['tool', '-created_at'], name='toolmovement_tool_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from core.models import Karyawan
 
@@ -12,6 +13,10 @@ class Tool(models.Model):
     spesifikasi = models.TextField(blank=True, null=True)
     jumlah_total = models.PositiveIntegerField(default=0)
     
+    # Saldo dikelola toolkeeper.ledger (update F() di transaksi yang sama dengan pinjam/kembali)
+    qty_dipinjam = models.PositiveIntegerField(default=0, editable=False)
+    qty_tersedia = models.IntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -23,20 +28,30 @@ class Tool(models.Model):
     def __str__(self):
         return f"{self.nama} (Stok: {self.jumlah_total})"
     
+    LEDGER_FIELDS = ('qty_dipinjam', 'qty_tersedia')
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.qty_tersedia = self.jumlah_total - self.qty_dipinjam
+            super().save(*args, **kwargs)
+            return
+        
+        # Edit master data (form/admin) tidak boleh menimpa saldo yang sedang berjalan
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LEDGER_FIELDS
+            ]
+        kwargs['update_fields'] = [name for name in update_fields if name not in self.LEDGER_FIELDS]
+        super().save(*args, **kwargs)
+        Tool.objects.filter(pk=self.pk).update(qty_tersedia=F('jumlah_total') - F('qty_dipinjam'))
+        self.refresh_from_db(fields=self.LEDGER_FIELDS)
+    
     @property
     def jumlah_tersedia(self):
-        """Hitung jumlah alat yang tersedia (belum dipinjam)"""
-        total_pinjam = DetailPeminjaman.objects.filter(
-            peminjaman__status__in=['aktif', 'overdue'],
-            tool=self
-        ).aggregate(total=models.Sum('qty_pinjam'))['total'] or 0
-        
-        # Kurangi dengan yang sudah dikembalikan
-        total_kembali = DetailPengembalian.objects.filter(
-            tool=self
-        ).aggregate(total=models.Sum('qty_kembali'))['total'] or 0
-        
-        return self.jumlah_total - (total_pinjam - total_kembali)
+        """Jumlah alat yang tersedia (belum dipinjam) - kolom saldo, tanpa query"""
+        return self.qty_tersedia
 
 
 class Peminjaman(models.Model):
@@ -74,10 +89,7 @@ class Peminjaman(models.Model):
     @property
     def is_complete(self):
         """Check apakah semua alat sudah dikembalikan"""
-        for detail in self.detail_peminjaman.all():
-            if detail.qty_kembali < detail.qty_pinjam:
-                return False
-        return True
+        return all(detail.qty_kembali >= detail.qty_pinjam for detail in self.detail_peminjaman.all())
     
     def check_and_update_status(self):
         """Check dan auto-update status ke selesai jika semua alat sudah kembali"""
@@ -99,6 +111,7 @@ class DetailPeminjaman(models.Model):
     peminjaman = models.ForeignKey(Peminjaman, on_delete=models.CASCADE, related_name='detail_peminjaman')
     tool = models.ForeignKey(Tool, on_delete=models.PROTECT, related_name='detail_peminjaman')
     qty_pinjam = models.PositiveIntegerField()
+    qty_kembali = models.PositiveIntegerField(default=0, editable=False)  # Dikelola toolkeeper.ledger
     kondisi_pinjam = models.CharField(max_length=20, choices=KONDISI_CHOICES, default='baik')
     
     class Meta:
@@ -109,13 +122,14 @@ class DetailPeminjaman(models.Model):
     def __str__(self):
         return f"{self.tool.nama} x{self.qty_pinjam}"
     
-    @property
-    def qty_kembali(self):
-        """Total qty yang sudah dikembalikan untuk alat ini"""
-        return DetailPengembalian.objects.filter(
-            pengembalian__peminjaman=self.peminjaman,
-            tool=self.tool
-        ).aggregate(total=models.Sum('qty_kembali'))['total'] or 0
+    def save(self, *args, **kwargs):
+        # qty_kembali hanya diubah ledger; formset edit tidak boleh menimpa dengan nilai lama
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'qty_kembali'
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def qty_belum_kembali(self):
@@ -168,3 +182,41 @@ class DetailPengembalian(models.Model):
     
     def __str__(self):
         return f"{self.tool.nama} x{self.qty_kembali}"
+
+
+
+class ToolMovement(models.Model):
+    """
+    Ledger pergerakan alat (append-only).
+    
+    qty adalah delta terhadap Tool.qty_dipinjam: pinjam positif, kembali negatif.
+    Saldo Tool / DetailPeminjaman selalu bisa direkonstruksi dari tabel ini.
+    """
+    
+    JENIS_CHOICES = [
+        ('pinjam', 'Pinjam'),
+        ('kembali', 'Kembali'),
+        ('koreksi', 'Koreksi'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    tool = models.ForeignKey(Tool, on_delete=models.PROTECT, related_name='movements')
+    jenis = models.CharField(max_length=20, choices=JENIS_CHOICES)
+    qty = models.IntegerField()
+    peminjaman = models.ForeignKey(Peminjaman, on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    detail_peminjaman = models.ForeignKey(DetailPeminjaman, on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    detail_pengembalian = models.ForeignKey(DetailPengembalian, on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    keterangan = models.CharField(max_length=255, blank=True, default='')
+    created_by = models.ForeignKey('core.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='tool_movements')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = 'Pergerakan Alat'
+        verbose_name_plural = 'Pergerakan Alat'
+        indexes = [
+            models.Index(fields=['tool', '-created_at'], name='toolmovement_tool_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_jenis_display()} {self.tool.nama} {self.qty:+d}"
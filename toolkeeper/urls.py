@@ -9,6 +9,7 @@ urlpatterns = [
     path('tools/', views.ToolListView.as_view(), name='tool-list'),
     path('tools/create/', views.ToolCreateView.as_view(), name='tool-create'),
     path('tools/import/', views.tool_import_view, name='tool-import'),
+    path('tools/import/report/<str:token>/', views.tool_import_report_view, name='tool-import-report'),
     path('tools/<uuid:pk>/edit/', views.ToolEditView.as_view(), name='tool-edit'),
     path('tools/<uuid:pk>/delete/', views.ToolDeleteView.as_view(), name='tool-delete'),
     
@@ -5,16 +5,21 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.db.models import Q
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Q, Sum
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 
 from .models import Tool, Peminjaman, DetailPeminjaman, Pengembalian, DetailPengembalian
+from . import ledger
+from .import_handler import ToolImporter
 from .forms import (
     ToolForm, ToolImportForm, PeminjamanForm, DetailPeminjamanFormSet,
     DetailPeminjamanFormSetWithStockValidation,
     PengembalianForm, DetailPengembalianFormSet
 )
+from core.excel_import import get_cached_error_report
 from core.models import Karyawan
 
 
@@ -99,96 +104,110 @@ class ToolDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 @login_required(login_url='core:login')
 def tool_import_view(request):
-    """Import tools dari Excel"""
+    """Import tools dari Excel (streaming, bulk insert per chunk - lihat import_handler.ToolImporter)"""
     if not can_manage_toolkeeper(request.user):
         messages.error(request, "Akses ditolak")
         return redirect('toolkeeper:tool-list')
     
+    result = None
     if request.method == 'POST':
         form = ToolImportForm(request.POST, request.FILES)
         if form.is_valid():
-            excel_file = request.FILES['excel_file']
+            importer = ToolImporter(
+                request.FILES['excel_file'],
+                user=request.user,
+                update_existing=form.cleaned_data['update_existing'],
+            )
+            importer.import_data()
+            result = importer.get_result()
             
-            try:
-                import openpyxl
-                from openpyxl.utils import get_column_letter
-                
-                # Load workbook
-                wb = openpyxl.load_workbook(excel_file)
-                ws = wb.active
-                
-                success_count = 0
-                error_count = 0
-                error_rows = []
-                
-                # Skip header (row 1)
-                for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=False), start=2):
-                    try:
-                        # Get cell values
-                        nama_cell = row[0]
-                        spesifikasi_cell = row[1]
-                        jumlah_cell = row[2]
-                        
-                        if not nama_cell.value:
-                            error_rows.append(f"Row {row_idx}: Nama alat kosong")
-                            error_count += 1
-                            continue
-                        
-                        nama = str(nama_cell.value).strip()
-                        spesifikasi = str(spesifikasi_cell.value) if spesifikasi_cell.value else ""
-                        
-                        try:
-                            jumlah = int(jumlah_cell.value) if jumlah_cell.value else 0
-                        except (ValueError, TypeError):
-                            error_rows.append(f"Row {row_idx}: Jumlah harus angka (nilai: {jumlah_cell.value})")
-                            error_count += 1
-                            continue
-                        
-                        # Check if already exists
-                        if Tool.objects.filter(nama=nama).exists():
-                            error_rows.append(f"Row {row_idx}: '{nama}' sudah ada di database")
-                            error_count += 1
-                            continue
-                        
-                        # Create tool
-                        Tool.objects.create(
-                            nama=nama,
-                            spesifikasi=spesifikasi,
-                            jumlah_total=jumlah
-                        )
-                        success_count += 1
-                        
-                    except Exception as e:
-                        error_rows.append(f"Row {row_idx}: {str(e)}")
-                        error_count += 1
-                
-                # Show results
-                if success_count > 0:
-                    messages.success(request, f"✓ Berhasil import {success_count} tool!")
-                
-                if error_count > 0:
-                    error_msg = f"⚠ Ada {error_count} baris yang gagal:\n" + "\n".join(error_rows[:5])
-                    if len(error_rows) > 5:
-                        error_msg += f"\n... dan {len(error_rows)-5} error lainnya"
-                    messages.warning(request, error_msg)
-                
+            for error in result['errors']:
+                messages.error(request, f"❌ {error}")
+            
+            # Show results
+            if result['created']:
+                messages.success(request, f"✓ Berhasil import {result['created']} tool!")
+            if result['updated']:
+                messages.success(request, f"✓ {result['updated']} tool yang sudah ada di-update jumlahnya")
+            
+            if not result['failed'] and not result['errors']:
                 return redirect('toolkeeper:tool-list')
-                
-            except Exception as e:
-                messages.error(request, f"Error membaca file Excel: {str(e)}")
+            
+            if result['failed']:
+                messages.warning(request, f"⚠ Ada {result['failed']} baris yang gagal")
+                # Laporan baris gagal bisa diunduh sebagai Excel (disimpan sementara di cache)
+                result['report_token'] = importer.cache_error_report('toolkeeper', request.user.id)
     else:
         form = ToolImportForm()
     
     context = {
         'form': form,
+        'result': result,
         'can_manage': can_manage_toolkeeper(request.user),
     }
     return render(request, 'toolkeeper/tool_import.html', context)
 
 
+@login_required(login_url='core:login')
+def tool_import_report_view(request, token):
+    """Download laporan baris gagal dari import tool terakhir (Excel)"""
+    if not can_manage_toolkeeper(request.user):
+        messages.error(request, "Akses ditolak")
+        return redirect('toolkeeper:tool-list')
+    
+    content = get_cached_error_report('toolkeeper', request.user.id, token)
+    if content is None:
+        messages.error(request, "Laporan import sudah kedaluwarsa, silakan import ulang")
+        return redirect('toolkeeper:tool-import')
+    response = HttpResponse(
+        content,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = 'attachment; filename="import_tool_gagal.xlsx"'
+    return response
+
+
 # ==============================================================================
 # PEMINJAMAN VIEWS
 # ==============================================================================
+OUTSTANDING_TOOLS_PER_PAGE = 20
+OUTSTANDING_FILTER = Q(detail_peminjaman__qty_kembali__lt=F('detail_peminjaman__qty_pinjam'))
+
+
+def outstanding_tools_queryset(search=''):
+    """
+    Tool yang masih punya pinjaman belum kembali, dengan agregat:
+        qty_outstanding - total qty belum kembali
+        jumlah_peminjaman - jumlah peminjaman yang masih membawa alat ini
+    Detail yang sudah lengkap kembali (histori) tidak ikut di-scan ke Python.
+    """
+    queryset = Tool.objects.filter(qty_dipinjam__gt=0)
+    if search:
+        queryset = queryset.filter(nama__icontains=search)
+    return queryset.annotate(
+        qty_outstanding=Sum(
+            F('detail_peminjaman__qty_pinjam') - F('detail_peminjaman__qty_kembali'),
+            filter=OUTSTANDING_FILTER,
+        ),
+        jumlah_peminjaman=Count('detail_peminjaman', filter=OUTSTANDING_FILTER),
+    ).filter(qty_outstanding__gt=0).order_by('nama')
+
+
+def outstanding_tools_data(tools):
+    """
+    [{'tool', 'peminjaman': [DetailPeminjaman belum kembali]}] untuk satu halaman tool.
+    Satu query untuk semua detail di halaman ini.
+    """
+    tools = list(tools)
+    grouped = {tool.pk: {'tool': tool, 'peminjaman': []} for tool in tools}
+    details = DetailPeminjaman.objects.filter(
+        tool__in=tools, qty_kembali__lt=F('qty_pinjam')
+    ).select_related('peminjaman__peminjam', 'tool').order_by('peminjaman__tgl_pinjam')
+    for detail in details:
+        grouped[detail.tool_id]['peminjaman'].append(detail)
+    return list(grouped.values())
+
+
 class PeminjamanListView(LoginRequiredMixin, ListView):
     """List peminjaman aktif & overdue"""
     model = Peminjaman
@@ -198,22 +217,12 @@ class PeminjamanListView(LoginRequiredMixin, ListView):
     login_url = 'login'
     
     def get_queryset(self):
-        queryset = Peminjaman.objects.select_related('peminjam').prefetch_related('detail_peminjaman')
-        
-        # Check and update status untuk semua peminjaman aktif/overdue
-        # 1. Check jika deadline lewat tapi masih aktif → mark sebagai overdue
-        # 2. Check jika semua alat kembali → mark sebagai selesai
-        from django.utils import timezone
-        now = timezone.now()
-        
-        for peminjaman in queryset.filter(status__in=['aktif', 'overdue']):
-            # Update ke overdue jika tgl_rencana_kembali sudah lewat
-            if peminjaman.status == 'aktif' and now > peminjaman.tgl_rencana_kembali:
-                peminjaman.status = 'overdue'
-                peminjaman.save(update_fields=['status'])
-            
-            # Update ke selesai jika semua alat sudah dikembalikan
-            peminjaman.check_and_update_status()
+        # Status overdue / selesai diperbarui core.status_sweeper (Celery Beat), view ini read-only
+        queryset = Peminjaman.objects.select_related('peminjam').prefetch_related(
+            'detail_peminjaman__tool',
+            'pengembalian__dikembalikan_oleh',
+            'pengembalian__detail_pengembalian__tool',
+        )
         
         # Filter by status
         status = self.request.GET.get('status', '')
@@ -237,23 +246,17 @@ class PeminjamanListView(LoginRequiredMixin, ListView):
         context['search'] = self.request.GET.get('search', '')
         context['view_type'] = 'peminjam'  # Show this is peminjam view
         
-        # Get per-alat data for context
-        detail_peminjamannya = DetailPeminjaman.objects.select_related(
-            'peminjaman__peminjam', 'tool'
-        ).prefetch_related('peminjaman__pengembalian__detail_pengembalian')
-        
-        # Group by tool
-        tools_data = {}
-        for detail in detail_peminjamannya:
-            tool_id = detail.tool.id
-            if tool_id not in tools_data:
-                tools_data[tool_id] = {
-                    'tool': detail.tool,
-                    'peminjaman': []
-                }
-            tools_data[tool_id]['peminjaman'].append(detail)
-        
-        context['tools_data'] = tools_data.values()
+        # Per alat: hanya alat yang masih dipinjam, diagregasi di SQL dan di-paginate
+        search_tool = self.request.GET.get('search_tool', '').strip()
+        tools_page = Paginator(outstanding_tools_queryset(search_tool), OUTSTANDING_TOOLS_PER_PAGE).get_page(
+            self.request.GET.get('tool_page')
+        )
+        context['tools_data'] = outstanding_tools_data(tools_page.object_list)
+        context['tools_page'] = tools_page
+        context['search_tool'] = search_tool
+        context['active_tab'] = 'alat' if (
+            search_tool or 'tool_page' in self.request.GET or self.request.GET.get('tab') == 'alat'
+        ) else 'peminjam'
         
         return context
 
@@ -281,12 +284,21 @@ class PeminjamanCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         formset = DetailPeminjamanFormSetWithStockValidation(self.request.POST)
         
         if form.is_valid() and formset.is_valid():
-            self.object = form.save(commit=False)
-            self.object.created_by = request.user
-            self.object.save()
-            
-            formset.instance = self.object
-            formset.save()
+            try:
+                with transaction.atomic():
+                    self.object = form.save(commit=False)
+                    self.object.created_by = request.user
+                    self.object.save()
+                    
+                    formset.instance = self.object
+                    details = formset.save()
+                    
+                    # Kurangi stok tersedia (guard stok di UPDATE, aman dari peminjaman bersamaan)
+                    ledger.record_borrow(details, user=request.user)
+            except ledger.LedgerError as e:
+                self.object = None
+                messages.error(request, str(e))
+                return self.form_invalid(form)
             
             messages.success(request, "Peminjaman berhasil dibuat")
             return redirect(self.get_success_url())
@@ -346,9 +358,16 @@ class PeminjamanEditView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         formset = context['formset']
         
         if formset.is_valid():
-            self.object = form.save()
-            formset.instance = self.object
-            formset.save()
+            try:
+                with transaction.atomic():
+                    before = ledger.outstanding_by_tool(self.object, lock=True)
+                    self.object = form.save()
+                    formset.instance = self.object
+                    formset.save()
+                    ledger.adjust_borrow(self.object, before, user=self.request.user)
+            except ledger.LedgerError as e:
+                messages.error(self.request, str(e))
+                return self.form_invalid(form)
             messages.success(self.request, "Peminjaman berhasil diupdate")
             return redirect(self.get_success_url())
         else:
@@ -410,23 +429,31 @@ class PengembalianCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView
         formset = DetailPengembalianFormSet(request.POST)
         
         if form.is_valid() and formset.is_valid():
-            self.object = form.save(commit=False)
-            self.object.peminjaman = peminjaman
-            self.object.save()
-            
-            formset.instance = self.object
-            formset.save()
-            
-            # Check dan auto-update status ke selesai jika semua alat sudah dikembalikan
-            peminjaman.check_and_update_status()
-            
-            messages.success(request, "Pengembalian berhasil dicatat")
-            return redirect(reverse_lazy('toolkeeper:peminjaman-detail', kwargs={'pk': peminjaman.pk}))
-        else:
-            context = self.get_context_data()
-            context['formset'] = formset
-            context['peminjaman'] = peminjaman
-            return self.render_to_response(context)
+            try:
+                with transaction.atomic():
+                    self.object = form.save(commit=False)
+                    self.object.peminjaman = peminjaman
+                    self.object.save()
+                    
+                    formset.instance = self.object
+                    returned = formset.save()
+                    
+                    # Update saldo alat & qty_kembali di transaksi yang sama
+                    ledger.record_returns(peminjaman, returned, user=request.user)
+                    
+                    # Check dan auto-update status ke selesai jika semua alat sudah dikembalikan
+                    peminjaman.check_and_update_status()
+            except ledger.LedgerError as e:
+                self.object = None
+                messages.error(request, str(e))
+            else:
+                messages.success(request, "Pengembalian berhasil dicatat")
+                return redirect(reverse_lazy('toolkeeper:peminjaman-detail', kwargs={'pk': peminjaman.pk}))
+        
+        context = self.get_context_data()
+        context['formset'] = formset
+        context['peminjaman'] = peminjaman
+        return self.render_to_response(context)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -449,6 +476,7 @@ class PengembalianDetailView(LoginRequiredMixin, DetailView):
 # ==============================================================================
 class ReportView(LoginRequiredMixin, ListView):
     """Report peminjaman & pengembalian"""
+    model = Tool
     template_name = 'toolkeeper/report.html'
     login_url = 'login'
     
@@ -502,44 +530,51 @@ def api_return_tool(request):
         
         # Get objects
         peminjaman = get_object_or_404(Peminjaman, id=peminjaman_id)
-        detail = get_object_or_404(DetailPeminjaman, id=detail_id, peminjaman=peminjaman)
+        detail = get_object_or_404(DetailPeminjaman.objects.select_related('tool'), id=detail_id, peminjaman=peminjaman)
         
         # Validate qty
         if qty_kembali > detail.qty_belum_kembali:
             return JsonResponse({'success': False, 'error': 'Quantity exceeds remaining amount'}, status=400)
         
-        # Create Pengembalian if doesn't exist for today
-        pengembalian, created = Pengembalian.objects.get_or_create(
-            peminjaman=peminjaman,
-            tgl_kembali__date=timezone.now().date(),
-            defaults={
-                'tgl_kembali': timezone.now(),
-                'dikembalikan_oleh': request.user.karyawan if hasattr(request.user, 'karyawan') else peminjaman.peminjam,
-                'catatan': catatan
-            }
-        )
-        
-        # Create detail pengembalian
-        detail_return, created = DetailPengembalian.objects.get_or_create(
-            pengembalian=pengembalian,
-            tool=detail.tool,
-            defaults={
-                'qty_kembali': qty_kembali,
-                'kondisi_kembali': kondisi_kembali
-            }
-        )
-        
-        # If exists, update qty
-        if not created:
-            detail_return.qty_kembali += qty_kembali
-            detail_return.kondisi_kembali = kondisi_kembali
-            detail_return.save()
-        
-        # Check if peminjaman complete (qty_kembali calculated from DetailPengembalian)
-        peminjaman.check_and_update_status()
+        with transaction.atomic():
+            # Create Pengembalian if doesn't exist for today
+            pengembalian, created = Pengembalian.objects.get_or_create(
+                peminjaman=peminjaman,
+                tgl_kembali__date=timezone.now().date(),
+                defaults={
+                    'tgl_kembali': timezone.now(),
+                    'dikembalikan_oleh': request.user.karyawan if hasattr(request.user, 'karyawan') else peminjaman.peminjam,
+                    'catatan': catatan
+                }
+            )
+            
+            # Create detail pengembalian
+            detail_return, created = DetailPengembalian.objects.get_or_create(
+                pengembalian=pengembalian,
+                tool=detail.tool,
+                defaults={
+                    'qty_kembali': qty_kembali,
+                    'kondisi_kembali': kondisi_kembali
+                }
+            )
+            
+            # If exists, update qty
+            if not created:
+                DetailPengembalian.objects.filter(pk=detail_return.pk).update(
+                    qty_kembali=F('qty_kembali') + qty_kembali,
+                    kondisi_kembali=kondisi_kembali,
+                )
+            
+            # Update saldo alat & qty_kembali (ditolak jika melebihi sisa, misal double submit)
+            ledger.record_return(detail, qty_kembali, user=request.user, detail_pengembalian=detail_return)
+            
+            # Check if peminjaman complete
+            peminjaman.check_and_update_status()
         
         return JsonResponse({'success': True, 'message': 'Return recorded successfully'})
     
+    except ledger.LedgerError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
     except Exception as e: